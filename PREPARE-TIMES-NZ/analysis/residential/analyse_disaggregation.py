@@ -17,7 +17,7 @@ from plotnine import (
     scale_y_continuous,
     theme_minimal,
 )
-from prepare_times_nz.utilities.filepaths import ANALYSIS, STAGE_1_DATA, STAGE_2_DATA
+from prepare_times_nz.utilities.filepaths import ANALYSIS, STAGE_2_DATA
 
 BASE_YEAR = 2023
 OUTPUT_LOCATION = ANALYSIS / "results/residential_demand_disaggregation"
@@ -26,7 +26,7 @@ OUTPUT_LOCATION.mkdir(parents=True, exist_ok=True)
 RES_DATA = STAGE_2_DATA / "residential"
 RES_CHECKS = RES_DATA / "checks"
 
-EEUD_FILE = STAGE_1_DATA / "eeud/eeud.csv"
+EEUD_DATASET = "stage_1_input_data/eeud/eeud"
 
 # get data
 
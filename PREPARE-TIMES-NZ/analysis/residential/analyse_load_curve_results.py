@@ -20,7 +20,6 @@ from plotnine import *
 from prepare_times_nz.stage_0.stage_0_settings import BASE_YEAR
 from prepare_times_nz.utilities.filepaths import (
     ANALYSIS,
-    STAGE_1_DATA,
     STAGE_2_DATA,
     TIMES_LOCATION,
 )
@@ -30,7 +29,7 @@ RESULTS_LOCATION = TIMES_LOCATION / "TIMES-NZ-INTERNAL-QA" / "data" / "clean_res
 
 # Get data
 
-EEUD_FILE = STAGE_1_DATA / "eeud/eeud.csv"
+EEUD_DATASET = "stage_1_input_data/eeud/eeud"
 LOAD_CURVE_DATA = STAGE_2_DATA / "settings/load_curves/"
 
 RES_DEMAND_FILE = STAGE_2_DATA / "residential/baseyear_residential_demand.csv"
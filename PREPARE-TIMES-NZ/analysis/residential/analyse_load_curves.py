@@ -10,7 +10,8 @@ import pandas as pd
 
 # pylint: disable = unused-import, unused-wildcard-import, wildcard-import
 from plotnine import *
-from prepare_times_nz.utilities.filepaths import ANALYSIS, STAGE_1_DATA, STAGE_2_DATA
+from prepare_times_nz.utilities.data_in_out import read_intermediate
+from prepare_times_nz.utilities.filepaths import ANALYSIS, STAGE_2_DATA
 
 OUTPUT_LOCATION = ANALYSIS / "results/load_curves"
 OUTPUT_LOCATION.mkdir(parents=True, exist_ok=True)
@@ -23,7 +24,7 @@ BASE_YEAR = 2023
 base_year_load_curve = pd.read_csv(LOAD_CURVE_DATA / "base_year_load_curve.csv")
 res_curves = pd.read_csv(LOAD_CURVE_DATA / "residential_curves.csv")
 yrfr = pd.read_csv(LOAD_CURVE_DATA / "yrfr.csv")
-eeud = pd.read_csv(STAGE_1_DATA / "eeud/eeud.csv")
+eeud = read_intermediate("stage_1_input_data/eeud/eeud")
 
 
 eeud_elc = eeud[eeud["Fuel"] == "Electricity"]
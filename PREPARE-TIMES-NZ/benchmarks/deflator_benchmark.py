@@ -0,0 +1,87 @@
+"""
+Time the vectorised deflator on a large frame.
+
+Builds a frame of random prices with base years spread across (and beyond)
+the CPI table, then times deflate_data() on all of it. The previous
+row-by-row approach (kept below as row_wise_deflate) is timed on a sample
+and scaled up, and both are checked to give the same values on the sample.
+
+Needs the stage-1 CPI data ('doit stage_1_extract:extract_snz_data').
+
+Run:
+    python benchmarks/deflator_benchmark.py [--rows 1000000] [--sample 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from prepare_times_nz.utilities.deflator import deflate_data, get_index_data
+from prepare_times_nz.utilities.logger_setup import logger
+
+
+def row_wise_deflate(df: pd.DataFrame, base_year: int, variable: str) -> pd.Series:
+    """The previous deflate_data(): search the CPI table for every row."""
+    cpi_df = get_index_data("cpi")
+    latest_available_year = int(cpi_df["Year"].max())
+
+    def deflate_row(row):
+        current_year, current_value = row["PriceBaseYear"], row[variable]
+        if current_year == base_year:
+            return current_value
+        current_year = min(current_year, latest_available_year)
+        idx_cur = cpi_df.loc[cpi_df["Year"] == current_year, "CPI_Index"]
+        idx_base = cpi_df.loc[cpi_df["Year"] == base_year, "CPI_Index"]
+        if idx_cur.empty or idx_base.empty or pd.isna(current_value):
+            return np.nan
+        return current_value * (idx_base.iloc[0] / idx_cur.iloc[0])
+
+    return df.apply(deflate_row, axis=1)
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    """Random prices, some missing, with base years from 1980 to 2035."""
+    rng = np.random.default_rng(0)
+    values = rng.uniform(1, 1000, rows)
+    values[rng.random(rows) < 0.01] = np.nan
+    return pd.DataFrame(
+        {"PriceBaseYear": rng.integers(1980, 2036, rows), "Cost": values}
+    )
+
+
+def main() -> None:
+    """Time both approaches and check they agree."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=20_000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    get_index_data("cpi")  # read the index before timing
+
+    start = time.perf_counter()
+    vectorised = deflate_data(df, 2023, ["Cost"])["Cost"]
+    vectorised_seconds = time.perf_counter() - start
+
+    sample = df.head(args.sample)
+    start = time.perf_counter()
+    row_wise = row_wise_deflate(sample, 2023, "Cost")
+    row_wise_seconds = (time.perf_counter() - start) * args.rows / len(sample)
+
+    np.testing.assert_allclose(vectorised.head(args.sample), row_wise)
+
+    logger.info("Rows: %s", f"{args.rows:,}")
+    logger.info("Vectorised: %8.2fs", vectorised_seconds)
+    logger.info(
+        "Row-wise:   %8.2fs (scaled from %s rows)",
+        row_wise_seconds,
+        f"{len(sample):,}",
+    )
+    logger.info("Speed-up:   %8.0fx", row_wise_seconds / vectorised_seconds)
+
+
+if __name__ == "__main__":
+    main()
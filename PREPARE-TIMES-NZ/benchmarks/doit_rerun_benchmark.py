@@ -0,0 +1,101 @@
+"""
+Measure how much of the doit pipeline one assumption change reruns.
+
+Temporarily appends a blank line to a single input file, asks doit which
+tasks are now out of date (``doit list --all --status``, which does not run
+anything), then restores the file. This is done twice:
+
+  - with the recorded I/O dependencies (see dodo.py)
+  - with ``coarse_deps=1``, where every task depends on whole stages
+
+Tasks that were already out of date before the change are not counted.
+Run the full pipeline at least once first so that the I/O records exist.
+
+Run:
+    python benchmarks/doit_rerun_benchmark.py [path/to/input_file]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from prepare_times_nz.utilities.filepaths import ASSUMPTIONS, PREP_LOCATION
+from prepare_times_nz.utilities.logger_setup import logger
+
+DEFAULT_FILE = ASSUMPTIONS / "electricity_generation/CapacityFactors.csv"
+
+
+def get_stale_tasks(*doit_vars: str) -> set[str]:
+    """Return the (sub)tasks doit would currently run."""
+    result = subprocess.run(
+        [sys.executable, "-m", "doit", "list", "--all", "--status", *doit_vars],
+        cwd=PREP_LOCATION,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    statuses = {}
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[0] in {"R", "U", "I"}:
+            statuses[parts[1]] = parts[0]
+
+    # group tasks (e.g. "stage_1_extract") just mirror their sub-tasks
+    groups = {name.split(":")[0] for name in statuses if ":" in name}
+    return {
+        name
+        for name, status in statuses.items()
+        if status == "R" and name not in groups
+    }
+
+
+def count_reruns(input_file: Path, *doit_vars: str) -> tuple[set[str], int, float]:
+    """Return the tasks rerun by changing input_file, the total task count
+    and how long doit took to work it out."""
+    already_stale = get_stale_tasks(*doit_vars)
+    original = input_file.read_bytes()
+    try:
+        input_file.write_bytes(original + b"\n")
+        start = time.perf_counter()
+        stale = get_stale_tasks(*doit_vars)
+        seconds = time.perf_counter() - start
+    finally:
+        input_file.write_bytes(original)
+
+    result = subprocess.run(
+        [sys.executable, "-m", "doit", "list", "--all", *doit_vars],
+        cwd=PREP_LOCATION,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = sum(1 for line in result.stdout.splitlines() if ":" in line.split()[0])
+    return stale - already_stale, total, seconds
+
+
+def main() -> None:
+    """Compare recorded and coarse dependencies for one input file."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("input_file", type=Path, nargs="?", default=DEFAULT_FILE)
+    input_file = parser.parse_args().input_file.resolve()
+
+    logger.info("Touching %s", input_file.relative_to(PREP_LOCATION))
+    for label, doit_vars in [("recorded I/O", ()), ("coarse deps", ("coarse_deps=1",))]:
+        reruns, total, seconds = count_reruns(input_file, *doit_vars)
+        logger.info(
+            "%-13s %3s of %s sub-tasks rerun (status check %.1fs)",
+            label,
+            len(reruns),
+            total,
+            seconds,
+        )
+        for name in sorted(reruns):
+            logger.info("    %s", name)
+
+
+if __name__ == "__main__":
+    main()
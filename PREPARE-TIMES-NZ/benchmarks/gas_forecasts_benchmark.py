@@ -0,0 +1,141 @@
+"""
+Time the vectorised contingent gas distribution on many fields.
+
+Builds synthetic production forecasts and contingent reserves for a number
+of gas fields (500 by default), then times decay_field_contingents() on
+all of them. The previous field-by-field approach (kept below as
+per_field_decay, which read the reserves file for every field) is timed on
+a sample of fields and scaled up, and both are checked to give the same
+values on the sample.
+
+Needs no pipeline data.
+
+Run:
+    python benchmarks/gas_forecasts_benchmark.py [--fields 500] [--sample 25]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from prepare_times_nz.stage_3.gas_forecasts import (
+    CONTINGENT_SHARE_ASSUMPTION,
+    DECAY_OVERRIDES,
+    decay_field_contingents,
+    get_contingent_reserves,
+)
+from prepare_times_nz.utilities.logger_setup import logger
+
+
+def per_field_decay(field: str, df: pd.DataFrame, contingent_file: Path):
+    """The previous decay_field_contingent(): one field, year by year."""
+    reserves = pd.read_csv(contingent_file)
+    reserves = reserves[
+        (reserves["Fuel"] == "Natural gas") & (reserves["Field"] == field)
+    ]
+    contingent = (
+        reserves["Value"].item() * CONTINGENT_SHARE_ASSUMPTION if len(reserves) else 0
+    )
+
+    df = df[df["Field"] == field]
+    peak = df[df["Value"] == max(df["Value"])]
+    cstart = peak["Year"].iloc[0] + 1
+    max_possible = df["Value"].max().item()
+
+    df = df[df["Year"] >= cstart]
+    to_distribute = df["Value"].sum() + contingent
+    decay = DECAY_OVERRIDES.get(field, df["Value"].iloc[0] / df["Value"].sum())
+
+    rows = []
+    for year in np.arange(cstart, int(df["Year"].max()) + 100):
+        vals = df.loc[df["Year"] == year, "Value"]
+        existing_2p = 0 if vals.empty else vals.iloc[0]
+        q = max(min(to_distribute * decay, max_possible), existing_2p)
+        to_distribute -= q
+        rows.append({"Year": year, "Field": field, "2C": q - existing_2p})
+    return pd.DataFrame(rows)
+
+
+def make_inputs(fields: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Forecasts for 2026-2060 that ramp up to a peak and then decline, and
+    contingent reserves (some missing) for each field
+    """
+    rng = np.random.default_rng(0)
+    names = [f"Field {i:04d}" for i in range(fields)]
+    years = np.arange(2026, 2061)
+
+    peak_year = rng.integers(2026, 2040, fields)[:, np.newaxis]
+    peak_output = rng.uniform(0.1, 50, fields)[:, np.newaxis]
+    decline = rng.uniform(0.05, 0.3, fields)[:, np.newaxis]
+    before = np.clip(1 - 0.2 * (peak_year - years), 0, 1)
+    after = np.exp(-decline * (years - peak_year))
+    output = peak_output * np.where(years <= peak_year, before, after)
+
+    forecasts = pd.DataFrame(
+        {
+            "Field": np.repeat(names, len(years)),
+            "Year": np.tile(years, fields),
+            "Value": output.ravel(),
+            "Unit": "PJ",
+            "Variable": "Natural gas forecasts",
+        }
+    )
+    reserves = pd.DataFrame(
+        {
+            "Field": names,
+            "Fuel": "Natural gas",
+            "Value": rng.uniform(0, 200, fields),
+            "Unit": "PJ",
+        }
+    )
+    reserves.loc[rng.random(fields) < 0.2, "Value"] = 0
+    return forecasts, reserves
+
+
+def main() -> None:
+    """Time both approaches and check they agree."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--fields", type=int, default=500)
+    parser.add_argument("--sample", type=int, default=25)
+    args = parser.parse_args()
+
+    forecasts, reserves = make_inputs(args.fields)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        contingent_file = Path(temp_dir) / "contingent_reserves.csv"
+        reserves.to_csv(contingent_file, index=False)
+
+        start = time.perf_counter()
+        contingents = get_contingent_reserves(contingent_file)
+        vectorised = decay_field_contingents(forecasts, contingents)
+        vectorised_seconds = time.perf_counter() - start
+
+        sample = forecasts["Field"].unique()[: args.sample]
+        start = time.perf_counter()
+        per_field = pd.concat(
+            [per_field_decay(field, forecasts, contingent_file) for field in sample]
+        )
+        per_field_seconds = (time.perf_counter() - start) * args.fields / len(sample)
+
+    sampled = vectorised[vectorised["Field"].isin(sample)]
+    np.testing.assert_array_equal(sampled["Year"], per_field["Year"])
+    np.testing.assert_allclose(sampled["2C"], per_field["2C"], rtol=0, atol=1e-12)
+
+    logger.info(
+        "Fields: %s (%s output rows)", f"{args.fields:,}", f"{len(vectorised):,}"
+    )
+    logger.info("Vectorised: %8.3fs", vectorised_seconds)
+    logger.info(
+        "Per-field:  %8.3fs (scaled from %s fields)", per_field_seconds, len(sample)
+    )
+    logger.info("Speed-up:   %8.0fx", per_field_seconds / vectorised_seconds)
+
+
+if __name__ == "__main__":
+    main()
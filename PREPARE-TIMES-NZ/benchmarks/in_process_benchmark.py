@@ -0,0 +1,104 @@
+"""
+Compare running pipeline scripts in subprocesses with running them in-process.
+
+Each named doit task's script is run twice:
+
+  - as "python -m prepare_times_nz.utilities.task_runner --record ...", the
+    command dodo.py uses by default (timed from outside, so it includes
+    starting Python and importing everything)
+  - through prepare_times_nz.utilities.task_runner.run_task() in this
+    process, which reports startup and run time separately
+
+Both runs write the task's real outputs, so only run this on a pipeline
+whose inputs are in place.
+
+Run:
+    python benchmarks/in_process_benchmark.py [task ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+
+from prepare_times_nz.utilities.filepaths import (
+    PREP_LOCATION,
+    STAGE_0_SCRIPTS,
+    STAGE_1_SCRIPTS,
+)
+from prepare_times_nz.utilities.logger_setup import logger
+from prepare_times_nz.utilities.task_runner import run_task
+from prepare_times_nz.utilities.task_scheduling import TASK_TIMINGS_FILE
+
+DEFAULT_TASKS = {
+    "stage_0_parse_tomls": STAGE_0_SCRIPTS / "parse_tomls.py",
+    "stage_1_extract:extract_eeud": STAGE_1_SCRIPTS / "extract_eeud.py",
+    "stage_1_extract:extract_mbie_data": STAGE_1_SCRIPTS / "extract_mbie_data.py",
+    "stage_1_extract:extract_nrel_data": STAGE_1_SCRIPTS / "extract_nrel_data.py",
+    "stage_1_extract:extract_snz_data": STAGE_1_SCRIPTS / "extract_snz_data.py",
+}
+
+
+def time_subprocess(task_name: str, script) -> float:
+    """Wall time of the default (one Python per task) command."""
+    start = time.perf_counter()
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "prepare_times_nz.utilities.task_runner",
+            "--record",
+            task_name,
+            str(script),
+        ],
+        cwd=PREP_LOCATION,
+        capture_output=True,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def time_in_process(task_name: str, script) -> float:
+    """Wall time of run_task() in this (already warm) process."""
+    start = time.perf_counter()
+    run_task(task_name, str(script))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Time each task both ways and log the saving."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("tasks", nargs="*", default=list(DEFAULT_TASKS))
+    tasks = parser.parse_args().tasks
+
+    # warm up: the first in-process task pays for the shared imports
+    first = tasks[0]
+    run_task(first, str(DEFAULT_TASKS[first]))
+
+    totals = {"subprocess": 0.0, "in-process": 0.0}
+    for task_name in tasks:
+        script = DEFAULT_TASKS[task_name]
+        subprocess_seconds = time_subprocess(task_name, script)
+        in_process_seconds = time_in_process(task_name, script)
+        totals["subprocess"] += subprocess_seconds
+        totals["in-process"] += in_process_seconds
+        logger.info(
+            "%-40s subprocess %6.2fs  in-process %6.2fs",
+            task_name,
+            subprocess_seconds,
+            in_process_seconds,
+        )
+
+    logger.info(
+        "%-40s subprocess %6.2fs  in-process %6.2fs",
+        "total",
+        totals["subprocess"],
+        totals["in-process"],
+    )
+    logger.info("Per-task startup/run times saved to %s", TASK_TIMINGS_FILE)
+
+
+if __name__ == "__main__":
+    main()
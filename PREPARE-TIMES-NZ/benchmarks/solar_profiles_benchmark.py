@@ -0,0 +1,256 @@
+"""
+Time the PVWatts hourly solar profiles for the full scenario x zone grid.
+
+Runs every scenario in SolarPvScenarios.csv across the 18 NIWA zones with
+the worker-pool runner in solar_run_hourly_profiles.py, and with the
+previous approach (kept below as sequential_profiles: a new model for
+every pair, run one after another, then one dict per hourly row). Each
+approach runs in a fresh process so that its peak RSS can be reported,
+together with the peak RSS of its largest worker process. Both are checked
+to give the same long-format output, up to the float32 precision of the
+PVWatts cache.
+
+The worker-pool runner starts with an empty PVWatts cache, and is then run
+a second time to show the cost of a rerun when nothing has changed.
+
+Uses the prepared NIWA EPW files if they exist
+('doit stage_3_scenarios:electricity_solar_prepare_epw'); otherwise writes
+synthetic EPW files with a simple clear-sky irradiance model, which PVWatts
+takes just as long to run.
+
+Run:
+    python benchmarks/solar_profiles_benchmark.py [--jobs 0] [--synthetic]
+"""
+
+from __future__ import annotations
+
+import argparse
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from prepare_times_nz.stage_3.pvwatts_model import build_model
+from prepare_times_nz.utilities.filepaths import STAGE_3_SCRIPTS
+from prepare_times_nz.utilities.logger_setup import logger
+from prepare_times_nz.utilities.task_runner import load_script
+from prepare_times_nz.utilities.timeslices import create_timeslices
+
+SCRIPT = STAGE_3_SCRIPTS / "electricity/solar_run_hourly_profiles.py"
+
+# Rough latitude and longitude of each NIWA zone, for synthetic weather
+ZONE_LOCATIONS = {
+    "NL": (-35.7, 174.3),
+    "AK": (-36.9, 174.8),
+    "HN": (-37.8, 175.3),
+    "BP": (-37.7, 176.2),
+    "RR": (-38.1, 176.2),
+    "TP": (-38.7, 176.1),
+    "NP": (-39.1, 174.1),
+    "EC": (-38.7, 178.0),
+    "MW": (-40.4, 175.6),
+    "WI": (-41.0, 175.6),
+    "WN": (-41.3, 174.8),
+    "NM": (-41.3, 173.3),
+    "WC": (-42.5, 171.2),
+    "CC": (-43.5, 172.6),
+    "QL": (-45.0, 168.7),
+    "OC": (-45.0, 169.2),
+    "DN": (-45.9, 170.5),
+    "IN": (-46.4, 168.4),
+}
+
+
+def synthetic_weather(latitude: float, seed: int) -> dict[str, np.ndarray]:
+    """Hourly clear-sky irradiance with random cloud, and air temperature."""
+    rng = np.random.default_rng(seed)
+    hour_of_year = np.arange(8760)
+    day = hour_of_year // 24 + 1
+    hour = hour_of_year % 24 + 0.5
+
+    declination = np.radians(23.45) * np.sin(2 * np.pi * (284 + day) / 365)
+    hour_angle = np.radians(15 * (hour - 12))
+    lat = np.radians(latitude)
+    cos_zenith = np.clip(
+        np.sin(lat) * np.sin(declination)
+        + np.cos(lat) * np.cos(declination) * np.cos(hour_angle),
+        0,
+        None,
+    )
+    clearness = rng.uniform(0.3, 1.0, len(hour_of_year))
+    dni = 900 * clearness * (cos_zenith > 0.05)
+    dhi = 100 * cos_zenith * (2 - clearness)
+    return {
+        "ghi": dni * cos_zenith + dhi,
+        "dni": dni,
+        "dhi": dhi,
+        "temperature": 12 + 6 * np.cos(2 * np.pi * (day - 15) / 365),
+    }
+
+
+def write_synthetic_epw(path: Path, latitude: float, longitude: float, seed: int):
+    """Write an 8760-hour EPW file of synthetic_weather()."""
+    weather = synthetic_weather(latitude, seed)
+    hours = pd.date_range("2019-01-01", periods=8760, freq="h")
+    temperature = weather["temperature"]
+    ghi, dni, dhi = weather["ghi"], weather["dni"], weather["dhi"]
+
+    lines = [
+        f"LOCATION,Synthetic,NZ,New Zealand,TMY3,0,{latitude},{longitude},12.0,10.0",
+        "DESIGN CONDITIONS,0",
+        "TYPICAL/EXTREME PERIODS,0",
+        "GROUND TEMPERATURES,0",
+        "HOLIDAYS/DAYLIGHT SAVING,No,0,0,0",
+        "COMMENTS 1,Synthetic benchmark EPW",
+        "COMMENTS 2,Synthetic benchmark EPW",
+        "DATA PERIODS,1,1,Data,Sunday,1/1,12/31",
+    ]
+    for i, timestamp in enumerate(hours):
+        fields = [timestamp.year, timestamp.month, timestamp.day, timestamp.hour + 1]
+        fields += [60, "?", f"{temperature[i]:.1f}", f"{temperature[i] - 4:.1f}"]
+        fields += [75, 101300, 0, 0, 300]
+        fields += [f"{ghi[i]:.0f}", f"{dni[i]:.0f}", f"{dhi[i]:.0f}"]
+        fields += [0, 0, 0, 0, 180, 3.0, 5, 5, 20, 77777, 9, 999999999]
+        fields += [10, 0.1, 0, 88, 0.2, 0, 1]
+        lines.append(",".join(str(field) for field in fields))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def write_synthetic_epws(epw_dir: Path) -> Path:
+    """Write a synthetic EPW file for every zone into epw_dir."""
+    for seed, (zone, (lat, lon)) in enumerate(ZONE_LOCATIONS.items()):
+        write_synthetic_epw(epw_dir / f"TMY3_NZ_{zone}.epw", lat, lon, seed)
+    return epw_dir
+
+
+def sequential_profiles(module, scenarios, epw_files, time_index):
+    """The previous runner: a model per pair in turn, then a dict per hour."""
+    long_frames = []
+    for scenario in scenarios:
+        rows = []
+        for zone in module.ZONE_ORDER:
+            model = build_model(epw_files[zone], scenario)
+            model.execute()
+            generation = [float(value) for value in model.Outputs.gen]
+            for time_row, value in zip(time_index.itertuples(index=False), generation):
+                row = {
+                    "Scenario": scenario["Tech_TIMES"],
+                    "Tech_TIMES": scenario["Tech_TIMES"],
+                    "ZoneCode": zone,
+                    "Region": module.ZONE_CODE_TO_REGION[zone],
+                    "Island": module.ZONE_CODE_TO_ISLAND[zone],
+                }
+                for column in module.LONG_TIME_COLUMNS:
+                    row[column] = getattr(time_row, column)
+                row["generation_kw_per_kw"] = value
+                rows.append(row)
+        long_frames.append(
+            create_timeslices(
+                pd.DataFrame(rows),
+                date_col="WallClock_Date",
+                hour_col="WallClock_Hour",
+            )
+        )
+    return pd.concat(long_frames, ignore_index=True)
+
+
+def pooled_profiles(module, scenarios, epw_files, time_index, grid_options):
+    """
+    The worker-pool runner, given run_pvwatts_grid()'s jobs and cache_dir
+    in grid_options, and column-wise long-format assembly.
+    """
+    grid = module.run_pvwatts_grid(scenarios, epw_files, **grid_options)
+    long_frames = [
+        module.build_long_frame(name, module.add_timeslices(time_index), generation)
+        for name, (generation, _) in grid.items()
+    ]
+    return pd.concat(long_frames, ignore_index=True)
+
+
+def run_approach(approach: str, epw_dir: Path, jobs: int, cache_dir: Path):
+    """
+    Run one approach for the full grid; return its long-format output,
+    seconds, and the peak RSS (MB) of this process and of its largest worker.
+    """
+    module = load_script(SCRIPT)
+    scenarios = module.load_solar_scenarios()
+    epw_files = module.discover_epw_files(epw_dir)
+    time_index = module.build_time_index(epw_files)
+
+    start = time.perf_counter()
+    if approach == "sequential":
+        long_df = sequential_profiles(module, scenarios, epw_files, time_index)
+    else:
+        long_df = pooled_profiles(
+            module,
+            scenarios,
+            epw_files,
+            time_index,
+            {"jobs": jobs, "cache_dir": cache_dir},
+        )
+    seconds = time.perf_counter() - start
+
+    # ru_maxrss is in KB on Linux
+    own_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    worker_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return long_df, seconds, own_rss, worker_rss
+
+
+def run_in_new_process(approach: str, epw_dir: Path, jobs: int, cache_dir: Path):
+    """run_approach() in a fresh process, so its peak RSS is its own."""
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(run_approach, approach, epw_dir, jobs, cache_dir).result()
+
+
+def main() -> None:
+    """Time both approaches and check they agree."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--jobs", type=int, default=0)
+    parser.add_argument("--synthetic", action="store_true")
+    args = parser.parse_args()
+
+    module = load_script(SCRIPT)
+    with tempfile.TemporaryDirectory() as tmp:
+        epw_dir = module.PREPARED_EPW_DIR
+        if args.synthetic or not epw_dir.exists():
+            epw_dir = Path(tmp) / "epw"
+            epw_dir.mkdir()
+            write_synthetic_epws(epw_dir)
+        logger.info("EPW files: %s", epw_dir)
+        cache_dir = Path(tmp) / "pvwatts_cache"
+
+        pooled = run_in_new_process("pooled", epw_dir, args.jobs, cache_dir)
+        cached = run_in_new_process("pooled", epw_dir, args.jobs, cache_dir)
+        sequential = run_in_new_process("sequential", epw_dir, args.jobs, cache_dir)
+
+    pd.testing.assert_frame_equal(pooled[0], cached[0])
+    pd.testing.assert_frame_equal(
+        pooled[0].astype({"TimeSlice": str}),
+        sequential[0].astype({"TimeSlice": str}),
+        check_dtype=False,
+        rtol=1e-6,
+    )
+
+    pairs = len(module.load_solar_scenarios()) * len(module.ZONE_ORDER)
+    logger.info("Pairs: %s, jobs: %s", pairs, module.get_jobs(args.jobs, pairs))
+    logger.info("Long rows: %s", f"{len(pooled[0]):,}")
+    for label, (_, seconds, own_rss, worker_rss) in [
+        ("Worker pool:", pooled),
+        ("Cached:     ", cached),
+        ("Sequential: ", sequential),
+    ]:
+        logger.info(
+            "%s %6.2fs, peak RSS %5.0f MB (largest worker %5.0f MB)",
+            label,
+            seconds,
+            own_rss,
+            worker_rss,
+        )
+    logger.info("Speed-up:     %6.1fx", sequential[1] / pooled[1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Time create_timeslices() on a large frame of dates and hours.
+
+Builds a frame of random dates (2020-2024, so including a leap year) and
+hours (0-24, where 24 is the repeated hour when daylight saving ends), then
+labels it with the lookup-table create_timeslices() and with the previous
+row-by-row string building (kept below as string_timeslices). Both are
+checked to give the same labels.
+
+Run:
+    python benchmarks/timeslice_benchmark.py [--rows 10000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from prepare_times_nz.utilities.logger_setup import logger
+from prepare_times_nz.utilities.timeslices import (
+    convert_date_to_daytype,
+    convert_date_to_season,
+    convert_hour_to_timeofday,
+    create_timeslices,
+)
+
+
+def string_timeslices(df: pd.DataFrame) -> pd.DataFrame:
+    """The previous create_timeslices(): masks and strings for every row."""
+    df = convert_hour_to_timeofday(df, hour_col="Hour")
+    df = convert_date_to_daytype(df, "Trading_Date")
+    df = convert_date_to_season(df, "Trading_Date")
+    df["TimeSlice"] = df["Season"] + df["Day_Type"] + df["Time_Of_Day"]
+    return df.drop(columns=["Season", "Day_Type", "Time_Of_Day"])
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    """Random dates from 2020 to 2024 and hours from 0 to 24."""
+    rng = np.random.default_rng(0)
+    days = pd.date_range("2020-01-01", "2024-12-31", freq="D")
+    return pd.DataFrame(
+        {
+            "Trading_Date": days[rng.integers(0, len(days), rows)],
+            "Hour": rng.integers(0, 25, rows),
+        }
+    )
+
+
+def time_it(func, df: pd.DataFrame) -> tuple[pd.Series, float]:
+    """Run func on a copy of df; return its TimeSlice column and the seconds."""
+    df = df.copy()
+    start = time.perf_counter()
+    result = func(df)["TimeSlice"]
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    """Time both approaches and check they agree."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    create_timeslices(df.head().copy())  # read time_of_day_types.csv first
+
+    lookup, lookup_seconds = time_it(create_timeslices, df)
+    strings, string_seconds = time_it(string_timeslices, df)
+
+    if not (lookup.astype(str).to_numpy() == strings.to_numpy()).all():
+        raise AssertionError("The lookup and string approaches disagree")
+
+    logger.info("Rows: %s", f"{args.rows:,}")
+    logger.info(
+        "Lookup table: %6.2fs, %6.0f MB",
+        lookup_seconds,
+        lookup.memory_usage(deep=True) / 1e6,
+    )
+    logger.info(
+        "Per-row:      %6.2fs, %6.0f MB",
+        string_seconds,
+        strings.memory_usage(deep=True) / 1e6,
+    )
+    logger.info("Speed-up:     %6.0fx", string_seconds / lookup_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Time the column-wise transport base-year transforms on a scaled-up fleet.
+
+Builds a synthetic fleet table (every vehicle/fuel/technology combination,
+repeated --scale times, 100 by default) and times the stage 2 regional
+split, fuel consumption and fuel share steps, and the stage 4 process
+parameters table on a demand table scaled the same way. The previous
+row-by-row versions are kept below and timed on the same inputs, and both
+are checked to give the same results.
+
+Needs no pipeline data.
+
+Run:
+    python benchmarks/transport_baseyear_benchmark.py [--scale 100]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from prepare_times_nz.stage_2.transport import FUEL_SHARE, MJ_PER_LITRE, REGIONAL_SPLIT
+from prepare_times_nz.stage_4.baseyear import transport
+from prepare_times_nz.utilities.filepaths import STAGE_2_SCRIPTS
+from prepare_times_nz.utilities.logger_setup import logger
+from prepare_times_nz.utilities.task_runner import load_script
+
+VEHICLES = list(transport.COMM_TO_VEHICLE.values())
+FUELS = ["Petrol", "Diesel", "Electricity", "LPG", "Fuel Oil", "Av. Fuel/Kero"]
+TECHS = ["ICE", "BEV", "PHEV", "ICE Hybrid", "Turbine Engine", "Electric Motor"]
+PP_COLUMNS = ["TechName", "Region", "Comm-In", "Comm-Out"] + list(
+    dict.fromkeys(transport.VAR_RENAME[var] for var in transport.VAR_LIST)
+)
+
+
+# ------------------------------------------------------------------ #
+# Previous row-by-row versions
+# ------------------------------------------------------------------ #
+
+
+def split_by_region_by_row(df: pd.DataFrame) -> pd.DataFrame:
+    """The previous regional split: a copied row for each region."""
+    rows = []
+    for _, row in df.iterrows():
+        split = REGIONAL_SPLIT.get(
+            (row["vehicletype"], row["fueltype"])
+        ) or REGIONAL_SPLIT.get(row["vehicletype"])
+        for region, frac in (split or {}).items():
+            new_row = row.copy()
+            new_row["region"] = region
+            for col in ["vktvalue", "pjvalue", "vehicle_count"]:
+                new_row[col] = row[col] * frac if pd.notnull(row[col]) else np.nan
+            rows.append(new_row)
+    return pd.DataFrame(rows).reset_index(drop=True)
+
+
+def fuel_consumption_by_row(row: pd.Series) -> float:
+    """The previous litres per 100km, for one row."""
+    fuel = row["fueltype"]
+    eff = row["efficiency_calc"]
+    if pd.notnull(eff) and fuel in MJ_PER_LITRE:
+        return 100 / (eff * MJ_PER_LITRE[fuel])
+    return np.nan
+
+
+def fuel_share_by_row(row: pd.Series) -> float:
+    """The previous fuel share, for one row."""
+    key1 = (row["vehicletype"], row["fueltype"], row["technology"])
+    key2 = (row["region"], row["vehicletype"], row["fueltype"])
+    if key1 in FUEL_SHARE:
+        return FUEL_SHARE[key1]["fuelshare"]
+    if key2 in FUEL_SHARE:
+        return FUEL_SHARE[key2]["fuelshare"]
+    return np.nan
+
+
+def process_parameters_by_row(demand: pd.DataFrame) -> pd.DataFrame:
+    """The previous process parameters: a demand table filter per value."""
+    # pylint: disable=too-many-locals
+    var_tbls = transport.load_var_tables(demand)
+    tech_df = transport.create_process_df(["TechName", "Region"])
+    rows = []
+    for tech, region in tech_df.itertuples(index=False):
+        comm_out = transport.comm_out_for_tech(transport.strip_level(tech))
+        if comm_out is None:
+            continue
+        is_special = any(key in tech for key in transport.SPECIAL_COMM_IN)
+        for comm_in in transport.get_comm_ins(tech):
+            veh, fuel, ttype = transport.parse_attrs(tech, comm_out, comm_in)
+            row = {
+                "TechName": tech,
+                "Region": region,
+                "Comm-In": comm_in,
+                "Comm-Out": comm_out,
+            }
+            for var in transport.VAR_LIST:
+                if (var == "pjvalue" and not is_special) or (
+                    var == "vktvalue" and is_special
+                ):
+                    continue
+                if None in (veh, fuel, ttype):
+                    row[transport.VAR_RENAME[var]] = None
+                    continue
+                tbl = var_tbls[var]
+                mask = (
+                    (tbl["vehicletype"] == veh.lower())
+                    & (tbl["fueltype"] == fuel.lower())
+                    & (tbl["technology"] == ttype.lower())
+                    & (tbl["region"] == region.lower())
+                )
+                if not is_special:
+                    mask &= tbl["tertile"] == transport.extract_tertile(tech)
+                hit = tbl[mask]
+                row[transport.VAR_RENAME[var]] = (
+                    hit["value"].iloc[0] if not hit.empty else None
+                )
+            rows.append(row)
+    df = pd.DataFrame(rows).reindex(columns=PP_COLUMNS)
+
+    df = df[
+        ~(df["TechName"].str.startswith("T_P_CPHEVBEV") & (df["Comm-In"] == "TRAELC"))
+    ].reset_index(drop=True)
+    mask = df["TechName"].str.startswith("T_P_CPHEVPET") & (df["Comm-In"] == "TRAELC")
+    df.loc[mask, "TechName"] = df.loc[mask, "TechName"].str.replace(
+        "T_P_CPHEVPET", "T_P_CPHEVBEV", regex=False
+    )
+    return df
+
+
+# ------------------------------------------------------------------ #
+# Inputs
+# ------------------------------------------------------------------ #
+
+
+def make_fleet(scale: int) -> pd.DataFrame:
+    """Every vehicle/fuel/technology combination, scale times over."""
+    rng = np.random.default_rng(0)
+    keys = pd.MultiIndex.from_product(
+        [VEHICLES, FUELS, TECHS], names=["vehicletype", "fueltype", "technology"]
+    ).to_frame(index=False)
+    fleet = pd.concat([keys] * scale, ignore_index=True)
+    n = len(fleet)
+    fleet["vktvalue"] = rng.uniform(0, 1000, n)
+    fleet["pjvalue"] = np.where(rng.random(n) < 0.5, np.nan, rng.uniform(0, 5, n))
+    fleet["vehicle_count"] = np.where(
+        rng.random(n) < 0.2, np.nan, rng.uniform(0, 1e5, n)
+    )
+    return fleet
+
+
+def make_demand(scale: int) -> pd.DataFrame:
+    """A long demand table with scale rows for every key and variable."""
+    rng = np.random.default_rng(0)
+    keys = pd.MultiIndex.from_product(
+        [VEHICLES, FUELS, TECHS, ["NI", "SI"], [0.0, 1.0, 2.0]],
+        names=["vehicletype", "fueltype", "technology", "region", "tertile"],
+    ).to_frame(index=False)
+    demand = pd.concat(
+        [keys.assign(variable=var) for var in transport.VAR_LIST for _ in range(scale)]
+    )
+    demand["value"] = rng.uniform(0, 10, len(demand))
+    return demand.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def timed(func, *args):
+    """The result of func(*args) and the seconds it took."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    """Time both approaches and check they agree."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--scale", type=int, default=100)
+    args = parser.parse_args()
+
+    baseyear = load_script(STAGE_2_SCRIPTS / "baseyear_transport_demand.py")
+    fleet = make_fleet(args.scale)
+    demand = make_demand(args.scale)
+    timings = []
+
+    by_row, by_row_seconds = timed(split_by_region_by_row, fleet)
+    split, seconds = timed(baseyear.split_by_region, fleet)
+    pd.testing.assert_frame_equal(split, by_row)
+    timings.append(("Regional split", len(fleet), by_row_seconds, seconds))
+
+    split["efficiency_calc"] = np.random.default_rng(1).uniform(0.1, 2, len(split))
+    for name, row_func, func in [
+        ("Fuel consumption", fuel_consumption_by_row, baseyear.get_fuel_consumption),
+        ("Fuel shares", fuel_share_by_row, baseyear.get_fuel_shares),
+    ]:
+        by_row, by_row_seconds = timed(split.apply, row_func, 1)
+        result, seconds = timed(func, split)
+        np.testing.assert_array_equal(result, by_row)
+        timings.append((name, len(split), by_row_seconds, seconds))
+
+    by_row, by_row_seconds = timed(process_parameters_by_row, demand)
+    result, seconds = timed(transport.create_process_parameters_df, PP_COLUMNS, demand)
+    assert result.to_csv(index=False) == by_row.to_csv(index=False)
+    timings.append(("Process parameters", len(demand), by_row_seconds, seconds))
+
+    logger.info("Scale: %sx", args.scale)
+    for name, rows, by_row_seconds, seconds in timings:
+        logger.info(
+            "%-20s %9s rows  row-wise %8.3fs  column-wise %7.3fs  (%4.0fx)",
+            name,
+            f"{rows:,}",
+            by_row_seconds,
+            seconds,
+            by_row_seconds / seconds,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark the Stage 5 Excel writers against each other.
+
+Compares the original overlay method (create_empty_workbook() followed by
+write_data() for every table, reloading and resaving the book each time)
+with write_workbook_once(), which lays everything out in memory and saves
+each workbook once.
+
+Both methods write the workbooks described by the real
+'stage_0_config/config_metadata.csv' into temporary folders, so
+OUTPUT_LOCATION is untouched. Table data is read once up front and shared,
+so only the writing is timed. The parsed outputs are then compared cell by
+cell (values, bold fonts, column widths).
+
+Workbooks whose source data has not been generated yet are skipped, so run
+the pipeline up to Stage 4 first for a full comparison.
+
+Run:
+    python benchmarks/write_excel_benchmark.py
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import tempfile
+import time
+from pathlib import Path
+
+from openpyxl import load_workbook
+from prepare_times_nz.utilities.excel_writers import (
+    create_empty_workbook,
+    table_height,
+    write_data,
+    write_workbook_once,
+)
+from prepare_times_nz.utilities.filepaths import STAGE_4_SCRIPTS
+from prepare_times_nz.utilities.logger_setup import logger
+
+
+def load_write_excel():
+    """Load the Stage 5 script module directly from its path."""
+    module_path = STAGE_4_SCRIPTS / "write_excel.py"
+    spec = importlib.util.spec_from_file_location("write_excel", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def collect_all_tables(write_excel) -> dict[str, dict[str, list[dict]]]:
+    """Read every workbook's tables, skipping books with missing inputs."""
+    metadata = write_excel.load_metadata()
+    books = {}
+    for workbook in metadata["WorkBookName"].unique():
+        workbook_meta = metadata[metadata["WorkBookName"] == workbook]
+        try:
+            books[workbook] = write_excel.collect_workbook_tables(
+                workbook, workbook_meta
+            )
+        except FileNotFoundError as exc:
+            logger.warning("Skipping %s: %s", workbook, exc)
+    return books
+
+
+def write_legacy(books, output_location: Path) -> None:
+    """Write every workbook with the per-table load/save overlay method."""
+    for workbook, sheet_tables in books.items():
+        create_empty_workbook(workbook, list(sheet_tables), output_location)
+        for sheet_name, tables in sheet_tables.items():
+            startrow = 0
+            for table in tables:
+                write_data(
+                    table["df"],
+                    book_name=workbook,
+                    sheet_name=sheet_name,
+                    tag=table["tag"],
+                    uc_set=table["uc_set"],
+                    startrow=startrow,
+                    table_name=table["table_name"],
+                    table_description=table["table_description"],
+                    output_location=output_location,
+                )
+                startrow += table_height(table["df"], table["uc_set"])
+
+
+def write_streamed(books, output_location: Path) -> None:
+    """Write every workbook in a single pass."""
+    for workbook, sheet_tables in books.items():
+        write_workbook_once(workbook, sheet_tables, output_location)
+
+
+def read_cells(path: Path):
+    """Return the parsed content of a workbook for comparison."""
+    book = load_workbook(path)
+    cells = {}
+    for sheet in book.worksheets:
+        for row in sheet.iter_rows():
+            for cell in row:
+                if cell.value is not None:
+                    cells[(sheet.title, cell.coordinate)] = (cell.value, cell.font.b)
+    widths = {sheet.title: sheet.column_dimensions["A"].width for sheet in book}
+    return book.sheetnames, cells, widths
+
+
+def timed(func, *args) -> float:
+    """Run func(*args) and return the elapsed wall-clock seconds."""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run both writers and report timings and any differences."""
+    write_excel = load_write_excel()
+    books = collect_all_tables(write_excel)
+    table_count = sum(
+        len(tables) for sheets in books.values() for tables in sheets.values()
+    )
+    logger.info("Benchmarking %s workbooks, %s tables", len(books), table_count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_dir = Path(tmp) / "legacy"
+        streamed_dir = Path(tmp) / "streamed"
+
+        legacy_seconds = timed(write_legacy, books, legacy_dir)
+        streamed_seconds = timed(write_streamed, books, streamed_dir)
+
+        mismatches = [
+            workbook
+            for workbook in books
+            if read_cells(legacy_dir / f"{workbook}.xlsx")
+            != read_cells(streamed_dir / f"{workbook}.xlsx")
+        ]
+
+    logger.info("write_data overlay:    %.2fs", legacy_seconds)
+    logger.info("write_workbook_once:   %.2fs", streamed_seconds)
+    logger.info("Speed-up:              %.1fx", legacy_seconds / streamed_seconds)
+    if mismatches:
+        logger.error("Parsed output differs for: %s", ", ".join(mismatches))
+    else:
+        logger.info("Parsed output identical for all %s workbooks", len(books))
+
+
+if __name__ == "__main__":
+    main()
@@ -30,26 +30,61 @@ step only when:
   * any of its inputs (scripts, upstream data) changed, or
   * its outputs are missing / deleted.
 
-Note:
+Precise dependencies:
 
-* The script globs contents of folders like `data_intermediate`. Keep these clean and
-run `doit` twice to ensure that all output data is picked up.
+Stage 0-4 scripts are run through prepare_times_nz.utilities.data_in_out,
+which records the exact data files each script reads and writes (and the
+package modules it imports) in '.cache/doit/io/'. Once a task has a record,
+its file_dep and targets come from that record, so changing one assumption
+file only reruns the scripts that actually read it.
 
-* Not all output files are listed for each script - only key / sentinel outputs.
+Until a task has run once, it falls back to depending on every file in the
+earlier stages (globbed when doit starts), and only its key / sentinel
+outputs are listed as targets. Use ``doit coarse_deps=1`` to force the
+fallback for every task.
+
+Parallel runs:
+
+Independent sub-tasks run in parallel processes (up to four by default; use
+``doit -n <processes>`` to change this, or ``doit -n 1`` to run one task at a
+time). Each task waits for its memory hint (TASK_MEMORY_GB) to fit in the
+memory budget, set with ``doit memory_gb=<n>``, so heavy tasks such as
+the load curves do not run alongside each other. After each run the
+critical path of the build - the chain of tasks that bounds its wall-clock
+time - is printed (see prepare_times_nz.utilities.task_scheduling).
+
+In-process mode:
+
+``doit in_process=1`` calls each stage 0-4 script's ``main()`` inside the
+doit process instead of starting a new Python for every task (see
+prepare_times_nz.utilities.task_runner). Libraries stay imported between
+tasks, and each task logs its startup overhead separately from its run time.
+
+Intermediate data:
+
+Stage outputs moved to the typed intermediate store are written as parquet
+only (see save_intermediate in prepare_times_nz.utilities.data_in_out).
+``doit csv_mirror=1`` writes a CSV copy of each of them as well.
 
 """
 
+import os
 import sys
 from os import PathLike
 from pathlib import Path
 from typing import Iterator
 
+import pandas as pd
+from doit import get_var
+from prepare_times_nz.utilities.data_in_out import CSV_MIRROR_ENV, load_io_record
+from prepare_times_nz.utilities.excel_manifest import get_stale_workbooks
 from prepare_times_nz.utilities.filepaths import (
     ASSUMPTIONS,
     CONCORDANCES,
     DATA_INTERMEDIATE,
     DATA_RAW,
     OUTPUT_LOCATION,
+    OUTPUT_MANIFEST,
     PREP_LOCATION,
     STAGE_0_SCRIPTS,
     STAGE_1_SCRIPTS,
@@ -57,6 +92,8 @@ from prepare_times_nz.utilities.filepaths import (
     STAGE_3_SCRIPTS,
     STAGE_4_SCRIPTS,
 )
+from prepare_times_nz.utilities.task_runner import run_task
+from prepare_times_nz.utilities.task_scheduling import TimingReporter
 
 ##########################################
 # Constants
@@ -66,6 +103,9 @@ DOIT_CONFIG = {
     "verbosity": 2,
     "dep_file": ".cache/doit/db",
     "default_tasks": ["stage_5_build_excel"],
+    "num_process": min(4, os.cpu_count() or 1),
+    "par_type": "process",
+    "reporter": TimingReporter,
 }
 
 # Pattern to identify datasets
@@ -81,6 +121,29 @@ S4_DIR = "stage_4_veda_format"
 # Active interpreter
 PY = sys.executable
 
+# Module that runs a script and records its I/O
+TASK_RUNNER = "prepare_times_nz.utilities.task_runner"
+
+# "doit in_process=1" runs scripts' main() inside the doit process
+IN_PROCESS = get_var("in_process", "0") == "1"
+
+# "doit csv_mirror=1" also writes a CSV copy of every parquet intermediate
+# dataset (see save_intermediate); set in the environment so that scripts
+# run in new processes see it too
+if get_var("csv_mirror", "0") == "1":
+    os.environ[CSV_MIRROR_ENV] = "1"
+
+# "doit memory_gb=<n>": memory (GB) that tasks running together may use
+MEMORY_BUDGET_GB = float(get_var("memory_gb", "8"))
+
+# Rough peak memory (GB) of the heavier tasks; every other task counts as 1
+TASK_MEMORY_GB: dict[str, float] = {
+    "stage_2_baseyear:baseyear_electricity_generation": 2,
+    # reads a year of half-hourly EMI grid export data
+    "stage_2_baseyear:settings/load_curves": 2,
+    "stage_3_scenarios:electricity_solar_run_hourly_profiles": 2,
+}
+
 # Stage-0: TOML -> config_metadata.csv
 CONFIG_DIR = DATA_INTERMEDIATE / S0_DIR
 CONFIG_META_CSV = CONFIG_DIR / "config_metadata.csv"
@@ -90,13 +153,41 @@ CONFIG_META_CSV = CONFIG_DIR / "config_metadata.csv"
 # Helpers
 
 
-def _run(script: str) -> str:
+def _run(script: str, task_name: str | None = None) -> str:
     """Return a shell command that invokes *script* with the current Python.
 
     We generate a string instead of a list so that *doit* passes it straight to
     the shell, which keeps quoting simple and honours the active virtual-env.
+
+    If *task_name* is given, the script's ``main()`` is run by the task
+    runner, which records its file reads and writes for that task (see
+    ``_task_io``) and waits for the task's share of the memory budget.
     """
-    return f'"{PY}" "{script}"'
+    if task_name is None:
+        return f'"{PY}" "{script}"'
+    return (
+        f'"{PY}" -m {TASK_RUNNER} --record "{task_name}" "{script}"'
+        f" --memory-gb {TASK_MEMORY_GB.get(task_name, 1)}"
+        f" --memory-budget-gb {MEMORY_BUDGET_GB}"
+    )
+
+
+def _action(script: Path, task_name: str):
+    """Return the doit action that runs *script* and records its I/O.
+
+    This is a shell command, or a call to the script's ``main()`` in this
+    process when ``in_process=1``.
+    """
+    if IN_PROCESS:
+        return (
+            run_task,
+            [task_name, str(script)],
+            {
+                "memory_gb": TASK_MEMORY_GB.get(task_name, 1),
+                "budget_gb": MEMORY_BUDGET_GB,
+            },
+        )
+    return _run(str(script), task_name)
 
 
 def _intermediate_out(rel_path: str, *sub):
@@ -190,16 +281,17 @@ STAGE_1_INPUTS: dict[str, list[Path]] = {
 
 # Stage-1: raw -> stage_1_input_data
 STAGE_1: dict[str, list[str]] = {
-    "extract_eeud": ["eeud/eeud.csv"],
+    "extract_eeud": ["eeud/eeud.parquet"],
     "extract_ea_data": [
-        "electricity_authority/emi_md.parquet",
+        "electricity_authority/emi_md/.complete",
+        "electricity_authority/emi_gxp/.complete",
         "electricity_authority/emi_distributed_solar.csv",
         "electricity_authority/emi_nsp_concordances.csv",
     ],
     "extract_mbie_data": ["mbie/gen_stack.csv"],
     "extract_nrel_data": ["nrel/future_electricity_costs.csv"],
     "extract_rbs_data": ["rbs/power_demand_by_tou.parquet.csv"],
-    "extract_snz_data": ["statsnz/cpi.csv", "statsnz/cgpi.csv"],
+    "extract_snz_data": ["statsnz/cpi.parquet", "statsnz/cgpi.parquet"],
     "extract_gic_data": ["gic/gic_production_consumption.csv"],
     "extract_mvr_fleet_data": ["fleet_vkt_pj/vehicle_counts_2023.csv"],
     "extract_fleet_vkt_pj_data": ["fleet_vkt_pj/vkt_by_vehicle_type_and_fuel_2023.csv"],
@@ -215,8 +307,8 @@ STAGE_1_DEPS: dict[str, list[str]] = {
     ],
     "extract_vehicle_costs_data": [
         # extract_snz_data's output
-        "statsnz/cpi.csv",
-        "statsnz/cgpi.csv",
+        "statsnz/cpi.parquet",
+        "statsnz/cgpi.parquet",
     ],
     "extract_vehicle_future_costs_data": [
         # extract_vehicle_costs_data's output
@@ -243,7 +335,9 @@ STAGE_3: dict[str, list[str]] = {
     "supply_projections": ["oil_and_gas/oil_and_gas_projections.csv"],
     "electricity/solar_prepare_epw": ["electricity/solar_af/prepared_epw/.prepared"],
     "electricity/solar_run_hourly_profiles": [
-        "electricity/solar_af/hourly/all_scenarios_hourly_long.csv"
+        "electricity/solar_af/hourly/generation.parquet",
+        "electricity/solar_af/hourly/time_index.parquet",
+        "electricity/solar_af/metadata/all_scenarios_zone_summary.csv",
     ],
     "electricity/solar_build_curves": [
         "electricity/solar_af/timeslices/solar_availability_factors.csv",
@@ -311,6 +405,126 @@ STAGE_5: dict[str, list[str]] = {
 }
 
 
+##########################################
+# I/O records
+##########################################
+
+# "doit coarse_deps=1" ignores the I/O records and uses whole-stage globs
+USE_IO_RECORDS = get_var("coarse_deps", "0") != "1"
+
+# Pipeline order of every recorded task. A task may only depend on files
+# written by tasks earlier in this order (or its declared inputs).
+TASK_RANKS: dict[str, int] = {
+    "stage_0_parse_tomls": 0,
+    **{f"stage_1_extract:{n}": 1 for n in STAGE_1},
+    **{f"stage_2_baseyear:{n}": 2 for n in STAGE_2},
+    **{f"stage_3_scenarios:{n.replace('/', '_')}": 3 for n in STAGE_3},
+    "stage_3_docs": 4,
+    **{f"stage_4_veda_csvs:{n}": 5 for n in STAGE_4},
+}
+
+# Key outputs listed above for each task
+DECLARED_TARGETS: dict[str, list[Path]] = {
+    "stage_0_parse_tomls": [CONFIG_META_CSV],
+    **{
+        f"stage_1_extract:{n}": [_intermediate_out(rel, S1_DIR) for rel in outs]
+        for n, outs in STAGE_1.items()
+    },
+    **{
+        f"stage_2_baseyear:{n}": [_intermediate_out(rel, S2_DIR) for rel in outs]
+        for n, outs in STAGE_2.items()
+    },
+    **{
+        f"stage_3_scenarios:{n.replace('/', '_')}": [
+            _intermediate_out(rel, S3_DIR) for rel in outs
+        ]
+        for n, outs in STAGE_3.items()
+    },
+    "stage_3_docs": DOC_TABLE_OUTPUTS,
+    **{
+        f"stage_4_veda_csvs:{n}": [_intermediate_out(rel, S4_DIR) for rel in outs]
+        for n, outs in STAGE_4.items()
+    },
+}
+
+
+def _load_io_records() -> dict[str, dict[str, list[Path]]]:
+    """Load the I/O record of every task that has been recorded."""
+    if not USE_IO_RECORDS:
+        return {}
+    records = {name: load_io_record(name) for name in TASK_RANKS}
+    return {name: record for name, record in records.items() if record is not None}
+
+
+IO_RECORDS = _load_io_records()
+
+
+def _target_owners() -> dict[Path, str]:
+    """Map every known output file to the single task that writes it.
+
+    Declared targets always belong to their task. Recorded writes are added
+    when exactly one task wrote the file.
+    """
+    writers: dict[Path, set[str]] = {}
+    for name, record in IO_RECORDS.items():
+        for path in record["writes"]:
+            writers.setdefault(path, set()).add(name)
+
+    owners = {path: names.pop() for path, names in writers.items() if len(names) == 1}
+    for name, paths in DECLARED_TARGETS.items():
+        owners.update({path: name for path in paths})
+    return owners
+
+
+TARGET_OWNERS = _target_owners()
+
+
+def _task_io(
+    task_name: str,
+    script: Path,
+    fallback_deps: list[Path],
+    declared_inputs: list[Path] | None = None,
+) -> dict[str, list[Path]]:
+    """Return the ``file_dep`` and ``targets`` for a recorded task.
+
+    Without an I/O record this is the script plus *fallback_deps*, and the
+    declared targets. With a record it is the script, the modules and files
+    it read, the files now in every folder it listed or globbed, and every
+    file it wrote. The scanned folders mean a new raw file the script would
+    find by globbing reruns it. Reads of files produced by later tasks
+    are ignored so the graph cannot loop, and reads of files that no longer
+    exist (and that no task produces) are dropped.
+    """
+    declared_inputs = declared_inputs or []
+    record = IO_RECORDS.get(task_name)
+    if record is None:
+        return {
+            "file_dep": [script, *fallback_deps, *declared_inputs],
+            "targets": DECLARED_TARGETS[task_name],
+        }
+
+    scanned = [
+        path
+        for folder in record["scans"]
+        if folder.is_dir()
+        for path in sorted(folder.iterdir())
+        if path.is_file()
+    ]
+    file_dep = [script, *record["modules"], *declared_inputs]
+    for path in [*record["reads"], *scanned]:
+        owner = TARGET_OWNERS.get(path)
+        if owner is None:
+            if path.exists():
+                file_dep.append(path)
+        elif TASK_RANKS[owner] < TASK_RANKS[task_name] or path in declared_inputs:
+            file_dep.append(path)
+
+    return {
+        "file_dep": list(dict.fromkeys(file_dep)),
+        "targets": [path for path, name in TARGET_OWNERS.items() if name == task_name],
+    }
+
+
 ###############################################################################
 # Stage-0: TOML -> config_metadata.csv
 ###############################################################################
@@ -324,11 +538,11 @@ def task_stage_0_parse_tomls():
     **both** the raw TOMLs *and* its own Python script.
     """
     script = STAGE_0_SCRIPTS / "parse_tomls.py"
+    name = "stage_0_parse_tomls"
     return {
-        "actions": [_run(str(script))],
-        "file_dep": STAGE_0_INPUTS + [script],
+        "actions": [_action(script, name)],
+        **_task_io(name, script, STAGE_0_INPUTS),
         "uptodate": [False],
-        "targets": [CONFIG_META_CSV],
         "clean": True,
     }
 
@@ -340,21 +554,17 @@ def task_stage_0_parse_tomls():
 
 def task_stage_1_extract() -> Iterator[dict]:
     """Stage-1: extractor scripts (one sub-task per source)."""
-    for stem, rel_outs in STAGE_1.items():
+    for stem in STAGE_1:
         script = STAGE_1_SCRIPTS / f"{stem}.py"
         extra_in = [_intermediate_out(p, S1_DIR) for p in STAGE_1_DEPS.get(stem, [])]
         input_files = list(STAGE_1_INPUTS.get(stem, []))
+        name = f"stage_1_extract:{stem}"
         yield {
             "name": stem,
-            "actions": [_run(str(script))],
-            "file_dep": [
-                script,
-                *input_files,
-                *extra_in,
-                # remove this so all raw data doesn't rerun on config change
-                # *_files_in_stage(S0_DIR),
-            ],
-            "targets": [_intermediate_out(rel, S1_DIR) for rel in rel_outs],
+            "actions": [_action(script, name)],
+            # no stage-0 files in the fallback, so all raw data doesn't
+            # rerun on config change
+            **_task_io(name, script, input_files, declared_inputs=extra_in),
             "task_dep": ["stage_0_parse_tomls"],
             "clean": True,
         }
@@ -367,16 +577,17 @@ def task_stage_1_extract() -> Iterator[dict]:
 
 def task_stage_2_baseyear() -> Iterator[dict]:
     """Stage-2: build calibrated base-year datasets."""
-    for stem, rel_outs in STAGE_2.items():
+    for stem in STAGE_2:
         script = STAGE_2_SCRIPTS / f"{stem}.py"
+        name = f"stage_2_baseyear:{stem}"
         yield {
             "name": stem,
-            "actions": [_run(str(script))],
-            "file_dep": [script]
-            + _files_in_stage(S1_DIR)
-            + ASSUMPTION_INPUTS
-            + CONCORDANCE_INPUTS,
-            "targets": [_intermediate_out(rel, S2_DIR) for rel in rel_outs],
+            "actions": [_action(script, name)],
+            **_task_io(
+                name,
+                script,
+                _files_in_stage(S1_DIR) + ASSUMPTION_INPUTS + CONCORDANCE_INPUTS,
+            ),
             "task_dep": [f"stage_1_extract:{n}" for n in STAGE_1],
             "clean": True,
         }
@@ -389,7 +600,7 @@ def task_stage_2_baseyear() -> Iterator[dict]:
 
 def task_stage_3_scenarios() -> Iterator[dict]:
     """Stage-3: derive scenario demand-growth assumptions."""
-    for rel_script, rel_outs in STAGE_3.items():
+    for rel_script in STAGE_3:
         script = STAGE_3_SCRIPTS / f"{rel_script}.py"
         extra_in = [
             _intermediate_out(rel, S3_DIR)
@@ -397,16 +608,19 @@ def task_stage_3_scenarios() -> Iterator[dict]:
             for rel in STAGE_3[dep]
         ]
         input_files = list(STAGE_3_INPUTS.get(rel_script, []))
+        name = f"stage_3_scenarios:{rel_script.replace('/', '_')}"
         yield {
             "name": rel_script.replace("/", "_"),
-            "actions": [_run(str(script))],
-            "file_dep": [script]
-            + _files_in_stage(S1_DIR)
-            + ASSUMPTION_INPUTS
-            + CONCORDANCE_INPUTS
-            + input_files
-            + extra_in,
-            "targets": [_intermediate_out(rel, S3_DIR) for rel in rel_outs],
+            "actions": [_action(script, name)],
+            **_task_io(
+                name,
+                script,
+                _files_in_stage(S1_DIR)
+                + ASSUMPTION_INPUTS
+                + CONCORDANCE_INPUTS
+                + input_files,
+                declared_inputs=extra_in,
+            ),
             "task_dep": [f"stage_2_baseyear:{n}" for n in STAGE_2]
             + [
                 f"stage_3_scenarios:{n.replace('/', '_')}"
@@ -419,18 +633,22 @@ def task_stage_3_scenarios() -> Iterator[dict]:
 def task_stage_3_docs() -> dict:
     """Generate committed documentation tables from stage-3 solar outputs."""
     script = STAGE_3_SCRIPTS / "electricity/solar_export_doc_tables.py"
+    name = "stage_3_docs"
     return {
-        "actions": [_run(str(script))],
-        "file_dep": [script]
-        + [
-            _intermediate_out(
-                "electricity/solar_af/timeslices/solar_availability_factors.csv", S3_DIR
-            ),
-            _intermediate_out(
-                "electricity/solar_af/hourly/all_scenarios_hourly_long.csv", S3_DIR
-            ),
-        ],
-        "targets": DOC_TABLE_OUTPUTS,
+        "actions": [_action(script, name)],
+        **_task_io(
+            name,
+            script,
+            [
+                _intermediate_out(
+                    "electricity/solar_af/timeslices/solar_availability_factors.csv",
+                    S3_DIR,
+                ),
+                _intermediate_out(
+                    "electricity/solar_af/hourly/generation.parquet", S3_DIR
+                ),
+            ],
+        ),
         "task_dep": ["stage_3_scenarios:electricity_solar_build_curves"],
     }
 
@@ -442,18 +660,21 @@ def task_stage_3_docs() -> dict:
 
 def task_stage_4_veda_csvs() -> Iterator[dict]:
     """Stage-4: assemble VEDA-ready CSV bundles."""
-    for stem, rel_outs in STAGE_4.items():
+    for stem in STAGE_4:
         script = STAGE_4_SCRIPTS / f"{stem}.py"
+        name = f"stage_4_veda_csvs:{stem}"
         yield {
             "name": stem,
-            "actions": [_run(str(script))],
-            "file_dep": [script]
-            + _files_in_stage(S3_DIR)
-            + _files_in_stage(S2_DIR)
-            + STAGE_0_INPUTS
-            + ASSUMPTION_INPUTS
-            + CONCORDANCE_INPUTS,
-            "targets": [_intermediate_out(rel, S4_DIR) for rel in rel_outs],
+            "actions": [_action(script, name)],
+            **_task_io(
+                name,
+                script,
+                _files_in_stage(S3_DIR)
+                + _files_in_stage(S2_DIR)
+                + STAGE_0_INPUTS
+                + ASSUMPTION_INPUTS
+                + CONCORDANCE_INPUTS,
+            ),
             "task_dep": [f"stage_3_scenarios:{n.replace('/', '_')}" for n in STAGE_3]
             + ["stage_3_docs"],
             "clean": True,
@@ -465,17 +686,35 @@ def task_stage_4_veda_csvs() -> Iterator[dict]:
 ###############################################################################
 
 
+def _stage_5_uptodate() -> bool:
+    """True when every workbook matches the inputs recorded in its manifest."""
+    if not CONFIG_META_CSV.exists():
+        return False
+    stale = get_stale_workbooks(pd.read_csv(CONFIG_META_CSV))
+    for workbook in stale:
+        print(f"Stale workbook: {workbook}")
+    return not stale
+
+
 def task_stage_5_build_excel():
-    """Stage-5: Assemble final Excel workbooks for the VEDA GUI."""
+    """Stage-5: Assemble final Excel workbooks for the VEDA GUI.
+
+    Workbooks can be built in parallel with e.g.
+    ``doit stage_5_build_excel --jobs 4`` (0 = one process per CPU).
+
+    The task is up to date when the input hashes of every workbook match
+    the output manifest; otherwise only the stale workbooks are rebuilt.
+    """
     script = STAGE_4_SCRIPTS / "write_excel.py"
     return {
-        "actions": [_run(str(script))],
-        "uptodate": [False],
+        "actions": [_run(str(script)) + " --jobs %(jobs)s"],
+        "params": [{"name": "jobs", "long": "jobs", "type": int, "default": 1}],
+        "uptodate": [_stage_5_uptodate],
         "file_dep": [script]
         + STAGE_0_INPUTS
         + _files_in_stage(S4_DIR)
         + [CONFIG_META_CSV],
-        "targets": [_out(rel) for rel in STAGE_5["write_excel"]],
+        "targets": [_out(rel) for rel in STAGE_5["write_excel"]] + [OUTPUT_MANIFEST],
         "task_dep": [f"stage_4_veda_csvs:{n}" for n in STAGE_4],
         "clean": True,
     }
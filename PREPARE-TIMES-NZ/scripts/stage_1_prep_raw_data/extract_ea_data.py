@@ -7,8 +7,14 @@ We also do some tidying/standardising here.
 
 Outputs
 -------
-* "emi_md.parquet"               - half-hourly Generation_MD files (combined).
-* "emi_gxp.parquet"              - half-hourly grid export node files (combined).
+* "emi_md/"                      - half-hourly Generation_MD files (combined).
+* "emi_gxp/"                     - half-hourly grid export node files (combined).
+
+The EMI files are read one at a time and appended to parquet datasets
+partitioned by year ("emi_md/Year=2023/202301_Generation_MD.parquet" etc.),
+so adding more years of data does not increase peak memory. Read them with
+prepare_times_nz.utilities.data_in_out.read_parquet_dataset(), filtering on
+Year to skip the other years entirely.
 * "emi_distributed_solar.csv"    - tidy distributed-solar summary.
 * "emi_nsp_concordances.csv"     - POC → region / zone / island concordance.
 
@@ -20,11 +26,14 @@ Run directly::
 from __future__ import annotations
 
 import glob
+import shutil
 import time
 from pathlib import Path
-from typing import List
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from prepare_times_nz.utilities.data_in_out import save_parquet_part
 from prepare_times_nz.utilities.filepaths import DATA_RAW, STAGE_1_DATA
 from prepare_times_nz.utilities.logger_setup import logger
 from prepare_times_nz.utilities.timeslices import create_timeslices
@@ -45,92 +54,152 @@ EMI_NSP_TABLE: Path = (
 )
 EMI_DISTRIBUTED_SOLAR_DIR: Path = INPUT_LOCATION / "emi_distributed_solar"
 
+# Trading periods: 48 a day, or 50 on the day daylight saving ends
+TRADING_PERIODS: list[str] = [f"TP{n}" for n in range(1, 51)]
+
+# Written once a dataset is complete (a target for doit)
+DATASET_SENTINEL = ".complete"
+
 # Functions ----------------------------------------
 
 
-def add_timeslices_to_emi(
-    df: pd.DataFrame, date_col: str = "Trading_Date", tp_col: str = "Trading_Period"
-) -> pd.DataFrame:
+def get_trading_period_table() -> pd.DataFrame:
     """
-    Adds time-based features to an EMI dataframe:
-    - Parses the date column
-    - Extracts hour from 'Trading_Period'
-    - Constructs the 'Timeslice' variable using season, day type, and time of day
+    Return every trading period with its number and hour of the day
 
-    Assumes the Trading_Period values are like 'TP01', 'TP48', etc.
+    The hour is ((TP - 1) * 30) // 60, so TP49 and TP50 (only used on the
+    day daylight saving ends) fall in hour 24.
     """
+    trading_time = np.arange(1, len(TRADING_PERIODS) + 1)
+    return pd.DataFrame(
+        {
+            "Trading_Period": pd.Categorical(
+                TRADING_PERIODS, categories=TRADING_PERIODS
+            ),
+            "Trading_Time": pd.array(trading_time, dtype="Int32"),
+            "Hour": pd.array(((trading_time - 1) * 30) // 60, dtype="Int32"),
+        }
+    )
 
-    # Step 1: Ensure the date column is parsed as datetime
-    df[date_col] = pd.to_datetime(df[date_col], format="%Y-%m-%d", errors="coerce")
 
-    # Step 2: Extract numeric period from 'TPxx' format
-    df["Trading_Time"] = (
-        df[tp_col]
-        .str.replace("TP", "", regex=False)
-        .astype("Int32")  # nullable integer in case of missing values
+def read_emi_file(file: Path) -> pd.DataFrame:
+    """
+    Read one EMI file (a row per POC/unit and day, a column per trading
+    period) and return it in long format, a row per trading period
+
+    Labels are read as categoricals. Trading_Time and Hour come from the
+    trading period table, and TimeSlice from the shared calendar lookup
+    (see prepare_times_nz.utilities.timeslices).
+    """
+    header = pd.read_csv(file, nrows=0).columns
+    tp_cols = [col for col in header if col.startswith("TP")]
+    unknown = sorted(set(tp_cols) - set(TRADING_PERIODS))
+    if unknown:
+        raise ValueError(f"Unexpected trading periods {unknown} in {file}")
+    id_cols = sorted(col for col in header if col not in tp_cols)
+
+    wide = pd.read_csv(
+        file,
+        dtype={
+            **{col: "category" for col in id_cols if col != "Trading_Date"},
+            **{col: "float64" for col in tp_cols},
+        },
     )
+    n_rows = len(wide)
+    dates = pd.to_datetime(wide["Trading_Date"], format="%Y-%m-%d", errors="coerce")
+
+    # long format, trading period by trading period (as pd.melt orders it)
+    tp_codes = np.repeat([TRADING_PERIODS.index(col) for col in tp_cols], n_rows)
+    row_index = np.tile(np.arange(n_rows), len(tp_cols))
+    df = pd.DataFrame(
+        {
+            col: (dates if col == "Trading_Date" else wide[col]).array.take(row_index)
+            for col in id_cols
+        }
+    )
+
+    tp_table = get_trading_period_table()
+    df["Trading_Period"] = pd.Categorical.from_codes(
+        tp_codes, categories=TRADING_PERIODS
+    )
+    df["Value"] = wide[tp_cols].to_numpy().ravel(order="F")
+    df["Trading_Time"] = tp_table["Trading_Time"].array.take(tp_codes)
+    df["Hour"] = tp_table["Hour"].array.take(tp_codes)
 
-    # Step 3: Calculate hour as integer ((TP - 1) * 30 // 60)
-    df["Hour"] = ((df["Trading_Time"] - 1) * 30) // 60
+    return create_timeslices(df)
 
-    # Step 4: Create the timeslice variable
-    df = create_timeslices(df, date_col=date_col)
 
-    return df
+def get_emi_schema(df: pd.DataFrame) -> pa.Schema:
+    """
+    Return the schema used for every part of an EMI dataset: label
+    columns as dictionaries (so parts with different labels still read
+    back as one table) and everything else as pyarrow infers it
+    """
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    label = pa.dictionary(pa.int32(), pa.string())
+    for col in df.select_dtypes("category").columns:
+        schema = schema.set(schema.get_field_index(col), pa.field(col, label))
+    return schema.remove_metadata()
 
 
-def combine_emi_files(csv_folder: Path) -> pd.DataFrame:
+def combine_emi_files(csv_folder: Path, dataset_dir: Path) -> int:
     """
-    Load every "*.csv" in *csv_folder* and return a long-format DataFrame.
+    Convert every "*.csv" in *csv_folder* to long format and write it to a
+    parquet dataset in *dataset_dir*, partitioned by year.
     Pivots expected the trading period variables (TP[_])
+
+    Files are processed one at a time, so memory use depends on the
+    largest file rather than on how many there are. Rows without a valid
+    date are dropped (with a warning), since they have no year.
+    Returns the number of rows written.
     """
 
-    files = glob.glob(str(csv_folder / "*.csv"))
+    files = sorted(glob.glob(str(csv_folder / "*.csv")))
     if not files:
         logger.warning("No files found in %s", csv_folder)
-        return pd.DataFrame()
+        return 0
 
-    frames: List[pd.DataFrame] = []
+    # start from an empty dataset, so removed input files do not linger
+    shutil.rmtree(dataset_dir, ignore_errors=True)
+    schema = None
+    rows_written = 0
     for file in files:
         logger.info("        Reading %s", Path(file).name)
-        frames.append(pd.read_csv(file))
-
-    emi_df = pd.concat(frames, ignore_index=True)
-
-    # Identify trading-period columns (TP1 … TP48)
-    tp_cols = [col for col in emi_df.columns if col.startswith("TP")]
-
-    emi_df = pd.melt(
-        emi_df,
-        id_vars=emi_df.columns.difference(tp_cols),
-        value_vars=tp_cols,
-        var_name="Trading_Period",
-        value_name="Value",
-    )
-
-    emi_df = add_timeslices_to_emi(emi_df)
-    return emi_df
-
-
-def get_gxp_demand(directory: Path) -> pd.DataFrame:
+        emi_df = read_emi_file(Path(file))
+        schema = schema or get_emi_schema(emi_df)
+
+        years = emi_df["Trading_Date"].dt.year
+        if years.isna().any():
+            logger.warning(
+                "Dropping %s rows without a valid Trading_Date from %s",
+                years.isna().sum(),
+                Path(file).name,
+            )
+        for year, part in emi_df.groupby(years, sort=True):
+            save_parquet_part(
+                part, dataset_dir, {"Year": int(year)}, Path(file).stem, schema
+            )
+            rows_written += len(part)
+
+    (dataset_dir / DATASET_SENTINEL).touch()
+    return rows_written
+
+
+def get_gxp_demand(directory: Path) -> int:
     """
-    Load every "*.csv" in *directory* and return a combined DataFrame.
+    Convert every "*.csv" in *directory* to the emi_gxp dataset
     Pivots expected the trading period variables (TP[_])
     """
     logger.info("Reading GXP demand data from %s", directory)
-    df = combine_emi_files(directory)
-
-    return df
+    return combine_emi_files(directory, OUTPUT_LOCATION / "emi_gxp")
 
 
-def get_md_generation(directory: Path) -> pd.DataFrame:
+def get_md_generation(directory: Path) -> int:
     """
     Wraps combine_emi_files with a log statement
     """
     logger.info("Reading MD_Generation data from %s", directory)
-    df = combine_emi_files(directory)
-
-    return df
+    return combine_emi_files(directory, OUTPUT_LOCATION / "emi_md")
 
 
 def read_distributed_solar(sector: str) -> pd.DataFrame:
@@ -200,21 +269,15 @@ def build_nsp_concordance(nsp_csv: Path) -> pd.DataFrame:
 def main() -> None:
     """Run all EA-data extraction steps."""
     # 1. Generation_MD
-    md_df = get_md_generation(EMI_MD_FOLDER)
-    if not md_df.empty:
-        md_path = OUTPUT_LOCATION / "emi_md.parquet"
-        md_df.to_parquet(md_path, engine="pyarrow")
-        logger.info("Wrote Generation_MD parquet to %s", md_path)
+    rows = get_md_generation(EMI_MD_FOLDER)
+    logger.info("Wrote %s Generation_MD rows to %s", rows, OUTPUT_LOCATION / "emi_md")
 
     # 2. GXP demand
 
     start_time = time.time()
 
-    gxp_df = get_gxp_demand(EMI_GXP_FOLDER)
-    if not gxp_df.empty:
-        gxp_path = OUTPUT_LOCATION / "emi_gxp.parquet"
-        gxp_df.to_parquet(gxp_path, engine="pyarrow")
-        logger.info("Wrote Generation_MD parquet to %s", gxp_path)
+    rows = get_gxp_demand(EMI_GXP_FOLDER)
+    logger.info("Wrote %s GXP rows to %s", rows, OUTPUT_LOCATION / "emi_gxp")
 
     end_time = time.time()
     elapsed = end_time - start_time
@@ -7,8 +7,9 @@ Steps performed
 1. Read the EEUD "Data" sheet from the raw Excel workbook.
 2. Tidy column names, derive useful fields, and coerce values.
 3. Add biomass patch assumptions for missing industrial/commercial demand
-4. Write a CSV copy to "data_intermediate/stage_1_input_data/eeud".
-5. Write an CSV copy of unpatched data to the same directory
+4. Write the patched data as parquet to "data_intermediate/stage_1_input_data/eeud"
+   (read it with read_intermediate("stage_1_input_data/eeud/eeud")).
+5. Write the unpatched data as parquet to the same directory
 
 This script is idempotent: it recreates its output each time it runs.
 
@@ -26,7 +27,7 @@ from typing import Final
 
 import pandas as pd
 from prepare_times_nz.utilities.data_cleaning import rename_columns_to_pascal
-from prepare_times_nz.utilities.data_in_out import _save_data
+from prepare_times_nz.utilities.data_in_out import read_excel_cached, save_intermediate
 from prepare_times_nz.utilities.filepaths import ASSUMPTIONS, DATA_RAW, STAGE_1_DATA
 from prepare_times_nz.utilities.logger_setup import logger
 
@@ -47,8 +48,8 @@ SHEET_NAME = "Data"
 
 
 def save_eeud(df, name):
-    """_save_data wrapper"""
-    _save_data(df, name, label="Saving EEUD", filepath=OUTPUT_DIR)
+    """save_intermediate wrapper"""
+    save_intermediate(df, f"stage_1_input_data/eeud/{name}", label="Saving EEUD")
 
 
 # pylint: disable=duplicate-code
@@ -74,7 +75,7 @@ def resolve_input_filename(source_dir: Path, filename: str) -> Path:
 def read_eeud(source_dir: Path, filename: str) -> pd.DataFrame:
     """Read the EEUD *filename* from *source_dir* and return the raw Data sheet."""
     file_path = resolve_input_filename(source_dir, filename)
-    return pd.read_excel(file_path, engine="openpyxl", sheet_name=SHEET_NAME)
+    return read_excel_cached(file_path, engine="openpyxl", sheet_name=SHEET_NAME)
 
 
 def clean_eeud_data(df: pd.DataFrame) -> pd.DataFrame:
@@ -168,8 +169,8 @@ def main() -> None:
     patched_df = add_patch_to_eeud(patched_df, "biomass_demand_patch.csv")
     patched_df = add_patch_to_eeud(patched_df, "unallocated_demand_patch.csv")
 
-    save_eeud(tidy_df, "eeud_no_patch.csv")
-    save_eeud(patched_df, "eeud.csv")
+    save_eeud(tidy_df, "eeud_no_patch")
+    save_eeud(patched_df, "eeud")
 
 
 if __name__ == "__main__":
@@ -17,6 +17,7 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 from prepare_times_nz.stage_1.vehicle_costs import get_rail_columns
+from prepare_times_nz.utilities.data_in_out import read_excel_cached
 from prepare_times_nz.utilities.filepaths import CONCORDANCES, DATA_RAW, STAGE_1_DATA
 from prepare_times_nz.utilities.logger_setup import logger
 
@@ -143,7 +144,7 @@ def read_vehicle_counts_and_vkt(year: int) -> tuple[pd.DataFrame, pd.DataFrame]:
     """MOT workbook in *mot* folder."""
     counts = pd.read_csv(OUTPUT_LOCATION / "vehicle_counts_2023.csv")
     vkt_xls = INPUT_LOCATION_MOT / f"NZVehicleFleet_{year}.xlsx"
-    vkt = pd.read_excel(vkt_xls, sheet_name="8.2a,b", header=1).iloc[
+    vkt = read_excel_cached(vkt_xls, sheet_name="8.2a,b", header=1).iloc[
         :, :12
     ]  # first 12 cols only
     vkt["Year"] = pd.to_numeric(vkt["Year"], errors="coerce").astype("Int64")
@@ -153,13 +154,13 @@ def read_vehicle_counts_and_vkt(year: int) -> tuple[pd.DataFrame, pd.DataFrame]:
 def read_energy_balance(sheet_name: str) -> pd.DataFrame:
     """MBIE energy balance in *mbie* folder."""
     xls = INPUT_LOCATION_MBIE / "energy-balance-tables.xlsx"
-    return pd.read_excel(xls, sheet_name=sheet_name, header=[2, 3]).round(6)
+    return read_excel_cached(xls, sheet_name=sheet_name, header=[2, 3]).round(6)
 
 
 def read_kiwirail_energy() -> pd.DataFrame:
     """Kiwirail fuel inputs in *kiwirail* folder (skips header rows)."""
     xls = INPUT_LOCATION_KIWIRAIL / "Kiwirail data check 2022-23 Input data.xlsx"
-    return pd.read_excel(xls, skiprows=369).round(6)
+    return read_excel_cached(xls, skiprows=369).round(6)
 
 
 def read_eeud_data() -> pd.DataFrame:
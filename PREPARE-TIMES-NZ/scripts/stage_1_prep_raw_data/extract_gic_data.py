@@ -24,6 +24,7 @@ from pathlib import Path
 from typing import List
 
 import pandas as pd
+from prepare_times_nz.utilities.data_in_out import read_excel_cached
 from prepare_times_nz.utilities.filepaths import DATA_RAW, STAGE_1_DATA
 
 # ---------------------------------------------------------------------------
@@ -48,7 +49,7 @@ def read_gic_sheet(sheet_name: str) -> pd.DataFrame:
     """Read *sheet_name* from the GIC workbook and return a DataFrame."""
     gic_path = INPUT_DIR / GIC_FILENAME
     logger.debug("Reading sheet '%s' from %s", sheet_name, gic_path)
-    return pd.read_excel(gic_path, sheet_name=sheet_name)
+    return read_excel_cached(gic_path, sheet_name=sheet_name)
 
 
 def get_all_gic_data() -> pd.DataFrame:
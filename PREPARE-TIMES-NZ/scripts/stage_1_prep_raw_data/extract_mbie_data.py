@@ -27,6 +27,7 @@ from __future__ import annotations
 from pathlib import Path
 
 import pandas as pd
+from prepare_times_nz.utilities.data_in_out import read_excel_cached
 from prepare_times_nz.utilities.filepaths import DATA_RAW, STAGE_1_DATA
 from prepare_times_nz.utilities.logger_setup import logger
 
@@ -47,7 +48,7 @@ def _read_edgs_sheet(sheet_name: str) -> pd.DataFrame:
     edgs_path = (
         INPUT_DIR / "electricity-demand-generation-scenarios-2024-assumptions.xlsx"
     )
-    return pd.read_excel(edgs_path, sheet_name=sheet_name)
+    return read_excel_cached(edgs_path, sheet_name=sheet_name)
 
 
 def _get_mbie_electricity(
@@ -59,7 +60,7 @@ def _get_mbie_electricity(
 ) -> pd.DataFrame:
     """Generic loader for tables in 'electricity.xlsx'."""
     ele_path = INPUT_DIR / "electricity.xlsx"
-    df = pd.read_excel(ele_path, sheet_name=sheet_name, skiprows=8)
+    df = read_excel_cached(ele_path, sheet_name=sheet_name, skiprows=8)
     df = df.iloc[row_slice]
     df = df.drop("Annual % change", axis=1)
     # relabel the category year
@@ -79,7 +80,7 @@ def _get_mbie_electricity(
 def _get_mbie_gen_ele_only() -> pd.DataFrame:
     """Electricity generation (no cogen) by fuel, GWh."""
     ele_path = INPUT_DIR / "electricity.xlsx"
-    df = pd.read_excel(
+    df = read_excel_cached(
         ele_path,
         sheet_name="6 - Fuel type (GWh)",
         usecols="B:K",
@@ -103,7 +104,7 @@ def _get_mbie_gen_ele_only() -> pd.DataFrame:
 def _get_official_electricity_capacity() -> pd.DataFrame:
     """Installed generation capacity (MW) by technology."""
     ele_path = INPUT_DIR / "electricity.xlsx"
-    df = pd.read_excel(
+    df = read_excel_cached(
         ele_path,
         sheet_name="7 - Plant type (MW)",
         usecols="B:P",
@@ -138,7 +139,7 @@ def _get_mbie_gas_pj(
 ) -> pd.DataFrame:
     """Pull a slice of the Annual_PJ sheet from gas.xlsx."""
     gas_path = INPUT_DIR / "gas.xlsx"
-    df = pd.read_excel(gas_path, sheet_name="Annual_PJ", skiprows=9)
+    df = read_excel_cached(gas_path, sheet_name="Annual_PJ", skiprows=9)
     df = df.iloc[row_slice]
     df.columns = [col.strip() if isinstance(col, str) else col for col in df.columns]
     # relabel the category year
@@ -162,7 +163,7 @@ def _get_reserves_data(sheet, cols, skip, size):
     """Reads a hardcoded table path from the published reserves workbook"""
     reserves_path = INPUT_DIR / "petroleum-reserves-1-jan-2026.xlsx"
 
-    df = pd.read_excel(
+    df = read_excel_cached(
         reserves_path, sheet_name=sheet, usecols=cols, skiprows=skip, nrows=size
     )
 
@@ -7,7 +7,8 @@ function.  Steps:
 1. Read raw CPI data exported from Infoshare.
 2. Drop descriptive rows and keep quarterly observations.
 3. Build annual CPI series (Q4 values only) from 1990 onward.
-4. Write the tidy CSV to "data_intermediate/stage_1_external_data/statsnz".
+4. Write the tidy indices as parquet to "data_intermediate/stage_1_input_data/statsnz"
+   (read by the deflator through read_intermediate()).
 """
 
 from __future__ import annotations
@@ -16,6 +17,7 @@ from pathlib import Path
 
 import pandas as pd
 from prepare_times_nz.utilities.data_cleaning import rename_columns_to_pascal
+from prepare_times_nz.utilities.data_in_out import save_intermediate
 from prepare_times_nz.utilities.filepaths import DATA_RAW, STAGE_1_DATA
 from prepare_times_nz.utilities.logger_setup import logger
 
@@ -86,11 +88,11 @@ def extract_price_index_data():
     """
     cpi_df = load_raw_index(SNZ_CPI_FILE, "CPI_Index")
     cpi_df.columns = ["Year", "CPI_Index"]
-    save_file(cpi_df, "cpi.csv", "CPI data")
+    save_intermediate(cpi_df, "stage_1_input_data/statsnz/cpi", "CPI data")
 
     cgpi_df = load_raw_index(SNZ_CGPI_FILE, "CGPI_Index")
     cgpi_df.columns = ["Year", "CGPI_Index"]
-    save_file(cgpi_df, "cgpi.csv", "CGPI data")
+    save_intermediate(cgpi_df, "stage_1_input_data/statsnz/cgpi", "CGPI data")
 
 
 # Census data
@@ -25,6 +25,7 @@ from prepare_times_nz.stage_1.vehicle_costs import (
     FUELTYPE_MAP,
     TECH_TO_POWERTRAIN,
 )
+from prepare_times_nz.utilities.data_in_out import read_excel_cached
 from prepare_times_nz.utilities.deflator import deflate_columns_rowwise
 from prepare_times_nz.utilities.filepaths import DATA_RAW, STAGE_1_DATA
 from prepare_times_nz.utilities.logger_setup import logger
@@ -65,7 +66,7 @@ def load_data(year: int):
     other_costs_path = INPUT_LOCATION_OTHER / "air_rail_ship_costs.csv"
 
     try:
-        vehicle_costs = pd.read_excel(vehicle_costs_path, sheet_name="AG_costs")
+        vehicle_costs = read_excel_cached(vehicle_costs_path, sheet_name="AG_costs")
         nrel_costs = pd.read_csv(nrel_costs_path, low_memory=False)
         other_costs = pd.read_csv(other_costs_path)
     except Exception as exc:
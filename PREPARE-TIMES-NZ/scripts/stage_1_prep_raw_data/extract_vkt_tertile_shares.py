@@ -16,6 +16,7 @@ from pathlib import Path
 
 import numpy as np
 import pandas as pd
+from prepare_times_nz.utilities.data_in_out import read_excel_cached
 from prepare_times_nz.utilities.filepaths import DATA_RAW, STAGE_1_DATA
 
 # ──────────────────────────────────────────────────────────────── #
@@ -171,7 +172,7 @@ def main() -> None:
     logger.info("Reading MOT VKT tertile mean data from Excel…")
     OUTPUT_LOCATION.mkdir(parents=True, exist_ok=True)
     year = 2023
-    df = pd.read_excel(MOT_FILE)
+    df = read_excel_cached(MOT_FILE)
     df = df[df["year"] == 2023].copy()
     if "tertile" not in df or not set(df["tertile"].unique()) <= {0, 1, 2}:
         raise ValueError("Need integer tertile 0/1/2 column in MOT sheet.")
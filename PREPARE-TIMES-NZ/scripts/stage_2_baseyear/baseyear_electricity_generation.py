@@ -22,7 +22,7 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 from prepare_times_nz.utilities.data_cleaning import pascal_case, remove_diacritics
-from prepare_times_nz.utilities.data_in_out import _save_data
+from prepare_times_nz.utilities.data_in_out import _save_data, read_parquet_dataset
 from prepare_times_nz.utilities.filepaths import (
     CONCORDANCES,
     DATA_RAW,
@@ -250,8 +250,11 @@ def main() -> None:
     )
     genstack = pd.read_csv(STAGE_1_DATA / "mbie" / "gen_stack.csv")
 
-    emi_md = pd.read_parquet(
-        STAGE_1_DATA / "electricity_authority" / "emi_md.parquet", engine="pyarrow"
+    # only the base year partition of the EMI dataset is read
+    emi_md = read_parquet_dataset(
+        STAGE_1_DATA / "electricity_authority" / "emi_md",
+        columns=["Trading_Date", "Gen_Code", "Fuel_Code", "Tech_Code", "Value"],
+        filters=[("Year", "==", BASE_YEAR)],
     )
     emi_solar = pd.read_csv(
         STAGE_1_DATA / "electricity_authority" / "emi_distributed_solar.csv"
@@ -280,7 +283,7 @@ def main() -> None:
     emi_md["Trading_Date"] = pd.to_datetime(emi_md["Trading_Date"])
     emi_md["Period"] = emi_md["Trading_Date"].dt.year
     emi_md = (
-        emi_md.groupby(["Period", "Gen_Code", "Fuel_Code", "Tech_Code"])
+        emi_md.groupby(["Period", "Gen_Code", "Fuel_Code", "Tech_Code"], observed=True)
         .sum("Value")
         .reset_index()
     )
@@ -20,6 +20,10 @@ from prepare_times_nz.stage_1.vehicle_costs import (
     COST_COLS,
     get_rail_columns,
 )
+from prepare_times_nz.stage_2.common.share_matching import (
+    compile_share_lookup,
+    match_shares,
+)
 from prepare_times_nz.stage_2.transport import (
     FUEL_SHARE,
     FUEL_SPLIT_MAP,
@@ -28,6 +32,7 @@ from prepare_times_nz.stage_2.transport import (
     REGIONAL_SPLIT,
     TRUCK_NAMES,
 )
+from prepare_times_nz.utilities.data_in_out import read_excel_cached
 from prepare_times_nz.utilities.filepaths import DATA_RAW, STAGE_1_DATA, STAGE_2_DATA
 from prepare_times_nz.utilities.logger_setup import logger
 
@@ -62,21 +67,21 @@ ACT_BND_0 = -1  # Interpolation rule for ACT_BND
 def read_energy_balance(sheet_name: str) -> pd.DataFrame:
     """MBIE energy balance in *mbie* folder."""
     xls = INPUT_LOCATION_MBIE / "energy-balance-tables.xlsx"
-    return pd.read_excel(xls, sheet_name=sheet_name, header=[2, 3]).round(6)
+    return read_excel_cached(xls, sheet_name=sheet_name, header=[2, 3]).round(6)
 
 
 def read_rail_data() -> pd.DataFrame:
     """
     Reads KiwiRail efficiency data from the shared Excel input file."""
     path = INPUT_LOCATION_KIWIRAIL / "Kiwirail data check 2022-23 Input data.xlsx"
-    df = pd.read_excel(path, skiprows=369)
+    df = read_excel_cached(path, skiprows=369)
     return df.rename(columns=str.strip).round(6)
 
 
 def read_kiwirail_energy() -> pd.DataFrame:
     """Kiwirail fuel energy inputs in *kiwirail* folder (skips header rows)."""
     xls = INPUT_LOCATION_KIWIRAIL / "Kiwirail data check 2022-23 Input data.xlsx"
-    return pd.read_excel(xls, skiprows=369).round(6)
+    return read_excel_cached(xls, skiprows=369).round(6)
 
 
 # ════════════════════════════════════════════════════════════════
@@ -86,45 +91,99 @@ def read_kiwirail_energy() -> pd.DataFrame:
 
 def vehicle_counts_expanded(vc: pd.DataFrame) -> pd.DataFrame:
     """Expands aggregated vehicle count records by splitting them into fuel type and
-    technology combinations using predefined mappings."""
-    vc = vc.copy()
+    technology combinations using predefined mappings.
+
+    Rows whose (vehicletype, custom_motive_group) is in FUEL_SPLIT_MAP are split
+    by its fractions; the rest take their fuel and technology from
+    MOTIVE_GROUP_MAP (or none). Rows keep the order of vc."""
+    vc = vc[["vehicletype", "custom_motive_group", "vehicle_count"]].copy()
     vc["vehicletype"] = vc["vehicletype"].replace(TRUCK_NAMES)
+    vc["row"] = np.arange(len(vc))
 
-    def expand_row(row):
-        key = (row["vehicletype"], row["custom_motive_group"])
-        motive = row["custom_motive_group"]
-
-        if key in FUEL_SPLIT_MAP:
-            return [
-                {
-                    "vehicletype": row["vehicletype"],
-                    "fueltype": s["fueltype"],
-                    "technology": s["technology"],
-                    "vehicle_count": row["vehicle_count"] * s["fraction"],
-                }
-                for s in FUEL_SPLIT_MAP[key]
-            ]
-        if motive in MOTIVE_GROUP_MAP:
-            fuel, tech = MOTIVE_GROUP_MAP[motive]
-            return [
-                {
-                    "vehicletype": row["vehicletype"],
-                    "fueltype": fuel,
-                    "technology": tech,
-                    "vehicle_count": row["vehicle_count"],
-                }
-            ]
-        return [
+    fuel_splits = pd.DataFrame(
+        [
+            {"vehicletype": vt, "custom_motive_group": motive, "order": i, **split}
+            for (vt, motive), splits in FUEL_SPLIT_MAP.items()
+            for i, split in enumerate(splits)
+        ]
+    )
+    motive_groups = pd.DataFrame(
+        [(motive, fuel, tech) for motive, (fuel, tech) in MOTIVE_GROUP_MAP.items()],
+        columns=["custom_motive_group", "fueltype", "technology"],
+    )
+
+    split = vc.merge(fuel_splits, on=["vehicletype", "custom_motive_group"])
+    split["vehicle_count"] = split["vehicle_count"] * split["fraction"]
+    unsplit = vc[~vc["row"].isin(split["row"])].merge(
+        motive_groups, on="custom_motive_group", how="left"
+    )
+    unsplit["order"] = 0
+
+    df = pd.concat([part for part in (split, unsplit) if not part.empty])
+    df = df.sort_values(["row", "order"], kind="stable")
+    return df[["vehicletype", "fueltype", "technology", "vehicle_count"]].reset_index(
+        drop=True
+    )
+
+
+def split_by_region(df: pd.DataFrame) -> pd.DataFrame:
+    """Expands each row into a row per region, scaling vktvalue, pjvalue and
+    vehicle_count by the REGIONAL_SPLIT fractions for its (vehicletype, fueltype),
+    or else for its vehicletype. Rows with neither are dropped."""
+    splits = pd.DataFrame(
+        [
             {
-                "vehicletype": row["vehicletype"],
-                "fueltype": None,
-                "technology": None,
-                "vehicle_count": row["vehicle_count"],
+                "vehicletype": key[0] if isinstance(key, tuple) else key,
+                "fueltype": key[1] if isinstance(key, tuple) else None,
+                "region": region,
+                "fraction": fraction,
+                "order": i,
             }
+            for key, split in REGIONAL_SPLIT.items()
+            for i, (region, fraction) in enumerate(split.items())
         ]
+    )
+    by_fuel = splits[splits["fueltype"].notna()]
+    by_vehicle = splits[splits["fueltype"].isna()].drop(columns="fueltype")
+
+    columns = list(df.columns) + ["region"]
+    df = df.assign(row=np.arange(len(df)))
+    fuel_rows = df.merge(by_fuel, on=["vehicletype", "fueltype"])
+    vehicle_rows = df[~df["row"].isin(fuel_rows["row"])].merge(
+        by_vehicle, on="vehicletype"
+    )
 
-    records = [rec for _, r in vc.iterrows() for rec in expand_row(r)]
-    return pd.DataFrame(records)
+    df = pd.concat([part for part in (fuel_rows, vehicle_rows) if not part.empty])
+    df = df.sort_values(["row", "order"], kind="stable")
+    for col in ["vktvalue", "pjvalue", "vehicle_count"]:
+        df[col] = df[col] * df["fraction"]
+    return df[columns].reset_index(drop=True)
+
+
+def get_fuel_consumption(df: pd.DataFrame) -> pd.Series:
+    """Litres per 100km from efficiency_calc, for the fuels in MJ_PER_LITRE."""
+    return 100 / (df["efficiency_calc"] * df["fueltype"].map(MJ_PER_LITRE))
+
+
+def get_fuel_shares(df: pd.DataFrame) -> pd.Series:
+    """FUEL_SHARE of each row, matched on (vehicletype, fueltype, technology),
+    or else on (region, vehicletype, fueltype)."""
+    shares = pd.DataFrame(
+        [(*key, value["fuelshare"]) for key, value in FUEL_SHARE.items()],
+        columns=["key_0", "key_1", "key_2", "fuelshare"],
+    )
+    levels = [
+        ("technology", ["vehicletype", "fueltype", "technology"]),
+        ("region", ["region", "vehicletype", "fueltype"]),
+    ]
+    lookup = compile_share_lookup(
+        [
+            (name, shares.set_axis(keys + ["fuelshare"], axis=1), keys)
+            for name, keys in levels
+        ],
+        share_column="fuelshare",
+    )
+    return match_shares(df, lookup)["Share"]
 
 
 def mbie_total_road_energy(year: int) -> pd.DataFrame:
@@ -430,28 +489,7 @@ def build_baseyear_table(year: int) -> pd.DataFrame:
         counts_expanded, on=["vehicletype", "fueltype", "technology"], how="left"
     )
 
-    # Expand rows by region and apply split
-    rows = []
-    for _, row in df.iterrows():
-        key = (row["vehicletype"], row["fueltype"])
-        split = REGIONAL_SPLIT.get(key) or REGIONAL_SPLIT.get(row["vehicletype"])
-        if split:
-            for region, frac in split.items():
-                new_row = row.copy()
-                new_row["region"] = region
-                new_row["vktvalue"] = (
-                    row["vktvalue"] * frac if pd.notnull(row["vktvalue"]) else np.nan
-                )
-                new_row["pjvalue"] = (
-                    row["pjvalue"] * frac if pd.notnull(row["pjvalue"]) else np.nan
-                )
-                new_row["vehicle_count"] = (
-                    row["vehicle_count"] * frac
-                    if pd.notnull(row["vehicle_count"])
-                    else np.nan
-                )
-                rows.append(new_row)
-    df = pd.DataFrame(rows)
+    df = split_by_region(df)
 
     df = (
         df.merge(vkt_shares, on="vehicletype", how="left")  # adds tertile & vktshare
@@ -546,14 +584,7 @@ def build_baseyear_table(year: int) -> pd.DataFrame:
         "efficiency",
     ] = 1.0
 
-    def to_l_per_100km(row):
-        fuel = row["fueltype"]
-        eff = row["efficiency_calc"]
-        if pd.notnull(eff) and fuel in MJ_PER_LITRE:
-            return 100 / (eff * MJ_PER_LITRE[fuel])
-        return np.nan
-
-    df["fuel_consumption"] = df.apply(to_l_per_100km, axis=1)
+    df["fuel_consumption"] = get_fuel_consumption(df)
 
     # For electricity: MJ to kWh conversion factor is 3.6
     df["energy_consumption"] = np.where(
@@ -586,19 +617,7 @@ def build_baseyear_table(year: int) -> pd.DataFrame:
         df["operation_cost_2023_nzd"] / 1000
     )  # converting to 000NZD/km/vehicle
 
-    # get FUEL_SHARE values
-    def get_fuelshare(row):
-        # Try (vehicletype, fueltype, technology)
-        key1 = (row["vehicletype"], row["fueltype"], row["technology"])
-        # Try (region, vehicletype, fueltype)
-        key2 = (row["region"], row["vehicletype"], row["fueltype"])
-        if key1 in FUEL_SHARE:
-            return FUEL_SHARE[key1]["fuelshare"]
-        if key2 in FUEL_SHARE:
-            return FUEL_SHARE[key2]["fuelshare"]
-        return np.nan
-
-    df["fuelshare"] = df.apply(get_fuelshare, axis=1)
+    df["fuelshare"] = get_fuel_shares(df)
     df = df.drop(
         columns=[
             "efficiency_vfm_pj_mkm",
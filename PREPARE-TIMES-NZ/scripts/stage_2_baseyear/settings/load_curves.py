@@ -42,6 +42,12 @@ Potential checking outputs:
 
 from prepare_times_nz.stage_2.load_curves import national_curves, residential_curves
 
-if __name__ == "__main__":
+
+def main() -> None:
+    """Build the national and residential load curves"""
     national_curves.main()
     residential_curves.main()
+
+
+if __name__ == "__main__":
+    main()
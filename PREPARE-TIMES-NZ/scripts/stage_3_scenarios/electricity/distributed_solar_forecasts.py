@@ -1,7 +1,6 @@
 """Calls the script to prepare distributed solar forecasts for TIMES-NZ."""
 
-from prepare_times_nz.stage_3.distributed_solar_forecasts import (
-    main as distributed_solar_forecasts,
-)
+from prepare_times_nz.stage_3.distributed_solar_forecasts import main
 
-distributed_solar_forecasts()
+if __name__ == "__main__":
+    main()
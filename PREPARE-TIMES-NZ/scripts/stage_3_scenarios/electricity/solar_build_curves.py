@@ -1,11 +1,18 @@
 """
 Aggregate NIWA solar hourly profiles to TIMES-NZ timeslices.
+
+The hourly generation of each scenario-zone pair is read straight from the
+PVWatts cache (see prepare_times_nz.stage_3.pvwatts_cache), using the cache
+keys in the zone summary written by solar_run_hourly_profiles.py.
 """
 
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
-from prepare_times_nz.utilities.data_in_out import _save_data
+from prepare_times_nz.stage_3.pvwatts_cache import load_cached_generation
+from prepare_times_nz.stage_3.solar_hourly import SOLAR_TIME_INDEX
+from prepare_times_nz.utilities.data_in_out import _save_data, read_intermediate
 from prepare_times_nz.utilities.filepaths import ASSUMPTIONS, STAGE_3_DATA
 
 STATIC_RENEWABLE_CURVES_FILE = (
@@ -16,7 +23,7 @@ SOLAR_ZONE_WEIGHTS_FILE = (
 )
 
 OUTPUT_ROOT = STAGE_3_DATA / "electricity/solar_af"
-HOURLY_DIR = OUTPUT_ROOT / "hourly"
+ZONE_SUMMARY_FILE = OUTPUT_ROOT / "metadata/all_scenarios_zone_summary.csv"
 SOLAR_AF_DIR = OUTPUT_ROOT / "timeslices"
 
 SOLAR_AF_FILE = SOLAR_AF_DIR / "solar_availability_factors.csv"
@@ -77,17 +84,38 @@ def load_zone_weights() -> pd.DataFrame:
     return zone_weights.sort_values(["Island", "ZoneCode"]).reset_index(drop=True)
 
 
-def aggregate_zone_availability_factors(hourly: pd.DataFrame) -> pd.DataFrame:
+def load_zone_generation() -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Load the scenario-zone pairs of the last PVWatts run and their cached
+    hourly generation, as a (pairs, 8760) array in zone summary order.
+    """
+    zone_runs = pd.read_csv(ZONE_SUMMARY_FILE)
+    generation = load_cached_generation(zone_runs["CacheKey"].tolist())
+    return zone_runs, generation
+
+
+def aggregate_zone_availability_factors(
+    zone_runs: pd.DataFrame, generation: np.ndarray, hour_timeslices: pd.Series
+) -> pd.DataFrame:
     """
     Aggregate hourly zone output into TIMES-NZ availability factors.
+
+    generation holds one row of hourly output per row of zone_runs, and
+    hour_timeslices gives the timeslice of each hour.
     """
-    grouped = hourly.groupby(
-        ["Tech_TIMES", "Scenario", "ZoneCode", "Region", "Island", "TimeSlice"],
-        as_index=False,
-    ).agg(
-        AvailabilityFactor=("generation_kw_per_kw", "mean"),
-        HoursInTimeSlice=("generation_kw_per_kw", "size"),
-    )
+    codes, timeslices = pd.factorize(hour_timeslices, sort=True)
+    hours_in_slice = np.bincount(codes, minlength=len(timeslices))
+    # (pairs, hours) @ (hours, timeslices) one-hot: total output per timeslice
+    in_slice = np.zeros((len(codes), len(timeslices)))
+    in_slice[np.arange(len(codes)), codes] = 1.0
+    means = generation.astype(np.float64) @ in_slice / hours_in_slice
+
+    pairs = zone_runs[["Tech_TIMES", "ZoneCode", "Region", "Island"]]
+    grouped = pairs.loc[pairs.index.repeat(len(timeslices))].reset_index(drop=True)
+    grouped.insert(1, "Scenario", grouped["Tech_TIMES"])
+    grouped["TimeSlice"] = np.tile(np.asarray(timeslices, dtype=object), len(pairs))
+    grouped["AvailabilityFactor"] = means.ravel()
+    grouped["HoursInTimeSlice"] = np.tile(hours_in_slice, len(pairs))
 
     return grouped.sort_values(["Tech_TIMES", "ZoneCode", "TimeSlice"]).reset_index(
         drop=True
@@ -166,10 +194,11 @@ def build_solar_curves():
     SOLAR_AF_DIR.mkdir(parents=True, exist_ok=True)
     RENEWABLE_CURVES_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-    hourly = pd.read_csv(
-        HOURLY_DIR / "all_scenarios_hourly_long.csv", parse_dates=["Trading_Date"]
+    zone_runs, generation = load_zone_generation()
+    time_index = read_intermediate(SOLAR_TIME_INDEX, ["hour_of_year", "TimeSlice"])
+    zone_factors = aggregate_zone_availability_factors(
+        zone_runs, generation, time_index.sort_values("hour_of_year")["TimeSlice"]
     )
-    zone_factors = aggregate_zone_availability_factors(hourly)
     zone_weights = load_zone_weights()
     island_curves = aggregate_island_curves(zone_factors, zone_weights)
     static_curves = pd.read_csv(STATIC_RENEWABLE_CURVES_FILE)
@@ -195,5 +224,10 @@ def build_solar_curves():
     )
 
 
-if __name__ == "__main__":
+def main() -> None:
+    """Build the solar availability curves"""
     build_solar_curves()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,12 @@ from __future__ import annotations
 import csv
 
 import pandas as pd
+from prepare_times_nz.stage_3.solar_hourly import read_solar_hourly
 from prepare_times_nz.utilities.filepaths import PREP_LOCATION, STAGE_3_DATA
 
 SOLAR_AF_FILE = (
     STAGE_3_DATA / "electricity/solar_af/timeslices/solar_availability_factors.csv"
 )
-HOURLY_FILE = STAGE_3_DATA / "electricity/solar_af/hourly/all_scenarios_hourly_long.csv"
 DOC_TABLE_DIR = PREP_LOCATION / "docs/source/model_methodology/electricity/tables"
 
 TECH_TABLE_FILES = {
@@ -91,7 +91,8 @@ def export_doc_tables():
 
     timeslice_df = pd.read_csv(SOLAR_AF_FILE)
     annual_df = (
-        pd.read_csv(HOURLY_FILE)
+        read_solar_hourly(["Tech_TIMES", "Island", "generation_kw_per_kw"])
+        .astype({"generation_kw_per_kw": "float64"})
         .groupby(["Tech_TIMES", "Island"], as_index=False)["generation_kw_per_kw"]
         .mean()
     )
@@ -104,5 +105,10 @@ def export_doc_tables():
             writer.writerows(rows)
 
 
-if __name__ == "__main__":
+def main() -> None:
+    """Export the solar documentation tables"""
     export_doc_tables()
+
+
+if __name__ == "__main__":
+    main()
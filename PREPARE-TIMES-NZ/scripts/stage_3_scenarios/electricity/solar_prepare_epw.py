@@ -237,5 +237,10 @@ def prepare_epw_files():
         )
 
 
-if __name__ == "__main__":
+def main() -> None:
+    """Prepare the NIWA EPW files"""
     prepare_epw_files()
+
+
+if __name__ == "__main__":
+    main()
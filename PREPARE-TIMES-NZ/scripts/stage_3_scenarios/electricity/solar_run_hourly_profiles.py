@@ -1,24 +1,72 @@
 """
 Run PVWatts hourly solar profiles for the configured NIWA scenarios.
+
+Every scenario x zone pair is an independent PVWatts run, so the grid is
+spread over a pool of worker processes, each of which builds one PVWatts
+model and reconfigures it for every pair it is given (see
+prepare_times_nz.stage_3.pvwatts_model):
+
+    python solar_run_hourly_profiles.py --jobs 4
+
+"--jobs 0" (the default) uses one process per CPU, and "--jobs 1" runs
+the grid in this process. The outputs are the same whatever the number of
+jobs.
+
+Runs are cached by a hash of their EPW file, model inputs and PySAM version
+(see prepare_times_nz.stage_3.pvwatts_cache), so only scenario-zone pairs
+that are new or have changed inputs are simulated. solar_build_curves.py
+reads the generation straight from the cache, using the cache keys listed
+in the zone summary.
+
+The hourly profiles are saved as two parquet datasets (see
+prepare_times_nz.stage_3.solar_hourly): a shared time index with one row
+per hour, and the generation of every scenario, zone and hour, joined to it
+by hour_of_year. The previous wide and long CSV files are only written when
+asked for, with "--csv" or ``doit csv_mirror=1``.
 """
 
 from __future__ import annotations
 
+import argparse
 import csv
 import json
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from typing import Any
 from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
+import PySAM
 from prepare_times_nz.stage_0.stage_0_settings import BASE_YEAR
+from prepare_times_nz.stage_3.pvwatts_cache import (
+    PVWATTS_CACHE_DIR,
+    get_cache_key,
+    hash_epw_file,
+    load_cached_run,
+    save_cached_run,
+)
+from prepare_times_nz.stage_3.pvwatts_model import (
+    get_model_inputs,
+    init_pvwatts_worker,
+    simulate_pair,
+)
+from prepare_times_nz.stage_3.solar_hourly import (
+    SOLAR_GENERATION,
+    SOLAR_TIME_INDEX,
+    join_time_index,
+)
+from prepare_times_nz.utilities.data_in_out import (
+    csv_mirror_enabled,
+    get_intermediate_path,
+    save_intermediate,
+)
 from prepare_times_nz.utilities.filepaths import ASSUMPTIONS, STAGE_3_DATA
+from prepare_times_nz.utilities.logger_setup import logger
 from prepare_times_nz.utilities.timeslices import create_timeslices
 
-# pylint: disable=wrong-import-order
-from PySAM import Pvwattsv8
-
 SOLAR_SCENARIOS_FILE = (
     ASSUMPTIONS / "electricity_generation/renewable_curves/SolarPvScenarios.csv"
 )
@@ -33,6 +81,7 @@ OUTPUT_ROOT = STAGE_3_DATA / "electricity/solar_af"
 PREPARED_EPW_DIR = OUTPUT_ROOT / "prepared_epw"
 HOURLY_DIR = OUTPUT_ROOT / "hourly"
 METADATA_DIR = OUTPUT_ROOT / "metadata"
+ZONE_SUMMARY_FILE = METADATA_DIR / "all_scenarios_zone_summary.csv"
 
 EPW_FILENAME_PATTERN = re.compile(r"^TMY3_NZ_(?P<zone>[A-Z]{2})\.epw$")
 
@@ -113,6 +162,24 @@ MODULE_TYPE_MAP = {
     "thin_film": 2,
 }
 
+# Time-index columns repeated for every zone in the long-format output
+LONG_TIME_COLUMNS = [
+    "Trading_Date",
+    "Year",
+    "Month",
+    "Day",
+    "Hour",
+    "EPWHour",
+    "Minute",
+    "WallClock_DateTime",
+    "WallClock_Date",
+    "WallClock_Year",
+    "WallClock_Month",
+    "WallClock_Day",
+    "WallClock_Hour",
+    "WallClock_UtcOffsetHours",
+]
+
 EPW_STANDARD_TZ = timezone(timedelta(hours=12), name="NZST_FIXED")
 NZ_WALLCLOCK_TZ = ZoneInfo("Pacific/Auckland")
 
@@ -371,163 +438,219 @@ def build_time_index(epw_files):
     return pd.DataFrame(format_time_index_rows(canonical))
 
 
-def build_model(epw_path, scenario):
+def get_jobs(jobs: int, pairs: int) -> int:
     """
-    Build a PVWatts model for one scenario-zone pair.
+    Number of processes to use: 0 means one per CPU, and there is never
+    more than one per pair.
     """
-    model = Pvwattsv8.default("PVWattsNone")  # pylint: disable=c-extension-no-member
-    model.SolarResource.solar_resource_file = str(epw_path.resolve())
-    model.Lifetime.system_use_lifetime_output = 0
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    return max(1, min(jobs, pairs))
 
-    model.SystemDesign.system_capacity = float(scenario["SystemCapacityKW"])
-    model.SystemDesign.array_type = int(scenario["ArrayTypeCode"])
-    model.SystemDesign.tilt = float(scenario["TiltDeg"])
-    model.SystemDesign.azimuth = float(scenario["AzimuthDeg"])
-    model.SystemDesign.module_type = int(scenario["ModuleTypeCode"])
-    model.SystemDesign.dc_ac_ratio = float(scenario["DcAcRatio"])
-    model.SystemDesign.inv_eff = float(scenario["InvEffPercent"])
-    model.SystemDesign.losses = float(scenario["LossesPercent"])
-    model.SystemDesign.bifaciality = float(scenario["Bifaciality"])
-    model.SystemDesign.gcr = float(scenario["Gcr"])
-    model.SystemDesign.en_snowloss = 0
 
-    use_weather_file_albedo = 1.0 if scenario["UseWeatherFileAlbedo"] else 0.0
-    model.SolarResource.use_wf_albedo = use_weather_file_albedo
-    if not use_weather_file_albedo:
-        albedo = float(scenario["Albedo"])
-        model.SolarResource.albedo = tuple(albedo for _ in range(12))
+def simulate_pairs(pairs, jobs: int = 0):
+    """
+    Run simulate_pair() for every (scenario, zone, epw_path) in pairs, on a
+    pool of worker processes if jobs allows more than one.
+
+    Yields (position in pairs, run) as each run finishes, so the caller can
+    keep every finished run even if a later one fails or is interrupted.
+    """
+    jobs = get_jobs(jobs, len(pairs))
 
-    model.Shading.shading_en_azal = 0
-    model.Shading.shading_en_diff = 0
-    model.Shading.shading_en_mxh = 0
-    model.Shading.shading_en_string_option = 0
-    model.Shading.shading_en_timestep = 0
+    if jobs == 1:
+        init_pvwatts_worker()
+        for i, pair in enumerate(pairs):
+            yield i, simulate_pair(*pair)
+        return
 
-    return model
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=init_pvwatts_worker)
+    try:
+        futures = {pool.submit(simulate_pair, *pair): i for i, pair in enumerate(pairs)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        # don't start any more runs if the caller stops early
+        pool.shutdown(cancel_futures=True)
 
 
-def _json_default(value: Any):
+def get_pair_cache_keys(scenarios, epw_files):
     """
-    Convert pandas / numpy scalar values to plain Python types for JSON output.
+    PVWatts cache key of every scenario x zone pair, by (scenario name, zone).
     """
-    if hasattr(value, "item"):
-        return value.item()
-    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    epw_hashes = {zone: hash_epw_file(epw_files[zone]) for zone in ZONE_ORDER}
+    return {
+        (scenario["Tech_TIMES"], zone): get_cache_key(
+            epw_hashes[zone], get_model_inputs(scenario), PySAM.__version__
+        )
+        for scenario in scenarios
+        for zone in ZONE_ORDER
+    }
 
 
-def collect_zone_hourly_rows(scenario_name, zone, time_index, generation):
+def run_pvwatts_grid(scenarios, epw_files, jobs: int = 0, cache_dir=PVWATTS_CACHE_DIR):
     """
-    Collect long-format hourly rows for a single zone.
+    Run PVWatts for every scenario x zone pair that is not already cached.
+
+    Each new run is added to the cache in cache_dir as soon as it finishes,
+    so an interrupted grid only reruns the pairs it had not finished. Returns,
+    for each scenario
+    name, a (zones, 8760) float32 generation array with one row per zone in
+    ZONE_ORDER, and the list of zone summaries.
     """
-    region = ZONE_CODE_TO_REGION[zone]
-    island = ZONE_CODE_TO_ISLAND[zone]
+    keys = get_pair_cache_keys(scenarios, epw_files)
+    runs = {pair: load_cached_run(key, cache_dir) for pair, key in keys.items()}
 
-    rows = []
-    for time_row, generation_kw_per_kw in zip(
-        time_index.itertuples(index=False), generation
-    ):
-        rows.append(
+    missing = [pair for pair, run in runs.items() if run is None]
+    logger.info(
+        "PVWatts: %s of %s scenario-zone runs cached, running %s",
+        len(runs) - len(missing),
+        len(runs),
+        len(missing),
+    )
+    scenario_by_name = {scenario["Tech_TIMES"]: scenario for scenario in scenarios}
+    new_runs = simulate_pairs(
+        [(scenario_by_name[name], zone, epw_files[zone]) for name, zone in missing],
+        jobs,
+    )
+    for i, run in new_runs:
+        save_cached_run(keys[missing[i]], run, cache_dir)
+        runs[missing[i]] = run
+
+    grid = {}
+    for scenario_name in scenario_by_name:
+        pair_runs = [runs[(scenario_name, zone)] for zone in ZONE_ORDER]
+        zone_results = [
             {
-                "Scenario": scenario_name,
                 "Tech_TIMES": scenario_name,
                 "ZoneCode": zone,
-                "Region": region,
-                "Island": island,
-                "Trading_Date": time_row.Trading_Date,
-                "Year": time_row.Year,
-                "Month": time_row.Month,
-                "Day": time_row.Day,
-                "Hour": time_row.Hour,
-                "EPWHour": time_row.EPWHour,
-                "Minute": time_row.Minute,
-                "WallClock_DateTime": time_row.WallClock_DateTime,
-                "WallClock_Date": time_row.WallClock_Date,
-                "WallClock_Year": time_row.WallClock_Year,
-                "WallClock_Month": time_row.WallClock_Month,
-                "WallClock_Day": time_row.WallClock_Day,
-                "WallClock_Hour": time_row.WallClock_Hour,
-                "WallClock_UtcOffsetHours": time_row.WallClock_UtcOffsetHours,
-                "generation_kw_per_kw": generation_kw_per_kw,
+                "Region": ZONE_CODE_TO_REGION[zone],
+                "Island": ZONE_CODE_TO_ISLAND[zone],
+                "EPWFile": epw_files[zone].name,
+                "AnnualEnergyKWhPerKWDC": float(
+                    run["generation"].sum(dtype=np.float64)
+                ),
+                "CapacityFactorPercent": run["capacity_factor"],
+                "KWhPerKW": run["kwh_per_kw"],
+                "CacheKey": keys[(scenario_name, zone)],
             }
+            for zone, run in zip(ZONE_ORDER, pair_runs)
+        ]
+        grid[scenario_name] = (
+            np.vstack([run["generation"] for run in pair_runs]),
+            zone_results,
         )
+    return grid
 
-    return rows
+
+def _json_default(value: Any):
+    """
+    Convert pandas / numpy scalar values to plain Python types for JSON output.
+    """
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
 
-def run_scenario_hourly_profiles(scenario, epw_files, time_index):
+def build_wide_frame(time_index, generation):
     """
-    Run one solar archetype across all NIWA zones.
+    Add one generation column per zone to the shared time index.
     """
-    scenario_name = scenario["Tech_TIMES"]
-    wide = time_index.copy()
-    long_rows = []
-    zone_results = []
+    zone_columns = pd.DataFrame(generation.T, columns=ZONE_ORDER)
+    return pd.concat([time_index, zone_columns], axis=1)
 
-    for zone in ZONE_ORDER:
-        region = ZONE_CODE_TO_REGION[zone]
-        island = ZONE_CODE_TO_ISLAND[zone]
-        model = build_model(epw_files[zone], scenario)
-        model.execute()
-        generation = [float(value) for value in model.Outputs.gen]
 
-        if len(generation) != 8760:
-            raise ValueError(
-                f"Expected 8760 PVWatts outputs for {scenario_name}/{zone}, "
-                f"got {len(generation)}"
-            )
+def build_generation_frame(scenario_name, generation):
+    """
+    Build the generation rows of one scenario: every zone and hour_of_year.
 
-        wide[zone] = generation
-        zone_results.append(
-            {
-                "Tech_TIMES": scenario_name,
-                "ZoneCode": zone,
-                "Region": region,
-                "Island": island,
-                "EPWFile": epw_files[zone].name,
-                "AnnualEnergyKWhPerKWDC": float(sum(generation)),
-                "CapacityFactorPercent": float(model.Outputs.capacity_factor),
-                "KWhPerKW": float(model.Outputs.kwh_per_kw),
-            }
-        )
-        long_rows.extend(
-            collect_zone_hourly_rows(
-                scenario_name=scenario_name,
-                zone=zone,
-                time_index=time_index,
-                generation=generation,
-            )
-        )
+    The (zones, 8760) generation array is flattened zone by zone, so zone
+    labels are repeated and hour numbers tiled to match.
+    """
+    zones, hours = generation.shape
+    zone_codes = np.repeat(ZONE_ORDER, hours)
+    return pd.DataFrame(
+        {
+            "Scenario": scenario_name,
+            "Tech_TIMES": scenario_name,
+            "ZoneCode": zone_codes,
+            "Region": pd.Series(zone_codes).map(ZONE_CODE_TO_REGION).to_numpy(),
+            "Island": pd.Series(zone_codes).map(ZONE_CODE_TO_ISLAND).to_numpy(),
+            "hour_of_year": np.tile(np.arange(1, hours + 1), zones),
+            "generation_kw_per_kw": generation.ravel(),
+        }
+    )
+
+
+def build_long_frame(scenario_name, time_index, generation):
+    """
+    Build long-format hourly rows for every zone of one scenario, with the
+    time index columns (and timeslices) repeated on every row.
+    """
+    long_df = join_time_index(
+        build_generation_frame(scenario_name, generation),
+        time_index[["hour_of_year"] + LONG_TIME_COLUMNS + ["TimeSlice"]],
+    )
+    labels = ["Scenario", "Tech_TIMES", "ZoneCode", "Region", "Island"]
+    return long_df[labels + LONG_TIME_COLUMNS + ["generation_kw_per_kw", "TimeSlice"]]
 
-    long_df = pd.DataFrame(long_rows)
-    long_df = create_timeslices(
-        long_df,
+
+def add_timeslices(time_index):
+    """
+    Label each hour of the time index with its wall-clock timeslice.
+    """
+    return create_timeslices(
+        time_index.copy(),
         date_col="WallClock_Date",
         hour_col="WallClock_Hour",
     )
-    return wide, long_df, zone_results
 
 
-def save_scenario_outputs(scenario_name, scenario, wide, long_df, zone_results):
+def assemble_scenario_outputs(scenario_name, time_index, generation):
     """
-    Save scenario outputs and metadata.
+    Build the wide and long hourly CSV frames for one scenario's generation,
+    from the time index with its timeslices.
     """
-    wide_path = HOURLY_DIR / f"{scenario_name}_hourly_by_zone.csv"
-    long_path = HOURLY_DIR / f"{scenario_name}_hourly_long.csv"
-    metadata_path = METADATA_DIR / f"{scenario_name}_run_metadata.json"
+    wide = build_wide_frame(time_index.drop(columns="TimeSlice"), generation)
+    long_df = build_long_frame(scenario_name, time_index, generation)
+    return wide, long_df
+
+
+def save_scenario_csvs(scenario_name, wide, long_df):
+    """
+    Save the wide and long hourly CSVs of one scenario and return their paths.
+    """
+    outputs = {
+        "HourlyByZoneCsv": HOURLY_DIR / f"{scenario_name}_hourly_by_zone.csv",
+        "HourlyLongCsv": HOURLY_DIR / f"{scenario_name}_hourly_long.csv",
+    }
+    wide.to_csv(outputs["HourlyByZoneCsv"], index=False)
+    long_df.to_csv(outputs["HourlyLongCsv"], index=False)
+    return outputs
+
+
+def remove_hourly_csvs():
+    """
+    Remove hourly CSVs left by an earlier run, so they cannot be mistaken
+    for current data.
+    """
+    for pattern in ["*_hourly_by_zone.csv", "*_hourly_long.csv"]:
+        for path in HOURLY_DIR.glob(pattern):
+            path.unlink()
 
-    wide.to_csv(wide_path, index=False)
-    long_df.to_csv(long_path, index=False)
 
+def save_scenario_metadata(scenario_name, scenario, zone_results, outputs):
+    """
+    Save the settings, zone results and output files of one scenario.
+    """
+    metadata_path = METADATA_DIR / f"{scenario_name}_run_metadata.json"
     with metadata_path.open("w", encoding="utf-8") as handle:
         json.dump(
             {
                 "Tech_TIMES": scenario_name,
                 "Settings": scenario,
                 "ZoneResults": zone_results,
-                "Outputs": {
-                    "HourlyByZoneCsv": str(wide_path),
-                    "HourlyLongCsv": str(long_path),
-                },
+                "Outputs": {label: str(path) for label, path in outputs.items()},
             },
             handle,
             indent=2,
@@ -535,43 +658,93 @@ def save_scenario_outputs(scenario_name, scenario, wide, long_df, zone_results):
         )
 
 
-def run_hourly_profiles():
+def run_hourly_profiles(jobs: int = 0, write_csv: bool | None = None):
     """
     Run PVWatts across all configured solar archetypes and NIWA zones.
+
+    The wide and long CSVs are also written if write_csv is True, or if it
+    is None and CSV copies of intermediate data are turned on.
     """
+    if write_csv is None:
+        write_csv = csv_mirror_enabled()
+
     scenarios = load_solar_scenarios()
     epw_files = discover_epw_files(PREPARED_EPW_DIR)
-    time_index = build_time_index(epw_files)
+    time_index = add_timeslices(build_time_index(epw_files))
 
     ensure_output_dir(HOURLY_DIR)
     ensure_output_dir(METADATA_DIR)
 
-    combined_rows = []
-    metadata_rows = []
+    grid = run_pvwatts_grid(scenarios, epw_files, jobs)
+
+    save_intermediate(
+        time_index, SOLAR_TIME_INDEX, "Solar hourly time index", write_csv
+    )
+    save_intermediate(
+        pd.concat(
+            [
+                build_generation_frame(scenario_name, generation)
+                for scenario_name, (generation, _) in grid.items()
+            ],
+            ignore_index=True,
+        ),
+        SOLAR_GENERATION,
+        "Solar hourly generation",
+        write_csv,
+    )
+    if not write_csv:
+        remove_hourly_csvs()
 
+    long_frames = []
+    metadata_rows = []
     for scenario in scenarios:
         scenario_name = scenario["Tech_TIMES"]
-        wide, long_df, zone_results = run_scenario_hourly_profiles(
-            scenario=scenario,
-            epw_files=epw_files,
-            time_index=time_index,
-        )
-        save_scenario_outputs(
-            scenario_name=scenario_name,
-            scenario=scenario,
-            wide=wide,
-            long_df=long_df,
-            zone_results=zone_results,
-        )
-        combined_rows.append(long_df)
+        generation, zone_results = grid[scenario_name]
+        outputs = {
+            "HourlyTimeIndex": get_intermediate_path(SOLAR_TIME_INDEX),
+            "HourlyGeneration": get_intermediate_path(SOLAR_GENERATION),
+        }
+        if write_csv:
+            wide, long_df = assemble_scenario_outputs(
+                scenario_name, time_index, generation
+            )
+            outputs.update(save_scenario_csvs(scenario_name, wide, long_df))
+            long_frames.append(long_df)
+        save_scenario_metadata(scenario_name, scenario, zone_results, outputs)
         metadata_rows.extend(zone_results)
 
-    all_hourly = pd.concat(combined_rows, ignore_index=True)
-    all_hourly.to_csv(HOURLY_DIR / "all_scenarios_hourly_long.csv", index=False)
-    pd.DataFrame(metadata_rows).to_csv(
-        METADATA_DIR / "all_scenarios_zone_summary.csv", index=False
+    if write_csv:
+        pd.concat(long_frames, ignore_index=True).to_csv(
+            HOURLY_DIR / "all_scenarios_hourly_long.csv", index=False
+        )
+    pd.DataFrame(metadata_rows).to_csv(ZONE_SUMMARY_FILE, index=False)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments for the hourly solar profiles."""
+    parser = argparse.ArgumentParser(
+        description="Run PVWatts hourly solar profiles for every scenario and zone."
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Number of PVWatts worker processes (0 = one per CPU).",
+    )
+    parser.add_argument(
+        "--csv",
+        action="store_true",
+        default=None,
+        help="Also write the wide and long hourly CSV files.",
     )
+    return parser.parse_args()
+
+
+def main(jobs: int = 0, write_csv: bool | None = None) -> None:
+    """Run the hourly solar profiles"""
+    run_hourly_profiles(jobs=jobs, write_csv=write_csv)
 
 
 if __name__ == "__main__":
-    run_hourly_profiles()
+    args = parse_args()
+    main(jobs=args.jobs, write_csv=args.csv)
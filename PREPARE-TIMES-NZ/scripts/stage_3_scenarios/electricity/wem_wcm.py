@@ -1,7 +1,37 @@
 """Calls all our Winter Energy Margin scripts
 Note: this is called wem_wcm for historical reasons - the wcm refers
-to the Winter Capacity Margin, but the WCM settings are entirely in the config file"""
+to the Winter Capacity Margin, but the WCM settings are entirely in the config file
 
-from prepare_times_nz.stage_3.wem_wcm import main as wem_wcm
+Pass --margins to also write a margin sweep, eg
+    python wem_wcm.py --margins 0.1 0.16 0.2 --variants wem"""
 
-wem_wcm()
+import argparse
+
+from prepare_times_nz.stage_3.wem_wcm import WEM_VARIANTS, main
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Build the Winter Energy Margin user constraint tables."
+    )
+    parser.add_argument(
+        "--margins",
+        type=float,
+        nargs="+",
+        default=None,
+        help="Also write a table per margin (a fraction, eg 0.16) to margin_sweep/.",
+    )
+    parser.add_argument(
+        "--variants",
+        nargs="+",
+        choices=list(WEM_VARIANTS),
+        default=None,
+        help="Constraint variants to sweep (default: all).",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(margins=args.margins, variants=args.variants)
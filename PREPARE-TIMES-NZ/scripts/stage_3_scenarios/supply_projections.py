@@ -3,5 +3,12 @@
 from prepare_times_nz.stage_3.biomass_forecasts import main as biomass_projections
 from prepare_times_nz.stage_3.gas_forecasts import main as gas_projections
 
-gas_projections()
-biomass_projections()
+
+def main() -> None:
+    """Run the gas and biomass supply projections"""
+    gas_projections()
+    biomass_projections()
+
+
+if __name__ == "__main__":
+    main()
@@ -15,12 +15,19 @@ from prepare_times_nz.stage_4.electricity.renewable_curves import (
     main as write_renewable_curves,
 )
 
-# generation technologies
-write_new_ele_techs()
-# battery technologies
-write_new_ele_storage()
-# renewable availability curves
-write_renewable_curves()
-# fixed adjustment dates for availability.
-# note this depends on renewable curves so must always run afterwards
-write_fixed_install_adjustments()
+
+def main() -> None:
+    """Write the new electricity technology files"""
+    # generation technologies
+    write_new_ele_techs()
+    # battery technologies
+    write_new_ele_storage()
+    # renewable availability curves
+    write_renewable_curves()
+    # fixed adjustment dates for availability.
+    # note this depends on renewable curves so must always run afterwards
+    write_fixed_install_adjustments()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,24 +4,48 @@ Write Excel files in VEDA format.
 This script reads the normalised TOML metadata produced in **Stage 0**,
 pulls the data from either intermediate TOML files *or* CSVs in the repo,
 and writes properly-tagged worksheets so VEDA can ingest them.
+
+Each workbook is independent, so they can be built concurrently:
+
+    python write_excel.py --jobs 4
+
+"--jobs 0" uses one process per CPU. The default (1) builds them in turn.
+Workbooks are written with fixed timestamps, so the output files are
+identical whatever the number of jobs.
+
+Only workbooks whose inputs have changed since the last build are
+rewritten (see prepare_times_nz.utilities.excel_manifest). Use "--force"
+to clear the output folder and rebuild everything.
 """
 
 from __future__ import annotations
 
+import argparse
 import logging
+import os
+import time
 import tomllib
 from ast import literal_eval
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+from prepare_times_nz.utilities.excel_manifest import (
+    get_stale_workbooks,
+    get_workbook_hashes,
+    save_manifest,
+)
 from prepare_times_nz.utilities.excel_writers import (
-    create_empty_workbook,
     dict_to_dataframe,
     strip_headers_from_tiny_df,
-    write_data,
+    write_workbook_once,
+)
+from prepare_times_nz.utilities.filepaths import (
+    DATA_INTERMEDIATE,
+    OUTPUT_LOCATION,
+    PREP_LOCATION,
 )
-from prepare_times_nz.utilities.filepaths import DATA_INTERMEDIATE, PREP_LOCATION
 from prepare_times_nz.utilities.helpers import clear_output
 from prepare_times_nz.utilities.logger_setup import logger
 
@@ -66,23 +90,32 @@ def get_source_dataframe(data_location: str, table_name: str) -> pd.DataFrame:
     return pd.DataFrame()  # Fallback to an empty frame
 
 
-def write_workbook(workbook: str, workbook_meta: pd.DataFrame) -> None:
+def get_uc_sets(uc_sets) -> dict:
     """
-    Create *workbook* and write all its worksheets defined in *workbook_meta*.
+    Parse the UC_Sets metadata entry into a dict.
+
+    UC_Sets may be NaN (float), so normalise that to an empty dict.
     """
-    worksheets = workbook_meta["SheetName"].unique()
+    if isinstance(uc_sets, float) and np.isnan(uc_sets):
+        return {}
+    return literal_eval(uc_sets)
 
-    # ----------------------------------------------------------------------
-    # Create an empty workbook shell with the expected worksheet names.
-    # ----------------------------------------------------------------------
-    create_empty_workbook(workbook, worksheets)
 
-    # ----------------------------------------------------------------------
-    # Iterate over worksheets, then over every table in that sheet.
-    # ----------------------------------------------------------------------
-    for worksheet in worksheets:
+def collect_workbook_tables(
+    workbook: str, workbook_meta: pd.DataFrame
+) -> dict[str, list[dict]]:
+    """
+    Read every table defined in *workbook_meta* into memory.
+
+    Returns a dict of {sheet_name: [table, ...]} in metadata order, where
+    each table is a dict with the keys expected by
+    :pyfunc:`prepare_times_nz.utilities.excel_writers.layout_sheet`.
+    """
+    sheet_tables = {}
+
+    for worksheet in workbook_meta["SheetName"].unique():
         worksheet_meta = workbook_meta[workbook_meta["SheetName"] == worksheet]
-        start_row = 0  # keeps track of where to write the next table
+        tables = []
 
         for row in worksheet_meta.itertuples():
             logger.info(
@@ -105,55 +138,133 @@ def write_workbook(workbook: str, workbook_meta: pd.DataFrame) -> None:
             }:
                 df = strip_headers_from_tiny_df(df)
 
-            # UC_Sets may be NaN (float), so normalise that to an empty dict
+            tables.append(
+                {
+                    "df": df,
+                    "tag": row.VedaTag,
+                    "uc_set": get_uc_sets(row.UC_Sets),
+                    "table_name": row.TableName,
+                    "table_description": row.Description,
+                }
+            )
 
-            if isinstance(row.UC_Sets, float) and np.isnan(row.UC_Sets):
-                uc_sets = {}
-            else:
-                uc_sets = literal_eval(row.UC_Sets)
+        sheet_tables[worksheet] = tables
 
-            # ------------------------------------------------------------------
-            # Write the table
-            # ------------------------------------------------------------------
-            write_data(
-                df,
-                book_name=workbook,
-                sheet_name=worksheet,
-                tag=row.VedaTag,
-                uc_set=uc_sets,
-                startrow=start_row,
-                table_name=row.TableName,
-                table_description=row.Description,
-            )
+    return sheet_tables
 
-            # ------------------------------------------------------------------
-            # Increment start_row for the NEXT table
-            # Requires 5 to ensure space
-            # ------------------------------------------------------------------
-            start_row += len(df) + len(uc_sets) + 4
+
+def write_workbook(workbook: str, workbook_meta: pd.DataFrame) -> None:
+    """
+    Create *workbook* and write all its worksheets defined in *workbook_meta*.
+
+    All tables are read and laid out first (including the row offsets for
+    stacked tables and UC_Sets), then the workbook is saved once.
+    """
+    sheet_tables = collect_workbook_tables(workbook, workbook_meta)
+    write_workbook_once(workbook, sheet_tables)
+
+
+def build_workbook(workbook: str, workbook_meta: pd.DataFrame) -> float:
+    """Write a single workbook and return the seconds it took."""
+    start = time.perf_counter()
+    write_workbook(workbook, workbook_meta)
+    return time.perf_counter() - start
+
+
+def build_workbooks(metadata: pd.DataFrame, jobs: int = 1) -> dict[str, float]:
+    """
+    Build every workbook in *metadata*, using *jobs* worker processes.
+
+    Returns the build time for each workbook, in metadata order.
+    """
+    # Each unique workbook in the metadata becomes its own file
+    workbook_metas = {
+        workbook: metadata[metadata["WorkBookName"] == workbook]
+        for workbook in metadata["WorkBookName"].unique()
+    }
+
+    if jobs == 1:
+        timings = {}
+        for workbook, workbook_meta in workbook_metas.items():
+            timings[workbook] = build_workbook(workbook, workbook_meta)
+            logger.info("Built %s in %.2fs", workbook, timings[workbook])
+        return timings
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            workbook: pool.submit(build_workbook, workbook, workbook_meta)
+            for workbook, workbook_meta in workbook_metas.items()
+        }
+        # collect in metadata order so the log reads the same on every run
+        timings = {workbook: future.result() for workbook, future in futures.items()}
+
+    for workbook, seconds in timings.items():
+        logger.info("Built %s in %.2fs", workbook, seconds)
+    return timings
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments for the Excel writer."""
+    parser = argparse.ArgumentParser(description="Write the VEDA Excel workbooks.")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of workbooks to build in parallel (0 = one per CPU).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Clear the output folder and rebuild every workbook.",
+    )
+    return parser.parse_args()
+
+
+def remove_unlisted_workbooks(workbooks) -> None:
+    """Delete any workbooks in the output folder that are not in *workbooks*."""
+    for book_path in OUTPUT_LOCATION.rglob("*.xlsx"):
+        book_name = book_path.relative_to(OUTPUT_LOCATION).with_suffix("")
+        if book_name.as_posix() not in workbooks:
+            logger.info("Removing unlisted workbook %s", book_path)
+            book_path.unlink()
 
 
 # -----------------------------------------------------------------------------
 # MAIN
 # -----------------------------------------------------------------------------
-def main() -> None:
+def main(jobs: int = 1, force: bool = False) -> None:
     """Entry-point when run as a script."""
-    # Wipe the output folder – we're going to fill it in!
-
-    clear_output()
+    if force:
+        # Wipe the output folder – we're going to fill it in!
+        clear_output()
+    OUTPUT_LOCATION.mkdir(parents=True, exist_ok=True)
 
     metadata = load_metadata()
+    hashes = get_workbook_hashes(metadata)
+    stale = get_stale_workbooks(metadata, hashes)
+    remove_unlisted_workbooks(hashes)
 
-    # Each unique workbook in the metadata becomes its own file
-    for workbook in metadata["WorkBookName"].unique():
-        workbook_meta = metadata[metadata["WorkBookName"] == workbook]
-        write_workbook(workbook, workbook_meta)
+    logger.info(
+        "%s of %s workbooks need rebuilding",
+        len(stale),
+        metadata["WorkBookName"].nunique(),
+    )
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    start = time.perf_counter()
+    build_workbooks(metadata[metadata["WorkBookName"].isin(stale)], jobs=jobs)
+    save_manifest(hashes)
 
-    logger.info("Excel writing complete.")
+    logger.info(
+        "Excel writing complete (%s jobs, %.2fs).", jobs, time.perf_counter() - start
+    )
 
 
 # -----------------------------------------------------------------------------
 # SCRIPT ENTRY-POINT
 # -----------------------------------------------------------------------------
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(jobs=args.jobs, force=args.force)
@@ -20,10 +20,10 @@ from collections.abc import Iterable
 from pathlib import Path
 
 import pandas as pd
+from prepare_times_nz.utilities.data_in_out import read_excel_cached, read_intermediate
 from prepare_times_nz.utilities.filepaths import (
     ASSUMPTIONS,
     DATA_RAW,
-    STAGE_1_DATA,
     STAGE_2_DATA,
 )
 from prepare_times_nz.utilities.logger_setup import blue_text, logger
@@ -64,7 +64,7 @@ OUTPUT_LOCATION.mkdir(parents=True, exist_ok=True)
 CHECKS_LOCATION.mkdir(parents=True, exist_ok=True)
 
 # Filenames (tweak if your repo uses different names)
-EEUD_CSV = Path(STAGE_1_DATA) / "eeud" / "eeud.csv"
+EEUD_DATASET = "stage_1_input_data/eeud/eeud"
 TIMES_EEUD_CATS = AG_CONCORDANCES / "times_eeud_categories.csv"
 MBIE_ENERGY_BALANCE = (
     Path(DATA_RAW) / "external_data" / "mbie" / "energy-balance-tables.xlsx"
@@ -127,7 +127,7 @@ def save_checks(df: pd.DataFrame, name: str, label: str) -> None:
 # ----------------------------------------------------------------------------
 def load_data() -> dict[str, pd.DataFrame | dict]:
     """Load inputs needed for ag_forest_fish sector alignment."""
-    mbie_raw = pd.read_excel(
+    mbie_raw = read_excel_cached(
         MBIE_ENERGY_BALANCE,
         sheet_name="2023",
         header=[0, 1, 2, 3, 4],
@@ -145,10 +145,10 @@ def load_data() -> dict[str, pd.DataFrame | dict]:
         for col in mbie_raw.columns
     ]
     data = {
-        "eeud": pd.read_csv(EEUD_CSV),
+        "eeud": read_intermediate(EEUD_DATASET),
         "times_eeud_categories": pd.read_csv(TIMES_EEUD_CATS),
         "mbie_energy_balance": mbie_raw,
-        "livestock_horticulture_irrigation_patch": pd.read_excel(
+        "livestock_horticulture_irrigation_patch": read_excel_cached(
             LIVESTOCK_HORTICULTURE_IRRIGATION,
             sheet_name="TIMES_INPUT",
             engine="openpyxl",
@@ -422,7 +422,7 @@ def add_livestock_horticulture_irrigation(df: pd.DataFrame) -> pd.DataFrame:
     then re-aggregate to collapse any duplicates.
     """
     # Read and normalize headers
-    patch_df = pd.read_excel(
+    patch_df = read_excel_cached(
         LIVESTOCK_HORTICULTURE_IRRIGATION, sheet_name="TIMES_INPUT", engine="openpyxl"
     )
     patch_df.columns = patch_df.columns.str.strip()
@@ -11,12 +11,18 @@ Ag, forest, and fish demand — Islandal (NI/SI) disaggregation using THREE inpu
 Outputs:
 - STAGE_2_DATA/ag_forest_fish/preprocessing/2_times_baseyear_regional_disaggregation.csv
 - STAGE_2_DATA/ag_forest_fish/checks/2_Regional_disaggregation/fuel_sector_shares.csv
+- STAGE_2_DATA/ag_forest_fish/checks/2_Regional_disaggregation/ni_share_match_levels.csv
 """
 
 import re
 from pathlib import Path
 
 import pandas as pd
+from prepare_times_nz.stage_2.common.share_matching import (
+    compile_share_lookup,
+    log_match_levels,
+    match_shares,
+)
 from prepare_times_nz.utilities.filepaths import ASSUMPTIONS, STAGE_2_DATA
 from prepare_times_nz.utilities.logger_setup import blue_text, logger
 
@@ -58,24 +64,8 @@ def _clean_text_col(s: pd.Series) -> pd.Series:
     return s.replace({"": pd.NA})
 
 
-def _warn_dupes_layer(df_layer: pd.DataFrame, keys: list[str], label: str):
-    dup = (
-        df_layer.groupby(keys)["NI_Share"]
-        .nunique(dropna=True)
-        .reset_index(name="n_unique")
-    )
-    bad = dup[dup["n_unique"] > 1]
-    if not bad.empty:
-        logger.warning(
-            "Conflicting NI_Share within %s for keys %s on %d groups; first value will be used.",
-            label,
-            keys,
-            len(bad),
-        )
-
-
 def normalize_sector_splits(sector_splits: pd.DataFrame) -> pd.DataFrame:
-    """Fix header whitespace, coerce empties to NaN, parse NI_Share to [0,1], dedupe per layer."""
+    """Fix header whitespace and coerce empty keys to NA."""
     ss = sector_splits.copy()
 
     # Normalize column names (strip, squash whitespace, fix NBSP) and standardize keys
@@ -110,56 +100,37 @@ def normalize_sector_splits(sector_splits: pd.DataFrame) -> pd.DataFrame:
     ss["Fuel"] = _clean_text_col(ss["Fuel"])
     ss["Technology"] = _clean_text_col(ss["Technology"])
 
-    # Build layers
-    exact = ss.dropna(subset=["Fuel", "Technology"])
-    fuel_only = ss[ss["Fuel"].notna() & ss["Technology"].isna()]
-    tech_only = ss[ss["Fuel"].isna() & ss["Technology"].notna()]
-    sector_only = ss[ss["Fuel"].isna() & ss["Technology"].isna()]
-
-    # Layer-aware conflict warnings
-    _warn_dupes_layer(exact, ["Sector", "Fuel", "Technology"], "EXACT layer")
-    _warn_dupes_layer(fuel_only, ["Sector", "Fuel"], "FUEL-ONLY layer")
-    _warn_dupes_layer(tech_only, ["Sector", "Technology"], "TECH-ONLY layer")
-    _warn_dupes_layer(sector_only, ["Sector"], "SECTOR-ONLY layer")
-
-    # Deduplicate within each layer
-    exact = exact.drop_duplicates(["Sector", "Fuel", "Technology"], keep="first")
-    fuel_only = fuel_only.drop_duplicates(["Sector", "Fuel"], keep="first")
-    tech_only = tech_only.drop_duplicates(["Sector", "Technology"], keep="first")
-    sector_only = sector_only.drop_duplicates(["Sector"], keep="first")
-
-    # Recombine
-    ss = pd.concat([exact, fuel_only, tech_only, sector_only], ignore_index=True)
     return ss
 
 
-def attach_sector_defaults(
-    df: pd.DataFrame, sector_splits: pd.DataFrame
-) -> pd.DataFrame:
+def get_share_levels(sector_splits: pd.DataFrame) -> list:
     """
-    Add NIShareSector by matching with a specificity hierarchy:
+    The fallback hierarchy of NI shares, most specific first:
       1) Sector + Fuel + Technology
       2) Sector + Fuel           (split Technology is NaN)
       3) Sector + Technology     (split Fuel is NaN)
       4) Sector                  (split Fuel & Technology are NaN)
     """
     ss = normalize_sector_splits(sector_splits)
+    fuel = ss["Fuel"].notna()
+    tech = ss["Technology"].notna()
+    return [
+        ("exact", ss[fuel & tech], ["Sector", "Fuel", "Technology"]),
+        ("fuel", ss[fuel & ~tech], ["Sector", "Fuel"]),
+        ("tech", ss[~fuel & tech], ["Sector", "Technology"]),
+        ("sector", ss[~fuel & ~tech], ["Sector"]),
+    ]
 
-    exact = ss.dropna(subset=["Fuel", "Technology"])[
-        ["Sector", "Fuel", "Technology", "NI_Share"]
-    ].rename(columns={"NI_Share": "NIShare_exact"})
-
-    fuel_only = ss[ss["Fuel"].notna() & ss["Technology"].isna()][
-        ["Sector", "Fuel", "NI_Share"]
-    ].rename(columns={"NI_Share": "NIShare_fuel"})
-
-    tech_only = ss[ss["Fuel"].isna() & ss["Technology"].notna()][
-        ["Sector", "Technology", "NI_Share"]
-    ].rename(columns={"NI_Share": "NIShare_tech"})
 
-    sector_only = ss[ss["Fuel"].isna() & ss["Technology"].isna()][
-        ["Sector", "NI_Share"]
-    ].rename(columns={"NI_Share": "NIShare_sector"})
+def attach_sector_defaults(
+    df: pd.DataFrame, sector_splits: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Add NIShareSector from the most specific level of sector_splits that
+    matches each row (see get_share_levels()), and the name of that level
+    as NIShareLevel
+    """
+    lookup = compile_share_lookup(get_share_levels(sector_splits))
 
     out = df.copy()
 
@@ -168,22 +139,10 @@ def attach_sector_defaults(
         if col in out.columns:
             out[col] = _clean_text_col(out[col])
 
-    out = out.merge(exact, on=["Sector", "Fuel", "Technology"], how="left")
-    out = out.merge(fuel_only, on=["Sector", "Fuel"], how="left")
-    out = out.merge(tech_only, on=["Sector", "Technology"], how="left")
-    out = out.merge(sector_only, on="Sector", how="left")
-
-    out["NIShareSector"] = (
-        out["NIShare_exact"]
-        .combine_first(out["NIShare_fuel"])
-        .combine_first(out["NIShare_tech"])
-        .combine_first(out["NIShare_sector"])
-    ).astype(float)
-
-    out.drop(
-        columns=["NIShare_exact", "NIShare_fuel", "NIShare_tech", "NIShare_sector"],
-        inplace=True,
-    )
+    matched = match_shares(out, lookup)
+    log_match_levels(matched, "NI shares")
+    out["NIShareSector"] = matched["Share"]
+    out["NIShareLevel"] = matched["MatchLevel"]
 
     # Final sanity
     out["NIShareSector"] = pd.to_numeric(out["NIShareSector"], errors="coerce").clip(
@@ -218,7 +177,7 @@ def tidy_long_island(df: pd.DataFrame) -> pd.DataFrame:
     """
     df = df.copy()
     df.drop(
-        columns=["NIShareSector", "NIShare"],
+        columns=["NIShareSector", "NIShare", "NIShareLevel"],
         inplace=True,
         errors="ignore",
     )
@@ -289,6 +248,13 @@ def save_checks_pivot(df_long: pd.DataFrame) -> None:
     save_checks(shares, "fuel_sector_shares.csv", "fuel × sector NI shares")
 
 
+def save_checks_match_levels(df: pd.DataFrame) -> None:
+    """Which level of the splits each NI share was taken from."""
+    cols = ["Sector", "Fuel", "Technology", "NIShareLevel", "NIShareSector"]
+    levels = df[[c for c in cols if c in df.columns]].drop_duplicates()
+    save_checks(levels, "ni_share_match_levels.csv", "NI share match levels")
+
+
 # -----------------------------------------------------------------------------
 # Orchestration
 # -----------------------------------------------------------------------------
@@ -311,6 +277,8 @@ def calculate_and_save() -> pd.DataFrame:
         compute_island_values
     )
 
+    save_checks_match_levels(df)
+
     df_long = tidy_long_island(df)
     save_output(df_long, "2_times_baseyear_regional_disaggregation.csv")
     save_checks_pivot(df_long)
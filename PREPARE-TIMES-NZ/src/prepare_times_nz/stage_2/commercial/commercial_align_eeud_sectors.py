@@ -19,10 +19,10 @@ from pathlib import Path
 
 import numpy as np
 import pandas as pd
+from prepare_times_nz.utilities.data_in_out import read_intermediate
 from prepare_times_nz.utilities.filepaths import (
     ASSUMPTIONS,
     DATA_RAW,
-    STAGE_1_DATA,
     STAGE_2_DATA,
 )
 from prepare_times_nz.utilities.logger_setup import blue_text, logger
@@ -60,7 +60,7 @@ OUTPUT_LOCATION.mkdir(parents=True, exist_ok=True)
 CHECKS_LOCATION.mkdir(parents=True, exist_ok=True)
 
 # Filenames (tweak if your repo uses different names)
-EEUD_CSV = Path(STAGE_1_DATA) / "eeud" / "eeud.csv"
+EEUD_DATASET = "stage_1_input_data/eeud/eeud"
 TIMES_EEUD_CATS = CONCORDANCES / "times_eeud_commercial_categories.csv"
 SPLITS_FILE = (
     COMMERCIAL_ASSUMPTIONS / "fuel_splits_by_sector_enduse.csv"
@@ -121,7 +121,7 @@ def save_checks(df: pd.DataFrame, name: str, label: str) -> None:
 def load_data() -> dict[str, pd.DataFrame | dict]:
     """Load inputs needed for commercial sector alignment."""
     data = {
-        "eeud": pd.read_csv(EEUD_CSV),
+        "eeud": read_intermediate(EEUD_DATASET),
         "times_eeud_commercial_categories": pd.read_csv(TIMES_EEUD_CATS),
     }
     return data
@@ -21,11 +21,17 @@ Rules:
 Outputs:
 - STAGE_2_DATA/commercial/preprocessing/2_times_baseyear_Islandal_disaggregation.csv
 - STAGE_2_DATA/commercial/checks/2_Island_disaggregation/fuel_sector_shares.csv
+- STAGE_2_DATA/commercial/checks/2_Island_disaggregation/ni_share_match_levels.csv
 """
 
 from pathlib import Path
 
 import pandas as pd
+from prepare_times_nz.stage_2.common.share_matching import (
+    compile_share_lookup,
+    log_match_levels,
+    match_shares,
+)
 from prepare_times_nz.utilities.filepaths import ASSUMPTIONS, STAGE_2_DATA
 from prepare_times_nz.utilities.logger_setup import blue_text, logger
 
@@ -62,71 +68,57 @@ def load_inputs() -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
 # -----------------------------------------------------------------------------
 # Core helpers
 # -----------------------------------------------------------------------------
-def attach_sector_defaults(
-    df: pd.DataFrame, sector_splits: pd.DataFrame
-) -> pd.DataFrame:
-    """Add NIShareSector (default NI share by Sector)."""
-    req = {"Sector", "NI_Share"}
-    missing = req - set(sector_splits.columns)
-    if missing:
-        raise KeyError(f"Sector splits file missing columns: {missing}")
-    sector = sector_splits[["Sector", "NI_Share"]].rename(
-        columns={"NI_Share": "NIShareSector"}
-    )
-    out = df.merge(sector, on="Sector", how="left")
-    missing_sectors = out.loc[out["NIShareSector"].isna(), "Sector"].dropna().unique()
-    if len(missing_sectors):
-        logger.warning(
-            "No sector default NI share for: %s", ", ".join(map(str, missing_sectors))
-        )
-    return out
-
-
-def attach_fuel_overrides(
-    df: pd.DataFrame, fuel_overrides: pd.DataFrame
-) -> pd.DataFrame:
+def get_share_levels(sector_splits: pd.DataFrame, fuel_overrides: pd.DataFrame) -> list:
     """
-    Add NIShareOverride from fuel overrides.
-    If overrides has 'Sector', match on (Sector, Fuel); else match on Fuel only.
+    The fallback hierarchy of NI shares: fuel overrides first, matched on
+    (Sector, Fuel) if the overrides have a Sector column and on Fuel only
+    otherwise, then the sector defaults.
     """
-    req = {"Fuel", "NI_Share"}
-    if not req.issubset(fuel_overrides.columns):
+    if not {"Fuel", "NI_Share"}.issubset(fuel_overrides.columns):
         raise KeyError(
             "Fuel overrides file must have columns: Fuel, NI_Share [optional Sector]"
         )
+    fuel_keys = ["Sector", "Fuel"] if "Sector" in fuel_overrides.columns else ["Fuel"]
+    return [
+        ("fuel", fuel_overrides, fuel_keys),
+        ("sector", sector_splits, ["Sector"]),
+    ]
 
-    if "Sector" in fuel_overrides.columns:
-        ov = fuel_overrides[["Sector", "Fuel", "NI_Share"]].rename(
-            columns={"NI_Share": "NIShareOverride"}
-        )
-        keys = ["Sector", "Fuel"]
-    else:
-        ov = fuel_overrides[["Fuel", "NI_Share"]].rename(
-            columns={"NI_Share": "NIShareOverride"}
-        )
-        keys = ["Fuel"]
 
-    out = df.merge(ov, on=keys, how="left")
+def attach_ni_shares(
+    df: pd.DataFrame, sector_splits: pd.DataFrame, fuel_overrides: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Add NIShare (the fuel override when present, else the sector default)
+    and NIShareLevel (which of the two it is).
+    """
+    lookup = compile_share_lookup(get_share_levels(sector_splits, fuel_overrides))
+    matched = match_shares(df, lookup)
+    log_match_levels(matched, "NI shares")
+
+    out = df.copy()
+    out["NIShare"] = matched["Share"]
+    out["NIShareLevel"] = matched["MatchLevel"]
 
     # Log which fuels got overridden (useful to confirm NG/Geothermal = 1.0 NI)
-    overridden = out.loc[
-        out["NIShareOverride"].notna(), ["Sector", "Fuel", "NIShareOverride"]
-    ]
+    overridden = out.loc[out["NIShareLevel"] == "fuel", "Fuel"]
     if not overridden.empty:
-        ex = ", ".join(sorted(set(overridden["Fuel"].astype(str))))
+        ex = ", ".join(sorted(set(overridden.astype(str))))
         logger.info("Applied fuel overrides for fuels: %s", ex)
     else:
         logger.info("No fuel overrides matched any rows.")
 
+    missing_sectors = out.loc[out["NIShare"].isna(), "Sector"].dropna().unique()
+    if len(missing_sectors):
+        logger.warning(
+            "No NI share found for sectors: %s", ", ".join(map(str, missing_sectors))
+        )
     return out
 
 
 def compute_island_values(df: pd.DataFrame) -> pd.DataFrame:
-    """Prefer override when present; else sector default. Compute NI and SI."""
+    """Compute NI and SI from NIShare."""
     df = df.copy()
-    df["NIShare"] = df["NIShareOverride"].where(
-        df["NIShareOverride"].notna(), df["NIShareSector"]
-    )
     df["NIShare"] = pd.to_numeric(df["NIShare"], errors="coerce").clip(lower=0, upper=1)
 
     df["NI"] = (df["Value"] * df["NIShare"]).round(ROUND_TOL)
@@ -141,7 +133,7 @@ def tidy_long_island(df: pd.DataFrame) -> pd.DataFrame:
     """
     df = df.copy()
     df.drop(
-        columns=["NIShareSector", "NIShareOverride", "NIShare"],
+        columns=["NIShare", "NIShareLevel"],
         inplace=True,
         errors="ignore",
     )
@@ -212,6 +204,12 @@ def save_checks_pivot(df_long: pd.DataFrame) -> None:
     save_checks(shares, "fuel_sector_shares.csv", "fuel × sector NI shares")
 
 
+def save_checks_match_levels(df: pd.DataFrame) -> None:
+    """Whether each NI share is a fuel override or a sector default."""
+    levels = df[["Sector", "Fuel", "NIShareLevel", "NIShare"]].drop_duplicates()
+    save_checks(levels, "ni_share_match_levels.csv", "NI share match levels")
+
+
 # -----------------------------------------------------------------------------
 # Orchestration
 # -----------------------------------------------------------------------------
@@ -225,11 +223,10 @@ def calculate_and_save() -> pd.DataFrame:
         len(fuel_overrides),
     )
 
-    df = (
-        baseyear.pipe(attach_sector_defaults, sector_splits=sector_splits)
-        .pipe(attach_fuel_overrides, fuel_overrides=fuel_overrides)
-        .pipe(compute_island_values)
-    )
+    df = baseyear.pipe(
+        attach_ni_shares, sector_splits=sector_splits, fuel_overrides=fuel_overrides
+    ).pipe(compute_island_values)
+    save_checks_match_levels(df)
 
     df_long = tidy_long_island(df)
 
@@ -0,0 +1,165 @@
+"""
+Matching regional share assumptions to demand rows through a fallback
+hierarchy
+
+Share assumptions are given at several levels of detail, for example
+Sector + Fuel + Technology, then Sector + Fuel, then Sector alone. Each row
+takes the share of the most specific level that matches it.
+
+compile_share_lookup() puts every level into one lookup, indexed on all
+the key columns, with WILDCARD in the columns a level does not match on.
+match_shares() then looks up every row at every level in a single pass,
+and reports which level each share came from.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from prepare_times_nz.utilities.logger_setup import logger
+
+# key value of a level that does not match on that column
+WILDCARD = "*"
+# stands in for missing keys in the data, so they only match wildcards
+_NO_KEY = "\x00"
+
+
+class ShareLookup(NamedTuple):
+    """Shares of every level of a hierarchy, from compile_share_lookup()"""
+
+    # (name, key columns) of each level, most specific first
+    levels: list[tuple[str, list[str]]]
+    # indexed by every key column, with WILDCARD where a level has no key
+    shares: pd.Series
+
+
+def _key_values(s: pd.Series) -> np.ndarray:
+    """Key values as an object array, with missing values as _NO_KEY"""
+    return s.astype("string").fillna(_NO_KEY).to_numpy(dtype=object)
+
+
+def _dedupe_level(
+    table: pd.DataFrame, keys: list[str], share_column: str, label: str
+) -> pd.DataFrame:
+    """Keep the first share of each key, warning if they disagree"""
+    conflicts = table.groupby(keys)[share_column].nunique()
+    conflicts = conflicts[conflicts > 1]
+    if not conflicts.empty:
+        logger.warning(
+            "Conflicting %s within %s for keys %s on %d groups; "
+            "first value will be used.",
+            share_column,
+            label,
+            keys,
+            len(conflicts),
+        )
+    return table.drop_duplicates(keys, keep="first")
+
+
+def compile_share_lookup(
+    levels: list[tuple[str, pd.DataFrame, list[str]]],
+    share_column: str = "NI_Share",
+) -> ShareLookup:
+    """
+    Compile a fallback hierarchy of share tables into one lookup
+
+    levels: (name, table, key columns) of each level, most specific first.
+        Each table has the key columns of its level and share_column.
+        Rows with a missing key or share are not part of their level.
+    """
+    key_columns = list(dict.fromkeys(col for _, _, keys in levels for col in keys))
+    key_sets = [frozenset(keys) for _, _, keys in levels]
+    if len(set(key_sets)) < len(key_sets):
+        raise ValueError("Two levels of the share hierarchy have the same keys")
+
+    frames = []
+    for name, table, keys in levels:
+        missing = set(keys + [share_column]) - set(table.columns)
+        if missing:
+            raise KeyError(f"Share table for level '{name}' missing columns: {missing}")
+
+        table = table[keys + [share_column]].copy()
+        table[share_column] = pd.to_numeric(table[share_column], errors="coerce")
+        table = table.dropna()
+        table = _dedupe_level(table, keys, share_column, f"{name.upper()} level")
+
+        frame = pd.DataFrame(
+            {
+                col: _key_values(table[col]) if col in keys else WILDCARD
+                for col in key_columns
+            },
+            index=table.index,
+        )
+        frame[share_column] = table[share_column]
+        frames.append(frame)
+
+    frame = pd.concat(frames, ignore_index=True)
+    # a MultiIndex even with one key column, to look up candidate tuples
+    shares = pd.Series(
+        frame[share_column].to_numpy(),
+        index=pd.MultiIndex.from_frame(frame[key_columns]),
+        name=share_column,
+    )
+    return ShareLookup([(name, keys) for name, _, keys in levels], shares)
+
+
+def match_shares(df: pd.DataFrame, lookup: ShareLookup) -> pd.DataFrame:
+    """
+    Find the share of each row of df from the most specific level of
+    lookup that matches it
+
+    Returns a frame with the index of df and columns Share (NaN if no level
+    matched) and MatchLevel (the name of the level used, or None).
+    """
+    key_columns = list(lookup.shares.index.names)
+    missing = set(key_columns) - set(df.columns)
+    if missing:
+        raise KeyError(f"Data missing share key columns: {missing}")
+
+    n_rows = len(df)
+    keys = {col: _key_values(df[col]) for col in key_columns}
+    wildcards = np.full(n_rows, WILDCARD, dtype=object)
+
+    # every row at every level, level by level
+    candidates = pd.MultiIndex.from_arrays(
+        [
+            np.concatenate(
+                [
+                    keys[col] if col in level_keys else wildcards
+                    for _, level_keys in lookup.levels
+                ]
+            )
+            for col in key_columns
+        ],
+        names=key_columns,
+    )
+    positions = lookup.shares.index.get_indexer(candidates).reshape(
+        len(lookup.levels), n_rows
+    )
+
+    found = positions >= 0
+    matched = found.any(axis=0)
+    level = found.argmax(axis=0)  # the first level found
+    chosen = positions[level, np.arange(n_rows)]
+    level_names = np.array([name for name, _ in lookup.levels], dtype=object)
+
+    return pd.DataFrame(
+        {
+            "Share": np.where(matched, lookup.shares.to_numpy()[chosen], np.nan),
+            "MatchLevel": np.where(matched, level_names[level], None),
+        },
+        index=df.index,
+    )
+
+
+def log_match_levels(matched: pd.DataFrame, label: str) -> None:
+    """Log how many rows took their share from each level"""
+    counts = matched["MatchLevel"].value_counts(dropna=False)
+    logger.info(
+        "%s matched by level: %s",
+        label,
+        ", ".join(
+            f"{'none' if pd.isna(level) else level} {count}"
+            for level, count in counts.items()
+        ),
+    )
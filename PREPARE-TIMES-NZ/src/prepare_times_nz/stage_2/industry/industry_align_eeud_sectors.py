@@ -22,6 +22,7 @@ from prepare_times_nz.stage_2.industry.common import (
     save_checks,
     save_preprocessing,
 )
+from prepare_times_nz.utilities.data_in_out import read_intermediate
 from prepare_times_nz.utilities.filepaths import STAGE_1_DATA
 from prepare_times_nz.utilities.logger_setup import blue_text, logger
 
@@ -78,7 +79,7 @@ def load_data():
             INDUSTRY_CONCORDANCES / "times_eeud_industry_categories.csv"
         ),
         "gic_data": pd.read_csv(STAGE_1_DATA / "gic/gic_production_consumption.csv"),
-        "eeud": pd.read_csv(STAGE_1_DATA / "eeud/eeud.csv"),
+        "eeud": read_intermediate("stage_1_input_data/eeud/eeud"),
         "mbie_gas_non_energy": pd.read_csv(
             STAGE_1_DATA / "mbie/mbie_gas_non_energy.csv"
         ),
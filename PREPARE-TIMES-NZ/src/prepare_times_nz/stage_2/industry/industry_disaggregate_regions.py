@@ -58,6 +58,11 @@ Layout:
 # --------------------------------------------------------------------------- #
 
 import pandas as pd
+from prepare_times_nz.stage_2.common.share_matching import (
+    compile_share_lookup,
+    log_match_levels,
+    match_shares,
+)
 from prepare_times_nz.stage_2.industry.common import (
     CHECKS_DIR,
     INDUSTRY_ASSUMPTIONS,
@@ -119,34 +124,31 @@ def get_usage_shares(df: pd.DataFrame, *, group_used: str = GROUP_USED) -> pd.Da
 
 
 def add_sector_default_shares(df: pd.DataFrame) -> pd.DataFrame:
-    """Attach default NI shares at sector level."""
-    sector_shares = regional_splits_by_sector[["Sector", "NI_Share"]].copy()
-    sector_shares = sector_shares.rename(columns={"NI_Share": "NIShareSector"})
-    return pd.merge(df, sector_shares, on="Sector")
-
+    """Attach default NI shares at sector level, dropping sectors without one."""
+    lookup = compile_share_lookup([("sector", regional_splits_by_sector, ["Sector"])])
+    matched = match_shares(df, lookup)
+    df = df.assign(NIShareSector=matched["Share"])
+    return df[matched["MatchLevel"].notna()]
 
-def add_fuel_default_shares(df: pd.DataFrame) -> pd.DataFrame:
-    """Attach default NI shares at fuel level (override candidate)."""
-    fuel_shares = regional_splits_by_fuel[["Fuel", "NI_Share"]].copy()
-    fuel_shares = fuel_shares.rename(columns={"NI_Share": "NIShareFuelOverride"})
-    return pd.merge(df, fuel_shares, on="Fuel", how="left")
 
-
-def add_fuel_sector_default_shares(df: pd.DataFrame) -> pd.DataFrame:
+def add_fuel_override_shares(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Attach fuel-by-sector overrides (highest priority).  If present, they
-    replace the simple fuel override.
+    Attach NI share overrides: fuel-by-sector overrides where present
+    (highest priority), else fuel overrides. NIShareOverrideLevel records
+    which was used, for diagnostics.
     """
-    sector_fuel_shares = regional_splits_by_sector_and_fuel.rename(
-        columns={"NI_Share": "NIShareSectorFuelOverride"}
+    lookup = compile_share_lookup(
+        [
+            ("sector_fuel", regional_splits_by_sector_and_fuel, ["Sector", "Fuel"]),
+            ("fuel", regional_splits_by_fuel, ["Fuel"]),
+        ]
     )
-    df = pd.merge(df, sector_fuel_shares, on=["Sector", "Fuel"], how="left")
-
-    # Overwrite more generic override where specific override exists
-    df["NIShareFuelOverride"] = df["NIShareSectorFuelOverride"].fillna(
-        df["NIShareFuelOverride"]
+    matched = match_shares(df, lookup)
+    log_match_levels(matched, "NI share overrides")
+    return df.assign(
+        NIShareFuelOverride=matched["Share"],
+        NIShareOverrideLevel=matched["MatchLevel"],
     )
-    return df  # keeping extra columns for diagnostics
 
 
 def define_override_shares(
@@ -404,8 +406,7 @@ def calculate_shares(df: pd.DataFrame) -> pd.DataFrame:
     df_calc = (
         df.pipe(get_usage_shares)
         .pipe(add_sector_default_shares)
-        .pipe(add_fuel_default_shares)
-        .pipe(add_fuel_sector_default_shares)
+        .pipe(add_fuel_override_shares)
         .pipe(define_override_shares)
         .pipe(calculate_override_adjustments)
         .pipe(get_final_adjusted_shares)
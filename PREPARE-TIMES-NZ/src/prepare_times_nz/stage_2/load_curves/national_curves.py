@@ -11,6 +11,10 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from prepare_times_nz.stage_0.stage_0_settings import BASE_YEAR
+from prepare_times_nz.utilities.data_in_out import (
+    read_intermediate,
+    read_parquet_dataset,
+)
 from prepare_times_nz.utilities.filepaths import ASSUMPTIONS, STAGE_1_DATA, STAGE_2_DATA
 from prepare_times_nz.utilities.logger_setup import logger
 
@@ -26,7 +30,17 @@ USE_EMI_RES_CURVES = False
 
 # INPUT DATA LOCATIONS -------------------------------------------------------
 GXP_SHARES_FILE = LOAD_CURVE_ASSUMPTIONS / "gxp_shares.csv"
-GXP_FILE = EA_DATA_DIR / "emi_gxp.parquet"
+GXP_DATASET = EA_DATA_DIR / "emi_gxp"
+# the only GXP columns used here
+GXP_COLUMNS = [
+    "POC",
+    "Trading_Date",
+    "Trading_Period",
+    "Hour",
+    "TimeSlice",
+    "Unit_Measure",
+    "Value",
+]
 NODE_CONCORDANCE_FILE = EA_DATA_DIR / "emi_nsp_concordances.csv"
 
 
@@ -44,7 +58,8 @@ def aggregate_emi_by_timeslice(df):
     # aggregate to hourly per POC
     df = (
         df.groupby(
-            ["Year", "TimeSlice", "POC", "Trading_Date", "Hour", "Unit_Measure"]
+            ["Year", "TimeSlice", "POC", "Trading_Date", "Hour", "Unit_Measure"],
+            observed=True,
         )["Value"]
         .sum()
         .reset_index()
@@ -91,11 +106,11 @@ def get_summary_timeslices(df, by_island=True, nsp_file=NODE_CONCORDANCE_FILE):
         group_vars += ["Island"]
         agg_group_vars += ["Island"]
 
-    df = df.groupby(group_vars)["Value"].sum().reset_index()
+    df = df.groupby(group_vars, observed=True)["Value"].sum().reset_index()
 
     # now hour is the grain we can get hours per slice to test:
     df = (
-        df.groupby(agg_group_vars)
+        df.groupby(agg_group_vars, observed=True)
         .agg(Value=("Value", "sum"), HoursInSlice=("Value", "size"))
         .reset_index()
     )
@@ -211,8 +226,10 @@ def get_residential_curves(
         agg_group_vars = ["Year", "Unit_Measure"]
         df = add_islands(df, nsp_file=nsp_file)
 
-    df = df.groupby(group_vars)["Value"].sum().reset_index()
-    df["LoadCurve"] = df["Value"] / df.groupby(agg_group_vars)["Value"].transform("sum")
+    df = df.groupby(group_vars, observed=True)["Value"].sum().reset_index()
+    df["LoadCurve"] = df["Value"] / df.groupby(agg_group_vars, observed=True)[
+        "Value"
+    ].transform("sum")
 
     # the value is just the sum of the sample POCs so not useful by itself.
     # remove to avoid confusion
@@ -227,7 +244,7 @@ def get_residential_total_demand():
     Load res elc demand from EEUD
     """
 
-    eeud = pd.read_csv(f"{STAGE_1_DATA}/eeud/eeud.csv")
+    eeud = read_intermediate("stage_1_input_data/eeud/eeud")
 
     eeud_res = eeud[eeud["SectorGroup"] == "Residential"]
     eeud_res = eeud_res[eeud_res["Fuel"] == "Electricity"]
@@ -368,7 +385,7 @@ def test_average_loads():
     print(CHECKS_LOCATION)
 
 
-def estimate_res_real_peak(gxp_file=GXP_FILE, test_year=2023):
+def estimate_res_real_peak(gxp_dataset=GXP_DATASET, test_year=2023):
     """
     Analysis function. Not part of main workflow
     Intended to assess actual residential peaks by checking the peak of residential POC
@@ -378,14 +395,20 @@ def estimate_res_real_peak(gxp_file=GXP_FILE, test_year=2023):
 
     """
 
-    df = pd.read_parquet(gxp_file)
+    df = read_parquet_dataset(
+        gxp_dataset, columns=GXP_COLUMNS, filters=[("Year", "==", test_year)]
+    )
     res_pocs = get_residential_pocs(threshold=0.90)
 
     df = df[df["POC"].isin(res_pocs)]
     df["Year"] = df["Trading_Date"].dt.year
     df = df[df["Year"] == test_year]
 
-    df = df.groupby(["Trading_Date", "Trading_Period"])["Value"].sum().reset_index()
+    df = (
+        df.groupby(["Trading_Date", "Trading_Period"], observed=True)["Value"]
+        .sum()
+        .reset_index()
+    )
     df = df[df["Value"] != 0]
 
     df["Share"] = df["Value"] / df["Value"].sum()
@@ -420,7 +443,10 @@ def main():
 
     OUTPUT_LOCATION.mkdir(parents=True, exist_ok=True)
     CHECKS_LOCATION.mkdir(parents=True, exist_ok=True)
-    raw_emi = pd.read_parquet(GXP_FILE)
+    # every output below is for the base year, so only that year is read
+    raw_emi = read_parquet_dataset(
+        GXP_DATASET, columns=GXP_COLUMNS, filters=[("Year", "==", BASE_YEAR)]
+    )
 
     emi_timeslice = aggregate_emi_by_timeslice(raw_emi)
     timeslice_by_island = get_summary_timeslices(emi_timeslice, by_island=True)
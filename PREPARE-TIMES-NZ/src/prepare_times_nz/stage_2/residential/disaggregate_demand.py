@@ -22,12 +22,13 @@ from prepare_times_nz.stage_2.residential.common import (
     save_checks,
     save_preprocessing,
 )
+from prepare_times_nz.utilities.data_in_out import read_intermediate
 from prepare_times_nz.utilities.filepaths import STAGE_1_DATA
 from prepare_times_nz.utilities.logger_setup import logger
 
 # Data locations -----------------------------
 
-EEUD_FILE = STAGE_1_DATA / "eeud/eeud.csv"
+EEUD_DATASET = "stage_1_input_data/eeud/eeud"
 DWELLING_HEATING_FILE = STAGE_1_DATA / "statsnz/dwelling_heating.csv"
 POP_DWELLING = STAGE_1_DATA / "statsnz/population_by_dwelling.csv"
 
@@ -41,10 +42,10 @@ FLOOR_AREAS = RESIDENTIAL_ASSUMPTIONS / "floor_area_per_dwelling.csv"
 # disaggregate other demand by pop (and redistribute NGA) ------------------------
 
 
-def get_residential_eeud(eeud_file=EEUD_FILE, base_year=BASE_YEAR):
+def get_residential_eeud(eeud_dataset=EEUD_DATASET, base_year=BASE_YEAR):
     """Loads residential EEUD for the base year"""
 
-    df = pd.read_csv(eeud_file)
+    df = read_intermediate(eeud_dataset)
 
     df = df[df["Sector"] == "Residential"]
     df = df[df["Year"] == base_year]
@@ -230,7 +231,7 @@ def get_residential_other_demand():
     save_checks(shares, "population_shares.csv", "Population shares")
 
     # get residential eeud
-    eeud = get_residential_eeud(eeud_file=EEUD_FILE, base_year=BASE_YEAR)
+    eeud = get_residential_eeud(eeud_dataset=EEUD_DATASET, base_year=BASE_YEAR)
 
     # identify all end uses except space heating
     all_uses = eeud["EndUse"].unique().tolist()
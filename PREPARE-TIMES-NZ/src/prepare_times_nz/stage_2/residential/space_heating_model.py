@@ -43,12 +43,13 @@ from prepare_times_nz.stage_2.residential.common import (
     save_checks,
     save_preprocessing,
 )
+from prepare_times_nz.utilities.data_in_out import read_intermediate
 from prepare_times_nz.utilities.filepaths import STAGE_1_DATA
 from prepare_times_nz.utilities.logger_setup import blue_text, logger
 
 # Data locations -----------------------------
 
-EEUD_FILE = STAGE_1_DATA / "eeud/eeud.csv"
+EEUD_DATASET = "stage_1_input_data/eeud/eeud"
 DWELLING_HEATING_FILE = STAGE_1_DATA / "statsnz/dwelling_heating.csv"
 
 # Assumptions --------------------------------------------
@@ -523,7 +524,7 @@ def build_sh_model(df):
     return df
 
 
-def get_eeud_space_heating_data(eeud_file=EEUD_FILE, base_year=BASE_YEAR):
+def get_eeud_space_heating_data(eeud_dataset=EEUD_DATASET, base_year=BASE_YEAR):
     """
     Returns the EEUD residential space heating data
     for the selected base year.
@@ -533,7 +534,7 @@ def get_eeud_space_heating_data(eeud_file=EEUD_FILE, base_year=BASE_YEAR):
     """
     # get EEUD data for residential space heating
 
-    eeud = pd.read_csv(eeud_file)
+    eeud = read_intermediate(eeud_dataset)
     df = eeud[eeud["Sector"] == "Residential"]
     df = df[df["EndUse"] == "Low Temperature Heat (<100 C), Space Heating"]
     df = df[df["Year"] == base_year]
@@ -578,7 +579,7 @@ def check_join_grain(df1, df2, join_vars):
 
 
 def apply_sh_model_to_eeud(
-    df: pd.DataFrame, eeud_file=EEUD_FILE, base_year=BASE_YEAR
+    df: pd.DataFrame, eeud_dataset=EEUD_DATASET, base_year=BASE_YEAR
 ) -> pd.DataFrame:
     """
     Apply space‑heating model shares to EEUD residential demand data.
@@ -604,7 +605,9 @@ def apply_sh_model_to_eeud(
         disaggregated demand
     """
     # get EEUD
-    sh_eeud = get_eeud_space_heating_data(eeud_file=eeud_file, base_year=base_year)
+    sh_eeud = get_eeud_space_heating_data(
+        eeud_dataset=eeud_dataset, base_year=base_year
+    )
 
     # assess joins
     join_vars = ["Technology", "Fuel"]
@@ -629,7 +632,7 @@ def disaggregate_space_heating_demand(
     hdd_assumptions=HDD_ASSUMPTIONS,
     eff_assumptions=CENSUS_EFF_ASSUMPTIONS,
     floor_areas=FLOOR_AREAS,
-    eeud_file=EEUD_FILE,
+    eeud_dataset=EEUD_DATASET,
     base_year=BASE_YEAR,
 ) -> pd.DataFrame:
     """
@@ -686,7 +689,7 @@ def disaggregate_space_heating_demand(
     model_df = build_sh_model(model_df)
     # apply calculated shares to EEUD
     model_df = apply_sh_model_to_eeud(
-        model_df, eeud_file=eeud_file, base_year=base_year
+        model_df, eeud_dataset=eeud_dataset, base_year=base_year
     )
 
     return model_df
@@ -761,7 +764,7 @@ def get_tech_island_split(
 
 
 def get_lpg_gas_consumption_share_of_tech(
-    eeud_file=EEUD_FILE,
+    eeud_dataset=EEUD_DATASET,
     base_year=BASE_YEAR,
     technology="Burner (Direct Heat)",
 ) -> pd.DataFrame:
@@ -793,11 +796,11 @@ def get_lpg_gas_consumption_share_of_tech(
         If any of 'Sector', 'EndUse', 'Year', 'Fuel', 'Technology' or 'Value'
         is missing from the EEUD data.
     FileNotFoundError
-        If EEUD_FILE cannot be read.
+        If the EEUD dataset cannot be read.
     """
 
     # Load EEUD data
-    eeud = pd.read_csv(eeud_file)
+    eeud = read_intermediate(eeud_dataset)
 
     # Validate required columns
     required = {"Sector", "EndUse", "Year", "Fuel", "Technology", "Value"}
@@ -934,7 +937,7 @@ def get_residential_space_heating_demand():
         model_df, technology="Burner (Direct Heat)", island_file=ISLAND_FILE
     )
     burner_fuel_split = get_lpg_gas_consumption_share_of_tech(
-        eeud_file=EEUD_FILE, technology="Burner (Direct Heat)"
+        eeud_dataset=EEUD_DATASET, technology="Burner (Direct Heat)"
     )
 
     ni_lpg_share = get_ni_lpg_share(
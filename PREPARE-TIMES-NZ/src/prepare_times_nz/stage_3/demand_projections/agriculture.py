@@ -11,7 +11,7 @@ from pathlib import Path
 
 import pandas as pd
 from prepare_times_nz.stage_0.stage_0_settings import BASE_YEAR
-from prepare_times_nz.utilities.data_in_out import _save_data
+from prepare_times_nz.utilities.data_in_out import _save_data, read_excel_cached
 from prepare_times_nz.utilities.filepaths import (
     ASSUMPTIONS,
     EXTERNAL_DATA,
@@ -100,7 +100,7 @@ def load_workbook_projection_sheet(workbook_path, sheet_name):
     The workbook stores years as columns, with the first two columns acting as
     row identifiers for the projection categories.
     """
-    df = pd.read_excel(workbook_path, sheet_name=sheet_name, header=5)
+    df = read_excel_cached(workbook_path, sheet_name=sheet_name, header=5)
     first_two_cols = list(df.columns[:2])
     df = df.rename(
         columns={
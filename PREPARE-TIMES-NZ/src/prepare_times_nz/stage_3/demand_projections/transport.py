@@ -14,7 +14,7 @@ from prepare_times_nz.stage_0.stage_0_settings import BASE_YEAR
 from prepare_times_nz.stage_3.demand_projections.population_projections import (
     get_national_population_growth_index,
 )
-from prepare_times_nz.utilities.data_in_out import _save_data
+from prepare_times_nz.utilities.data_in_out import _save_data, read_excel_cached
 from prepare_times_nz.utilities.filepaths import EXTERNAL_DATA, STAGE_3_DATA
 
 # CONSTANTS
@@ -44,7 +44,7 @@ def get_transport_growth_indices():
     Returns long format: [SectorGroup, Sector, Year, Scenario, Index]
     """
     # Load data
-    df = pd.read_excel(
+    df = read_excel_cached(
         INPUT_DATA / "VFM202405_outputs_summary_V3.xlsx",
         sheet_name="Raw data (wem202405)",
         skiprows=2,
@@ -17,7 +17,7 @@ from __future__ import annotations
 from pathlib import Path
 
 import pandas as pd
-from prepare_times_nz.utilities.data_in_out import _save_data
+from prepare_times_nz.utilities.data_in_out import _save_data, read_excel_cached
 from prepare_times_nz.utilities.filepaths import (
     EXTERNAL_DATA,
     STAGE_2_DATA,
@@ -141,7 +141,7 @@ def get_cumulative_build_projections():
     annual additions by scenario and technology.
     """
     # Load the Distributed solar PV sheet
-    df = pd.read_excel(EDGS_FILEPATH, sheet_name="Distributed solar PV")
+    df = read_excel_cached(EDGS_FILEPATH, sheet_name="Distributed solar PV")
 
     # Filter for Variable: Total capacity
     df = df[df["Variable"] == "Cumulative new capacity"]
@@ -4,6 +4,11 @@ This module distributes the contingent natural gas reserves across each applicab
 
 This includes contingent gas from fields that haven't been developed yet.
 
+The contingent reserves are read once (get_contingent_reserves()), and every
+field is distributed together: start years, peak outputs and decay rates
+come from grouped operations on the production forecasts, and the yearly
+decay is stepped through for all fields at once, as is the lognormal shape
+of new fields.
 
 """
 
@@ -11,6 +16,7 @@ This includes contingent gas from fields that haven't been developed yet.
 # pylint: disable = wrong-import-order
 import numpy as np
 import pandas as pd
+from prepare_times_nz.utilities.data_in_out import read_csv_cached
 from prepare_times_nz.utilities.filepaths import STAGE_1_DATA, STAGE_3_DATA
 from scipy.stats import lognorm
 
@@ -27,27 +33,41 @@ OUTPUT_LOCATION.mkdir(parents=True, exist_ok=True)
 
 CONTINGENT_SHARE_ASSUMPTION = 0.6
 
+# some decay rate tinkering: fixed decay rates for some fields
+DECAY_OVERRIDES = {"Kupe": 0.15}
+
+# years of decay modelled past the last forecast year (a generous horizon)
+DECAY_HORIZON = 100
+
 
 # Functions -----------------------------------------------------------
 
 
-def get_contingent_for_field(
-    field, contingent_file=CONTINGENT_FILE, share_assumption=CONTINGENT_SHARE_ASSUMPTION
+def get_contingent_reserves(
+    contingent_file=CONTINGENT_FILE, share_assumption=CONTINGENT_SHARE_ASSUMPTION
 ):
-    """Returns the natural gas reserves as a value
-    for a given field
-
-    Currently touches the input file a lot more than possibly needed
+    """Returns the natural gas reserves we assume are released,
+    as a series indexed by field
 
+    The file is only read once per process (see read_csv_cached())
     """
 
-    df = pd.read_csv(contingent_file)
+    df = read_csv_cached(contingent_file)
 
     df = df[df["Fuel"] == "Natural gas"]
-    df = df[df["Field"] == field]
-    if len(df) == 0:
-        return 0
-    return df["Value"].item() * share_assumption
+    if df["Field"].duplicated().any():
+        raise ValueError(f"Fields listed more than once in {contingent_file}")
+    return df.set_index("Field")["Value"] * share_assumption
+
+
+def get_contingent_for_field(
+    field, contingent_file=CONTINGENT_FILE, share_assumption=CONTINGENT_SHARE_ASSUMPTION
+):
+    """Returns the natural gas reserves as a value
+    for a given field (0 if it has none listed)
+    """
+
+    return get_contingent_reserves(contingent_file, share_assumption).get(field, 0)
 
 
 def update_maui(df):
@@ -63,21 +83,24 @@ def update_maui(df):
     return df
 
 
-def get_contingent_start_year_for_field(field, df):
+def get_contingent_start_years(df):
     """
     Based on the input df of production shapes,
-    return a list of fields and the year contingent can begin
-    Takes the earlist max year for each field, adds one, returns a list of field to year
+    return the year contingent can begin for each field
+    This is the year after each field's maximum output. If a field reaches
+    its maximum in several years, the first listed is used.
     """
-    # filter main data to field
-    df = df[df["Field"] == field]
-    # filter to max output
-    df = df[df["Value"] == max(df["Value"])]
-
-    # there may be multiple years but we just take the earliest
+    peak = df["Value"] == df.groupby("Field")["Value"].transform("max")
     # we add 1 (contingent release begins the year after max)
+    return df[peak].groupby("Field", sort=False)["Year"].first() + 1
 
-    return df["Year"].iloc[0] + 1
+
+def get_contingent_start_year_for_field(field, df):
+    """
+    Based on the input df of production shapes,
+    return the year contingent can begin for a field
+    """
+    return get_contingent_start_years(df[df["Field"] == field]).loc[field]
 
 
 def get_max_output_of_field(field, df):
@@ -88,111 +111,163 @@ def get_max_output_of_field(field, df):
     return df["Value"].max().item()
 
 
-def _get_value_for_year(df, year, var="Value"):
-    vals = df.loc[df["Year"] == year, var]
-    if vals.empty:
-        return 0
-    # else
-    return vals.iloc[0]  # first match
-
-
-def distribute_new_gas(field, start_year, sigma=0.8, years=40, startup=2):
+def distribute_new_gas_fields(new_fields, contingents=None, years=40):
     """
-    Pull a field's contingent values out and distribute them lognormally
-    Field: the name of the field to get contingent values for (will also label output)
-    start_year: the first year of production
-    startup: number of years before reaching peak production
-    sigma: variance/spread for lognormal distribution
-    years: years to distribute this over
+    Pull each new field's contingent values out and distribute them lognormally
 
-    """
+    new_fields: a frame with a row per field and columns
+        Field (the name of the field to get contingent values for),
+        StartYear (the first year of production),
+        Sigma (variance/spread for the lognormal distribution) and
+        Startup (number of years before reaching peak production)
+    contingents: contingent reserves by field (get_contingent_reserves())
+    years: years to distribute these over
 
-    contingent = get_contingent_for_field(field)
+    """
+    if contingents is None:
+        contingents = get_contingent_reserves()
 
-    peak_year = startup + 1
+    fields = new_fields["Field"].to_numpy()
+    contingent = contingents.reindex(fields, fill_value=0).to_numpy()
+    sigma = new_fields["Sigma"].to_numpy(dtype=float)[:, np.newaxis]
+    peak_year = new_fields["Startup"].to_numpy()[:, np.newaxis] + 1
     mu = np.log(peak_year) + sigma**2
     x = np.arange(1, years + 1)
 
+    # one row of weights per field
     pdf = lognorm.pdf(x, s=sigma, scale=np.exp(mu))
-    weights = pdf / pdf.sum()
-    allocation = contingent * weights
-
-    df = pd.DataFrame({"Year": x, "Value": allocation})
-
-    df["Year"] = df["Year"] + start_year - 1
+    weights = pdf / pdf.sum(axis=1, keepdims=True)
+    allocation = contingent[:, np.newaxis] * weights
+
+    start_year = new_fields["StartYear"].to_numpy()[:, np.newaxis]
+    df = pd.DataFrame(
+        {
+            "Year": (x + start_year - 1).ravel(),
+            "Value": allocation.ravel(),
+        }
+    )
     df["Variable"] = "Natural gas forecasts"
     df["ResourceType"] = "2C"
     df["Unit"] = "PJ"
-    df["Field"] = field
+    df["Field"] = np.repeat(fields, years)
 
     return df
 
 
-def decay_field_contingent(field, df):
+def distribute_new_gas(field, start_year, sigma=0.8, years=40, startup=2):
     """
+    Pull a field's contingent values out and distribute them lognormally
+    (see distribute_new_gas_fields())
 
-    Takes a field. Returns the contingent decayed
+    """
+    new_fields = pd.DataFrame(
+        {
+            "Field": [field],
+            "StartYear": [start_year],
+            "Sigma": [sigma],
+            "Startup": [startup],
+        }
+    )
+    return distribute_new_gas_fields(new_fields, years=years)
 
 
+def get_field_year_grid(df, fields, cstart):
+    """
+    The years of a field x year grid, from the first contingent start to
+    the last field's decay horizon, with each field's 2P forecast on it
+    (0 where there is none), and whether each field is decaying in each year
     """
+    last_year = df.groupby("Field")["Year"].max().reindex(fields) + DECAY_HORIZON - 1
+    years = np.arange(cstart.min(), last_year.max() + 1)
+    existing_2p = (
+        df.pivot_table(index="Field", columns="Year", values="Value", aggfunc="first")
+        .reindex(index=fields, columns=years)
+        .fillna(0)
+        .to_numpy()
+    )
+    active = (years >= cstart.to_numpy()[:, np.newaxis]) & (
+        years <= last_year.to_numpy()[:, np.newaxis]
+    )
+    return years, existing_2p, active
 
-    # expecting the input to just have the one field. Ensure that's true here
 
-    contingent = get_contingent_for_field(field)
-    cstart = get_contingent_start_year_for_field(field, df)
-    max_possible = get_max_output_of_field(field, df)
+def release_contingents(to_distribute, decay, max_possible, existing_2p, active):
+    """
+    Step through the years of the grid (see get_field_year_grid()) for every
+    field at once, returning the contingent each releases in each year
+    """
+    contingent_release = np.zeros(existing_2p.shape)
+    for i in range(existing_2p.shape[1]):
+        # we distribute the remaining by taking the decay from what's left
+        # then ensure it's not less than 2p projections, or more than max
+        q = np.maximum(
+            np.minimum(to_distribute * decay, max_possible), existing_2p[:, i]
+        )
+        q = np.where(active[:, i], q, 0)
+        # remove the distributed from total distribution
+        to_distribute = to_distribute - q
+        # we've distributed the sum of remaining 2p and contingent,
+        # so we split these by checking against the 2p for that year (rest was contingent)
+        contingent_release[:, i] = q - np.where(active[:, i], existing_2p[:, i], 0)
+    return contingent_release
 
-    # calculate remaining 2p from contingent start and existing decay rates
-    df = df[df["Field"] == field]
-    df = df[df["Year"] >= cstart]
-    df["Remaining2PAtStart"] = df.groupby("Field").transform("sum")["Value"]
-    df["Decay"] = df["Value"] / df["Remaining2PAtStart"]
-    df["TotalToDistribute"] = df["Remaining2PAtStart"] + contingent
 
-    # contingent start year
-    to_distribute = df["TotalToDistribute"].iloc[0]
-    decay = df["Decay"].iloc[0]
+def decay_field_contingents(df, contingents=None):
+    """
 
-    # some decay rate tinkering:
+    Takes the production forecasts of any number of fields.
+    Returns the contingent of each decayed, by year
 
-    if field == "Kupe":
-        decay = 0.15
+    From the year after its peak, a field's remaining 2P and contingent
+    are released at its decay rate, kept between its 2P forecast and its
+    peak. The years are stepped through for every field at once.
 
-    years_tail = np.arange(cstart, int(df["Year"].max()) + 100)  # generous horizon
+    """
+    if contingents is None:
+        contingents = get_contingent_reserves()
 
-    rows = []
-    for i, y in enumerate(years_tail):
-        # how much 2P was that year
-        existing_2p = _get_value_for_year(df, y)
-        # we distribute the remaining by taking the decay from what's left
-        q = to_distribute * decay
-        # then ensure it's not less than 2p projections, or more than max
-        q = min(q, max_possible)
-        q = max(q, existing_2p)
+    fields = pd.Index(df["Field"].unique())
+    cstart = get_contingent_start_years(df).reindex(fields)
+    max_possible = df.groupby("Field")["Value"].max().reindex(fields)
 
-        # remove the distributed from total distribution
-        to_distribute -= q
-        # we've distributed the sum of remaining 2p and contingent,
-        # so we split these by checking against the 2p for that year (rest was contingent)
-        contingent_release = q - existing_2p
-
-        rows.append(
-            {
-                "Index": i,
-                "Year": y,
-                "ToDistribute": to_distribute,
-                "TotalOutput": q,
-                "2C": contingent_release,
-            }
-        )
+    # calculate remaining 2p from contingent start and existing decay rates
+    df = df[df["Year"] >= df["Field"].map(cstart)]
+    remaining_2p = df.groupby("Field")["Value"].sum().reindex(fields)
+    # the decay rate of the first row at (or after) the contingent start
+    first_value = df.groupby("Field", sort=False).head(1).set_index("Field")["Value"]
+    decay = first_value.reindex(fields) / remaining_2p
+    decay.update(pd.Series(DECAY_OVERRIDES, dtype=float))
+    to_distribute = (
+        remaining_2p + contingents.reindex(fields, fill_value=0)
+    ).to_numpy()
+
+    years, existing_2p, active = get_field_year_grid(df, fields, cstart)
+    contingent_release = release_contingents(
+        to_distribute,
+        decay.to_numpy(),
+        max_possible.to_numpy(),
+        existing_2p,
+        active,
+    )
 
-    # combine
-    result_df = pd.DataFrame(rows)
-    # label and output
-    result_df["Field"] = field
-    result_df = result_df[["Year", "Field", "2C"]]
+    field_index, year_index = np.nonzero(active)
+    return pd.DataFrame(
+        {
+            "Year": years[year_index],
+            "Field": fields[field_index],
+            "2C": contingent_release[field_index, year_index],
+        }
+    )
 
-    return result_df
+
+def decay_field_contingent(field, df):
+    """
+
+    Takes a field. Returns the contingent decayed
+
+
+    """
+    return decay_field_contingents(df[df["Field"] == field])
 
 
 def distribute_all_field_contingents(df):
@@ -203,12 +278,8 @@ def distribute_all_field_contingents(df):
     Identifies fields in the list and combines results before tidying
     """
     df = df[df["Field"] != "Total"]
-    fields = df["Field"].unique()
 
-    contingent_df = pd.DataFrame()
-    for field in fields:
-        df_field = decay_field_contingent(field, df)
-        contingent_df = pd.concat([contingent_df, df_field])
+    contingent_df = decay_field_contingents(df)
 
     out = pd.merge(df, contingent_df, how="left")
     out["2C"] = out["2C"].fillna(0)
@@ -0,0 +1,124 @@
+"""
+Persistent cache of PVWatts runs for the solar availability-factor workflow
+
+Each scenario-zone run is kept as one .npz file in PVWATTS_CACHE_DIR,
+named by a hash of everything that determines its result:
+
+  - the contents of the zone's prepared EPW file
+  - every model input the run sets (see get_model_inputs in
+    prepare_times_nz.stage_3.pvwatts_model)
+  - the PySAM version
+
+so changing SolarPvScenarios.csv, or a weather file, only reruns PVWatts
+for the pairs it affects, and a PySAM upgrade reruns everything. Each file
+holds the 8760 hourly generation values (kW per kW DC) as float32 and the
+model's annual capacity factor and kWh per kW.
+
+Cache files are never removed automatically, so switching back to earlier
+assumptions is free. Delete the folder to start again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from prepare_times_nz.utilities.filepaths import STAGE_3_DATA
+
+PVWATTS_CACHE_DIR = STAGE_3_DATA / "electricity/solar_af/pvwatts_cache"
+
+HOURS_PER_YEAR = 8760
+
+
+def hash_epw_file(epw_path: Path) -> str:
+    """sha256 of an EPW file's contents"""
+    return hashlib.sha256(Path(epw_path).read_bytes()).hexdigest()
+
+
+def get_cache_key(
+    epw_hash: str, model_inputs: dict[str, Any], pysam_version: str
+) -> str:
+    """
+    Hash identifying one PVWatts run
+
+    model_inputs must be JSON-serialisable; its key order does not matter.
+    """
+    payload = json.dumps(
+        {"epw": epw_hash, "model": model_inputs, "pysam": pysam_version},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_cache_path(key: str, cache_dir: Path = PVWATTS_CACHE_DIR) -> Path:
+    """File holding the run with this key"""
+    return Path(cache_dir) / f"{key}.npz"
+
+
+def load_cached_run(key: str, cache_dir: Path = PVWATTS_CACHE_DIR) -> dict | None:
+    """
+    Read a cached run, or return None if there is no run with this key
+
+    The run is a dict of "generation" (float32 array), "capacity_factor"
+    and "kwh_per_kw".
+    """
+    cache_path = get_cache_path(key, cache_dir)
+    if not cache_path.exists():
+        return None
+    with np.load(cache_path) as cached:
+        return {
+            "generation": cached["generation"],
+            "capacity_factor": float(cached["capacity_factor"]),
+            "kwh_per_kw": float(cached["kwh_per_kw"]),
+        }
+
+
+def save_cached_run(key: str, run: dict, cache_dir: Path = PVWATTS_CACHE_DIR) -> None:
+    """
+    Save a run in the format load_cached_run() reads
+
+    The file is written under a temporary name and then renamed, so an
+    interrupted run never leaves a partial cache entry behind.
+    """
+    generation = np.asarray(run["generation"], dtype=np.float32)
+    if generation.shape != (HOURS_PER_YEAR,):
+        raise ValueError(
+            f"Expected {HOURS_PER_YEAR} hourly values to cache, "
+            f"got shape {generation.shape}"
+        )
+
+    cache_path = get_cache_path(key, cache_dir)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = cache_path.with_suffix(".partial.npz")
+    np.savez(
+        partial_path,
+        generation=generation,
+        capacity_factor=np.float64(run["capacity_factor"]),
+        kwh_per_kw=np.float64(run["kwh_per_kw"]),
+    )
+    os.replace(partial_path, cache_path)
+
+
+def load_cached_generation(
+    keys: list[str], cache_dir: Path = PVWATTS_CACHE_DIR
+) -> np.ndarray:
+    """
+    Stack the hourly generation of several cached runs
+
+    Returns a (len(keys), 8760) float32 array, one row per key. Raises
+    FileNotFoundError if any run is missing from the cache.
+    """
+    generation = np.empty((len(keys), HOURS_PER_YEAR), dtype=np.float32)
+    for row, key in enumerate(keys):
+        run = load_cached_run(key, cache_dir)
+        if run is None:
+            raise FileNotFoundError(
+                f"PVWatts run {key} is not in {cache_dir}. "
+                "Run solar_run_hourly_profiles.py first."
+            )
+        generation[row] = run["generation"]
+    return generation
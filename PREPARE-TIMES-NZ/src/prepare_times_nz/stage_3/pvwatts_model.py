@@ -0,0 +1,126 @@
+"""
+The PVWatts model behind the solar availability-factor workflow
+
+solar_run_hourly_profiles.py runs one PVWatts simulation per scenario-zone
+pair, on a pool of worker processes. The model setup and the worker
+functions live here, in an importable module, so the pool can pickle them
+by name under any multiprocessing start method (the script itself is
+loaded under a generated module name that spawned workers cannot import).
+
+Each worker builds one model in init_pvwatts_worker(), and simulate_pair()
+reconfigures it for every pair it is given.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+from PySAM import Pvwattsv8
+
+
+def create_model():
+    """
+    Create a PVWatts model with the defaults that build_model() starts from.
+    """
+    return Pvwattsv8.default("PVWattsNone")  # pylint: disable=c-extension-no-member
+
+
+def get_model_inputs(scenario) -> dict[str, dict[str, Any]]:
+    """
+    Every PVWatts input set for a scenario, other than the weather file,
+    grouped by model section.
+
+    These are also part of the PVWatts cache key, so anything that changes
+    a run's result must be set here.
+    """
+    use_weather_file_albedo = 1.0 if scenario["UseWeatherFileAlbedo"] else 0.0
+    solar_resource = {"use_wf_albedo": use_weather_file_albedo}
+    if not use_weather_file_albedo:
+        albedo = float(scenario["Albedo"])
+        solar_resource["albedo"] = tuple(albedo for _ in range(12))
+
+    return {
+        "Lifetime": {"system_use_lifetime_output": 0},
+        "SystemDesign": {
+            "system_capacity": float(scenario["SystemCapacityKW"]),
+            "array_type": int(scenario["ArrayTypeCode"]),
+            "tilt": float(scenario["TiltDeg"]),
+            "azimuth": float(scenario["AzimuthDeg"]),
+            "module_type": int(scenario["ModuleTypeCode"]),
+            "dc_ac_ratio": float(scenario["DcAcRatio"]),
+            "inv_eff": float(scenario["InvEffPercent"]),
+            "losses": float(scenario["LossesPercent"]),
+            "bifaciality": float(scenario["Bifaciality"]),
+            "gcr": float(scenario["Gcr"]),
+            "en_snowloss": 0,
+        },
+        "SolarResource": solar_resource,
+        "Shading": {
+            "shading_en_azal": 0,
+            "shading_en_diff": 0,
+            "shading_en_mxh": 0,
+            "shading_en_string_option": 0,
+            "shading_en_timestep": 0,
+        },
+    }
+
+
+def configure_model(model, epw_path, scenario):
+    """
+    Set the weather file and system design of a PVWatts model for one
+    scenario-zone pair.
+
+    Every input that differs between pairs is set here, so one model can be
+    reused for any number of pairs.
+    """
+    model.SolarResource.solar_resource_file = str(epw_path.resolve())
+    for section, inputs in get_model_inputs(scenario).items():
+        for name, value in inputs.items():
+            setattr(getattr(model, section), name, value)
+    return model
+
+
+def build_model(epw_path, scenario):
+    """
+    Build a PVWatts model for one scenario-zone pair.
+    """
+    return configure_model(create_model(), epw_path, scenario)
+
+
+# The PVWatts model of this process, created once by init_pvwatts_worker()
+_WORKER_MODEL = None
+
+
+def init_pvwatts_worker():
+    """
+    Create the PVWatts model this process reuses for every pair it runs.
+    """
+    global _WORKER_MODEL  # pylint: disable=global-statement
+    _WORKER_MODEL = create_model()
+
+
+def simulate_pair(scenario, zone, epw_path):
+    """
+    Run PVWatts for one scenario-zone pair on this process's model.
+
+    Returns the run as cached by save_cached_run(): the hourly generation
+    (kW per kW DC, as float32), capacity factor and kWh per kW.
+    """
+    if _WORKER_MODEL is None:
+        init_pvwatts_worker()
+    model = configure_model(_WORKER_MODEL, epw_path, scenario)
+    model.execute()
+    generation = np.asarray(model.Outputs.gen, dtype=np.float32)
+
+    if len(generation) != 8760:
+        raise ValueError(
+            f"Expected 8760 PVWatts outputs for {scenario['Tech_TIMES']}/{zone}, "
+            f"got {len(generation)}"
+        )
+
+    return {
+        "generation": generation,
+        "capacity_factor": float(model.Outputs.capacity_factor),
+        "kwh_per_kw": float(model.Outputs.kwh_per_kw),
+    }
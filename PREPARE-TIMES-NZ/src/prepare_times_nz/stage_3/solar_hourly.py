@@ -0,0 +1,84 @@
+"""
+Hourly solar profiles written by solar_run_hourly_profiles.py
+
+The PVWatts output for every scenario, zone and hour is kept as two typed
+intermediate datasets (see save_intermediate in
+prepare_times_nz.utilities.data_in_out):
+
+  - SOLAR_TIME_INDEX: one row per hour of the model base year, numbered
+    by hour_of_year (1-8760), with its calendar, wall-clock and timeslice
+    columns
+  - SOLAR_GENERATION: one row per scenario, zone and hour, holding
+    generation_kw_per_kw and the hour_of_year of the time index row
+
+so the calendar columns are stored once rather than for every scenario
+and zone, and the scenario and zone labels are dictionary-encoded.
+read_solar_hourly() reads only the columns asked for, and only joins the
+time index if some of them come from it.
+"""
+
+import numpy as np
+import pandas as pd
+from prepare_times_nz.utilities.data_in_out import (
+    get_intermediate_schema,
+    read_intermediate,
+)
+
+SOLAR_HOURLY_DIR = "stage_3_scenario_data/electricity/solar_af/hourly"
+SOLAR_TIME_INDEX = f"{SOLAR_HOURLY_DIR}/time_index"
+SOLAR_GENERATION = f"{SOLAR_HOURLY_DIR}/generation"
+
+JOIN_COLUMN = "hour_of_year"
+
+
+def join_time_index(generation: pd.DataFrame, time_index: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the time index columns to each generation row, matched on
+    hour_of_year, keeping the generation rows in order
+    """
+    positions = pd.Index(time_index[JOIN_COLUMN]).get_indexer(generation[JOIN_COLUMN])
+    if (positions < 0).any():
+        missing = np.unique(generation[JOIN_COLUMN].to_numpy()[positions < 0])
+        raise ValueError(f"Hours missing from the solar time index: {missing[:10]}")
+
+    times = time_index.drop(columns=JOIN_COLUMN).iloc[positions]
+    return pd.concat(
+        [generation.reset_index(drop=True), times.reset_index(drop=True)], axis=1
+    )
+
+
+def read_solar_hourly(
+    columns: list[str] | None = None, categorical: bool = False
+) -> pd.DataFrame:
+    """
+    Read hourly solar generation with any of the time index columns
+
+    columns may name columns of either dataset; by default every column of
+    both is read. Label columns come back as plain strings unless
+    categorical is True (see read_intermediate).
+    """
+    generation_columns = get_intermediate_schema(SOLAR_GENERATION).names
+    time_columns = [
+        col
+        for col in get_intermediate_schema(SOLAR_TIME_INDEX).names
+        if col not in generation_columns
+    ]
+    if columns is None:
+        columns = generation_columns + time_columns
+
+    unknown = [col for col in columns if col not in generation_columns + time_columns]
+    if unknown:
+        raise KeyError(f"Unknown solar hourly columns {unknown}")
+
+    wanted_times = [col for col in columns if col in time_columns]
+    read_columns = [col for col in generation_columns if col in columns]
+    if wanted_times and JOIN_COLUMN not in read_columns:
+        read_columns.append(JOIN_COLUMN)
+
+    df = read_intermediate(SOLAR_GENERATION, read_columns, categorical=categorical)
+    if wanted_times:
+        time_index = read_intermediate(
+            SOLAR_TIME_INDEX, [JOIN_COLUMN] + wanted_times, categorical=categorical
+        )
+        df = join_time_index(df, time_index)
+    return df[columns]
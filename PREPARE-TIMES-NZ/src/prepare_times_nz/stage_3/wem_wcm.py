@@ -27,6 +27,15 @@ However, actually the technology's island availability
 This method could be made much much much more robust by extracting
     that data from the system rather than doing some hardcoding here
 
+MARGIN SWEEPS:
+
+make_uc_wem_grid() builds the constraint tables for a grid of margins and
+constraint variants (national and SI) in one pass, reading the AFs and
+year fractions once. Only the demand coefficient (UC_FLO) depends on the
+margin, so each variant's table is built once and the coefficients for
+every margin are computed together. main(margins=...) saves each table to
+its own file under OUTPUT_LOCATION/margin_sweep, for sensitivity scenarios.
+
 """
 
 import numpy as np
@@ -40,6 +49,10 @@ OUTPUT_LOCATION = STAGE_3_DATA / "wem_user_constraints"
 yrfr_data = STAGE_2_DATA / "settings/load_curves/yrfr.csv"
 generated_renewable_curves = STAGE_3_DATA / "electricity/renewable_curves.csv"
 
+# margins of the constraints used in the main scenario
+WEM_MARGIN = 0.16
+WEM_SI_MARGIN = 0.28
+
 
 # Helpers -----------------------------------------------
 
@@ -172,19 +185,21 @@ def get_si_only_techs():
     return ["HydRR"]
 
 
-def get_weighted_winter_afs():
+def get_weighted_winter_afs(yrfr=None):
     """
     Calculates weighted average availability for techs
     with seasonal availablity
     Filters these for winter/autumn seasons
 
     outputs different availability per tech/island
+    yrfr can be given to save reading the year fractions again
     """
 
     # get availability curves for intermittent techs
     df = get_af_curves()
     # get the daynite year fractions
-    yrfr = get_yrfr()
+    if yrfr is None:
+        yrfr = get_yrfr()
     # get the seasonal year fractions
     yrfr_seasons = get_yrfr_seasons(yrfr)
 
@@ -221,10 +236,10 @@ def get_weighted_winter_afs():
     return df
 
 
-def get_winter_share():
+def get_winter_share(yrfr=None):
     """Simply return the winter/fall share of the year"""
     # get the daynite year fractions
-    df = get_yrfr()
+    df = get_yrfr() if yrfr is None else yrfr
     # get the seasonal year fractions
     df = get_yrfr_seasons(df)
     # filter winter fall
@@ -233,7 +248,7 @@ def get_winter_share():
     return df["YRFR"].sum()
 
 
-def get_all_afs():
+def get_all_afs(yrfr=None):
     """
     Takes all techs from the default and weighted AFs
     Creates a single table where we use the weighted AFs if they exist
@@ -242,7 +257,7 @@ def get_all_afs():
 
     df_default = get_default_afs()
 
-    df_intermittent = get_weighted_winter_afs()
+    df_intermittent = get_weighted_winter_afs(yrfr)
 
     # first start by just ensuring that we have every tech from either table
     df = pd.concat([df_default, df_intermittent])
@@ -280,6 +295,7 @@ def get_flo_equation(margin, cap2act=31.536, year_fraction=1):
     as this is applied to winter demand
 
     The resulting value will be applied as a coefficient to activity output
+    margin can be an array of margins, giving an array of coefficients
     """
 
     flo = (margin + 1) / cap2act
@@ -289,7 +305,7 @@ def get_flo_equation(margin, cap2act=31.536, year_fraction=1):
     return flo
 
 
-def create_uc_table(df, uc_n, uc_type, uc_desc, margin):
+def create_uc_table(df, uc_n, uc_type, uc_desc, *, margin, winter_share=None):
     """
     Uses the AFs produced and reshaped for the
     user_constraint
@@ -297,8 +313,11 @@ def create_uc_table(df, uc_n, uc_type, uc_desc, margin):
     uc_n = name of UC (eg WEM, WEM_SI)
     uc_type = specific code for the method (UC_RHRST, etc)
     uc_desc = user description of UC
+    winter_share = winter/fall share of the year (read from yrfr if None)
     """
 
+    # pylint: disable=too-many-arguments
+
     # get AF wildcards
     df["Pset_PN"] = "ELC_" + df["Tech_TIMES"] + "_*"
     df["Pset_CO"] = "ELC"
@@ -324,7 +343,8 @@ def create_uc_table(df, uc_n, uc_type, uc_desc, margin):
     # create the demand side (we'll append this afterwards)
     df_d = pd.DataFrame()
 
-    winter_share = get_winter_share()
+    if winter_share is None:
+        winter_share = get_winter_share()
     uc_flo = get_flo_equation(margin=margin, year_fraction=winter_share)
     # set single row with the coefficient
     df_d.loc[0, "UC_FLO"] = uc_flo
@@ -343,13 +363,20 @@ def create_uc_table(df, uc_n, uc_type, uc_desc, margin):
     return df
 
 
-def make_uc_wem(df):
+def make_uc_wem(df, margin=WEM_MARGIN, winter_share=None):
     """
     Additional manipulation of the uc created above specific to the
     national constraint
     """
 
-    out = create_uc_table(df, "WEM", "UC_RHSTS", "NZ Winter energy margin", margin=0.16)
+    out = create_uc_table(
+        df,
+        "WEM",
+        "UC_RHSTS",
+        "NZ Winter energy margin",
+        margin=margin,
+        winter_share=winter_share,
+    )
 
     # relabel the UC_RHSTS to ignore islands.
     # Because its always 0 it doesn't matter which we pick.
@@ -378,7 +405,7 @@ def make_uc_wem(df):
     return out
 
 
-def make_uc_wem_si(df):
+def make_uc_wem_si(df, margin=WEM_SI_MARGIN, winter_share=None):
     """
     Additional manipulation of the uc created above specific to the
     national constraint
@@ -388,7 +415,12 @@ def make_uc_wem_si(df):
     df_for_si = df[~df["UC_CAP~SI"].isnull()].copy().reset_index()
 
     out = create_uc_table(
-        df_for_si, "WEM_SI", "UC_RHSRTS", "SI Winter energy margin", margin=0.28
+        df_for_si,
+        "WEM_SI",
+        "UC_RHSRTS",
+        "SI Winter energy margin",
+        margin=margin,
+        winter_share=winter_share,
     )
 
     # only relevant capacity factor coefficient is the SI one
@@ -418,17 +450,92 @@ def make_uc_wem_si(df):
     return out
 
 
-def main():
-    """Script entrypoint"""
+# Margin sweeps -----------------------------------------------
 
-    df = get_all_afs()
+# the constraint variants, by the name used in their file names
+WEM_VARIANTS = {
+    "wem": make_uc_wem,
+    "wem_si": make_uc_wem_si,
+}
 
-    uc_wem = make_uc_wem(df)
-    uc_wem_si = make_uc_wem_si(df)
+
+def get_grid_file_name(variant, margin):
+    """File name of one table of a margin sweep, eg uc_wem_si_margin_28.csv"""
+    percent = f"{margin * 100:g}".replace(".", "p")
+    return f"uc_{variant}_margin_{percent}.csv"
+
+
+def make_uc_wem_grid(margins, variants=None, df=None, winter_share=None):
+    """
+    Builds the constraint table of every variant (all of WEM_VARIANTS by
+    default) for every margin
+
+    The AFs and winter share are read once (unless given). Each variant's
+    table is built once, and its demand coefficient (the UC_FLO row) is
+    then set for each margin.
+
+    Returns a dict of tables keyed by (variant, margin)
+    """
+    if variants is None:
+        variants = list(WEM_VARIANTS)
+    if df is None or winter_share is None:
+        yrfr = get_yrfr()
+        if df is None:
+            df = get_all_afs(yrfr)
+        if winter_share is None:
+            winter_share = get_winter_share(yrfr)
+
+    margins = list(margins)
+    flos = get_flo_equation(
+        np.asarray(margins, dtype=float), year_fraction=winter_share
+    )
+
+    grid = {}
+    for variant in variants:
+        base = WEM_VARIANTS[variant](df.copy(), margin=0, winter_share=winter_share)
+        demand_row = base["UC_FLO"].notna()
+        for margin, flo in zip(margins, flos):
+            out = base.copy()
+            out.loc[demand_row, "UC_FLO"] = flo
+            grid[(variant, margin)] = out
+    return grid
+
+
+def save_wem_grid(grid):
+    """Saves each table of a margin sweep to its own file"""
+    for (variant, margin), df in grid.items():
+        _save_data(
+            df=df,
+            name=get_grid_file_name(variant, margin),
+            label=f"UC_WEM constraint table ({variant}, margin {margin:g})",
+            filepath=OUTPUT_LOCATION / "margin_sweep",
+        )
+
+
+def main(margins=None, variants=None):
+    """
+    Script entrypoint
+
+    Saves the constraints for the main scenario, and, if margins are
+    given, the tables of a margin sweep over them
+    """
+
+    yrfr = get_yrfr()
+    df = get_all_afs(yrfr)
+    winter_share = get_winter_share(yrfr)
+
+    uc_wem = make_uc_wem(df.copy(), winter_share=winter_share)
+    uc_wem_si = make_uc_wem_si(df.copy(), winter_share=winter_share)
 
     save_wem_data(uc_wem, "uc_wem.csv")
     save_wem_data(uc_wem_si, "uc_wem_si.csv")
 
+    if margins:
+        grid = make_uc_wem_grid(
+            margins, variants=variants, df=df, winter_share=winter_share
+        )
+        save_wem_grid(grid)
+
 
 if __name__ == "__main__":
     main()
@@ -74,6 +74,16 @@ COMM_TO_VEHICLE = {
     "T_O_JET_Int": "International Aviation",
 }
 
+ROAD_COMMODITIES = [
+    "T_P_Car",
+    "T_C_Car",
+    "T_P_Mcy",
+    "T_P_Bus",
+    "T_F_LTrk",
+    "T_F_MTrk",
+    "T_F_HTrk",
+]
+
 VAR_LIST = [
     "efficiency",
     "life(years)",
@@ -123,6 +133,11 @@ def strip_level(name: str) -> str:
     return name
 
 
+def strip_levels(names: pd.Series) -> pd.Series:
+    """strip_level() for a whole column of technology names."""
+    return names.str.replace(r"_(LOW|MED|HIGH)$", "", case=False, regex=True)
+
+
 def extract_tertile(tech: str) -> int:
     """Extracts the tertile index from a technology name based on its level suffix."""
     if tech.endswith("_LOW"):
@@ -134,15 +149,6 @@ def extract_tertile(tech: str) -> int:
     return 0  # default or exception
 
 
-def get_base_name(tech_name, base_list):
-    """Matches a stripped technology name against a base name list."""
-    base = strip_level(tech_name)
-    for b in base_list:
-        if base == b:
-            return b
-    return base
-
-
 def assign_tcap(base):
     """Assigns the appropriate TIMES capacity unit based on the base technology name."""
     if base in {
@@ -328,13 +334,14 @@ def create_fuel_commodity_df(columns: list[str]) -> pd.DataFrame:
         [(comm, region) for comm in comm_names for region in regions],
         columns=["CommName", "Region"],
     )
-    df["Csets"] = df["CommName"].apply(lambda x: "ENV" if x == "TRACO2" else "NRG")
-    df["Unit"] = df["CommName"].apply(lambda x: "Kt" if x == "TRACO2" else "PJ")
-    df["LimType"] = df["CommName"].apply(lambda x: "" if x == "TRACO2" else "FX")
-    df["CTSLvl"] = df["CommName"].apply(
-        lambda x: "DAYNITE" if x in ["TRAH2R", "TRAELC"] else "ANNUAL"
+    is_co2 = df["CommName"] == "TRACO2"
+    df["Csets"] = np.where(is_co2, "ENV", "NRG")
+    df["Unit"] = np.where(is_co2, "Kt", "PJ")
+    df["LimType"] = np.where(is_co2, "", "FX")
+    df["CTSLvl"] = np.where(
+        df["CommName"].isin(["TRAH2R", "TRAELC"]), "DAYNITE", "ANNUAL"
     )
-    df["Ctype"] = df["CommName"].apply(lambda x: "ELC" if x == "TRAELC" else "")
+    df["Ctype"] = np.where(df["CommName"] == "TRAELC", "ELC", "")
     return df[columns]
 
 
@@ -359,12 +366,9 @@ def create_fuel_process_df(columns: list[str]) -> pd.DataFrame:
     df["Sets"] = ""
     df.loc[0, "Sets"] = "DISTR"
     df["Tact"] = "PJ"
-    df["Tcap"] = df["TechName"].apply(
-        lambda x: "GW" if x in ["FTE_TRAH2R", "FTE_TRAELC"] else "PJa"
-    )
-    df["Tslvl"] = df["TechName"].apply(
-        lambda x: "DAYNITE" if x in ["FTE_TRAH2R", "FTE_TRAELC"] else ""
-    )
+    is_daynite = df["TechName"].isin(["FTE_TRAH2R", "FTE_TRAELC"])
+    df["Tcap"] = np.where(is_daynite, "GW", "PJa")
+    df["Tslvl"] = np.where(is_daynite, "DAYNITE", "")
     return df[columns]
 
 
@@ -391,25 +395,11 @@ def create_commodity_df(columns: list[str]) -> pd.DataFrame:
         [(comm, region) for comm in comm_names for region in regions],
         columns=["CommName", "Region"],
     )
-    df["Csets"] = df["CommName"].apply(lambda x: "NRG" if x == "H2R" else "DEM")
-    df["Unit"] = df["CommName"].apply(
-        lambda x: (
-            "BVkm"
-            if x
-            in [
-                "T_P_Car",
-                "T_C_Car",
-                "T_P_Mcy",
-                "T_P_Bus",
-                "T_F_LTrk",
-                "T_F_MTrk",
-                "T_F_HTrk",
-            ]
-            else "PJ"
-        )
-    )
+    is_h2r = df["CommName"] == "H2R"
+    df["Csets"] = np.where(is_h2r, "NRG", "DEM")
+    df["Unit"] = np.where(df["CommName"].isin(ROAD_COMMODITIES), "BVkm", "PJ")
     df["TsLvl"] = "DAYNITE"
-    df["LimType"] = df["CommName"].apply(lambda x: "FX" if x == "H2R" else "")
+    df["LimType"] = np.where(is_h2r, "FX", "")
     return df[columns]
 
 
@@ -484,12 +474,9 @@ def create_process_df(columns: list[str]) -> pd.DataFrame:
     )
 
     df["Sets"] = "DMD"
-    df["Tact"] = df["TechName"].apply(
-        lambda x: "PJ" if get_base_name(x, tech_names_base) in exceptions else "BVkm"
-    )
-    df["Tcap"] = df["TechName"].apply(
-        lambda x: assign_tcap(get_base_name(x, tech_names_base))
-    )
+    base = strip_levels(df["TechName"])
+    df["Tact"] = np.where(base.isin(exceptions), "PJ", "BVkm")
+    df["Tcap"] = base.map({name: assign_tcap(name) for name in tech_names_base})
 
     return df[columns]
 
@@ -501,147 +488,169 @@ def create_fuel_process_parameters_df(columns: list[str]) -> pd.DataFrame:
     This function generates process parameter rows for transport fuel technologies
     based on the output of `create_fuel_process_df`, and maps each technology to
     its associated input and output commodities."""
-    tech_df = create_fuel_process_df(["TechName", "Region"])
+    df = create_fuel_process_df(["TechName", "Region"])
     expanded_comm_in = {
         "FTE_TRADSL": ["DSL", "BDSL", "DID"],
         "FTE_TRAJET": ["JET", "DIJ"],
     }
+    df["Comm-Out"] = df["TechName"].str.replace("FTE_", "", regex=False)
+    default_comm_in = (
+        df["Comm-Out"]
+        .str.replace("TRA", "", regex=False)
+        .str.replace("ELC", "ELCDD", regex=False)
+    )
+    df["Comm-In"] = [
+        expanded_comm_in.get(tech, [comm_in])
+        for tech, comm_in in zip(df["TechName"], default_comm_in)
+    ]
+    df = df.explode("Comm-In", ignore_index=True)
+
+    comm_in = df["Comm-In"]
+    is_h2r = df["TechName"].str.contains("H2R", regex=False)
+    share_i_up = np.select(
+        [comm_in.isin(["DSL", "DID"]), comm_in == "BDSL"], [1, 0.07], np.nan
+    )
+    df["Share-I~UP"] = share_i_up
+    df["Share-I~UP~2025"] = share_i_up
+    df["Share-I~UP~2060"] = share_i_up
+    df["EFF"] = np.where(is_h2r, 0.37, 1)
+    df["Life"] = np.where(is_h2r, 20, 60)
+    df["FIXOM"] = np.where(is_h2r, 100.40972, np.nan)
+    df["VAROM"] = np.select(
+        [comm_in.isin(["NGA", "LPG"]), comm_in.isin(["PET", "DSL"])],
+        [4.946, 0.92],
+        np.nan,
+    )
+    df["FLO_DELIV"] = np.where(comm_in.isin(["DIJ", "DID"]), 2.4, np.nan)
+    return df[columns]
+
+
+# -----------------------------------------------------------------------------
+# COMPLEX builder (process parameters)
+# -----------------------------------------------------------------------------
+def get_comm_ins(tech: str) -> list[str]:
+    """Comm-In commodities of a base year technology."""
+    # 1) specials first
+    comm_ins = next((lst for key, lst in SPECIAL_COMM_IN.items() if key in tech), None)
+    if comm_ins is not None:
+        return comm_ins
+
+    # 2) PHEV: allow multiple fuels (liquid + electricity) for one TechName
+    up = tech.upper()
+    if "PHEV" in up:
+        fuels = []
+        if "PET" in up:
+            fuels.append("TRAPET")  # petrol
+        if "DSL" in up:
+            fuels.append("TRADSL")  # diesel PHEV variants, if any
+        fuels.append("TRAELC")  # electricity for all PHEVs
+        return fuels
+
+    # 3) default inference for everything else
+    ci = infer_comm_in(tech)
+    return [ci] if ci else []
+
+
+def create_tech_attribute_table(tech_names: Sequence[str]) -> pd.DataFrame:
+    """
+    Mapping table with a row for each Comm-In of each unique technology:
+    its Comm-Out, the vehicle/fuel/technology it is looked up by in the
+    demand table, whether it is a special (PJ-based) technology, and its
+    tertile. Technologies without a Comm-Out are left out.
+    """
     rows = []
-    for _, row in tech_df.iterrows():
-        tech = row["TechName"]
-        region = row["Region"]
-        comm_out = tech.replace("FTE_", "")
-        comm_in_list = expanded_comm_in.get(
-            tech, [comm_out.replace("TRA", "").replace("ELC", "ELCDD")]
-        )
-        for comm_in in comm_in_list:
-            share_i_up = share_i_up_2025 = share_i_up_2060 = np.nan
-            eff = 1
-            life = 60
-            fixom = varom = flo_deliv = np.nan
-            if "H2R" in tech:
-                eff = 0.37
-                life = 20
-                fixom = 100.40972
-            if comm_in in ["NGA", "LPG"]:
-                varom = 4.946
-            elif comm_in in ["PET", "DSL"]:
-                varom = 0.92
-            elif comm_in in ["DIJ", "DID"]:
-                flo_deliv = 2.4
-            if comm_in in ["DSL", "DID"]:
-                share_i_up = share_i_up_2025 = share_i_up_2060 = 1
-            elif comm_in == "BDSL":
-                share_i_up = share_i_up_2025 = share_i_up_2060 = 0.07
+    for tech in pd.unique(pd.Series(tech_names)):
+        comm_out = comm_out_for_tech(strip_level(tech))
+        if comm_out is None:
+            continue
+        for comm_in in get_comm_ins(tech):
+            vehicle, fuel, ttype = parse_attrs(tech, comm_out, comm_in)
             rows.append(
                 {
                     "TechName": tech,
-                    "Region": region,
                     "Comm-In": comm_in,
                     "Comm-Out": comm_out,
-                    "Share-I~UP": share_i_up,
-                    "Share-I~UP~2025": share_i_up_2025,
-                    "Share-I~UP~2060": share_i_up_2060,
-                    "EFF": eff,
-                    "Life": life,
-                    "FIXOM": fixom,
-                    "VAROM": varom,
-                    "FLO_DELIV": flo_deliv,
+                    "vehicletype": vehicle,
+                    "fueltype": fuel,
+                    "technology": ttype,
+                    "is_special": any(key in tech for key in SPECIAL_COMM_IN),
+                    "tertile": extract_tertile(tech),
                 }
             )
-    out = pd.DataFrame(rows)[columns]
-    return out
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "TechName",
+            "Comm-In",
+            "Comm-Out",
+            "vehicletype",
+            "fueltype",
+            "technology",
+            "is_special",
+            "tertile",
+        ],
+    )
 
 
-# -----------------------------------------------------------------------------
-# COMPLEX builder (process parameters)
-# -----------------------------------------------------------------------------
-def create_process_parameters_df(columns: list[str]) -> pd.DataFrame:
-    """Main Process-Parameters table (uses VAR_LIST)."""
-    demand = pd.read_csv(TRA_FILE)
+def lookup_first_value(
+    keys: pd.DataFrame, tbl: pd.DataFrame, on: list[str]
+) -> np.ndarray:
+    """The value of the first row of tbl matching each row of keys on the
+    columns on (NaN where none do)."""
+    first = tbl.drop_duplicates(on)[on + ["value"]]
+    return keys[on].merge(first, on=on, how="left")["value"].to_numpy()
+
+
+def create_process_parameters_df(
+    columns: list[str], demand: pd.DataFrame | None = None
+) -> pd.DataFrame:
+    """Main Process-Parameters table (uses VAR_LIST).
+
+    Each technology and region takes the value of every variable from the
+    first demand row (TRA_FILE by default) for its vehicle, fuel, technology
+    and region, and also its tertile unless it is a special technology."""
+    if demand is None:
+        demand = pd.read_csv(TRA_FILE)
     var_tbls = load_var_tables(demand)
     tech_df = create_process_df(["TechName", "Region"])
 
-    # Comm-Out map
-    comm_out_map = {t: comm_out_for_tech(strip_level(t)) for t in tech_df["TechName"]}
-    rows: list[dict[str, object]] = []
-
-    for tech, region in tech_df[["TechName", "Region"]].itertuples(index=False):
-        comm_out = comm_out_map.get(tech)
-        if comm_out is None:
-            continue
+    df = tech_df.merge(create_tech_attribute_table(tech_df["TechName"]), on="TechName")
+    has_attrs = df[["vehicletype", "fueltype", "technology"]].notna().all(axis=1)
+    is_special = df["is_special"].to_numpy()
+    keys = pd.DataFrame(
+        {
+            "vehicletype": df["vehicletype"].str.lower(),
+            "fueltype": df["fueltype"].str.lower(),
+            "technology": df["technology"].str.lower(),
+            "region": df["Region"].str.lower(),
+            "tertile": df["tertile"],
+        }
+    )
+    special_keys = ["vehicletype", "fueltype", "technology", "region"]
 
-        # 1) specials first
-        comm_ins = next(
-            (lst for key, lst in SPECIAL_COMM_IN.items() if key in tech), None
+    for var in VAR_LIST:
+        out = VAR_RENAME[var]
+        # pjvalue only for special techs, vktvalue only for the others
+        if var == "pjvalue":
+            applies = is_special
+        elif var == "vktvalue":
+            applies = ~is_special
+        else:
+            applies = np.ones(len(df), dtype=bool)
+
+        tbl = var_tbls[var]
+        value = np.where(
+            is_special,
+            # Match without tertile
+            lookup_first_value(keys, tbl, special_keys),
+            lookup_first_value(keys, tbl, special_keys + ["tertile"]),
         )
+        value = np.where(has_attrs, value, np.nan)
+
+        if out not in df.columns:
+            df[out] = np.nan
+        df[out] = df[out].where(~applies, value)
 
-        # 2) PHEV: allow multiple fuels (liquid + electricity) for one TechName
-        if comm_ins is None and "PHEV" in tech.upper():
-            up = tech.upper()
-            fuels = []
-            if "PET" in up:
-                fuels.append("TRAPET")  # petrol
-            if "DSL" in up:
-                fuels.append("TRADSL")  # diesel PHEV variants, if any
-            fuels.append("TRAELC")  # electricity for all PHEVs
-            comm_ins = fuels
-
-        # 3) default inference for everything else
-        if comm_ins is None:
-            ci = infer_comm_in(tech)
-            comm_ins = [ci] if ci else []
-
-        for comm_in in comm_ins:
-            veh, fuel, ttype = parse_attrs(tech, comm_out, comm_in)
-            row = {
-                "TechName": tech,
-                "Region": region,
-                "Comm-In": comm_in,
-                "Comm-Out": comm_out,
-            }
-
-            # ADD THIS HERE
-            is_special = any(key in tech for key in SPECIAL_COMM_IN)
-
-            for var in VAR_LIST:
-                out = VAR_RENAME[var]
-
-                # Skip pjvalue/vktvalue based on tech type
-                if var == "pjvalue" and not is_special:
-                    continue
-                if var == "vktvalue" and is_special:
-                    continue
-
-                if None in (veh, fuel, ttype):
-                    row[out] = None
-                    continue
-
-                tbl = var_tbls[var]
-
-                if is_special:
-                    # Match without tertile
-                    hit = tbl[
-                        (tbl["vehicletype"] == veh.lower())
-                        & (tbl["fueltype"] == fuel.lower())
-                        & (tbl["technology"] == ttype.lower())
-                        & (tbl["region"] == region.lower())
-                    ]
-                else:
-                    tech_tertile = extract_tertile(tech)
-                    hit = tbl[
-                        (tbl["vehicletype"] == veh.lower())
-                        & (tbl["fueltype"] == fuel.lower())
-                        & (tbl["technology"] == ttype.lower())
-                        & (tbl["region"] == region.lower())
-                        & (tbl["tertile"] == tech_tertile)
-                    ]
-
-                row[out] = hit["value"].iloc[0] if not hit.empty else None
-            # Append the row after it's fully built
-            rows.append(row)
-
-    df = pd.DataFrame(rows)
     # Add empty columns if missing
     for col in columns:
         if col not in df.columns:
@@ -710,21 +719,10 @@ def create_constraints_df(df):
     The input df is just the main transport df
     """
 
-    # identify all road transport commodities
-    # (we don't use this process for air/rail/shipping)
-    road_transport_commodities = [
-        "T_P_Car",
-        "T_C_Car",
-        "T_P_Mcy",
-        "T_P_Bus",
-        "T_F_LTrk",
-        "T_F_MTrk",
-        "T_F_HTrk",
-    ]
-
     # identify existing topology for road transport
+    # (we don't use this process for air/rail/shipping)
     df_c = df[["TechName", "Comm-Out"]].drop_duplicates()
-    df_c = df_c[df_c["Comm-Out"].isin(road_transport_commodities)]
+    df_c = df_c[df_c["Comm-Out"].isin(ROAD_COMMODITIES)]
 
     # create groups
     df_c["Utilisation"] = df_c["TechName"].str.rsplit("_", n=1).str[-1]
@@ -752,17 +750,17 @@ def create_constraints_df(df):
 
     # duplicate each row with the complementary wildcards from the same topology group
     group_cols = ["Comm-Out", "TechNameGroup"]
-    wildcards_by_group = df_c.groupby(group_cols)["Wildcard"].agg(list).to_dict()
+    wildcards = df_c[group_cols + ["Wildcard"]].assign(row=np.arange(len(df_c)))
+    others = wildcards.merge(wildcards, on=group_cols, suffixes=("", "_other"))
+    others = others[others["Wildcard"] != others["Wildcard_other"]].sort_values(
+        ["row", "row_other"]
+    )
+    other_wildcards = others.groupby("row")["Wildcard_other"].agg(", ".join)
 
     df_c_other = df_c.copy()
-    df_c_other["Wildcard"] = df_c_other.apply(
-        lambda row: ", ".join(
-            wildcard
-            for wildcard in wildcards_by_group[(row["Comm-Out"], row["TechNameGroup"])]
-            if wildcard != row["Wildcard"]
-        ),
-        axis=1,
-    )
+    df_c_other["Wildcard"] = other_wildcards.reindex(
+        np.arange(len(df_c)), fill_value=""
+    ).to_numpy()
     df_c_other["Pset_PN"] = df_c_other["Wildcard"]
     # we defined these precisely so we could create the complementary constraint cap
     df_c_other["UC_CAP"] = f"{-1 / 3:.6f}"
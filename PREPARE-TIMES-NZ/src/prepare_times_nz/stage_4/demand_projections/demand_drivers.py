@@ -18,7 +18,7 @@ from prepare_times_nz.stage_3.demand_projections.population_projections import (
 from prepare_times_nz.stage_4.baseyear.transport import (
     COMM_TO_VEHICLE as transport_commodity_map,
 )
-from prepare_times_nz.utilities.data_in_out import _save_data
+from prepare_times_nz.utilities.data_in_out import _save_data, read_excel_cached
 from prepare_times_nz.utilities.filepaths import (
     ASSUMPTIONS,
     CONCORDANCES,
@@ -257,7 +257,7 @@ def get_gdp_index():
     Data pulled from EDGS and based to BASE_YEAR
     """
 
-    df = pd.read_excel(EDGS, sheet_name="GDP")
+    df = read_excel_cached(EDGS, sheet_name="GDP")
 
     df = df.rename(columns={"Scenario": "MBIEScenario", "TimePeriod": "Year"})
 
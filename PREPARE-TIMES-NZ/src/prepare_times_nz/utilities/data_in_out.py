@@ -7,12 +7,126 @@ Long term, ideally every in/out would be wrapped in here
 and the script's inputs and outputs can be logged
 This will help us trace how things flow through later.
 For now, just standard helpers to be used elsewhere
+
+I/O registry
+------------
+
+Pipeline scripts are run through prepare_times_nz.utilities.task_runner,
+which uses IORecorder to record exactly which data files they read and
+write. It watches every file opened (using a Python audit hook) under
+DATA_RAW, DATA_INTERMEDIATE and the docs folder, and every folder listed
+or globbed there. The files read, files written, folders scanned and
+package modules imported are saved to IO_RECORD_LOCATION as JSON once
+the script succeeds. dodo.py uses these
+records to give each task precise file_dep and targets, rather than
+depending on every file in the previous stages. The files now in each
+scanned folder are dependencies too, so a new raw file picked up by a
+glob reruns the script.
+
+pyarrow opens parquet files itself rather than through Python, so parquet
+reads and writes through pandas are recorded separately, by wrapping
+pd.read_parquet and DataFrame.to_parquet while a recorder is active.
+Package modules are found by following the script's import statements, so the record is
+the same whether the script runs in its own process or in-process.
+
+Shared inputs
+-------------
+
+read_csv_cached() reads small inputs that many scripts share (such as the
+CPI and CGPI indices) once per process. Each call gets its own copy, and
+the file is read again if it changes on disk.
+
+read_excel_cached() does the same for sheets of raw Excel workbooks, which
+are slow to parse, and also keeps each parsed sheet as parquet under
+EXCEL_CACHE_LOCATION. Cached sheets are keyed by a hash of the workbook's
+contents, the sheet and the read_excel() arguments, so later runs (and
+other scripts reading the same sheet) skip openpyxl entirely until the
+workbook changes. The workbook itself is still recorded as the read.
+
+Intermediate datasets
+---------------------
+
+save_intermediate() writes a stage output as parquet, cast to the explicit
+schema registered for it in prepare_times_nz.utilities.intermediate_schemas,
+and read_intermediate() reads it back with its types intact, rather than
+re-parsing a CSV. Datasets are named by their path under DATA_INTERMEDIATE
+without an extension, e.g. "stage_1_input_data/eeud/eeud". The schema is
+checked again on reading, so a stage fails straight away if an upstream
+file does not have the columns and types it expects.
+
+A CSV copy of each dataset is only written when asked for, with
+save_intermediate(..., csv=True) or for every dataset by setting the
+CSV_MIRROR_ENV environment variable to 1 (``doit csv_mirror=1``).
+
+Larger outputs that grow over time (such as the EMI half-hourly data) are
+kept as partitioned parquet datasets instead: a folder per partition value
+(e.g. "Year=2023"), written a part at a time with save_parquet_part() and
+read with read_parquet_dataset(), which only loads the partitions and
+columns asked for.
+
 """
 
+import ast
+import datetime
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as pads
+import pyarrow.parquet as pq
+from prepare_times_nz.utilities.filepaths import (
+    DATA_INTERMEDIATE,
+    DATA_RAW,
+    PREP_LIBRARY_LOCATION,
+    PREP_LOCATION,
+)
+from prepare_times_nz.utilities.intermediate_schemas import INTERMEDIATE_SCHEMAS
 from prepare_times_nz.utilities.logger_setup import blue_text, logger
 
+# Where the per-task I/O records are kept (alongside the doit database)
+IO_RECORD_LOCATION = PREP_LOCATION / ".cache/doit/io"
+
+# Only files in these folders are recorded
+TRACKED_LOCATIONS = [DATA_RAW, DATA_INTERMEDIATE, PREP_LOCATION / "docs"]
+
+# Package source, so changes to shared code rerun the scripts that use it
+PACKAGE_LOCATION = PREP_LIBRARY_LOCATION.parent
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+# Audit events that list a folder. pathlib and os.walk list folders through
+# os.scandir/os.listdir too.
+_SCAN_EVENTS = {"os.listdir", "os.scandir", "glob.glob", "glob.glob/2"}
+
+# The recorder currently collecting file opens. Audit hooks cannot be
+# removed, so one hook is installed per process and forwards to this.
+_RECORDING = {"recorder": None, "installed": False}
+# pandas' own parquet functions, while a recorder has them wrapped
+_PANDAS_PARQUET = {}
+
+# read_csv_cached() and read_intermediate(cached=True) results, by resolved path
+_CSV_CACHE: dict[Path, tuple[tuple, pd.DataFrame]] = {}
+
+# Set to 1 to write a CSV copy of every intermediate dataset
+CSV_MIRROR_ENV = "TIMES_NZ_CSV_MIRROR"
+
+# Parsed Excel sheets, kept between runs (see read_excel_cached())
+EXCEL_CACHE_LOCATION = DATA_INTERMEDIATE / ".cache/excel"
+# Change to invalidate every cached sheet, e.g. if the encoding changes
+_EXCEL_CACHE_VERSION = 1
+
+# Content hashes of workbooks, by resolved path: ((mtime, size), sha256)
+_FILE_HASHES: dict[Path, tuple[tuple, str]] = {}
+# Sheets read by read_excel_cached() in this process, by cache file
+_EXCEL_CACHE: dict[Path, pd.DataFrame] = {}
+
 
 def _save_data(df, name, label, filepath: Path):
     """Save DataFrame output to the output location and print to console"""
@@ -20,3 +134,727 @@ def _save_data(df, name, label, filepath: Path):
     filename = filepath / name
     logger.info("%s: %s", label, blue_text(filename))
     df.to_csv(filename, index=False, encoding="utf-8-sig")
+
+
+# I/O registry -----------------------------------------------------------
+
+
+def get_io_record_path(task_name: str) -> Path:
+    """Return the JSON file holding the I/O record for a doit task name"""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "__", task_name)
+    return IO_RECORD_LOCATION / f"{safe_name}.json"
+
+
+def load_io_record(task_name: str) -> dict[str, list[Path]] | None:
+    """
+    Return the recorded "reads", "writes", "scans" and "modules" of a task
+    as absolute paths, or None if the task has not been recorded yet
+    """
+    record_path = get_io_record_path(task_name)
+    if not record_path.exists():
+        return None
+    with open(record_path, encoding="utf-8") as file_obj:
+        record = json.load(file_obj)
+    # records made before folder scans were recorded have none
+    record.setdefault("scans", [])
+    return {
+        key: [PREP_LOCATION / rel_path for rel_path in rel_paths]
+        for key, rel_paths in record.items()
+    }
+
+
+def find_package_modules(script: Path) -> set[str]:
+    """
+    Return the files of every package module imported by script,
+    directly or through other package modules
+
+    Imports are read from the source rather than from sys.modules, so
+    modules that happen to be loaded already (by an earlier in-process
+    task) are not counted.
+    """
+    found = set()
+    to_visit = [Path(script)]
+    while to_visit:
+        tree = ast.parse(to_visit.pop().read_text(encoding="utf-8"))
+        for node in ast.walk(tree):
+            for candidate in _imported_module_files(node):
+                if candidate not in found:
+                    found.add(candidate)
+                    to_visit.append(Path(candidate))
+    return found
+
+
+def _imported_module_files(node: ast.AST) -> list[str]:
+    """
+    The files of the package modules an import statement imports,
+    including their parent packages' __init__ files, which run too
+    """
+    if isinstance(node, ast.Import):
+        names = [alias.name for alias in node.names]
+    elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+        # "from package.module import name" may also import a submodule
+        names = [node.module]
+        names += [f"{node.module}.{alias.name}" for alias in node.names]
+    else:
+        return []
+
+    files = []
+    for name in names:
+        parts = name.split(".")
+        if parts[0] != PACKAGE_LOCATION.name:
+            continue
+        for depth in range(1, len(parts) + 1):
+            module_path = PACKAGE_LOCATION.parent.joinpath(*parts[:depth])
+            for candidate in (
+                module_path.with_suffix(".py"),
+                module_path / "__init__.py",
+            ):
+                if candidate.is_file():
+                    files.append(str(candidate))
+    return files
+
+
+def _recording_hook(event, args):
+    """The process-wide audit hook: pass events to the active recorder"""
+    recorder = _RECORDING["recorder"]
+    if recorder is not None:
+        recorder.audit_hook(event, args)
+
+
+def _install_recording_hook() -> None:
+    """Install the audit hook, once per process"""
+    if _RECORDING["installed"]:
+        return
+    _RECORDING["installed"] = True
+    sys.addaudithook(_recording_hook)
+
+
+def _wrap_pandas_parquet() -> None:
+    """
+    Replace pd.read_parquet and DataFrame.to_parquet with versions that
+    note the file they use, until _unwrap_pandas_parquet()
+    """
+    if _PANDAS_PARQUET:
+        return
+    read_parquet = pd.read_parquet
+    to_parquet = pd.DataFrame.to_parquet
+
+    def recorded_read_parquet(path, *args, **kwargs):
+        note_file_use(path, is_write=False)
+        return read_parquet(path, *args, **kwargs)
+
+    def recorded_to_parquet(df, *args, **kwargs):
+        note_file_use(args[0] if args else kwargs.get("path"), is_write=True)
+        return to_parquet(df, *args, **kwargs)
+
+    _PANDAS_PARQUET.update(read_parquet=read_parquet, to_parquet=to_parquet)
+    pd.read_parquet = recorded_read_parquet
+    pd.DataFrame.to_parquet = recorded_to_parquet
+
+
+def _unwrap_pandas_parquet() -> None:
+    """Put back the pandas parquet functions _wrap_pandas_parquet() replaced"""
+    if not _PANDAS_PARQUET:
+        return
+    pd.read_parquet = _PANDAS_PARQUET.pop("read_parquet")
+    pd.DataFrame.to_parquet = _PANDAS_PARQUET.pop("to_parquet")
+
+
+def note_file_use(path, is_write: bool = False) -> None:
+    """
+    Tell the active recorder (if any) about a file used without opening it,
+    such as a cached read
+    """
+    recorder = _RECORDING["recorder"]
+    if recorder is not None:
+        recorder.track(path, is_write)
+
+
+def _glob_root(pattern: str, root_dir=None) -> str:
+    """The folder a glob pattern starts searching from"""
+    parts = []
+    for part in Path(os.fsdecode(pattern)).parts:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    folder = os.path.join(*parts) if parts else ""
+    if root_dir is not None:
+        folder = os.path.join(os.fsdecode(root_dir), folder)
+    return folder or os.curdir
+
+
+def _scanned_folder(event, args) -> str:
+    """The folder a listing or glob audit event (see _SCAN_EVENTS) reads"""
+    if event.startswith("glob"):
+        root_dir = args[2] if len(args) > 2 else None
+        return _glob_root(args[0], root_dir)
+    # os.listdir() and os.scandir() list the working directory
+    return os.curdir if args[0] is None else args[0]
+
+
+class IORecorder:
+    """
+    Collects the tracked files opened and folders listed while it is active
+
+    Use it as a context manager around the code to record. Only one
+    recorder is active at a time.
+    """
+
+    def __init__(self):
+        self.reads = set()
+        self.writes = set()
+        self.scans = set()
+        self._roots = tuple(os.path.join(str(path), "") for path in TRACKED_LOCATIONS)
+
+    def _tracked_path(self, path) -> str | None:
+        """The absolute path, if it sits in (or is) a tracked folder"""
+        if isinstance(path, int) or path is None:
+            return None
+        path = os.path.abspath(os.fsdecode(path))
+        if not os.path.join(path, "").startswith(self._roots):
+            return None
+        return path
+
+    def track(self, path, is_write: bool) -> None:
+        """Add path to reads or writes if it sits in a tracked folder"""
+        path = self._tracked_path(path)
+        if path is None:
+            return
+        if is_write:
+            self.writes.add(path)
+        else:
+            self.reads.add(path)
+
+    def track_scan(self, folder) -> None:
+        """
+        Add folder to scans if it sits in a tracked folder, other than the
+        Excel sheet cache (which is tidied by globbing it)
+        """
+        folder = self._tracked_path(folder)
+        cache = os.path.join(str(EXCEL_CACHE_LOCATION), "")
+        if folder is not None and not os.path.join(folder, "").startswith(cache):
+            self.scans.add(folder)
+
+    def audit_hook(self, event, args):
+        """sys.addaudithook callback: record file opens and folder listings"""
+        if event in _SCAN_EVENTS:
+            self.track_scan(_scanned_folder(event, args))
+            return
+        if event != "open":
+            return
+        path, mode, flags = args
+        if mode is None:
+            is_write = bool(flags & _WRITE_FLAGS)
+        else:
+            is_write = any(char in mode for char in "wax+")
+        self.track(path, is_write)
+
+    def start(self) -> None:
+        """Start collecting file opens"""
+        _install_recording_hook()
+        _wrap_pandas_parquet()
+        _RECORDING["recorder"] = self
+
+    def stop(self) -> None:
+        """Stop collecting file opens, and put back pandas' parquet functions"""
+        if _RECORDING["recorder"] is self:
+            _RECORDING["recorder"] = None
+            _unwrap_pandas_parquet()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def to_record(self, script: Path | None = None) -> dict[str, list[str]]:
+        """
+        Summarise the run as paths relative to PREP_LOCATION
+
+        Files the script wrote are not counted as reads, and files that no
+        longer exist (failed opens, temporary files) are dropped. Folders
+        it listed are under "scans", and the package modules script
+        imports are listed under "modules".
+        """
+
+        def relative(paths):
+            return sorted(
+                Path(path).relative_to(PREP_LOCATION).as_posix()
+                for path in paths
+                if os.path.isfile(path)
+            )
+
+        modules = find_package_modules(script) if script is not None else set()
+
+        return {
+            "reads": relative(self.reads - self.writes),
+            "writes": relative(self.writes),
+            "scans": sorted(
+                Path(folder).relative_to(PREP_LOCATION).as_posix()
+                for folder in self.scans
+                if os.path.isdir(folder)
+            ),
+            "modules": relative(modules),
+        }
+
+
+def save_io_record(task_name: str, record: dict[str, list[str]]) -> None:
+    """Save the I/O record of a task for dodo.py"""
+    record_path = get_io_record_path(task_name)
+    record_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(record_path, "w", encoding="utf-8") as file_obj:
+        json.dump(record, file_obj, indent=2)
+
+
+def _read_cached(filepath: Path, read_func, **kwargs) -> pd.DataFrame:
+    """
+    Return a copy of read_func(filepath, **kwargs), reading the file only
+    if it changed since it was last read with the same arguments
+    """
+    filepath = Path(os.path.abspath(filepath))
+    stat = filepath.stat()
+    key = (stat.st_mtime_ns, stat.st_size, repr(sorted(kwargs.items())))
+
+    cached = _CSV_CACHE.get(filepath)
+    if cached is not None and cached[0] == key:
+        # the file was not opened, so tell the I/O recorder directly
+        note_file_use(filepath)
+        return cached[1].copy()
+
+    df = read_func(filepath, **kwargs)
+    _CSV_CACHE[filepath] = (key, df)
+    return df.copy()
+
+
+def read_csv_cached(filepath, **kwargs) -> pd.DataFrame:
+    """
+    Read a csv once per process and return a copy of it
+
+    The cached table is reused while the file's size and modification time
+    are unchanged and the same read_csv() arguments are given. Meant for
+    small inputs that many scripts share, so that in-process tasks do not
+    read them again.
+    """
+    return _read_cached(filepath, pd.read_csv, **kwargs)
+
+
+# Excel sheet cache ------------------------------------------------------
+
+
+class _UncacheableSheet(Exception):
+    """A parsed sheet holds something the parquet cache cannot round-trip"""
+
+
+def _hash_file(filepath: Path) -> str:
+    """
+    Return the sha256 of a file's contents, hashing it again only if its
+    size or modification time changed
+    """
+    stat = filepath.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _FILE_HASHES.get(filepath)
+    if cached is not None and cached[0] == key:
+        note_file_use(filepath)
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as file_obj:
+        while chunk := file_obj.read(1024 * 1024):
+            digest.update(chunk)
+    _FILE_HASHES[filepath] = (key, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _encode_label(label):
+    """A column label (or level of one) as JSON, keeping its type"""
+    if isinstance(label, tuple):
+        return {"tuple": [_encode_label(part) for part in label]}
+    if label is None or isinstance(label, str):
+        return label
+    if isinstance(label, (bool, np.bool_)):
+        return {"bool": bool(label)}
+    if isinstance(label, (int, np.integer)):
+        return {"int": int(label)}
+    if isinstance(label, (float, np.floating)):
+        return {"float": float(label)}
+    if isinstance(label, datetime.datetime):
+        return {"datetime": pd.Timestamp(label).isoformat()}
+    raise _UncacheableSheet(f"column label {label!r}")
+
+
+def _decode_label(value):
+    """Inverse of _encode_label()"""
+    if not isinstance(value, dict):
+        return value
+    ((kind, item),) = value.items()
+    if kind == "tuple":
+        return tuple(_decode_label(part) for part in item)
+    if kind == "datetime":
+        return pd.Timestamp(item)
+    return {"bool": bool, "int": int, "float": float}[kind](item)
+
+
+# Types of the cells of mixed object columns, as stored in their "kind" column
+_CELL_KINDS = {str: 1, bool: 2, int: 3, float: 4, datetime.datetime: 5}
+
+
+def _cell_kind(value) -> int:
+    """The _CELL_KINDS code of one cell of a mixed column (0 for missing)"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return 0
+    if value is pd.NaT:
+        return 0
+    for kind_type, kind in _CELL_KINDS.items():
+        if isinstance(value, kind_type):
+            return kind
+    if isinstance(value, np.generic):
+        return _cell_kind(value.item())
+    raise _UncacheableSheet(f"cell of type {type(value).__name__}")
+
+
+def _encode_excel_sheet(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert a parsed sheet to a parquet-ready table
+
+    Columns are stored by position, with their labels in the schema
+    metadata. Object columns holding more than one type of value (numbers
+    mixed with notes, say) are split into a kind column and one column per
+    type, so every cell comes back exactly as read_excel() returned it.
+    """
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        raise _UncacheableSheet("index other than the default")
+
+    arrays, names, layouts = [], [], []
+    for position, (_, col) in enumerate(df.items()):
+        if col.dtype != object:
+            arrays.append(pa.array(col, from_pandas=True))
+            names.append(f"{position}")
+            layouts.append("plain")
+            continue
+        kinds = np.array([_cell_kind(value) for value in col], dtype=np.int8)
+        if set(kinds.tolist()) <= {0, _CELL_KINDS[str]}:
+            arrays.append(pa.array(col.where(kinds > 0, None), type=pa.string()))
+            names.append(f"{position}")
+            layouts.append("string")
+            continue
+
+        values = col.to_numpy()
+        arrays.append(pa.array(kinds))
+        names.append(f"{position}.kind")
+        for kind_type, kind in _CELL_KINDS.items():
+            arrow_type = {
+                str: pa.string(),
+                bool: pa.bool_(),
+                int: pa.int64(),
+                float: pa.float64(),
+                datetime.datetime: pa.timestamp("ns"),
+            }[kind_type]
+            cells = [
+                value if cell_kind == kind else None
+                for value, cell_kind in zip(values, kinds)
+            ]
+            arrays.append(pa.array(cells, type=arrow_type, from_pandas=True))
+            names.append(f"{position}.{kind}")
+        layouts.append("mixed")
+
+    metadata = {
+        "columns": [_encode_label(label) for label in df.columns],
+        "names": [_encode_label(name) for name in df.columns.names],
+        "layouts": layouts,
+    }
+    return pa.Table.from_arrays(arrays, names=names).replace_schema_metadata(
+        {"excel_sheet": json.dumps(metadata)}
+    )
+
+
+def _decode_excel_sheet(table: pa.Table) -> pd.DataFrame:
+    """Inverse of _encode_excel_sheet()"""
+    metadata = json.loads(table.schema.metadata[b"excel_sheet"])
+    columns = {}
+    for position, layout in enumerate(metadata["layouts"]):
+        if layout == "plain":
+            columns[position] = table[f"{position}"].to_pandas()
+        elif layout == "string":
+            col = table[f"{position}"].to_pandas()
+            columns[position] = col.where(col.notna(), np.nan)
+        else:
+            kinds = table[f"{position}.kind"].to_numpy()
+            values = np.full(len(kinds), np.nan, dtype=object)
+            for kind in _CELL_KINDS.values():
+                cells = table[f"{position}.{kind}"].to_pylist()
+                mask = kinds == kind
+                values[mask] = np.array(cells, dtype=object)[mask]
+            columns[position] = pd.Series(values, dtype=object)
+
+    df = pd.DataFrame(columns)
+    labels = [_decode_label(label) for label in metadata["columns"]]
+    names = [_decode_label(name) for name in metadata["names"]]
+    if len(names) > 1:
+        df.columns = pd.MultiIndex.from_tuples(labels, names=names)
+    else:
+        df.columns = pd.Index(labels, name=names[0])
+    return df
+
+
+def _get_excel_cache_path(filepath: Path, sheet_name, kwargs) -> Path:
+    """
+    Return the cache file of a sheet, named by the workbook, a hash of its
+    path, a hash of its contents and a hash of the read arguments
+    """
+    path_hash = hashlib.sha256(str(filepath).encode()).hexdigest()[:8]
+    read_key = json.dumps(
+        [
+            _EXCEL_CACHE_VERSION,
+            pd.__version__,
+            repr(sheet_name),
+            repr(sorted(kwargs.items())),
+        ]
+    )
+    read_hash = hashlib.sha256(read_key.encode()).hexdigest()[:12]
+    file_hash = _hash_file(filepath)[:12]
+    name = f"{filepath.stem}-{path_hash}-{file_hash}-{read_hash}.parquet"
+    return EXCEL_CACHE_LOCATION / name
+
+
+def _save_excel_cache(df: pd.DataFrame, cache_path: Path) -> None:
+    """
+    Save a parsed sheet to the cache, replacing older versions of the
+    workbook, or skip it if it cannot be cached exactly
+
+    The file is written under a temporary name and renamed into place, so
+    tasks running in parallel never read a partial file. pyarrow opens the
+    file itself, so the I/O recorder does not count it as an output.
+    """
+    try:
+        table = _encode_excel_sheet(df)
+    except (_UncacheableSheet, pa.ArrowException) as error:
+        logger.debug("Not caching %s: %s", cache_path.name, error)
+        return
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    # sheets of the same workbook (by path) with other contents
+    _, path_hash, file_hash, _ = cache_path.stem.rsplit("-", 3)
+    for old_path in cache_path.parent.glob("*.parquet"):
+        old_key = old_path.stem.rsplit("-", 3)
+        if len(old_key) == 4 and old_key[1] == path_hash and old_key[2] != file_hash:
+            old_path.unlink(missing_ok=True)
+
+    handle, temp_name = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+    os.close(handle)
+    try:
+        pq.write_table(table, temp_name)
+        os.replace(temp_name, cache_path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def read_excel_cached(filepath, sheet_name=0, **kwargs) -> pd.DataFrame:
+    """
+    Read a sheet of a workbook with pd.read_excel(), parsing it only if it
+    has not been parsed with the same arguments since the workbook last
+    changed, and return a copy of it
+
+    Parsed sheets are kept in memory for the rest of the process and as
+    parquet under EXCEL_CACHE_LOCATION for later runs. sheet_name must
+    name (or number) one sheet. Sheets that parquet cannot hold exactly
+    (unusual cell types, or an index_col) are parsed every time.
+    """
+    if sheet_name is None or isinstance(sheet_name, list):
+        raise ValueError("read_excel_cached() reads one sheet at a time")
+
+    filepath = Path(os.path.abspath(filepath))
+    cache_path = _get_excel_cache_path(filepath, sheet_name, kwargs)
+
+    df = _EXCEL_CACHE.get(cache_path)
+    if df is None and cache_path.exists():
+        df = _decode_excel_sheet(pq.read_table(cache_path))
+    if df is None:
+        df = pd.read_excel(filepath, sheet_name=sheet_name, **kwargs)
+        _save_excel_cache(df, cache_path)
+    _EXCEL_CACHE[cache_path] = df
+    return df.copy()
+
+
+# Intermediate datasets --------------------------------------------------
+
+
+def get_intermediate_path(name: str, suffix: str = ".parquet") -> Path:
+    """Return the file of an intermediate dataset (parquet by default)"""
+    return DATA_INTERMEDIATE / f"{name}{suffix}"
+
+
+def get_intermediate_schema(name: str) -> pa.Schema:
+    """Return the registered schema of an intermediate dataset"""
+    if name not in INTERMEDIATE_SCHEMAS:
+        raise KeyError(
+            f"No schema registered for intermediate dataset '{name}' "
+            "(see prepare_times_nz.utilities.intermediate_schemas)"
+        )
+    return INTERMEDIATE_SCHEMAS[name]
+
+
+def check_schema(name: str, schema: pa.Schema) -> None:
+    """Raise a ValueError if schema differs from the one registered for name"""
+    expected = get_intermediate_schema(name)
+    if schema.remove_metadata().equals(expected):
+        return
+    problems = []
+    for field in expected:
+        index = schema.get_field_index(field.name)
+        if index < 0:
+            problems.append(f"missing column {field.name}")
+        elif schema.field(index).type != field.type:
+            problems.append(
+                f"{field.name} is {schema.field(index).type}, expected {field.type}"
+            )
+    extra = [col for col in schema.names if col not in expected.names]
+    if extra:
+        problems.append(f"unexpected columns {extra}")
+    if not problems:
+        problems.append(f"columns should be in the order {expected.names}")
+    raise ValueError(f"Schema mismatch in '{name}': " + "; ".join(problems))
+
+
+def csv_mirror_enabled() -> bool:
+    """Whether CSV copies of intermediate data were asked for (CSV_MIRROR_ENV)"""
+    return os.environ.get(CSV_MIRROR_ENV) == "1"
+
+
+def save_intermediate(
+    df: pd.DataFrame, name: str, label: str, csv: bool | None = None
+) -> None:
+    """
+    Save a stage output as parquet with its registered schema
+
+    df must have exactly the columns of the schema; values are converted to
+    the schema's types (failing if that would lose data). A CSV copy is
+    also written if csv is True, or if csv is None and the CSV_MIRROR_ENV
+    environment variable is set to 1. Otherwise any old CSV copy is
+    removed, so it cannot be mistaken for current data.
+    """
+    schema = get_intermediate_schema(name)
+    missing = [col for col in schema.names if col not in df.columns]
+    extra = [col for col in df.columns if col not in schema.names]
+    if missing or extra:
+        raise ValueError(
+            f"Cannot save '{name}': missing columns {missing}, "
+            f"unexpected columns {extra}"
+        )
+    table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+    filename = get_intermediate_path(name)
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    logger.info("%s: %s", label, blue_text(filename))
+    note_file_use(filename, is_write=True)
+    pq.write_table(table.replace_schema_metadata(None), filename)
+
+    if csv is None:
+        csv = csv_mirror_enabled()
+    csv_filename = get_intermediate_path(name, ".csv")
+    if csv:
+        df[schema.names].to_csv(csv_filename, index=False, encoding="utf-8-sig")
+    else:
+        csv_filename.unlink(missing_ok=True)
+
+
+def _read_parquet_table(filepath: Path, columns=None) -> pd.DataFrame:
+    """Read a parquet file with pyarrow, telling the I/O recorder"""
+    note_file_use(filepath)
+    return pq.read_table(filepath, columns=columns).to_pandas()
+
+
+def read_intermediate(
+    name: str,
+    columns: list[str] | None = None,
+    categorical: bool = False,
+    cached: bool = False,
+) -> pd.DataFrame:
+    """
+    Read an intermediate dataset saved by save_intermediate()
+
+    The file's schema is checked against the registered one first. Only
+    the given columns are read, if any are given. Label columns come back
+    as plain strings unless categorical is True, so that grouping and
+    merging behave as they did when the data was read from CSV.
+
+    With cached=True the data is read once per process (as for
+    read_csv_cached()), which suits small shared tables.
+    """
+    filepath = get_intermediate_path(name)
+    if not filepath.exists():
+        raise FileNotFoundError(
+            f"Intermediate dataset '{name}' not found at {filepath}. "
+            "Has the stage that writes it been run?"
+        )
+    check_schema(name, pq.read_schema(filepath))
+
+    if cached:
+        df = _read_cached(filepath, _read_parquet_table, columns=columns)
+    else:
+        df = _read_parquet_table(filepath, columns=columns)
+
+    if not categorical:
+        label_columns = df.select_dtypes("category").columns
+        df[label_columns] = df[label_columns].astype(object)
+    return df
+
+
+# Partitioned parquet datasets -------------------------------------------
+
+
+def save_parquet_part(
+    df: pd.DataFrame,
+    dataset_dir: Path,
+    partition: dict[str, object],
+    part_name: str,
+    schema: pa.Schema | None = None,
+) -> Path:
+    """
+    Write one part of a hive-partitioned parquet dataset
+
+    The part is written to dataset_dir/<key>=<value>/.../<part_name>.parquet.
+    Give the same schema for every part, so that label columns use the
+    same dictionary type across parts and the dataset reads back as one
+    table. Returns the file written.
+    """
+    part_dir = Path(dataset_dir).joinpath(
+        *[f"{key}={value}" for key, value in partition.items()]
+    )
+    part_dir.mkdir(parents=True, exist_ok=True)
+    filename = part_dir / f"{part_name}.parquet"
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    note_file_use(filename, is_write=True)
+    pq.write_table(table.replace_schema_metadata(None), filename)
+    return filename
+
+
+def read_parquet_dataset(
+    dataset_dir: Path, columns: list[str] | None = None, filters=None
+) -> pd.DataFrame:
+    """
+    Read a hive-partitioned parquet dataset
+
+    Only the given columns are read, and filters (pyarrow's list of
+    (column, op, value) tuples, which may use the partition columns) skip
+    whole partitions without reading them. Partition columns come back as
+    plain values. Label columns come back as categoricals with sorted
+    categories, so grouping on them orders rows as plain strings would.
+
+    Every file in the dataset is noted as read by the I/O recorder.
+    """
+    dataset_dir = Path(dataset_dir)
+    files = sorted(dataset_dir.rglob("*.parquet"))
+    if not files:
+        raise FileNotFoundError(f"No parquet files found in {dataset_dir}")
+    for filename in files:
+        note_file_use(filename)
+
+    partitioning = pads.HivePartitioning.discover(infer_dictionary=False)
+    df = pq.read_table(
+        dataset_dir, columns=columns, filters=filters, partitioning=partitioning
+    ).to_pandas()
+    for col in df.select_dtypes("category").columns:
+        df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    return df
@@ -8,6 +8,12 @@ base year for the price data to deflate/inflate.
 
 
 Depends on the extract_snz.py script running in order to populate the cpi data
+The index data is read when first needed (not on import), through the
+intermediate data cache, so in-process tasks always see the current files.
+
+Whole columns are deflated at once: the index is turned into an array by
+year, so each value's index is a single array lookup rather than a search
+of the index table per row.
 
 """
 
@@ -15,14 +21,93 @@ import logging
 
 import numpy as np
 import pandas as pd
-from prepare_times_nz.utilities.filepaths import STAGE_1_DATA
+from prepare_times_nz.utilities.data_in_out import read_intermediate
 
 # helper data for these functions
 
-cpi_df = pd.read_csv(f"{STAGE_1_DATA}/statsnz/cpi.csv")  # this is the deflator data
-cgpi_df = pd.read_csv(
-    f"{STAGE_1_DATA}/statsnz/cgpi.csv"
-)  # this is the capital deflator data
+INDEX_DATASETS = {
+    "cpi": "stage_1_input_data/statsnz/cpi",  # this is the deflator data
+    "cgpi": "stage_1_input_data/statsnz/cgpi",  # this is the capital deflator data
+}
+
+INDEX_COLUMNS = {"cpi": "CPI_Index", "cgpi": "CGPI_Index"}
+
+
+def get_index_data(method: str = "cpi") -> pd.DataFrame:
+    """Return the CPI or CGPI index table"""
+    if method not in INDEX_DATASETS:
+        raise ValueError("method must be 'cpi' or 'cgpi'")
+    return read_intermediate(INDEX_DATASETS[method], cached=True)
+
+
+def get_index_lookup(method: str = "cpi") -> tuple[int, np.ndarray]:
+    """
+    Return the first year of the CPI or CGPI index and an array of the
+    index by year from then (NaN for any year missing from the table)
+
+    If a year is listed twice, the first value is used.
+    """
+    idx_df = get_index_data(method).drop_duplicates("Year")
+    years = idx_df["Year"].astype(int).to_numpy()
+    first_year = years.min()
+
+    lookup = np.full(years.max() - first_year + 1, np.nan)
+    lookup[years - first_year] = idx_df[INDEX_COLUMNS[method]].to_numpy(dtype=float)
+    return first_year, lookup
+
+
+def lookup_index(years, first_year: int, lookup: np.ndarray) -> np.ndarray:
+    """
+    Return the index value for each year, or NaN where there is none
+
+    Years beyond the latest index year are treated as the latest year.
+    """
+    years = np.asarray(years, dtype=float)
+    # np.minimum keeps NaN years as NaN
+    positions = np.minimum(years, first_year + len(lookup) - 1) - first_year
+
+    valid = np.isfinite(positions) & (positions >= 0) & (positions % 1 == 0)
+    index = np.full(positions.shape, np.nan)
+    index[valid] = lookup[positions[valid].astype(int)]
+    return index
+
+
+def deflate_series(
+    values: pd.Series, current_years, base_year, method: str = "cpi"
+) -> pd.Series:
+    """
+    Deflate a column of values from their current years to base_year
+
+    Values already in base_year are returned unchanged. Otherwise the result
+    is NaN if the value is missing or either year has no index. Years
+    beyond the latest index year are treated as the latest year.
+    """
+    if method not in INDEX_COLUMNS:
+        raise ValueError("method must be 'cpi' or 'cgpi'")
+
+    current_years = pd.Series(current_years, index=values.index)
+    unchanged = current_years == base_year
+    if unchanged.all():
+        return values.copy()
+
+    first_year, lookup = get_index_lookup(method)
+    idx_cur = lookup_index(current_years.to_numpy(), first_year, lookup)
+    idx_base = lookup_index([base_year], first_year, lookup)[0]
+    # unlike the current years, the base year is not capped at the latest year
+    if base_year > first_year + len(lookup) - 1:
+        idx_base = np.nan
+
+    deflated = pd.to_numeric(values) * (idx_base / idx_cur)
+
+    missing = int((deflated.isna() & ~unchanged).sum())
+    if missing:
+        logging.debug(
+            "%s missing for %s values ->%s; returning NaN",
+            method.upper(),
+            missing,
+            base_year,
+        )
+    return deflated.where(~unchanged, values)
 
 
 def deflate_value(current_year, base_year, current_value, method="cpi"):
@@ -38,37 +123,15 @@ def deflate_value(current_year, base_year, current_value, method="cpi"):
     Returns:
     - deflated_value: The deflated value.
 
-    This function relies on cpi_df or cgpi_df, which should be loaded in
-    the script, contain the CPI or CGPI indexs for each year.
+    For whole columns use deflate_series(), which looks up every year at once.
     """
-
-    if method == "cpi":
-        idx_df = cpi_df
-        idx_col = "CPI_Index"
-        label = "CPI"
-    elif method == "cgpi":
-        idx_df = cgpi_df
-        idx_col = "CGPI_Index"
-        label = "CGPI"
-    else:
-        raise ValueError("method must be 'cpi' or 'cgpi'")
-
-    if current_year == base_year:
-        return current_value
-
-    latest_available_year = int(idx_df["Year"].max())
-    current_year = min(current_year, latest_available_year)
-
-    idx_cur = idx_df.loc[idx_df["Year"] == current_year, idx_col]
-    idx_base = idx_df.loc[idx_df["Year"] == base_year, idx_col]
-
-    if idx_cur.empty or idx_base.empty or pd.isna(current_value):
-        logging.debug(
-            "%s missing for %s->%s; returning NaN", label, current_year, base_year
-        )
-        return np.nan
-
-    return current_value * (idx_base.iloc[0] / idx_cur.iloc[0])
+    deflated = deflate_series(
+        pd.Series([current_value], dtype=object),
+        [current_year],
+        base_year,
+        method=method,
+    )
+    return deflated.iloc[0]
 
 
 def deflate_columns_rowwise(
@@ -91,14 +154,8 @@ def deflate_columns_rowwise(
         if value_col not in df.columns:
             raise ValueError(f"Value column '{value_col}' not found in DataFrame")
 
-        df[f"{value_col}{out_suffix}"] = df.apply(
-            lambda row, _vc=value_col, _bc=base_col: deflate_value(
-                current_year=row[_bc],
-                base_year=target_year,
-                current_value=row[_vc],
-                method=method,
-            ),
-            axis=1,
+        df[f"{value_col}{out_suffix}"] = deflate_series(
+            df[value_col], df[base_col], target_year, method=method
         )
     return df
 
@@ -136,14 +193,8 @@ def deflate_data(
         raise ValueError("The variable 'PriceBaseYear' not found in DataFrame")
 
     for variable in variables_to_deflate:
-        df[variable] = df.apply(
-            lambda row, _var=variable: deflate_value(
-                row["PriceBaseYear"],
-                base_year,
-                row[_var],
-                method=method,
-            ),
-            axis=1,
+        df[variable] = deflate_series(
+            df[variable], df["PriceBaseYear"], base_year, method=method
         )
 
     df["PriceBaseYear"] = base_year
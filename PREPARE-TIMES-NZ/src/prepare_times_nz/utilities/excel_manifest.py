@@ -0,0 +1,118 @@
+"""
+Tracks which VEDA workbooks need rebuilding in Stage 5
+
+Each workbook is given a hash of everything that goes into it:
+
+  - its rows in config_metadata.csv
+  - the contents of every source CSV/TOML those rows point to
+  - the Excel writer code itself
+
+These hashes are stored in OUTPUT_MANIFEST after each build. A workbook is
+stale if its hash has changed since, or if the file is missing, and only
+stale workbooks are rewritten. dodo.py uses get_stale_workbooks() to decide
+whether the Stage 5 task needs to run at all.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+from prepare_times_nz.utilities.filepaths import (
+    OUTPUT_LOCATION,
+    OUTPUT_MANIFEST,
+    PREP_LOCATION,
+    STAGE_0_DATA,
+    STAGE_4_SCRIPTS,
+)
+
+METADATA_PATH = STAGE_0_DATA / "config_metadata.csv"
+
+# Changes to these rebuild every workbook
+WRITER_FILES = [
+    STAGE_4_SCRIPTS / "write_excel.py",
+    Path(__file__).resolve().parent / "excel_writers.py",
+]
+
+
+def get_source_path(data_location: str) -> Path | None:
+    """
+    Return the file a metadata DataLocation refers to
+
+    TOML locations are the normalised files in STAGE_0_DATA, while CSV
+    locations are relative to PREP_LOCATION. Anything else returns None.
+    """
+    if data_location.endswith(".toml"):
+        return STAGE_0_DATA / data_location
+    if data_location.endswith(".csv"):
+        return PREP_LOCATION / data_location
+    return None
+
+
+def hash_file(filepath: Path, digest) -> None:
+    """Add the contents of filepath (or a marker if missing) to digest"""
+    if filepath.exists():
+        digest.update(filepath.read_bytes())
+    else:
+        digest.update(b"<missing>")
+
+
+def hash_workbook_inputs(workbook_meta: pd.DataFrame) -> str:
+    """
+    Hash a single workbook's metadata rows, source files and writer code
+    """
+    digest = hashlib.sha256()
+    digest.update(workbook_meta.to_csv(index=False).encode())
+
+    for data_location in workbook_meta["DataLocation"].unique():
+        source_path = get_source_path(data_location)
+        if source_path is not None:
+            hash_file(source_path, digest)
+
+    for filepath in WRITER_FILES:
+        hash_file(filepath, digest)
+
+    return digest.hexdigest()
+
+
+def get_workbook_hashes(metadata: pd.DataFrame) -> dict[str, str]:
+    """Return the input hash for every workbook in the metadata"""
+    return {
+        workbook: hash_workbook_inputs(workbook_meta)
+        for workbook, workbook_meta in metadata.groupby("WorkBookName", sort=False)
+    }
+
+
+def load_manifest() -> dict[str, str]:
+    """Read the workbook hashes from the last build (empty if none)"""
+    if not OUTPUT_MANIFEST.exists():
+        return {}
+    with open(OUTPUT_MANIFEST, encoding="utf-8") as file_obj:
+        return json.load(file_obj)
+
+
+def save_manifest(hashes: dict[str, str]) -> None:
+    """Write the workbook hashes for the current build"""
+    with open(OUTPUT_MANIFEST, "w", encoding="utf-8") as file_obj:
+        json.dump(hashes, file_obj, indent=2, sort_keys=True)
+
+
+def get_stale_workbooks(
+    metadata: pd.DataFrame, hashes: dict[str, str] | None = None
+) -> list[str]:
+    """
+    List the workbooks that are missing or whose inputs have changed
+
+    Pass hashes if they have already been calculated with
+    get_workbook_hashes(), to avoid hashing everything twice.
+    """
+    if hashes is None:
+        hashes = get_workbook_hashes(metadata)
+    manifest = load_manifest()
+
+    return [
+        workbook
+        for workbook, workbook_hash in hashes.items()
+        if manifest.get(workbook) != workbook_hash
+        or not (OUTPUT_LOCATION / f"{workbook}.xlsx").exists()
+    ]
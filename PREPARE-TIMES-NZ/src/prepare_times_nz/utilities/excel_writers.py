@@ -9,19 +9,36 @@
 # (book, sheet, tag, uc_sets, maybe more)
 # 3: get all the dataframes from the original toml files
 
+Two ways of writing tagged tables are available:
 
+  - create_empty_workbook() + write_data(): the original overlay method,
+    which reloads and resaves the workbook for every table.
+  - write_workbook_once(): collects every table for a workbook, lays
+    out all the cells in memory, then streams each sheet out once using a
+    write-only openpyxl workbook. This is what Stage 5 uses.
+
+Both use layout_table(), so the cell positions they produce are identical.
 
 """
 
 # Libraries ------------------------------------------------------------------
+import io
 import os
+import re
+import zipfile
+from datetime import datetime
 
 import pandas as pd
 from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
 from prepare_times_nz.utilities.filepaths import OUTPUT_LOCATION
 from prepare_times_nz.utilities.logger_setup import logger
 
+# Fixed timestamps so that identical inputs produce byte-identical workbooks
+FIXED_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+FIXED_DOC_DATE_TIME = datetime(2000, 1, 1)
+
 
 # Functions ------------------------------------------------------------------
 def get_csv_data(file_location):
@@ -86,19 +103,19 @@ def test_if_toml_location(string):
     return string.endswith(".toml")
 
 
-def create_empty_workbook(book_name, sheets):
+def create_empty_workbook(book_name, sheets, output_location=OUTPUT_LOCATION):
     """
     Creates a workbook with empty sheets
     THe sheets will have data appended via excel overlay,
     but the sheets are required to exist first for that to work.
 
     Takes a book name and list of sheets, then saves the empty book
-    in OUTPUT_LOCATION
+    in output_location (OUTPUT_LOCATION by default)
 
     """
     # This function creates the workbook with empty sheets
     # Later, data is appended to these sheets by overlay.
-    book_location = f"{OUTPUT_LOCATION}/{book_name}.xlsx"
+    book_location = f"{output_location}/{book_name}.xlsx"
     book_directory = os.path.dirname(book_location)
 
     # create the folder if needed
@@ -118,6 +135,90 @@ def create_empty_workbook(book_name, sheets):
     wb.save(book_location)
 
 
+def table_height(df, uc_set):
+    """
+    Number of rows a tagged table takes up on its sheet, including the
+    gap before the next table. Add this to the start row of a table
+    to get the start row of the following one.
+    """
+    return len(df) + len(uc_set) + 4
+
+
+def layout_table(
+    df,
+    tag,
+    uc_set,
+    startrow=0,
+    table_name="TABLE NAME",
+    table_description="TABLE DESCRIPTION",
+):
+    """
+    Work out where every cell of a tagged table goes on its sheet
+
+    Returns a tuple of:
+
+      A dict of {(row, column): value} using 1-based openpyxl coordinates
+      A list of the (row, column) cells that should be bold
+
+    The layout, from the top, is:
+
+      The table name and description
+      Any ~UC_Sets declarations (column B)
+      The VEDA tag (column A, on the last UC_Sets row if there are any)
+      The header row
+      The data
+
+    The startrow input is the zero-based row where this table begins,
+    and increases by table_height() for each table added to a sheet.
+    """
+
+    # pylint: disable=too-many-positional-arguments
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-locals
+
+    cells = {}
+
+    # quick definitions of row layout
+    description_row = startrow + 1
+    # Get uc_set length and adjust startrow if needed
+    # (after setting description row, which is always at the top)
+    uc_set_length = len(uc_set)
+    if uc_set_length > 0:
+        logger.debug("uc_sets detected")
+        startrow += uc_set_length - 1
+    else:
+        logger.debug("no uc_sets detected ")
+
+    tag_row = startrow + 2
+    header_row = startrow + 3
+    data_start_row = startrow + 4
+
+    # Write the table name and description, inherited from config files
+    cells[(description_row, 1)] = table_name
+    cells[(description_row, 2)] = table_description
+    # make bold, for fun
+    bold_cells = [(description_row, 1), (description_row, 2)]
+
+    # The header row
+    for col_idx, column_name in enumerate(df.columns, 1):
+        cells[(header_row, col_idx)] = column_name
+
+    # The data
+    for row_idx, row in enumerate(df.values, data_start_row):
+        for col_idx, value in enumerate(row, 1):
+            cells[(row_idx, col_idx)] = value
+
+    # The tag
+    cells[(tag_row, 1)] = tag
+
+    # UC_Set tags if needed
+    for n, (key, value) in enumerate(uc_set.items()):
+        uc_set_tag_row = startrow - n + 2
+        cells[(uc_set_tag_row, 2)] = f"~UC_Sets: {key}: {value}"
+
+    return cells, bold_cells
+
+
 def write_data(
     df,
     book_name,
@@ -127,6 +228,7 @@ def write_data(
     startrow=0,
     table_name="TABLE NAME",
     table_description="TABLE DESCRIPTION",
+    output_location=OUTPUT_LOCATION,
 ):
     """
     Writes data to the existing book
@@ -144,6 +246,9 @@ def write_data(
 
     THis allows us to print many tagged tables to a single worksheet
 
+    Note that this reloads and saves the whole workbook for each table.
+    write_workbook_once() produces the same result in a single save.
+
     """
 
     # Ideally, this function should be broken down into smaller pieces
@@ -154,53 +259,145 @@ def write_data(
     # pylint: disable=too-many-locals
 
     # Load existing workbook
-    book = load_workbook(f"{OUTPUT_LOCATION}/{book_name}.xlsx")
+    book_location = f"{output_location}/{book_name}.xlsx"
+    book = load_workbook(book_location)
     sheet = book[sheet_name]
     # expand the width of the first column (often important for names)
     sheet.column_dimensions["A"].width = 30
 
-    # quick definitions of row layout
-    description_row = startrow + 1
-    # Get uc_set length and adjust startrow if needed
-    # (after setting description row, which is always at the top)
-    uc_set_length = len(uc_set)
-    if uc_set_length > 0:
-        logger.debug("uc_sets detected")
-        startrow += uc_set_length - 1
-    else:
-        logger.debug("no uc_sets detected ")
+    cells, bold_cells = layout_table(
+        df,
+        tag,
+        uc_set,
+        startrow=startrow,
+        table_name=table_name,
+        table_description=table_description,
+    )
 
-    tag_row = startrow + 2
-    header_row = startrow + 3
-    data_start_row = startrow + 4
+    for (row_idx, col_idx), value in cells.items():
+        sheet.cell(row=row_idx, column=col_idx, value=value)
+    for row_idx, col_idx in bold_cells:
+        sheet.cell(row=row_idx, column=col_idx).font = Font(bold=True)
 
-    # Now can write things:
-    # Write the table name and description, inherited from config files
-    sheet.cell(row=description_row, column=1, value=table_name)
-    sheet.cell(row=description_row, column=2, value=table_description)
-    # make bold, for fun
-    sheet.cell(row=description_row, column=1).font = Font(bold=True)
-    sheet.cell(row=description_row, column=2).font = Font(bold=True)
+    # Save the workbook
+    book.save(book_location)
 
-    # Write the header row
-    for col_idx, column_name in enumerate(df.columns, 1):
-        sheet.cell(row=header_row, column=col_idx, value=column_name)
 
-    # Write the data
-    for row_idx, row in enumerate(df.values, data_start_row):
-        for col_idx, value in enumerate(row, 1):
-            sheet.cell(row=row_idx, column=col_idx, value=value)
+def layout_sheet(tables):
+    """
+    Lay out a list of tagged tables stacked down a single sheet
 
-    # Write the tag
-    sheet.cell(row=tag_row, column=1, value=tag)
+    Each table is a dict with the keys "df", "tag", "uc_set",
+    "table_name" and "table_description", in the order they should appear.
 
-    # Add UC_Set tags if needed
-    if uc_set_length > 0:
-        for n in range(uc_set_length):
-            uc_set_tag_row = startrow - n + 2
-            key = list(uc_set.keys())[n]
-            value = uc_set[key]
-            sheet.cell(row=uc_set_tag_row, column=2, value=f"~UC_Sets: {key}: {value}")
+    Returns the combined cells and bold cells, as per layout_table()
+    """
+    cells = {}
+    bold_cells = []
+    startrow = 0  # keeps track of where to write the next table
+
+    for table in tables:
+        table_cells, table_bold_cells = layout_table(
+            table["df"],
+            table["tag"],
+            table["uc_set"],
+            startrow=startrow,
+            table_name=table["table_name"],
+            table_description=table["table_description"],
+        )
+        cells.update(table_cells)
+        bold_cells.extend(table_bold_cells)
+        startrow += table_height(table["df"], table["uc_set"])
+
+    return cells, bold_cells
+
+
+def append_rows(sheet, cells, bold_cells):
+    """
+    Append laid out cells (see layout_table()) to a write-only sheet,
+    one row at a time from the top, leaving empty rows blank
+    """
+    # group the cells by row so each row can be appended in turn
+    rows = {}
+    for (row_idx, col_idx), value in cells.items():
+        rows.setdefault(row_idx, {})[col_idx] = value
+
+    bold_cells = set(bold_cells)
+    for row_idx in range(1, max(rows) + 1):
+        row_values = rows.get(row_idx, {})
+        row = [None] * max(row_values, default=0)
+        for col_idx, value in row_values.items():
+            if (row_idx, col_idx) in bold_cells:
+                cell = WriteOnlyCell(sheet, value=value)
+                cell.font = Font(bold=True)
+                value = cell
+            row[col_idx - 1] = value
+        sheet.append(row)
+
+
+def write_workbook_once(book_name, sheet_tables, output_location=OUTPUT_LOCATION):
+    """
+    Build a whole workbook in a single pass and save it once
 
-    # Save the workbook
-    book.save(f"{OUTPUT_LOCATION}/{book_name}.xlsx")
+    sheet_tables is a dict of {sheet_name: [table, ...]}, in sheet order,
+    where each table is a dict as described in layout_sheet().
+
+    All cells are laid out in memory first, then each sheet is streamed
+    out row by row through a write-only workbook. The parsed result
+    matches create_empty_workbook() followed by write_data() for each
+    table, but avoids reloading the workbook every time. Timestamps are
+    fixed (see make_reproducible_xlsx()), so rebuilding from the same
+    tables gives a byte-identical file.
+    """
+    book_location = f"{output_location}/{book_name}.xlsx"
+    os.makedirs(os.path.dirname(book_location), exist_ok=True)
+
+    wb = Workbook(write_only=True)
+    wb.properties.created = FIXED_DOC_DATE_TIME
+
+    for sheet_name, tables in sheet_tables.items():
+        sheet = wb.create_sheet(sheet_name)
+        if not tables:
+            continue
+        # expand the width of the first column (often important for names)
+        sheet.column_dimensions["A"].width = 30
+
+        cells, bold_cells = layout_sheet(tables)
+        append_rows(sheet, cells, bold_cells)
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    with open(book_location, "wb") as file_obj:
+        file_obj.write(make_reproducible_xlsx(buffer.getvalue()))
+
+
+def make_reproducible_xlsx(xlsx_bytes):
+    """
+    Strip the save-time timestamps from an openpyxl workbook
+
+    openpyxl stamps the current time on every zip entry and on the
+    document's modified date. These are replaced with fixed values so
+    the same tables always give the same file, whenever (and in whichever
+    process) the workbook is built.
+    """
+    output = io.BytesIO()
+
+    with (
+        zipfile.ZipFile(io.BytesIO(xlsx_bytes)) as source,
+        zipfile.ZipFile(output, "w") as target,
+    ):
+        for info in source.infolist():
+            contents = source.read(info.filename)
+            if info.filename == "docProps/core.xml":
+                contents = re.sub(
+                    rb"(<dcterms:modified[^>]*>)[^<]*(</dcterms:modified>)",
+                    rb"\g<1>"
+                    + FIXED_DOC_DATE_TIME.strftime("%Y-%m-%dT%H:%M:%SZ").encode()
+                    + rb"\g<2>",
+                    contents,
+                )
+            fixed_info = zipfile.ZipInfo(info.filename, date_time=FIXED_ZIP_DATE_TIME)
+            fixed_info.compress_type = info.compress_type
+            target.writestr(fixed_info, contents)
+
+    return output.getvalue()
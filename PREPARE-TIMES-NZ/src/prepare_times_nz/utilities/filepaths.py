@@ -25,6 +25,9 @@ TIMES_LOCATION = _REPO_ROOT.parent
 
 # Data directories (Top-level)
 OUTPUT_LOCATION = PREP_LOCATION / "output"
+# Input hashes for each workbook in OUTPUT_LOCATION (kept outside it, so
+# clearing the output folder forces a full rebuild)
+OUTPUT_MANIFEST = PREP_LOCATION / "output_manifest.json"
 DATA_INTERMEDIATE = PREP_LOCATION / "data_intermediate"
 DATA_RAW = PREP_LOCATION / "data_raw"
 
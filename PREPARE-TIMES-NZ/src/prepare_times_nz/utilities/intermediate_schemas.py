@@ -0,0 +1,93 @@
+"""
+Schemas of the intermediate datasets kept as parquet
+
+Each entry is keyed by the dataset name used with save_intermediate() and
+read_intermediate() in prepare_times_nz.utilities.data_in_out: its path
+under DATA_INTERMEDIATE, without a file extension.
+
+A dataset is cast to its schema when it is written, so a script that
+starts producing different columns or types fails there, rather than in
+whichever later stage reads the data. The schema is checked again when the
+dataset is read, which catches files left over from an older version of
+the script.
+
+Repeated labels are stored as dictionary (categorical) columns.
+
+"""
+
+import pyarrow as pa
+
+_LABEL = pa.dictionary(pa.int32(), pa.string())
+
+EEUD_SCHEMA = pa.schema(
+    [
+        ("SectorGroup", _LABEL),
+        ("Sector", _LABEL),
+        ("SectorANZSIC", _LABEL),
+        ("FuelGroup", _LABEL),
+        ("Fuel", _LABEL),
+        ("TechnologyGroup", _LABEL),
+        ("Technology", _LABEL),
+        ("EnduseGroup", _LABEL),
+        ("EndUse", _LABEL),
+        ("Transport", _LABEL),
+        ("Year", pa.int64()),
+        ("Value", pa.float64()),
+        ("Unit", _LABEL),
+    ]
+)
+
+# One row per hour of the base year; joined to the generation by hour_of_year
+SOLAR_TIME_INDEX_SCHEMA = pa.schema(
+    [
+        ("hour_of_year", pa.int16()),
+        ("Trading_Date", pa.timestamp("ns")),
+        ("Year", pa.int64()),
+        ("Month", pa.int64()),
+        ("Day", pa.int64()),
+        ("EPWHour", pa.int64()),
+        ("Hour", pa.int64()),
+        ("Minute", pa.int64()),
+        ("WallClock_DateTime", pa.timestamp("ns", tz="Pacific/Auckland")),
+        ("WallClock_Date", pa.timestamp("ns")),
+        ("WallClock_Year", pa.int64()),
+        ("WallClock_Month", pa.int64()),
+        ("WallClock_Day", pa.int64()),
+        ("WallClock_Hour", pa.int64()),
+        ("WallClock_UtcOffsetHours", pa.float64()),
+        ("TimeSlice", _LABEL),
+    ]
+)
+
+# One row per scenario, zone and hour
+SOLAR_GENERATION_SCHEMA = pa.schema(
+    [
+        ("Scenario", _LABEL),
+        ("Tech_TIMES", _LABEL),
+        ("ZoneCode", _LABEL),
+        ("Region", _LABEL),
+        ("Island", _LABEL),
+        ("hour_of_year", pa.int16()),
+        ("generation_kw_per_kw", pa.float32()),
+    ]
+)
+
+INTERMEDIATE_SCHEMAS: dict[str, pa.Schema] = {
+    # Stage 1: EEUD
+    "stage_1_input_data/eeud/eeud": EEUD_SCHEMA,
+    "stage_1_input_data/eeud/eeud_no_patch": EEUD_SCHEMA,
+    # Stage 1: Stats NZ price indices (used by the deflator)
+    "stage_1_input_data/statsnz/cpi": pa.schema(
+        [("Year", pa.int64()), ("CPI_Index", pa.float64())]
+    ),
+    "stage_1_input_data/statsnz/cgpi": pa.schema(
+        [("Year", pa.int64()), ("CGPI_Index", pa.float64())]
+    ),
+    # Stage 3: PVWatts hourly solar profiles
+    "stage_3_scenario_data/electricity/solar_af/hourly/time_index": (
+        SOLAR_TIME_INDEX_SCHEMA
+    ),
+    "stage_3_scenario_data/electricity/solar_af/hourly/generation": (
+        SOLAR_GENERATION_SCHEMA
+    ),
+}
@@ -0,0 +1,149 @@
+"""
+In-process task runner for dodo.py
+
+By default dodo.py runs every pipeline script in a fresh Python process,
+so each task pays for starting Python and importing pandas, numpy,
+openpyxl etc. again. With
+
+    doit in_process=1
+
+each task instead calls its script's main() inside the doit process, which
+acts as a persistent worker:
+
+- heavy libraries and package modules are imported once and stay loaded
+- small shared inputs read through read_csv_cached() (such as the CPI and
+  CGPI indices used by the deflator) are read once
+- the script itself is loaded fresh for every task, with the same argv and
+  sys.path it would get from "python script.py"
+
+Without in_process=1, each task's command runs this same function in a
+new Python process instead:
+
+    python -m prepare_times_nz.utilities.task_runner --record <task> <script>
+
+Either way the script's file reads and writes are recorded (see
+prepare_times_nz.utilities.data_in_out), the task waits for its share of
+the memory budget (see prepare_times_nz.utilities.task_scheduling), and
+its startup overhead (loading the script and anything it imports that is
+not already loaded) is logged separately from the time spent in main().
+Timings are also saved with the task's other timings.
+
+"""
+
+import argparse
+import importlib.util
+import re
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+
+from prepare_times_nz.utilities.data_in_out import IORecorder, save_io_record
+from prepare_times_nz.utilities.logger_setup import blue_text, logger
+from prepare_times_nz.utilities.task_scheduling import memory_budget, save_task_timing
+
+
+def get_module_name(script: Path) -> str:
+    """Module name used for a script loaded by load_script()"""
+    return "_pipeline_" + re.sub(r"\W", "_", script.stem)
+
+
+def load_script(script: Path) -> ModuleType:
+    """
+    Import a pipeline script as a new module (not as __main__)
+
+    The module is registered in sys.modules so that anything defined in
+    it can be pickled; run_task() removes it again afterwards.
+    """
+    module_name = get_module_name(script)
+    spec = importlib.util.spec_from_file_location(module_name, script)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _close_figures() -> None:
+    """Close any matplotlib figures a script left open"""
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    if pyplot is not None:
+        pyplot.close("all")
+
+
+def run_task(
+    task_name: str,
+    script: str,
+    memory_gb: float = 1.0,
+    budget_gb: float | None = None,
+    startup_seconds: float = 0.0,
+) -> bool:
+    """
+    Run a pipeline script's main() in this process and record its I/O
+
+    The script only starts once memory_gb fits in the memory budget.
+    startup_seconds is any time already spent starting this process,
+    which is added to the startup time reported for the task.
+    Used as a doit python-action, so returns True on success and lets
+    exceptions fail the task.
+    """
+    script = Path(script).resolve()
+    argv, path = sys.argv, list(sys.path)
+
+    # match "python script.py": the script's folder comes first on the path
+    sys.argv = [str(script)]
+    sys.path.insert(0, str(script.parent))
+
+    try:
+        with memory_budget(task_name, memory_gb, budget_gb) as wait_seconds:
+            with IORecorder() as recorder:
+                start = time.perf_counter()
+                module = load_script(script)
+                loaded = time.perf_counter()
+                module.main()
+                finished = time.perf_counter()
+    finally:
+        sys.argv = argv
+        sys.path[:] = path
+        sys.modules.pop(get_module_name(script), None)
+        _close_figures()
+
+    save_io_record(task_name, recorder.to_record(script))
+
+    timing = {
+        "startup_seconds": round(startup_seconds + loaded - start, 3),
+        "run_seconds": round(finished - loaded, 3),
+        "wait_seconds": round(wait_seconds, 3),
+    }
+    save_task_timing(task_name, **timing)
+    logger.info(
+        "%s: startup %.2fs, run %.2fs",
+        blue_text(task_name),
+        timing["startup_seconds"],
+        timing["run_seconds"],
+    )
+    return True
+
+
+def main() -> None:
+    """Command-line entry point: run one task in a new process"""
+    # CPU time so far is roughly the cost of starting Python and importing
+    startup_seconds = time.process_time()
+    parser = argparse.ArgumentParser(
+        description="Run a pipeline script's main() and record its I/O."
+    )
+    parser.add_argument("--record", required=True, help="doit task name")
+    parser.add_argument("--memory-gb", type=float, default=1.0)
+    parser.add_argument("--memory-budget-gb", type=float, default=None)
+    parser.add_argument("script", type=Path, help="Script to run")
+    args = parser.parse_args()
+    run_task(
+        args.record,
+        args.script,
+        memory_gb=args.memory_gb,
+        budget_gb=args.memory_budget_gb,
+        startup_seconds=startup_seconds,
+    )
+
+
+if __name__ == "__main__":
+    main()
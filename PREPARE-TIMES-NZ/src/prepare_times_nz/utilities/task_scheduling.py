@@ -0,0 +1,246 @@
+"""
+Helpers for running the doit pipeline in parallel
+
+dodo.py runs independent sub-tasks in several processes at once (doit's
+"-n" option). Two things make that safe and measurable:
+
+Memory budget
+-------------
+
+Every task has a memory hint in GB (see TASK_MEMORY_GB in dodo.py). Before
+a task starts, memory_budget() waits until the hints of the tasks already
+running plus its own fit inside the budget (``doit memory_gb=<n>``,
+DEFAULT_MEMORY_BUDGET_GB by default). A task whose hint is larger than the
+whole budget runs once nothing else is running. This keeps the load
+curves, which hold a year of half-hourly EMI data, from running alongside
+other heavy tasks, while light tasks still share the machine.
+
+The budget is shared between processes through lock files in
+MEMORY_LOCK_LOCATION. Each running task holds a lock for as long as it
+runs, so a task that crashes never keeps its share.
+
+Critical path
+-------------
+
+TimingReporter is the doit reporter set in dodo.py. It saves how long each
+task took, and the tasks it depends on, to TASK_TIMINGS_FILE, and prints
+the critical path at the end of each run: the chain of dependent tasks
+with the longest total time. No amount of parallelism can make a full
+build faster than that chain, so those are the tasks worth speeding up.
+
+The report for the last recorded timings can also be printed with
+
+    python -m prepare_times_nz.utilities.task_scheduling
+
+"""
+
+import json
+import re
+import time
+from contextlib import contextmanager
+
+from doit.reporter import ConsoleReporter
+from filelock import FileLock, Timeout
+from prepare_times_nz.utilities.filepaths import PREP_LOCATION
+from prepare_times_nz.utilities.logger_setup import blue_text, logger
+
+# Per-task timings and dependencies from the latest runs
+TASK_TIMINGS_FILE = PREP_LOCATION / ".cache/doit/task_timings.json"
+
+# Lock files that share the memory budget between processes
+MEMORY_LOCK_LOCATION = PREP_LOCATION / ".cache/doit/memory"
+
+DEFAULT_MEMORY_BUDGET_GB = 8.0
+
+# How often a waiting task checks the memory budget again (seconds)
+POLL_SECONDS = 0.5
+
+
+# Task timings -----------------------------------------------------------
+
+
+def load_task_timings() -> dict[str, dict]:
+    """Return the saved timings, by task name"""
+    if not TASK_TIMINGS_FILE.exists():
+        return {}
+    with open(TASK_TIMINGS_FILE, encoding="utf-8") as file_obj:
+        return json.load(file_obj)
+
+
+def save_task_timing(task_name: str, **values) -> None:
+    """Update the saved timing of one task (safe across processes)"""
+    TASK_TIMINGS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with FileLock(f"{TASK_TIMINGS_FILE}.lock"):
+        timings = load_task_timings()
+        timings.setdefault(task_name, {}).update(values)
+        with open(TASK_TIMINGS_FILE, "w", encoding="utf-8") as file_obj:
+            json.dump(timings, file_obj, indent=2, sort_keys=True)
+
+
+# Memory budget ----------------------------------------------------------
+
+
+def running_tasks_gb() -> float:
+    """
+    Total memory hint of the tasks currently running
+
+    A claim whose holder lock can be taken belongs to a task that has
+    finished or died, so it is removed.
+    """
+    total = 0.0
+    for claim in MEMORY_LOCK_LOCATION.glob("*.gb"):
+        holder = FileLock(claim.with_suffix(".lock"))
+        try:
+            holder.acquire(timeout=0)
+        except Timeout:
+            total += float(claim.read_text(encoding="utf-8"))
+            continue
+        claim.unlink(missing_ok=True)
+        holder.release()
+    return total
+
+
+@contextmanager
+def memory_budget(task_name: str, memory_gb: float, budget_gb: float | None = None):
+    """
+    Wait until memory_gb fits in the memory budget, then hold it
+
+    Yields the number of seconds spent waiting.
+    """
+    budget_gb = DEFAULT_MEMORY_BUDGET_GB if budget_gb is None else budget_gb
+    MEMORY_LOCK_LOCATION.mkdir(parents=True, exist_ok=True)
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "__", task_name)
+    claim = MEMORY_LOCK_LOCATION / f"{safe_name}.gb"
+    holder = FileLock(claim.with_suffix(".lock"))
+    holder.acquire()
+
+    start = time.perf_counter()
+    waiting_logged = False
+    try:
+        while True:
+            with FileLock(MEMORY_LOCK_LOCATION / "budget.lock"):
+                running_gb = running_tasks_gb()
+                if running_gb == 0 or running_gb + memory_gb <= budget_gb:
+                    claim.write_text(str(memory_gb), encoding="utf-8")
+                    break
+            if not waiting_logged:
+                logger.info(
+                    "%s: waiting for %.1f GB of memory (%.1f of %.1f GB in use)",
+                    blue_text(task_name),
+                    memory_gb,
+                    running_gb,
+                    budget_gb,
+                )
+                waiting_logged = True
+            time.sleep(POLL_SECONDS)
+
+        yield time.perf_counter() - start
+    finally:
+        claim.unlink(missing_ok=True)
+        holder.release()
+
+
+# Critical path ----------------------------------------------------------
+
+
+def find_critical_path(
+    durations: dict[str, float], task_deps: dict[str, list[str]]
+) -> tuple[float, list[str]]:
+    """
+    Return the length and tasks of the longest chain of dependent tasks
+
+    Tasks without a duration (such as doit group tasks) take no time but
+    still link their dependencies.
+    """
+    finish = {}
+    previous = {}
+
+    def visit(task_name):
+        if task_name not in finish:
+            start, latest_dep = 0.0, None
+            for dep in task_deps.get(task_name, []):
+                if visit(dep) > start:
+                    start, latest_dep = finish[dep], dep
+            finish[task_name] = start + durations.get(task_name, 0.0)
+            previous[task_name] = latest_dep
+        return finish[task_name]
+
+    for task_name in [*task_deps, *durations]:
+        visit(task_name)
+    if not finish:
+        return 0.0, []
+
+    task_name = max(finish, key=finish.get)
+    length = finish[task_name]
+    path = []
+    while task_name is not None:
+        if task_name in durations:
+            path.append(task_name)
+        task_name = previous[task_name]
+    return length, path[::-1]
+
+
+def format_critical_path_report(timings: dict[str, dict]) -> str:
+    """Describe the critical path of the recorded task timings"""
+    durations = {
+        name: timing["seconds"]
+        for name, timing in timings.items()
+        if "seconds" in timing
+    }
+    task_deps = {name: timing.get("task_dep", []) for name, timing in timings.items()}
+    length, path = find_critical_path(durations, task_deps)
+
+    lines = [
+        "Critical path (from the latest timing of each task):",
+        *[f"  {durations[name]:8.1f}s  {name}" for name in path],
+        f"  {length:8.1f}s  critical path total",
+        f"  {sum(durations.values()):8.1f}s  all {len(durations)} tasks one after another",
+    ]
+    return "\n".join(lines)
+
+
+class TimingReporter(ConsoleReporter):
+    """
+    doit's console reporter, plus task timings and a critical-path report
+
+    Timings are taken in the main doit process, from when a task starts to
+    when it succeeds, less any time it waited for the memory budget.
+    """
+
+    desc = "console output with task timings"
+
+    def __init__(self, outstream, options):
+        super().__init__(outstream, options)
+        self._started = {}
+        self._timed_any = False
+
+    def execute_task(self, task):
+        super().execute_task(task)
+        self._started[task.name] = time.perf_counter()
+
+    def add_success(self, task):
+        super().add_success(task)
+        start = self._started.pop(task.name, None)
+        if start is None or not task.actions:
+            return
+        wait = load_task_timings().get(task.name, {}).get("wait_seconds", 0.0)
+        save_task_timing(
+            task.name,
+            seconds=round(max(time.perf_counter() - start - wait, 0.0), 3),
+            task_dep=sorted(task.task_dep),
+        )
+        self._timed_any = True
+
+    def complete_run(self):
+        super().complete_run()
+        if self._timed_any:
+            self.write(format_critical_path_report(load_task_timings()) + "\n")
+
+
+def main() -> None:
+    """Print the critical path of the last recorded timings"""
+    print(format_critical_path_report(load_task_timings()))
+
+
+if __name__ == "__main__":
+    main()
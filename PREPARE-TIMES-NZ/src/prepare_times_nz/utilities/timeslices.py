@@ -1,10 +1,27 @@
 """
 Shared helpers for constructing TIMES timeslices.
+
+create_timeslices() labels each row with its TimeSlice (season, day type
+and time of day, e.g. "SUM-WK-P") through a lookup table with a row per
+calendar day and a column per hour. The table covers whole years and is
+built once per range of years, so labelling millions of rows is two array
+lookups rather than date parsing and string building per row. TimeSlice
+comes back as a categorical with every possible label as a category.
+
+Calendar edge cases are handled explicitly:
+
+- the table has a row for every day of the years covered, so 29 February
+  gets its own (summer, weekday or weekend) row in leap years
+- hours are wall-clock hours 0-23; hour 24 is the repeated hour on the day
+  daylight saving ends (EMI trading periods 49 and 50) and counts as night,
+  as does any other hour missing from time_of_day_types.csv
+- rows without a valid date get a missing TimeSlice
 """
 
 from __future__ import annotations
 
 from functools import cache
+from itertools import product
 
 import numpy as np
 import pandas as pd
@@ -12,6 +29,16 @@ from prepare_times_nz.utilities.filepaths import DATA_RAW
 
 TIME_OF_DAY_FILE = DATA_RAW / "user_config/settings/time_of_day_types.csv"
 
+# Season by month (January first), and day type by weekday (Monday first)
+SEASON_BY_MONTH = ["SUM-"] * 2 + ["FAL-"] * 3 + ["WIN-"] * 3 + ["SPR-"] * 3 + ["SUM-"]
+DAY_TYPE_BY_WEEKDAY = ["WK-"] * 5 + ["WE-"] * 2
+
+# Time of day for hours outside 0-23 (or missing from TIME_OF_DAY_FILE)
+DEFAULT_TIME_OF_DAY = "N"
+
+# Lookup columns: hours 0-23, then one for every other hour
+HOURS_IN_LOOKUP = 25
+
 
 @cache
 def get_hour_to_time_map() -> dict[int, str]:
@@ -68,15 +95,104 @@ def convert_date_to_season(
     return df
 
 
+def get_timeslice_categories() -> list[str]:
+    """
+    Return every TimeSlice label that create_timeslices() can produce,
+    sorted as plain strings would be
+    """
+    times_of_day = set(get_hour_to_time_map().values()) | {DEFAULT_TIME_OF_DAY}
+    return sorted(
+        "".join(parts)
+        for parts in product(
+            set(SEASON_BY_MONTH), set(DAY_TYPE_BY_WEEKDAY), times_of_day
+        )
+    )
+
+
+@cache
+def get_timeslice_lookup(first_year: int, last_year: int) -> np.ndarray:
+    """
+    Return TimeSlice category codes (see get_timeslice_categories()) with a
+    row per day from 1 January of first_year to 31 December of last_year
+    and a column per hour (HOURS_IN_LOOKUP columns; the last is used for
+    any hour outside 0-23)
+    """
+    categories = {label: code for code, label in enumerate(get_timeslice_categories())}
+    hour_map = get_hour_to_time_map()
+    time_of_day = [hour_map.get(hour, DEFAULT_TIME_OF_DAY) for hour in range(24)]
+    time_of_day.append(DEFAULT_TIME_OF_DAY)
+
+    days = pd.Series(pd.date_range(f"{first_year}-01-01", f"{last_year}-12-31"))
+    # only 14 season and day type combinations, so label those first
+    season = np.array(SEASON_BY_MONTH, dtype=object)[days.dt.month.to_numpy() - 1]
+    day_type = np.array(DAY_TYPE_BY_WEEKDAY, dtype=object)[days.dt.weekday.to_numpy()]
+    day_labels = pd.Series(season + day_type)
+
+    lookup = np.empty((len(days), HOURS_IN_LOOKUP), dtype=np.int8)
+    for label in day_labels.unique():
+        codes = [categories[label + tod] for tod in time_of_day]
+        lookup[(day_labels == label).to_numpy()] = codes
+    return lookup
+
+
+def get_hour_index(hours: pd.Series) -> np.ndarray:
+    """
+    Return the lookup column of each hour: the hour itself for whole hours
+    0-23, or the last column for anything else (including missing hours)
+    """
+    if pd.api.types.is_integer_dtype(hours.dtype) and not hours.hasnans:
+        values = hours.to_numpy()
+        in_day = (values >= 0) & (values <= 23)
+    else:
+        values = pd.to_numeric(hours, errors="coerce").to_numpy(
+            dtype=float, na_value=np.nan
+        )
+        in_day = (values >= 0) & (values <= 23) & (values % 1 == 0)
+    return np.where(in_day, values, HOURS_IN_LOOKUP - 1).astype(np.intp)
+
+
+def get_timeslice_codes(dates: pd.Series, hours: pd.Series) -> np.ndarray:
+    """
+    Return the TimeSlice category code of each date and hour (-1 where the
+    date is missing)
+    """
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        # local (wall-clock) dates
+        dates = dates.dt.tz_localize(None)
+    days = dates.to_numpy(dtype="datetime64[D]")
+    valid = ~np.isnat(days)
+    codes = np.full(len(days), -1, dtype=np.int8)
+    if not valid.any():
+        return codes
+
+    first_year, last_year = (
+        int(day.astype("datetime64[Y]").astype(int)) + 1970
+        for day in (days[valid].min(), days[valid].max())
+    )
+    lookup = get_timeslice_lookup(first_year, last_year)
+    first_day = np.datetime64(f"{first_year}-01-01", "D").astype(np.int64)
+    day_index = days.view(np.int64) - first_day
+    hour_index = get_hour_index(hours)
+
+    if valid.all():
+        return lookup[day_index, hour_index]
+    codes[valid] = lookup[day_index[valid], hour_index[valid]]
+    return codes
+
+
 def create_timeslices(
     df: pd.DataFrame, date_col: str = "Trading_Date", hour_col: str = "Hour"
 ) -> pd.DataFrame:
     """
     Add a TIMES-style `TimeSlice` column using the shared project mapping.
+
+    The date column is converted to datetimes if it is not already.
+    TimeSlice is categorical.
     """
-    df = convert_hour_to_timeofday(df, hour_col=hour_col)
-    df = convert_date_to_daytype(df, date_col)
-    df = convert_date_to_season(df, date_col)
-    df["TimeSlice"] = df["Season"] + df["Day_Type"] + df["Time_Of_Day"]
-    df = df.drop(columns=["Season", "Day_Type", "Time_Of_Day"])
+    if not pd.api.types.is_datetime64_any_dtype(df[date_col]):
+        df[date_col] = pd.to_datetime(df[date_col])
+    codes = get_timeslice_codes(df[date_col], df[hour_col])
+    df["TimeSlice"] = pd.Categorical.from_codes(
+        codes, categories=get_timeslice_categories()
+    )
     return df
@@ -3,6 +3,8 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT_DIR = Path(__file__).resolve().parents[1]
 SRC_DIR = Path(__file__).resolve().parents[1] / "src"
 
@@ -11,3 +13,15 @@ if str(ROOT_DIR) not in sys.path:
 
 if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
+
+
+@pytest.fixture(autouse=True)
+def fixture_excel_cache_in_tmp(tmp_path_factory, monkeypatch):
+    """Keep workbooks parsed by tests out of the pipeline's Excel sheet cache."""
+    # imported here, once src is on the path
+    # pylint: disable=import-outside-toplevel
+    from prepare_times_nz.utilities import data_in_out
+
+    monkeypatch.setattr(
+        data_in_out, "EXCEL_CACHE_LOCATION", tmp_path_factory.mktemp("excel_cache")
+    )
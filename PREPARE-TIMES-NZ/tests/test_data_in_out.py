@@ -0,0 +1,257 @@
+"""Tests for the pipeline I/O registry."""
+
+import glob
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from prepare_times_nz.utilities import data_in_out
+from prepare_times_nz.utilities.filepaths import PREP_LOCATION
+
+
+def test_io_recorder_splits_reads_and_writes(tmp_path, monkeypatch):
+    """Opens in tracked folders are recorded relative to the project root."""
+    tracked = tmp_path / "data_raw"
+    tracked.mkdir()
+    monkeypatch.setattr(data_in_out, "TRACKED_LOCATIONS", [tracked])
+    monkeypatch.setattr(data_in_out, "PREP_LOCATION", tmp_path)
+    monkeypatch.setattr(data_in_out, "PACKAGE_LOCATION", tmp_path / "src")
+
+    read_file = tracked / "input.csv"
+    written_file = tracked / "output.csv"
+    rewritten_file = tracked / "rewritten.csv"
+    for path in [read_file, written_file, rewritten_file]:
+        path.write_text("x\n", encoding="utf-8")
+
+    recorder = data_in_out.IORecorder()
+    recorder.audit_hook("open", (str(read_file), "r", os.O_RDONLY))
+    recorder.audit_hook("open", (str(written_file), "w", os.O_WRONLY))
+    recorder.audit_hook("open", (str(rewritten_file), "rb", os.O_RDONLY))
+    recorder.audit_hook("open", (str(rewritten_file), None, os.O_RDWR))
+    # untracked, missing, and other events are ignored
+    recorder.audit_hook("open", (str(tmp_path / "other.csv"), "r", os.O_RDONLY))
+    recorder.audit_hook("open", (str(tracked / "missing.csv"), "r", os.O_RDONLY))
+    recorder.audit_hook("os.remove", (str(read_file), -1))
+
+    record = recorder.to_record()
+
+    assert record["reads"] == ["data_raw/input.csv"]
+    assert record["writes"] == ["data_raw/output.csv", "data_raw/rewritten.csv"]
+    assert record["scans"] == []
+
+
+def test_io_recorder_records_folder_scans(tmp_path, monkeypatch):
+    """Folders listed or globbed in tracked folders are recorded as scans."""
+    tracked = tmp_path / "data_raw"
+    for folder in ["emi", "gic", "mbie/2023", "excel_cache"]:
+        (tracked / folder).mkdir(parents=True)
+    (tracked / "emi/202301.csv").write_text("x\n", encoding="utf-8")
+    monkeypatch.setattr(data_in_out, "TRACKED_LOCATIONS", [tracked])
+    monkeypatch.setattr(data_in_out, "PREP_LOCATION", tmp_path)
+    monkeypatch.setattr(data_in_out, "EXCEL_CACHE_LOCATION", tracked / "excel_cache")
+
+    with data_in_out.IORecorder() as recorder:
+        list(tracked.joinpath("emi").glob("*.csv"))
+        os.listdir(tracked / "gic")
+        glob.glob(str(tracked / "mbie/2023/*.xlsx"))
+        list(tracked.joinpath("excel_cache").glob("*.parquet"))
+        os.listdir(tmp_path)
+
+    assert recorder.to_record()["scans"] == [
+        "data_raw/emi",
+        "data_raw/gic",
+        "data_raw/mbie/2023",
+    ]
+
+
+def test_io_recorder_only_wraps_pandas_parquet_while_active(tmp_path, monkeypatch):
+    """Parquet reads and writes are recorded, and pandas is restored after."""
+    tracked = tmp_path / "data_raw"
+    tracked.mkdir()
+    monkeypatch.setattr(data_in_out, "TRACKED_LOCATIONS", [tracked])
+    monkeypatch.setattr(data_in_out, "PREP_LOCATION", tmp_path)
+    read_parquet = pd.read_parquet
+    to_parquet = pd.DataFrame.to_parquet
+
+    with data_in_out.IORecorder() as recorder:
+        assert pd.read_parquet is not read_parquet
+        pd.DataFrame({"x": [1]}).to_parquet(tracked / "written.parquet")
+        pd.read_parquet(tracked / "written.parquet")
+
+    assert pd.read_parquet is read_parquet
+    assert pd.DataFrame.to_parquet is to_parquet
+    assert recorder.to_record()["writes"] == ["data_raw/written.parquet"]
+
+
+def test_io_record_path_is_safe_for_subtask_names():
+    """doit sub-task names contain colons, which are not valid on Windows."""
+    path = data_in_out.get_io_record_path("stage_1_extract:extract_eeud")
+
+    assert path.name == "stage_1_extract__extract_eeud.json"
+
+
+def test_find_package_modules_follows_imports():
+    """Package modules are found through the script's import statements."""
+    script = PREP_LOCATION / "scripts/stage_3_scenarios/supply_projections.py"
+
+    modules = data_in_out.find_package_modules(script)
+
+    library = data_in_out.PACKAGE_LOCATION
+    assert str(library / "stage_3/gas_forecasts.py") in modules
+    assert str(library / "__init__.py") in modules
+    # imported by gas_forecasts rather than the script
+    assert str(library / "utilities/filepaths.py") in modules
+
+
+def test_read_csv_cached_returns_copies_and_rereads_changes(tmp_path, monkeypatch):
+    """Cached reads are independent copies, refreshed when the file changes."""
+    tracked = tmp_path / "data_raw"
+    tracked.mkdir()
+    monkeypatch.setattr(data_in_out, "TRACKED_LOCATIONS", [tracked])
+    monkeypatch.setattr(data_in_out, "PREP_LOCATION", tmp_path)
+    csv_file = tracked / "index.csv"
+    csv_file.write_text("Year,Index\n2020,1.0\n", encoding="utf-8")
+
+    first = data_in_out.read_csv_cached(csv_file)
+    first.loc[0, "Index"] = 99.0
+    with data_in_out.IORecorder() as recorder:
+        second = data_in_out.read_csv_cached(csv_file)
+
+    assert second.loc[0, "Index"] == 1.0
+    # cache hits are still recorded as reads
+    assert recorder.to_record()["reads"] == ["data_raw/index.csv"]
+
+    csv_file.write_text("Year,Index\n2020,1.0\n2021,1.1\n", encoding="utf-8")
+    os.utime(csv_file, ns=(0, csv_file.stat().st_mtime_ns + 1_000_000))
+
+    assert len(data_in_out.read_csv_cached(csv_file)) == 2
+
+
+@pytest.fixture(name="excel_cache")
+def fixture_excel_cache(tmp_path, monkeypatch):
+    """An empty Excel sheet cache, on disk and in memory."""
+    cache_dir = tmp_path / "excel_cache"
+    monkeypatch.setattr(data_in_out, "EXCEL_CACHE_LOCATION", cache_dir)
+    monkeypatch.setattr(data_in_out, "_EXCEL_CACHE", {})
+    monkeypatch.setattr(data_in_out, "_FILE_HASHES", {})
+    return cache_dir
+
+
+def test_read_excel_cached_round_trips_mixed_sheets(tmp_path, excel_cache, monkeypatch):
+    """Cached sheets come back exactly as read_excel() parsed them."""
+    workbook = tmp_path / "workbook.xlsx"
+    pd.DataFrame(
+        {
+            "Year": [2020, 2021, "Total"],
+            "Value": [1.5, "C", None],
+            "Fuel": ["Coal", None, "Gas"],
+            "Date": pd.to_datetime(["2020-01-01", "2021-01-01", "2022-01-01"]),
+            2023: [1, 2, 3],
+        }
+    ).to_excel(workbook, sheet_name="Data", index=False)
+    expected = pd.read_excel(workbook, sheet_name="Data")
+
+    first = data_in_out.read_excel_cached(workbook, sheet_name="Data")
+    first.loc[0, "Fuel"] = "changed"
+    assert len(list(excel_cache.glob("*.parquet"))) == 1
+
+    # a later run reads the parquet copy without parsing the workbook
+    monkeypatch.setattr(data_in_out, "_EXCEL_CACHE", {})
+
+    def fail_read_excel(*args, **kwargs):
+        raise AssertionError("workbook parsed again")
+
+    monkeypatch.setattr(pd, "read_excel", fail_read_excel)
+    second = data_in_out.read_excel_cached(workbook, sheet_name="Data")
+
+    pd.testing.assert_frame_equal(second, expected)
+    assert [type(value) for value in second["Value"][:2]] == [float, str]
+
+
+def test_read_excel_cached_keys_on_arguments_and_contents(tmp_path, excel_cache):
+    """Other header rows get their own entry; a changed workbook replaces them."""
+    workbook = tmp_path / "workbook.xlsx"
+    rows = pd.DataFrame([["Fuel", "Coal", "Gas"], ["Unit", "PJ", "PJ"], [2020, 1, 2]])
+    rows.to_excel(workbook, header=False, index=False)
+
+    multi = data_in_out.read_excel_cached(workbook, header=[0, 1])
+    single = data_in_out.read_excel_cached(workbook, skiprows=1)
+    data_in_out._EXCEL_CACHE.clear()  # pylint: disable=protected-access
+
+    pd.testing.assert_frame_equal(
+        data_in_out.read_excel_cached(workbook, header=[0, 1]), multi
+    )
+    assert multi.columns.nlevels == 2
+    assert list(single.columns) == ["Unit", "PJ", "PJ.1"]
+    assert len(list(excel_cache.glob("*.parquet"))) == 2
+
+    rows.iloc[2, 1] = 5
+    rows.to_excel(workbook, header=False, index=False)
+    os.utime(workbook, ns=(0, workbook.stat().st_mtime_ns + 1_000_000))
+
+    assert data_in_out.read_excel_cached(workbook, skiprows=1)["PJ"].tolist() == [5]
+    assert len(list(excel_cache.glob("*.parquet"))) == 1
+
+
+@pytest.fixture(name="intermediate")
+def fixture_intermediate(tmp_path, monkeypatch):
+    """An empty intermediate data folder with one registered dataset."""
+    schema = pa.schema(
+        [("Fuel", pa.dictionary(pa.int32(), pa.string())), ("Value", pa.float64())]
+    )
+    monkeypatch.setattr(data_in_out, "DATA_INTERMEDIATE", tmp_path)
+    monkeypatch.setattr(data_in_out, "INTERMEDIATE_SCHEMAS", {"stage_1/test": schema})
+    monkeypatch.delenv(data_in_out.CSV_MIRROR_ENV, raising=False)
+    return tmp_path
+
+
+def test_intermediate_round_trip_keeps_types(intermediate):
+    """Values are cast to the schema on saving and read back typed."""
+    df = pd.DataFrame({"Value": [1, 2], "Fuel": ["Coal", None]})
+
+    data_in_out.save_intermediate(df, "stage_1/test", "Test data")
+    result = data_in_out.read_intermediate("stage_1/test")
+    labels = data_in_out.read_intermediate("stage_1/test", categorical=True)
+
+    assert list(result.columns) == ["Fuel", "Value"]
+    assert result["Value"].dtype == "float64"
+    assert result["Fuel"].tolist()[0] == "Coal" and pd.isna(result["Fuel"][1])
+    assert result["Fuel"].dtype == object
+    assert labels["Fuel"].dtype == "category"
+    # no CSV copy unless asked for
+    assert not (intermediate / "stage_1/test.csv").exists()
+
+
+def test_intermediate_csv_mirror_on_request(intermediate, monkeypatch):
+    """A CSV copy is written per call or for every dataset via the environment."""
+    df = pd.DataFrame({"Fuel": ["Coal"], "Value": [1.5]})
+    csv_file = intermediate / "stage_1/test.csv"
+
+    data_in_out.save_intermediate(df, "stage_1/test", "Test data", csv=True)
+    assert pd.read_csv(csv_file, encoding="utf-8-sig").equals(df)
+
+    data_in_out.save_intermediate(df, "stage_1/test", "Test data")
+    assert not csv_file.exists()
+
+    monkeypatch.setenv(data_in_out.CSV_MIRROR_ENV, "1")
+    data_in_out.save_intermediate(df, "stage_1/test", "Test data")
+    assert csv_file.exists()
+
+
+def test_intermediate_schema_is_enforced(intermediate):
+    """Wrong columns fail on saving, and stale files fail on reading."""
+    with pytest.raises(ValueError, match="missing columns \\['Value'\\]"):
+        data_in_out.save_intermediate(
+            pd.DataFrame({"Fuel": ["Coal"]}), "stage_1/test", "Test data"
+        )
+    with pytest.raises(KeyError, match="No schema registered"):
+        data_in_out.save_intermediate(pd.DataFrame(), "stage_1/other", "Test data")
+
+    # a file written by an older version of the script
+    (intermediate / "stage_1").mkdir()
+    pd.DataFrame({"Fuel": ["Coal"], "Value": ["1.5"]}).to_parquet(
+        intermediate / "stage_1/test.parquet"
+    )
+    with pytest.raises(ValueError, match="Value is string, expected double"):
+        data_in_out.read_intermediate("stage_1/test")
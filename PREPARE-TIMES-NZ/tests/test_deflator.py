@@ -0,0 +1,79 @@
+"""Tests for the vectorised CPI/CGPI deflator."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from prepare_times_nz.utilities import data_in_out, deflator
+
+
+@pytest.fixture(autouse=True)
+def fixture_index_files(tmp_path, monkeypatch):
+    """Small CPI and CGPI tables, with a gap in 2021."""
+    monkeypatch.setattr(data_in_out, "DATA_INTERMEDIATE", tmp_path)
+    cpi = pd.DataFrame(
+        {"Year": [2018, 2019, 2020, 2022], "CPI_Index": [100.0, 110, 120, 150]}
+    )
+    cgpi = pd.DataFrame({"Year": [2018, 2022], "CGPI_Index": [200.0, 300]})
+    data_in_out.save_intermediate(cpi, deflator.INDEX_DATASETS["cpi"], "CPI")
+    data_in_out.save_intermediate(cgpi, deflator.INDEX_DATASETS["cgpi"], "CGPI")
+
+
+def test_deflate_data_matches_per_value_rules():
+    """Each row follows the same rules as the old row-by-row deflator."""
+    df = pd.DataFrame(
+        {
+            "PriceBaseYear": [2018, 2022, 2030, 2021, 2019, np.nan, 2018],
+            "Cost": [10.0, 5.0, 3.0, 7.0, np.nan, 4.0, 2.0],
+        }
+    )
+
+    result = deflator.deflate_data(df, 2020, ["Cost"])
+
+    expected = [
+        10.0 * 120 / 100,  # normal
+        5.0 * 120 / 150,  # 2022 index
+        3.0 * 120 / 150,  # beyond the latest year: use 2022
+        np.nan,  # no 2021 index
+        np.nan,  # missing value
+        np.nan,  # missing year
+        2.0 * 120 / 100,
+    ]
+    np.testing.assert_allclose(result["Cost"], expected)
+    assert (result["PriceBaseYear"] == 2020).all()
+
+
+def test_values_already_in_base_year_are_unchanged():
+    """Rows in the base year keep their value, even without an index."""
+    df = pd.DataFrame({"PriceBaseYear": [2025, 2025], "Cost": [1, 2]})
+
+    result = deflator.deflate_data(df, 2025, ["Cost"])
+
+    assert result["Cost"].tolist() == [1, 2]
+    assert result["Cost"].dtype == df["Cost"].dtype
+
+    # other rows have no 2025 base index, as the base year is not capped
+    df.loc[1, "PriceBaseYear"] = 2018
+    result = deflator.deflate_data(df, 2025, ["Cost"])
+    assert result["Cost"].iloc[0] == 1
+    assert np.isnan(result["Cost"].iloc[1])
+
+
+def test_deflate_columns_rowwise_uses_each_rows_base_column():
+    """Each value column is deflated from its own base-year column (CGPI)."""
+    df = pd.DataFrame({"Cost": [10.0, 20.0], "CostYear": [2018, 2022]})
+
+    result = deflator.deflate_columns_rowwise(
+        df, {"Cost": "CostYear"}, target_year=2022, method="cgpi"
+    )
+
+    np.testing.assert_allclose(result["Cost_nzd"], [15.0, 20.0])
+
+
+def test_deflate_value_and_bad_method():
+    """The scalar helper agrees with the column version."""
+    assert deflator.deflate_value(2018, 2020, 10.0) == pytest.approx(12.0)
+    assert np.isnan(deflator.deflate_value(2021, 2020, 10.0))
+    assert deflator.deflate_value(2021, 2021, "n/a") == "n/a"
+
+    with pytest.raises(ValueError):
+        deflator.deflate_value(2018, 2020, 10.0, method="ppi")
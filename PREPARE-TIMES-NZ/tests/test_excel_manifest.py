@@ -0,0 +1,71 @@
+"""Tests for the Stage 5 workbook manifest."""
+
+import pandas as pd
+import pytest
+from prepare_times_nz.utilities import excel_manifest
+
+
+@pytest.fixture(name="stage_dirs")
+def fixture_stage_dirs(tmp_path, monkeypatch):
+    """Point the manifest module at temporary folders with two workbooks."""
+    stage_0 = tmp_path / "stage_0_config"
+    output = tmp_path / "output"
+    stage_0.mkdir()
+    output.mkdir()
+    (stage_0 / "Settings.toml").write_text("a = 1\n", encoding="utf-8")
+    (tmp_path / "table.csv").write_text("x\n1\n", encoding="utf-8")
+
+    monkeypatch.setattr(excel_manifest, "STAGE_0_DATA", stage_0)
+    monkeypatch.setattr(excel_manifest, "PREP_LOCATION", tmp_path)
+    monkeypatch.setattr(excel_manifest, "OUTPUT_LOCATION", output)
+    monkeypatch.setattr(excel_manifest, "OUTPUT_MANIFEST", tmp_path / "manifest.json")
+
+    metadata = pd.DataFrame(
+        {
+            "WorkBookName": ["BookA", "BookB"],
+            "TableName": ["Settings", "Table"],
+            "SheetName": ["Sheet", "Sheet"],
+            "VedaTag": ["~TFM_INS", "~FI_T"],
+            "UC_Sets": [None, None],
+            "DataLocation": ["Settings.toml", "table.csv"],
+            "Description": ["", ""],
+        }
+    )
+    return tmp_path, metadata
+
+
+def build(tmp_path, metadata):
+    """Pretend to build every workbook and record the manifest."""
+    for workbook in metadata["WorkBookName"]:
+        (tmp_path / "output" / f"{workbook}.xlsx").write_bytes(b"")
+    excel_manifest.save_manifest(excel_manifest.get_workbook_hashes(metadata))
+
+
+def test_all_workbooks_stale_without_manifest(stage_dirs):
+    """A first build should rebuild everything."""
+    _, metadata = stage_dirs
+
+    assert excel_manifest.get_stale_workbooks(metadata) == ["BookA", "BookB"]
+
+
+def test_only_changed_source_is_stale(stage_dirs):
+    """Changing one source file should only invalidate the book that uses it."""
+    tmp_path, metadata = stage_dirs
+    build(tmp_path, metadata)
+
+    assert not excel_manifest.get_stale_workbooks(metadata)
+
+    (tmp_path / "table.csv").write_text("x\n2\n", encoding="utf-8")
+
+    assert excel_manifest.get_stale_workbooks(metadata) == ["BookB"]
+
+
+def test_metadata_change_and_missing_output_are_stale(stage_dirs):
+    """Edited metadata rows or a deleted workbook should trigger a rebuild."""
+    tmp_path, metadata = stage_dirs
+    build(tmp_path, metadata)
+
+    metadata.loc[0, "Description"] = "changed"
+    (tmp_path / "output/BookB.xlsx").unlink()
+
+    assert excel_manifest.get_stale_workbooks(metadata) == ["BookA", "BookB"]
@@ -0,0 +1,125 @@
+"""Tests for the VEDA Excel table writers."""
+
+import time
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from prepare_times_nz.utilities.excel_writers import (
+    create_empty_workbook,
+    layout_sheet,
+    table_height,
+    write_data,
+    write_workbook_once,
+)
+
+SHEET_TABLES = {
+    "Processes": [
+        {
+            "df": pd.DataFrame(
+                {"TechName": ["ELC_A", "ELC_B"], "Region": ["NI", np.nan]}
+            ),
+            "tag": "~FI_Process",
+            "uc_set": {},
+            "table_name": "ProcessDefinitions",
+            "table_description": "Declare processes",
+        },
+        {
+            "df": pd.DataFrame({"UC_N": ["UC_1"], "NI": ["0.5"], "SI": [""]}),
+            "tag": "~UC_T",
+            "uc_set": {"R_E": "AllRegions", "T_E": ""},
+            "table_name": "Constraints",
+            "table_description": "Two UC_Sets",
+        },
+        {
+            "df": pd.DataFrame({"Attribute": ["NCAP_AF"], "Value": [0.9]}),
+            "tag": "~TFM_INS",
+            "uc_set": {"R_S": "NI"},
+            "table_name": "SingleUcSet",
+            "table_description": "One UC_Set",
+        },
+    ],
+    "Empty": [
+        {
+            "df": pd.DataFrame(columns=["2050"]),
+            "tag": "~StartYear",
+            "uc_set": {},
+            "table_name": "StartYear",
+            "table_description": "Header only",
+        }
+    ],
+}
+
+
+def read_cells(path):
+    """Return every populated cell in a workbook, with its bold flag."""
+    book = load_workbook(path)
+    cells = {}
+    for sheet in book.worksheets:
+        for row in sheet.iter_rows():
+            for cell in row:
+                if cell.value is not None:
+                    cells[(sheet.title, cell.coordinate)] = (cell.value, cell.font.b)
+    widths = {sheet.title: sheet.column_dimensions["A"].width for sheet in book}
+    return book.sheetnames, cells, widths
+
+
+def test_table_height_counts_uc_sets_and_gap():
+    """Each table should reserve its data, UC_Sets and four layout rows."""
+    table = SHEET_TABLES["Processes"][1]
+
+    assert table_height(table["df"], table["uc_set"]) == 7
+
+
+def test_layout_sheet_stacks_tables_with_uc_sets():
+    """UC_Sets should sit above the tag, sharing the tag row for the last set."""
+    cells, bold_cells = layout_sheet(SHEET_TABLES["Processes"])
+
+    # second table starts at zero-based row 6 (2 data rows + 4)
+    assert cells[(7, 1)] == "Constraints"
+    assert cells[(8, 2)] == "~UC_Sets: T_E: "
+    assert cells[(9, 2)] == "~UC_Sets: R_E: AllRegions"
+    assert cells[(9, 1)] == "~UC_T"
+    assert cells[(10, 1)] == "UC_N"
+    assert (7, 2) in bold_cells
+
+
+def test_write_workbook_once_matches_per_table_overlay(tmp_path):
+    """The single-pass writer should parse back identically to write_data()."""
+    legacy_dir = tmp_path / "legacy"
+    streamed_dir = tmp_path / "streamed"
+
+    create_empty_workbook("Book", list(SHEET_TABLES), output_location=legacy_dir)
+    for sheet_name, tables in SHEET_TABLES.items():
+        startrow = 0
+        for table in tables:
+            write_data(
+                table["df"],
+                book_name="Book",
+                sheet_name=sheet_name,
+                tag=table["tag"],
+                uc_set=table["uc_set"],
+                startrow=startrow,
+                table_name=table["table_name"],
+                table_description=table["table_description"],
+                output_location=legacy_dir,
+            )
+            startrow += table_height(table["df"], table["uc_set"])
+
+    write_workbook_once("Book", SHEET_TABLES, output_location=streamed_dir)
+
+    assert read_cells(streamed_dir / "Book.xlsx") == read_cells(
+        legacy_dir / "Book.xlsx"
+    )
+
+
+def test_write_workbook_once_is_byte_identical_across_runs(tmp_path):
+    """Rebuilding from the same tables should give exactly the same file."""
+    write_workbook_once("Book", SHEET_TABLES, output_location=tmp_path / "first")
+    time.sleep(2.1)  # zip timestamps have two-second resolution
+    write_workbook_once("Book", SHEET_TABLES, output_location=tmp_path / "second")
+
+    first = (tmp_path / "first/Book.xlsx").read_bytes()
+    second = (tmp_path / "second/Book.xlsx").read_bytes()
+
+    assert first == second
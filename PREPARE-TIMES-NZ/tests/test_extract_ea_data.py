@@ -0,0 +1,105 @@
+"""Tests for the streaming EMI ingestion in extract_ea_data."""
+
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from prepare_times_nz.utilities.data_in_out import read_parquet_dataset
+from prepare_times_nz.utilities.timeslices import create_timeslices
+
+
+def load_extract_ea_data():
+    """
+    Load the script module directly from its path for test usage.
+    """
+    module_path = (
+        Path(__file__).resolve().parents[1]
+        / "scripts/stage_1_prep_raw_data/extract_ea_data.py"
+    )
+    spec = importlib.util.spec_from_file_location("extract_ea_data", module_path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_emi_file(path: Path, dates: list[str], pocs: list[str]):
+    """Write a wide EMI file with 50 trading periods (TP49/TP50 mostly blank)."""
+    rng = np.random.default_rng(len(dates))
+    rows = []
+    for date in dates:
+        for poc in pocs:
+            values = rng.integers(0, 1000, 50).astype(float)
+            values[48:] = np.nan
+            rows.append([poc, "kWh", date, *values])
+    columns = ["POC", "Unit_Measure", "Trading_Date"]
+    columns += [f"TP{n}" for n in range(1, 51)]
+    pd.DataFrame(rows, columns=columns).to_csv(path, index=False)
+
+
+def melt_emi_reference(csv_folder: Path) -> pd.DataFrame:
+    """The previous approach: concatenate everything, melt, then add timeslices."""
+    emi_df = pd.concat(
+        [pd.read_csv(file) for file in sorted(csv_folder.glob("*.csv"))],
+        ignore_index=True,
+    )
+    tp_cols = [col for col in emi_df.columns if col.startswith("TP")]
+    emi_df = pd.melt(
+        emi_df,
+        id_vars=emi_df.columns.difference(tp_cols),
+        value_vars=tp_cols,
+        var_name="Trading_Period",
+        value_name="Value",
+    )
+    emi_df["Trading_Date"] = pd.to_datetime(emi_df["Trading_Date"])
+    emi_df["Trading_Time"] = emi_df["Trading_Period"].str[2:].astype(int)
+    emi_df["Hour"] = ((emi_df["Trading_Time"] - 1) * 30) // 60
+    return create_timeslices(emi_df).astype({"TimeSlice": str})
+
+
+def test_combine_emi_files_matches_full_melt(tmp_path):
+    """The partitioned dataset holds the same rows as melting everything at once."""
+    module = load_extract_ea_data()
+    csv_folder = tmp_path / "emi"
+    csv_folder.mkdir()
+    write_emi_file(csv_folder / "202212.csv", ["2022-12-30", "2022-12-31"], ["A", "B"])
+    write_emi_file(csv_folder / "202301.csv", ["2023-01-01", "2023-04-02"], ["B", "C"])
+    dataset_dir = tmp_path / "emi_gxp"
+
+    rows = module.combine_emi_files(csv_folder, dataset_dir)
+
+    assert sorted(p.parent.name for p in dataset_dir.rglob("*.parquet")) == [
+        "Year=2022",
+        "Year=2023",
+    ]
+    result = read_parquet_dataset(dataset_dir).drop(columns="Year")
+    expected = melt_emi_reference(csv_folder)
+    assert rows == len(expected)
+
+    keys = ["POC", "Trading_Date", "Trading_Time"]
+    result = result.astype({col: str for col in ["POC", "Trading_Period"]})
+    result = result.astype({"TimeSlice": str, "Unit_Measure": str})
+    pd.testing.assert_frame_equal(
+        result.sort_values(keys).reset_index(drop=True)[expected.columns],
+        expected.sort_values(keys).reset_index(drop=True),
+        check_dtype=False,
+    )
+
+
+def test_read_parquet_dataset_filters_partitions(tmp_path):
+    """Filtering on the partition column reads only that year."""
+    module = load_extract_ea_data()
+    csv_folder = tmp_path / "emi"
+    csv_folder.mkdir()
+    write_emi_file(csv_folder / "202212.csv", ["2022-12-31"], ["A"])
+    write_emi_file(csv_folder / "202301.csv", ["2023-01-01"], ["B"])
+    module.combine_emi_files(csv_folder, tmp_path / "emi_gxp")
+
+    df = read_parquet_dataset(
+        tmp_path / "emi_gxp", columns=["POC", "Value"], filters=[("Year", "==", 2023)]
+    )
+
+    assert list(df.columns) == ["POC", "Value"]
+    assert df["POC"].unique().tolist() == ["B"]
+    assert len(df) == 50
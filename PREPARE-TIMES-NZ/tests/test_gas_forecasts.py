@@ -0,0 +1,85 @@
+"""Tests for distributing contingent gas reserves across fields."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from prepare_times_nz.stage_3 import gas_forecasts
+
+CONTINGENTS = pd.Series({"Alpha": 30.0, "Kupe": 12.0})
+
+
+@pytest.fixture(name="forecasts")
+def fixture_forecasts():
+    """2P forecasts of three fields, one of them with no contingent reserves."""
+    values = {
+        "Alpha": [5.0, 8.0, 6.0, 3.0],
+        "Beta": [2.0, 2.0, 1.0, 0.5],
+        "Kupe": [4.0, 3.0, 2.0, 1.0],
+    }
+    return pd.DataFrame(
+        [
+            {"Field": field, "Year": 2024 + i, "Value": value}
+            for field, field_values in values.items()
+            for i, value in enumerate(field_values)
+        ]
+    )
+
+
+def decay_one_field(field, df, contingent):
+    """The 2C of one field, worked out a year at a time."""
+    df = df[df["Field"] == field]
+    cstart = df.loc[df["Value"].idxmax(), "Year"] + 1
+    max_possible = df["Value"].max()
+    df = df[df["Year"] >= cstart]
+    to_distribute = df["Value"].sum() + contingent
+    decay = gas_forecasts.DECAY_OVERRIDES.get(
+        field, df["Value"].iloc[0] / df["Value"].sum()
+    )
+    existing = df.set_index("Year")["Value"]
+
+    values = []
+    for year in range(cstart, df["Year"].max() + gas_forecasts.DECAY_HORIZON):
+        existing_2p = existing.get(year, 0)
+        q = max(min(to_distribute * decay, max_possible), existing_2p)
+        to_distribute -= q
+        values.append(q - existing_2p)
+    return values
+
+
+def test_decay_matches_field_by_field(forecasts):
+    """All fields decayed together match each field decayed on its own."""
+    result = gas_forecasts.decay_field_contingents(forecasts, CONTINGENTS)
+
+    for field in ["Alpha", "Beta", "Kupe"]:
+        field_result = result[result["Field"] == field]
+        expected = decay_one_field(field, forecasts, CONTINGENTS.get(field, 0))
+        np.testing.assert_allclose(field_result["2C"], expected, rtol=0, atol=1e-12)
+
+
+def test_contingent_start_years(forecasts):
+    """Contingent starts the year after the first peak of each field."""
+    start_years = gas_forecasts.get_contingent_start_years(forecasts)
+
+    assert start_years.to_dict() == {"Alpha": 2026, "Beta": 2025, "Kupe": 2025}
+
+
+def test_new_fields_distribute_all_contingent():
+    """Each new field releases all of its contingent, from its start year."""
+    new_fields = pd.DataFrame(
+        {
+            "Field": ["Alpha", "Kupe", "Gamma"],
+            "StartYear": [2030, 2035, 2030],
+            "Sigma": [0.8, 0.5, 0.8],
+            "Startup": [2, 3, 2],
+        }
+    )
+
+    result = gas_forecasts.distribute_new_gas_fields(new_fields, CONTINGENTS, years=40)
+
+    totals = result.groupby("Field", sort=False)["Value"].sum()
+    assert totals.to_dict() == pytest.approx({"Alpha": 30, "Kupe": 12, "Gamma": 0})
+    assert result.groupby("Field", sort=False)["Year"].min().tolist() == [
+        2030,
+        2035,
+        2030,
+    ]
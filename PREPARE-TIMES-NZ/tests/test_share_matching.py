@@ -0,0 +1,137 @@
+"""Tests for matching regional shares through a fallback hierarchy."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from prepare_times_nz.stage_2.common.share_matching import (
+    compile_share_lookup,
+    match_shares,
+)
+
+
+@pytest.fixture(name="splits")
+def fixture_splits():
+    """Splits with Fuel and Technology left empty for the less specific levels."""
+    return pd.DataFrame(
+        {
+            "Sector": ["Dairy", "Dairy", "Dairy", "Dairy", "Forestry"],
+            "Fuel": ["Electricity", "Electricity", None, None, None],
+            "Technology": ["Irrigation", None, "Pumps", None, None],
+            "NI_Share": [0.14, 0.59, 0.3, 0.6, 0.7],
+        }
+    )
+
+
+def get_levels(splits):
+    """Sector + Fuel + Technology, Sector + Fuel, Sector + Technology, Sector."""
+    fuel = splits["Fuel"].notna()
+    tech = splits["Technology"].notna()
+    return [
+        ("exact", splits[fuel & tech], ["Sector", "Fuel", "Technology"]),
+        ("fuel", splits[fuel & ~tech], ["Sector", "Fuel"]),
+        ("tech", splits[~fuel & tech], ["Sector", "Technology"]),
+        ("sector", splits[~fuel & ~tech], ["Sector"]),
+    ]
+
+
+def test_most_specific_level_wins(splits):
+    """Each row takes the share of the first level that matches it."""
+    df = pd.DataFrame(
+        {
+            "Sector": ["Dairy", "Dairy", "Dairy", "Dairy", "Forestry", "Fishing"],
+            "Fuel": [
+                "Electricity",
+                "Electricity",
+                "Diesel",
+                "Diesel",
+                "Diesel",
+                "Diesel",
+            ],
+            "Technology": ["Irrigation", "Pumps", "Pumps", None, "Pumps", None],
+        },
+        index=[10, 11, 12, 13, 14, 15],
+    )
+
+    matched = match_shares(df, compile_share_lookup(get_levels(splits)))
+
+    assert matched.index.tolist() == df.index.tolist()
+    assert matched["MatchLevel"].tolist() == [
+        "exact",
+        "fuel",
+        "tech",
+        "sector",
+        "sector",
+        None,
+    ]
+    np.testing.assert_array_equal(matched["Share"], [0.14, 0.59, 0.3, 0.6, 0.7, np.nan])
+
+
+def test_matches_chained_merges(splits):
+    """The same shares as merging each level and taking the first found."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "Sector": rng.choice(["Dairy", "Forestry", "Fishing"], 200),
+            "Fuel": rng.choice(["Electricity", "Diesel", None], 200),
+            "Technology": rng.choice(["Irrigation", "Pumps", None], 200),
+        }
+    )
+
+    matched = match_shares(df, compile_share_lookup(get_levels(splits)))
+
+    expected = df.copy()
+    for name, table, keys in get_levels(splits):
+        level = table[keys + ["NI_Share"]].rename(columns={"NI_Share": name})
+        expected = expected.merge(level, on=keys, how="left")
+    expected_share = expected["exact"]
+    for name in ["fuel", "tech", "sector"]:
+        expected_share = expected_share.combine_first(expected[name])
+    np.testing.assert_array_equal(matched["Share"], expected_share)
+
+
+def test_single_key_levels():
+    """Levels of one key column, with a missing share falling through."""
+    by_sector_and_fuel = pd.DataFrame(
+        {
+            "Sector": ["Dairy", "Meat"],
+            "Fuel": ["Coal", "Coal"],
+            "NI_Share": [0.04, None],
+        }
+    )
+    by_fuel = pd.DataFrame({"Fuel": ["Coal", "Natural Gas"], "NI_Share": [0.5, 1]})
+    lookup = compile_share_lookup(
+        [
+            ("sector_fuel", by_sector_and_fuel, ["Sector", "Fuel"]),
+            ("fuel", by_fuel, ["Fuel"]),
+        ]
+    )
+    df = pd.DataFrame(
+        {
+            "Sector": ["Dairy", "Meat", "Dairy", "Dairy"],
+            "Fuel": ["Coal", "Coal", "Natural Gas", "Wood"],
+        }
+    )
+
+    matched = match_shares(df, lookup)
+
+    assert matched["MatchLevel"].tolist() == ["sector_fuel", "fuel", "fuel", None]
+    np.testing.assert_array_equal(matched["Share"], [0.04, 0.5, 1, np.nan])
+
+
+def test_conflicting_shares_use_the_first():
+    """Duplicate keys within a level keep their first share."""
+    splits = pd.DataFrame({"Sector": ["Dairy", "Dairy"], "NI_Share": [0.6, 0.4]})
+    lookup = compile_share_lookup([("sector", splits, ["Sector"])])
+
+    matched = match_shares(pd.DataFrame({"Sector": ["Dairy"]}), lookup)
+
+    assert matched["Share"].tolist() == [0.6]
+
+
+def test_levels_need_different_keys():
+    """Two levels on the same keys could never both be used."""
+    splits = pd.DataFrame({"Sector": ["Dairy"], "NI_Share": [0.6]})
+    with pytest.raises(ValueError):
+        compile_share_lookup(
+            [("sector", splits, ["Sector"]), ("again", splits, ["Sector"])]
+        )
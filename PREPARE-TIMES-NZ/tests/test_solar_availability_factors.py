@@ -3,6 +3,7 @@
 import importlib.util
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -128,3 +129,43 @@ def test_merge_solar_and_static_curves_replaces_only_solar_rows():
         },
         {"TimeSlice": "SUM-WK-D", "Tech_TIMES": "WindOn", "NI": 0.5, "SI": 0.5},
     ]
+
+
+def test_aggregate_zone_availability_factors_matches_hourly_means():
+    """
+    Zone factors from the generation array equal the mean of each timeslice's hours.
+    """
+    module = load_solar_build_curves()
+    zone_runs = pd.DataFrame(
+        {
+            "Tech_TIMES": ["SolarTrack", "SolarDistSmall", "SolarDistSmall"],
+            "ZoneCode": ["AK", "CC", "AK"],
+            "Region": ["Auckland", "Christchurch", "Auckland"],
+            "Island": ["NI", "SI", "NI"],
+        }
+    )
+    rng = np.random.default_rng(0)
+    generation = rng.uniform(0, 1, (3, 8760)).astype(np.float32)
+    hour_timeslices = pd.Series(rng.choice(["SUM-WK-D", "WIN-WE-N", "FAL-WK-P"], 8760))
+
+    result = module.aggregate_zone_availability_factors(
+        zone_runs, generation, hour_timeslices
+    )
+
+    hourly = zone_runs.loc[zone_runs.index.repeat(8760)].reset_index(drop=True)
+    hourly["Scenario"] = hourly["Tech_TIMES"]
+    hourly["TimeSlice"] = np.tile(hour_timeslices, 3)
+    hourly["generation_kw_per_kw"] = generation.ravel().astype(np.float64)
+    expected = (
+        hourly.groupby(
+            ["Tech_TIMES", "Scenario", "ZoneCode", "Region", "Island", "TimeSlice"],
+            as_index=False,
+        )
+        .agg(
+            AvailabilityFactor=("generation_kw_per_kw", "mean"),
+            HoursInTimeSlice=("generation_kw_per_kw", "size"),
+        )
+        .sort_values(["Tech_TIMES", "ZoneCode", "TimeSlice"])
+        .reset_index(drop=True)
+    )
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
@@ -0,0 +1,265 @@
+"""Tests for the PVWatts grid runner and hourly output assembly."""
+
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from prepare_times_nz.stage_3 import solar_hourly
+from prepare_times_nz.stage_3.pvwatts_model import build_model
+from prepare_times_nz.utilities import data_in_out
+from prepare_times_nz.utilities.task_runner import get_module_name, load_script
+from prepare_times_nz.utilities.timeslices import create_timeslices
+from tests.test_timeslices import ensure_stage_0_config
+
+SCRIPT = (
+    Path(__file__).resolve().parents[1]
+    / "scripts/stage_3_scenarios/electricity/solar_run_hourly_profiles.py"
+)
+
+
+@pytest.fixture(name="module")
+def fixture_module():
+    """
+    Load the script as a registered module, as the pipeline's tasks do.
+    """
+    ensure_stage_0_config()
+    module = load_script(SCRIPT)
+    yield module
+    sys.modules.pop(get_module_name(SCRIPT), None)
+
+
+def write_daylight_epw(path: Path, irradiance: float):
+    """Write an 8760-hour EPW with constant irradiance from 8am to 5pm."""
+    lines = [
+        "LOCATION,Test,Test,New Zealand,TMY3,0,-41.3,174.8,12.0,10.0",
+        "DESIGN CONDITIONS,0",
+        "TYPICAL/EXTREME PERIODS,0",
+        "GROUND TEMPERATURES,0",
+        "HOLIDAYS/DAYLIGHT SAVING,No,0,0,0",
+        "COMMENTS 1,Synthetic test EPW",
+        "COMMENTS 2,Synthetic test EPW",
+        "DATA PERIODS,1,1,Data,Sunday,1/1,12/31",
+    ]
+    for day in pd.date_range("2019-01-01", "2019-12-31", freq="D"):
+        for hour in range(1, 25):
+            ghi = irradiance if 8 < hour <= 17 else 0
+            fields = [day.year, day.month, day.day, hour, 60, "?", 15, 10, 75]
+            fields += [101300, 0, 0, 300, ghi, ghi, ghi / 5, 0, 0, 0, 0, 180, 3]
+            fields += [5, 5, 20, 77777, 9, 999999999, 10, 0.1, 0, 88, 0.2, 0, 1]
+            lines.append(",".join(str(field) for field in fields))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def per_row_long_frame(module, scenario_name, time_index, generation):
+    """The previous assembly: one dict per zone and hour, then timeslices."""
+    rows = []
+    for zone, zone_generation in zip(module.ZONE_ORDER, generation):
+        for time_row, value in zip(time_index.itertuples(index=False), zone_generation):
+            row = {
+                "Scenario": scenario_name,
+                "Tech_TIMES": scenario_name,
+                "ZoneCode": zone,
+                "Region": module.ZONE_CODE_TO_REGION[zone],
+                "Island": module.ZONE_CODE_TO_ISLAND[zone],
+            }
+            row.update(
+                {col: getattr(time_row, col) for col in module.LONG_TIME_COLUMNS}
+            )
+            row["generation_kw_per_kw"] = value
+            rows.append(row)
+    return create_timeslices(
+        pd.DataFrame(rows), date_col="WallClock_Date", hour_col="WallClock_Hour"
+    )
+
+
+def test_long_frame_matches_per_row_assembly(module):
+    """Column-wise assembly gives the same rows as building a dict per hour."""
+    # three days around the end of daylight saving on 2 April 2023
+    canonical_index = [(4, day, hour, 60) for day in [1, 2, 3] for hour in range(1, 25)]
+    time_index = pd.DataFrame(module.format_time_index_rows(canonical_index))
+    rng = np.random.default_rng(0)
+    generation = rng.uniform(0, 1, (len(module.ZONE_ORDER), len(time_index)))
+
+    wide, long_df = module.assemble_scenario_outputs(
+        "SolarTest", module.add_timeslices(time_index), generation
+    )
+
+    expected = per_row_long_frame(module, "SolarTest", time_index, generation)
+    pd.testing.assert_frame_equal(long_df, expected)
+    assert list(wide.columns) == list(time_index.columns) + module.ZONE_ORDER
+    np.testing.assert_array_equal(wide["WN"], generation[module.ZONE_ORDER.index("WN")])
+
+
+def write_zone_epws(module, tmp_path):
+    """Write a daylight EPW for each zone, brighter for each zone in turn."""
+    epw_files = {}
+    for irradiance, zone in zip([600, 800, 1000], module.ZONE_ORDER):
+        epw_files[zone] = tmp_path / f"TMY3_NZ_{zone}.epw"
+        write_daylight_epw(epw_files[zone], irradiance)
+    return epw_files
+
+
+def get_scenarios(module, names):
+    """The configured scenarios with these Tech_TIMES names."""
+    return [
+        scenario
+        for scenario in module.load_solar_scenarios()
+        if scenario["Tech_TIMES"] in names
+    ]
+
+
+def test_read_solar_hourly_joins_the_shared_time_index(module, monkeypatch, tmp_path):
+    """The two parquet datasets read back as the long hourly rows."""
+    monkeypatch.setattr(data_in_out, "DATA_INTERMEDIATE", tmp_path)
+    canonical_index = [(4, day, hour, 60) for day in [1, 2] for hour in range(1, 25)]
+    time_index = module.add_timeslices(
+        pd.DataFrame(module.format_time_index_rows(canonical_index))
+    )
+    rng = np.random.default_rng(1)
+    grid = {
+        name: rng.uniform(0, 1, (len(module.ZONE_ORDER), 48)).astype(np.float32)
+        for name in ["SolarDistSmall", "SolarTrack"]
+    }
+    data_in_out.save_intermediate(time_index, solar_hourly.SOLAR_TIME_INDEX, "Times")
+    data_in_out.save_intermediate(
+        pd.concat(
+            [module.build_generation_frame(name, gen) for name, gen in grid.items()],
+            ignore_index=True,
+        ),
+        solar_hourly.SOLAR_GENERATION,
+        "Generation",
+    )
+
+    columns = ["Tech_TIMES", "ZoneCode", "TimeSlice", "generation_kw_per_kw"]
+    result = solar_hourly.read_solar_hourly(columns)
+
+    expected = pd.concat(
+        [module.build_long_frame(name, time_index, gen) for name, gen in grid.items()],
+        ignore_index=True,
+    )[columns].astype({"TimeSlice": str})
+    pd.testing.assert_frame_equal(result, expected)
+
+    no_times = solar_hourly.read_solar_hourly(["Island", "generation_kw_per_kw"])
+    assert list(no_times.columns) == ["Island", "generation_kw_per_kw"]
+    with pytest.raises(KeyError, match="Unknown solar hourly columns"):
+        solar_hourly.read_solar_hourly(["Weather"])
+
+
+def test_pvwatts_grid_is_the_same_on_a_worker_pool(module, monkeypatch, tmp_path):
+    """Reused worker models give the same results as a fresh model per pair."""
+    monkeypatch.setattr(module, "ZONE_ORDER", ["AK", "CC", "WN"])
+    epw_files = write_zone_epws(module, tmp_path)
+    scenarios = get_scenarios(module, {"SolarDistSmall", "SolarDistBifacial"})
+
+    pooled = module.run_pvwatts_grid(
+        scenarios, epw_files, jobs=2, cache_dir=tmp_path / "cache"
+    )
+
+    for scenario in scenarios:
+        generation, zone_results = pooled[scenario["Tech_TIMES"]]
+        assert generation.shape == (3, 8760)
+        assert [row["ZoneCode"] for row in zone_results] == module.ZONE_ORDER
+        for zone, zone_generation in zip(module.ZONE_ORDER, generation):
+            model = build_model(epw_files[zone], scenario)
+            model.execute()
+            np.testing.assert_array_equal(
+                zone_generation, np.asarray(model.Outputs.gen, dtype=np.float32)
+            )
+
+
+def test_pvwatts_grid_only_runs_new_or_changed_pairs(module, monkeypatch, tmp_path):
+    """Cached pairs are reused; changing a scenario or weather file reruns it."""
+    monkeypatch.setattr(module, "ZONE_ORDER", ["AK", "CC", "WN"])
+    epw_files = write_zone_epws(module, tmp_path)
+    cache_dir = tmp_path / "cache"
+    scenarios = get_scenarios(module, {"SolarDistSmall"})
+    first = module.run_pvwatts_grid(scenarios, epw_files, jobs=1, cache_dir=cache_dir)
+
+    simulated = []
+    simulate_pair = module.simulate_pair
+
+    def counting_simulate_pair(scenario, zone, epw_path):
+        simulated.append((scenario["Tech_TIMES"], zone))
+        return simulate_pair(scenario, zone, epw_path)
+
+    monkeypatch.setattr(module, "simulate_pair", counting_simulate_pair)
+
+    again = module.run_pvwatts_grid(scenarios, epw_files, jobs=1, cache_dir=cache_dir)
+    assert not simulated
+    np.testing.assert_array_equal(
+        again["SolarDistSmall"][0], first["SolarDistSmall"][0]
+    )
+    assert again["SolarDistSmall"][1] == first["SolarDistSmall"][1]
+
+    # a new archetype, a changed archetype and a changed weather file
+    scenarios = get_scenarios(module, {"SolarDistSmall", "SolarTrack"})
+    scenarios[0]["TiltDeg"] = 20.0
+    write_daylight_epw(epw_files["CC"], 700)
+    changed = module.run_pvwatts_grid(scenarios, epw_files, jobs=1, cache_dir=cache_dir)
+    assert sorted(simulated) == sorted(
+        [("SolarDistSmall", zone) for zone in module.ZONE_ORDER]
+        + [("SolarTrack", zone) for zone in module.ZONE_ORDER]
+    )
+    assert len(list(cache_dir.glob("*.npz"))) == 9
+    assert changed["SolarTrack"][0].dtype == np.float32
+
+    simulated.clear()
+    scenarios[0]["TiltDeg"] = 30.0
+    module.run_pvwatts_grid(scenarios, epw_files, jobs=1, cache_dir=cache_dir)
+    assert simulated == [("SolarDistSmall", "CC")]
+
+
+def test_pvwatts_grid_caches_each_run_as_it_finishes(module, monkeypatch, tmp_path):
+    """Runs finished before an interruption are cached, so only the rest rerun."""
+    monkeypatch.setattr(module, "ZONE_ORDER", ["AK", "CC", "WN"])
+    epw_files = write_zone_epws(module, tmp_path)
+    cache_dir = tmp_path / "cache"
+    scenarios = get_scenarios(module, {"SolarDistSmall"})
+
+    simulated = []
+    interrupt_zones = {"WN"}
+    simulate_pair = module.simulate_pair
+
+    def interrupted_simulate_pair(scenario, zone, epw_path):
+        if zone in interrupt_zones:
+            raise KeyboardInterrupt
+        simulated.append(zone)
+        return simulate_pair(scenario, zone, epw_path)
+
+    monkeypatch.setattr(module, "simulate_pair", interrupted_simulate_pair)
+    with pytest.raises(KeyboardInterrupt):
+        module.run_pvwatts_grid(scenarios, epw_files, jobs=1, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.npz"))) == 2
+
+    simulated.clear()
+    interrupt_zones.clear()
+    module.run_pvwatts_grid(scenarios, epw_files, jobs=1, cache_dir=cache_dir)
+    assert simulated == ["WN"]
+
+
+def test_pvwatts_workers_start_without_forking(module, monkeypatch, tmp_path):
+    """
+    Spawned workers can import the functions the pool gives them, although
+    the script itself is loaded under a name they cannot import.
+    """
+    monkeypatch.setattr(module, "ZONE_ORDER", ["AK"])
+    epw_files = write_zone_epws(module, tmp_path)
+    scenario = get_scenarios(module, {"SolarDistSmall"})[0]
+
+    with ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=get_context("spawn"),
+        initializer=module.init_pvwatts_worker,
+    ) as pool:
+        run = pool.submit(module.simulate_pair, scenario, "AK", epw_files["AK"])
+        generation = run.result()["generation"]
+
+    model = build_model(epw_files["AK"], scenario)
+    model.execute()
+    np.testing.assert_array_equal(
+        generation, np.asarray(model.Outputs.gen, dtype=np.float32)
+    )
@@ -0,0 +1,56 @@
+"""Tests for the in-process task runner."""
+
+import json
+import sys
+
+from prepare_times_nz.utilities import data_in_out, task_runner, task_scheduling
+
+SCRIPT = """
+from pathlib import Path
+
+import pandas as pd
+
+DATA = Path(__file__).parent / "data_raw"
+
+
+def main():
+    df = pd.read_csv(DATA / "input.csv")
+    df.to_csv(DATA / "output.csv", index=False)
+
+
+if __name__ == "__main__":
+    raise RuntimeError("should be loaded as a module")
+"""
+
+
+def test_run_task_calls_main_and_records_io(tmp_path, monkeypatch):
+    """run_task() runs main() in-process and saves the I/O record and timing."""
+    tracked = tmp_path / "data_raw"
+    tracked.mkdir()
+    (tracked / "input.csv").write_text("x\n1\n", encoding="utf-8")
+    script = tmp_path / "example_task.py"
+    script.write_text(SCRIPT, encoding="utf-8")
+
+    monkeypatch.setattr(data_in_out, "TRACKED_LOCATIONS", [tracked])
+    monkeypatch.setattr(data_in_out, "PREP_LOCATION", tmp_path)
+    monkeypatch.setattr(data_in_out, "IO_RECORD_LOCATION", tmp_path / "io")
+    monkeypatch.setattr(task_scheduling, "TASK_TIMINGS_FILE", tmp_path / "timings.json")
+    monkeypatch.setattr(task_scheduling, "MEMORY_LOCK_LOCATION", tmp_path / "memory")
+    argv, path = list(sys.argv), list(sys.path)
+
+    assert task_runner.run_task("stage_x:example", str(script))
+
+    record = json.loads((tmp_path / "io/stage_x__example.json").read_text())
+    assert record["reads"] == ["data_raw/input.csv"]
+    assert record["writes"] == ["data_raw/output.csv"]
+
+    timings = json.loads((tmp_path / "timings.json").read_text())
+    assert set(timings["stage_x:example"]) == {
+        "startup_seconds",
+        "run_seconds",
+        "wait_seconds",
+    }
+
+    # the process is left as it was found
+    assert sys.argv == argv and sys.path == path
+    assert task_runner.get_module_name(script) not in sys.modules
@@ -0,0 +1,79 @@
+"""Tests for the parallel-run memory budget and critical-path report."""
+
+import pytest
+from filelock import FileLock
+from prepare_times_nz.utilities import task_scheduling
+
+
+@pytest.fixture(name="lock_location")
+def fixture_lock_location(tmp_path, monkeypatch):
+    """Keep memory budget lock files in a temporary folder."""
+    monkeypatch.setattr(task_scheduling, "MEMORY_LOCK_LOCATION", tmp_path)
+    monkeypatch.setattr(task_scheduling, "POLL_SECONDS", 0.01)
+    return tmp_path
+
+
+def test_memory_budget_counts_running_tasks(lock_location):
+    """Claims are held while a task runs and released afterwards."""
+    with task_scheduling.memory_budget("a", 3, budget_gb=8):
+        with task_scheduling.memory_budget("b", 4, budget_gb=8):
+            assert task_scheduling.running_tasks_gb() == 7
+
+    assert task_scheduling.running_tasks_gb() == 0
+    assert not list(lock_location.glob("*.gb"))
+
+
+def test_memory_budget_ignores_claims_of_finished_tasks(lock_location):
+    """A claim left by a crashed task does not hold any memory."""
+    (lock_location / "crashed.gb").write_text("6", encoding="utf-8")
+
+    with task_scheduling.memory_budget("a", 6, budget_gb=8) as wait_seconds:
+        assert task_scheduling.running_tasks_gb() == 6
+
+    assert wait_seconds < 1
+
+
+def test_oversized_task_runs_when_nothing_else_is(lock_location):
+    """A hint above the whole budget must not wait forever."""
+    with task_scheduling.memory_budget("huge", 50, budget_gb=8) as wait_seconds:
+        assert wait_seconds < 1
+
+    assert not list(lock_location.glob("*.gb"))
+
+
+def test_memory_budget_waits_for_held_claims(lock_location, monkeypatch):
+    """A task waits while a running task's claim leaves too little memory."""
+    holder = FileLock(lock_location / "heavy.lock")
+    holder.acquire()
+    (lock_location / "heavy.gb").write_text("6", encoding="utf-8")
+
+    sleeps = []
+
+    def release_after_first_wait(seconds):
+        sleeps.append(seconds)
+        (lock_location / "heavy.gb").unlink()
+        holder.release()
+
+    monkeypatch.setattr(task_scheduling.time, "sleep", release_after_first_wait)
+
+    with task_scheduling.memory_budget("light", 3, budget_gb=8):
+        pass
+
+    assert len(sleeps) == 1
+
+
+def test_find_critical_path_follows_longest_chain():
+    """The slowest chain wins, passing through tasks without timings."""
+    durations = {"s0": 1.0, "s1:ea": 30.0, "s1:snz": 2.0, "s2:a": 5.0, "s2:b": 1.0}
+    task_deps = {
+        "s1:ea": ["s0"],
+        "s1:snz": ["s0"],
+        "s1": ["s1:ea", "s1:snz"],
+        "s2:a": ["s1:snz"],
+        "s2:b": ["s1"],
+    }
+
+    length, path = task_scheduling.find_critical_path(durations, task_deps)
+
+    assert length == 32.0
+    assert path == ["s0", "s1:ea", "s2:b"]
@@ -4,6 +4,7 @@ import importlib.util
 from pathlib import Path
 
 import pandas as pd
+from prepare_times_nz.utilities import timeslices
 
 
 def ensure_stage_0_config():
@@ -150,6 +151,56 @@ def test_create_timeslices_can_use_wall_clock_hour_column():
     assert result["TimeSlice"].tolist() == ["SUM-WK-N", "WIN-WK-P"]
 
 
+def test_create_timeslices_handles_leap_days_dst_hours_and_missing_dates():
+    """
+    The lookup covers 29 February, counts hour 24 as night and leaves
+    rows without a date unlabelled.
+    """
+    df = pd.DataFrame(
+        {
+            "Trading_Date": [
+                "2024-02-29",
+                "2023-04-02",
+                "2023-04-02",
+                None,
+                "2025-12-31",
+            ],
+            "Hour": [18, 24, 7, 18, 12.0],
+        }
+    )
+
+    result = timeslices.create_timeslices(df)
+
+    assert isinstance(result["TimeSlice"].dtype, pd.CategoricalDtype)
+    assert result["TimeSlice"].tolist()[:3] == ["SUM-WK-P", "FAL-WE-N", "FAL-WE-D"]
+    assert pd.isna(result["TimeSlice"][3])
+    assert result["TimeSlice"][4] == "SUM-WK-D"
+    assert pd.api.types.is_datetime64_any_dtype(result["Trading_Date"])
+
+
+def test_timeslice_lookup_matches_per_row_rules():
+    """
+    Every day of a leap and a normal year gets the same label as building
+    the season, day type and time of day strings row by row.
+    """
+    days = pd.date_range("2023-01-01", "2024-12-31", freq="D")
+    df = pd.DataFrame(
+        {
+            "Trading_Date": days.repeat(25),
+            "Hour": list(range(25)) * len(days),
+        }
+    )
+
+    expected = timeslices.convert_hour_to_timeofday(df.copy())
+    expected = timeslices.convert_date_to_daytype(expected)
+    expected = timeslices.convert_date_to_season(expected)
+    expected = expected["Season"] + expected["Day_Type"] + expected["Time_Of_Day"]
+    result = timeslices.create_timeslices(df)["TimeSlice"]
+
+    assert (result.astype(str) == expected).all()
+    assert set(result.cat.categories) == set(timeslices.get_timeslice_categories())
+
+
 def test_build_time_index_uses_model_base_year_and_ignores_epw_calendar_metadata(
     tmp_path,
 ):
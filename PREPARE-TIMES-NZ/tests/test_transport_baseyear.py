@@ -0,0 +1,214 @@
+"""Tests for building the transport base-year tables column-wise."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from prepare_times_nz.stage_2.transport import FUEL_SHARE, MJ_PER_LITRE, REGIONAL_SPLIT
+from prepare_times_nz.stage_4.baseyear import transport
+from prepare_times_nz.utilities.filepaths import STAGE_2_SCRIPTS
+from prepare_times_nz.utilities.task_runner import load_script
+
+PP_COLUMNS = ["TechName", "Region", "Comm-In", "Comm-Out"] + list(
+    dict.fromkeys(transport.VAR_RENAME[var] for var in transport.VAR_LIST)
+)
+
+
+@pytest.fixture(name="baseyear", scope="module")
+def fixture_baseyear():
+    """The stage 2 transport demand script, loaded as a module."""
+    return load_script(STAGE_2_SCRIPTS / "baseyear_transport_demand.py")
+
+
+@pytest.fixture(name="demand", scope="module")
+def fixture_demand():
+    """
+    A long demand table for most vehicle/fuel/technology/region/tertile
+    combinations, with duplicated keys, missing values and untidy labels
+    """
+    rng = np.random.default_rng(0)
+    vehicles = list(transport.COMM_TO_VEHICLE.values())
+    fuels = ["Petrol", "Diesel", "Electricity", "LPG", "Fuel Oil", "Av. Fuel/Kero"]
+    techs = ["ICE", "BEV", "PHEV", "ICE Hybrid", "Turbine Engine", "Electric Motor"]
+    keys = pd.MultiIndex.from_product(
+        [vehicles, fuels, techs, ["NI", "SI"], [0.0, 1.0, 2.0]],
+        names=["vehicletype", "fueltype", "technology", "region", "tertile"],
+    ).to_frame(index=False)
+    keys = keys.sample(frac=0.7, random_state=0)
+
+    demand = pd.concat(
+        [keys.assign(variable=var) for var in transport.VAR_LIST for _ in range(2)]
+    )
+    demand["value"] = rng.uniform(0, 10, len(demand))
+    demand.loc[rng.random(len(demand)) < 0.05, "value"] = np.nan
+    untidy = rng.random(len(demand)) < 0.3
+    demand["vehicletype"] = demand["vehicletype"].where(
+        ~untidy, " " + demand["vehicletype"].str.upper()
+    )
+    return demand.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def process_parameters_by_row(demand):
+    """Process parameters found one technology, fuel and variable at a time."""
+    var_tbls = transport.load_var_tables(demand)
+    rows = []
+    for tech, region in transport.create_process_df(["TechName", "Region"]).itertuples(
+        index=False
+    ):
+        comm_out = transport.comm_out_for_tech(transport.strip_level(tech))
+        if comm_out is None:
+            continue
+        is_special = any(key in tech for key in transport.SPECIAL_COMM_IN)
+        for comm_in in transport.get_comm_ins(tech):
+            attrs = transport.parse_attrs(tech, comm_out, comm_in)
+            row = {
+                "TechName": tech,
+                "Region": region,
+                "Comm-In": comm_in,
+                "Comm-Out": comm_out,
+            }
+            for var in transport.VAR_LIST:
+                if (var == "pjvalue" and not is_special) or (
+                    var == "vktvalue" and is_special
+                ):
+                    continue
+                if None in attrs:
+                    continue
+                tbl = var_tbls[var]
+                hit = tbl[
+                    (tbl["vehicletype"] == attrs[0].lower())
+                    & (tbl["fueltype"] == attrs[1].lower())
+                    & (tbl["technology"] == attrs[2].lower())
+                    & (tbl["region"] == region.lower())
+                ]
+                if not is_special:
+                    hit = hit[hit["tertile"] == transport.extract_tertile(tech)]
+                if not hit.empty:
+                    row[transport.VAR_RENAME[var]] = hit["value"].iloc[0]
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def test_process_parameters_match_row_lookups(demand):
+    """Every value comes from the first matching demand row, as before."""
+    result = transport.create_process_parameters_df(PP_COLUMNS, demand=demand)
+
+    expected = process_parameters_by_row(demand).reindex(columns=PP_COLUMNS)
+    expected = expected[
+        ~(
+            expected["TechName"].str.startswith("T_P_CPHEVBEV")
+            & (expected["Comm-In"] == "TRAELC")
+        )
+    ].reset_index(drop=True)
+    phev_elc = expected["TechName"].str.startswith("T_P_CPHEVPET") & (
+        expected["Comm-In"] == "TRAELC"
+    )
+    expected.loc[phev_elc, "TechName"] = expected.loc[phev_elc, "TechName"].str.replace(
+        "T_P_CPHEVPET", "T_P_CPHEVBEV"
+    )
+
+    assert result.to_csv(index=False) == expected.to_csv(index=False)
+    assert result["ACT_BND~2023"].notna().any()
+
+
+def test_constraint_complements():
+    """Each complement constraint covers the other utilisations of its group."""
+    df = pd.DataFrame(
+        {
+            "TechName": [
+                "T_P_CICEPET_LOW",
+                "T_P_CICEPET_MED",
+                "T_P_CBEVELC_HIGH",
+                "T_F_HTICEDSL_LOW",
+                "T_F_DSHIPP",
+            ],
+            "Comm-Out": ["T_P_Car", "T_P_Car", "T_P_Car", "T_F_HTrk", "T_F_DSHIP"],
+        }
+    )
+
+    result = transport.create_constraints_df(df)
+
+    assert result["UC_CAP"].value_counts().to_dict() == {"0.666667": 4, "-0.333333": 4}
+    complements = result[result["UC_CAP"] == "-0.333333"].set_index("UC_N")
+    assert complements["Pset_PN"].to_dict() == {
+        "T_F_H_LOW_SHR": "",
+        "T_P_C_LOW_SHR": "T_P_C*MED, T_P_C*HIGH",
+        "T_P_C_MED_SHR": "T_P_C*LOW, T_P_C*HIGH",
+        "T_P_C_HIGH_SHR": "T_P_C*LOW, T_P_C*MED",
+    }
+
+
+def test_split_by_region(baseyear):
+    """Rows split by fuel where there is a split for it, else by vehicle."""
+    df = pd.DataFrame(
+        {
+            "vehicletype": ["LPV", "Passenger Rail", "Passenger Rail", "Unknown"],
+            "fueltype": ["Petrol", "Electricity", "Diesel", "Petrol"],
+            "technology": ["ICE", "Electric Motor", "ICE", "ICE"],
+            "vktvalue": [10.0, 20.0, 30.0, 40.0],
+            "pjvalue": [np.nan, 2.0, 3.0, 4.0],
+            "vehicle_count": [100.0, np.nan, np.nan, 400.0],
+        }
+    )
+
+    result = baseyear.split_by_region(df)
+
+    expected = []
+    for row in df.to_dict("records"):
+        split = REGIONAL_SPLIT.get(
+            (row["vehicletype"], row["fueltype"])
+        ) or REGIONAL_SPLIT.get(row["vehicletype"])
+        for region, fraction in (split or {}).items():
+            scaled = {
+                col: row[col] * fraction
+                for col in ["vktvalue", "pjvalue", "vehicle_count"]
+            }
+            expected.append({**row, **scaled, "region": region})
+    pd.testing.assert_frame_equal(result, pd.DataFrame(expected))
+
+
+def test_fuel_consumption_and_shares(baseyear):
+    """Litres per 100km and fuel shares, with the technology key first."""
+    df = pd.DataFrame(
+        [
+            (*key[:3], "NI", eff)
+            for key, eff in zip(list(FUEL_SHARE)[:6], [0.5, 1.0, 1.5, 2.0, 2.5, 3.0])
+        ]
+        + [("Unknown", "Petrol", "ICE", "NI", np.nan)],
+        columns=["vehicletype", "fueltype", "technology", "region", "efficiency_calc"],
+    )
+
+    consumption = baseyear.get_fuel_consumption(df)
+    shares = baseyear.get_fuel_shares(df)
+
+    for i, row in df.iterrows():
+        if row["fueltype"] in MJ_PER_LITRE and pd.notna(row["efficiency_calc"]):
+            expected = 100 / (row["efficiency_calc"] * MJ_PER_LITRE[row["fueltype"]])
+            assert consumption[i] == pytest.approx(expected)
+        else:
+            assert np.isnan(consumption[i])
+        by_tech = FUEL_SHARE.get(tuple(row[["vehicletype", "fueltype", "technology"]]))
+        by_region = FUEL_SHARE.get(tuple(row[["region", "vehicletype", "fueltype"]]))
+        expected = (by_tech or by_region or {"fuelshare": np.nan})["fuelshare"]
+        np.testing.assert_equal(shares[i], expected)
+
+
+def test_vehicle_counts_keep_row_order(baseyear):
+    """Split counts follow their source row, and sum back to its count."""
+    motives = list(dict.fromkeys(motive for _, motive in baseyear.FUEL_SPLIT_MAP))
+    vehicle = next(vt for vt, motive in baseyear.FUEL_SPLIT_MAP if motive == motives[0])
+    vc = pd.DataFrame(
+        {
+            "vehicletype": ["Bus", vehicle, "Bus"],
+            "custom_motive_group": ["Unmapped", motives[0], "Unmapped"],
+            "vehicle_count": [1.0, 100.0, 3.0],
+        }
+    )
+
+    result = baseyear.vehicle_counts_expanded(vc)
+
+    n_split = len(baseyear.FUEL_SPLIT_MAP[(vehicle, motives[0])])
+    assert len(result) == n_split + 2
+    assert result["vehicle_count"].iloc[0] == 1.0
+    assert result["vehicle_count"].iloc[1 : n_split + 1].sum() == pytest.approx(100)
+    assert result["vehicle_count"].iloc[-1] == 3.0
+    assert result[["fueltype", "technology"]].iloc[[0, -1]].isna().all(axis=None)
@@ -0,0 +1,60 @@
+"""Tests for the Winter Energy Margin user constraint tables."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from prepare_times_nz.stage_3 import wem_wcm
+
+WINTER_SHARE = 0.5
+
+
+@pytest.fixture(name="afs")
+def fixture_afs():
+    """Winter AFs as get_all_afs() returns them."""
+    return pd.DataFrame(
+        {
+            "Tech_TIMES": ["CoalCHP", "Geo", "HydRR", "SolarDistSmall", "WindFloatOff"],
+            "UC_CAP~SI": [0.9, 0.95, 0.6, 0.1, np.nan],
+            "UC_CAP~NI": [0.9, 0.95, np.nan, 0.12, 0.4],
+        }
+    )
+
+
+def test_grid_matches_single_margin_tables(afs):
+    """Every table of a sweep is the table built for that margin alone."""
+    margins = [0.1, 0.16, 0.285]
+
+    grid = wem_wcm.make_uc_wem_grid(margins, df=afs, winter_share=WINTER_SHARE)
+
+    assert sorted(grid) == sorted(
+        (variant, margin) for variant in wem_wcm.WEM_VARIANTS for margin in margins
+    )
+    for (variant, margin), table in grid.items():
+        expected = wem_wcm.WEM_VARIANTS[variant](
+            afs.copy(), margin=margin, winter_share=WINTER_SHARE
+        )
+        pd.testing.assert_frame_equal(table, expected)
+
+
+def test_grid_coefficients_scale_with_margin(afs):
+    """Only the demand coefficient changes with the margin."""
+    grid = wem_wcm.make_uc_wem_grid(
+        [0.16, 0.3], variants=["wem_si"], df=afs, winter_share=WINTER_SHARE
+    )
+    low, high = grid[("wem_si", 0.16)], grid[("wem_si", 0.3)]
+
+    assert low["UC_FLO"].dropna().tolist() == pytest.approx(
+        [-1.16 / 31.536 / WINTER_SHARE]
+    )
+    assert high["UC_FLO"].dropna().tolist() == pytest.approx(
+        [-1.3 / 31.536 / WINTER_SHARE]
+    )
+    pd.testing.assert_frame_equal(
+        low.drop(columns="UC_FLO"), high.drop(columns="UC_FLO")
+    )
+
+
+def test_grid_file_names():
+    """Margins are written as percentages, without a decimal point."""
+    assert wem_wcm.get_grid_file_name("wem", 0.16) == "uc_wem_margin_16.csv"
+    assert wem_wcm.get_grid_file_name("wem_si", 0.285) == "uc_wem_si_margin_28p5.csv"
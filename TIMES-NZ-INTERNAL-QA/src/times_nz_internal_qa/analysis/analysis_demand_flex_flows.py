@@ -24,7 +24,7 @@ from times_nz_internal_qa.app.helpers.timeslices import (
     TIMESLICE_ORDER,
     add_timeslice_chart_columns,
 )
-from times_nz_internal_qa.utilities.filepaths import SCENARIO_FILES
+from times_nz_internal_qa.postprocessing.get_data import read_scenario_file
 
 FLEX_UNDERLYING_PROCESS_MAP = {
     "DD-S_HEAT-FLEX": "RES-DD-ELC-HPSH-S_HEAT",
@@ -85,9 +85,7 @@ def _get_underlying_process_efficiencies():
     ]
     results = []
     for scenario in chart_data.STANDARD_SCENARIO_MAP:
-        df = pd.read_csv(
-            SCENARIO_FILES / f"{scenario}.csv", usecols=usecols, low_memory=False
-        )
+        df = read_scenario_file(scenario, columns=usecols)
         df["Scenario"] = chart_data.STANDARD_SCENARIO_MAP.get(scenario, scenario)
         results.append(df)
 
@@ -17,6 +17,7 @@ from times_nz_internal_qa.utilities.filepaths import (
     FINAL_DATA,
     PREP_STAGE_3,
 )
+from times_nz_internal_qa.utilities.parquet_datasets import read_partitioned_parquet
 
 # Scenario display names ------------------------------------------------------
 
@@ -69,10 +70,10 @@ def get_times_data(filename, scenario_map=_DEFAULT_SCENARIO_MAP):
     if scenario_map is _DEFAULT_SCENARIO_MAP:
         scenario_map = STANDARD_SCENARIO_MAP
 
-    # read parquet
-    df = pd.read_parquet(FINAL_DATA / filename)
+    # read parquet, only for the mapped scenarios
+    scenarios = None if scenario_map is None else list(scenario_map)
+    df = read_partitioned_parquet(FINAL_DATA / filename, scenarios=scenarios)
     if scenario_map is not None:
-        df = df[df["Scenario"].isin(scenario_map)].copy()
         df["Scenario"] = df["Scenario"].map(scenario_map)
     return df
 
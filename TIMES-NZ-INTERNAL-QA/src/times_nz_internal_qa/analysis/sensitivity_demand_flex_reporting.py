@@ -4,6 +4,7 @@ from pathlib import Path
 
 import pandas as pd
 from times_nz_internal_qa.utilities.filepaths import FINAL_DATA
+from times_nz_internal_qa.utilities.parquet_datasets import read_partitioned_parquet
 
 DEMAND_FLEX_SENSITIVITY_SCENARIOS = {
     "steady-v308": "Steady",
@@ -54,7 +55,9 @@ def _sensitivity_scenario_order(scenario_map=DEMAND_FLEX_SENSITIVITY_SCENARIOS):
 def _get_objective_lookup(scenario_map=DEMAND_FLEX_SENSITIVITY_SCENARIOS):
     """Return objective values keyed by raw scenario code."""
 
-    objective_df = pd.read_parquet(FINAL_DATA / "objective_function.parquet")
+    objective_df = read_partitioned_parquet(
+        FINAL_DATA / "objective_function.parquet", scenarios=scenario_map
+    )
     objective_df = objective_df[objective_df["Scenario"].isin(scenario_map)].copy()
     objective_counts = objective_df.groupby("Scenario").size()
     duplicate_scenarios = objective_counts[objective_counts > 1]
@@ -102,7 +105,9 @@ def create_demand_flex_sensitivity_objective_functions(
     """Write objective-function values for the selected sensitivity scenarios."""
 
     scenario_map = _resolve_scenario_map(scenarios, scenario_map)
-    objective_df = pd.read_parquet(FINAL_DATA / "objective_function.parquet")
+    objective_df = read_partitioned_parquet(
+        FINAL_DATA / "objective_function.parquet", scenarios=scenario_map
+    )
     objective_df = objective_df[objective_df["Scenario"].isin(scenario_map)].copy()
     found_scenarios = set(objective_df["Scenario"])
     missing_scenarios = sorted(set(scenario_map) - found_scenarios)
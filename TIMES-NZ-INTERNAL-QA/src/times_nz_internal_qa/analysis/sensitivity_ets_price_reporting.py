@@ -4,6 +4,7 @@ from pathlib import Path
 
 import pandas as pd
 from times_nz_internal_qa.utilities.filepaths import FINAL_DATA
+from times_nz_internal_qa.utilities.parquet_datasets import read_partitioned_parquet
 
 ETS_PRICE_SENSITIVITY_SCENARIOS = {
     "steady-v308": "Steady",
@@ -30,7 +31,9 @@ BASE_SCENARIOS = {
 def _get_objective_lookup(scenario_map=ETS_PRICE_SENSITIVITY_SCENARIOS):
     """Return objective values keyed by raw scenario code."""
 
-    objective_df = pd.read_parquet(FINAL_DATA / "objective_function.parquet")
+    objective_df = read_partitioned_parquet(
+        FINAL_DATA / "objective_function.parquet", scenarios=scenario_map
+    )
     objective_df = objective_df[objective_df["Scenario"].isin(scenario_map)].copy()
     objective_counts = objective_df.groupby("Scenario").size()
     duplicate_scenarios = objective_counts[objective_counts > 1]
@@ -97,7 +100,9 @@ def create_objective_summary_table():
 def _get_total_carbon_cost_lookup(scenario_map=BASE_SCENARIOS):
     """Return total carbon costs keyed by raw scenario code."""
 
-    carbon_costs = pd.read_parquet(FINAL_DATA / "carbon_costs.parquet")
+    carbon_costs = read_partitioned_parquet(
+        FINAL_DATA / "carbon_costs.parquet", scenarios=scenario_map
+    )
     carbon_costs = carbon_costs[
         (carbon_costs["Scenario"].isin(scenario_map))
         & (carbon_costs["Variable"] == "Carbon cost")
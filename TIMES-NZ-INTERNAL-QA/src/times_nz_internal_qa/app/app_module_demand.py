@@ -2,8 +2,6 @@
 Energy demand processing, ui, and server functions
 """
 
-from functools import lru_cache
-
 import polars as pl
 from shiny import reactive
 from times_nz_internal_qa.app.helpers.data_processing import (
@@ -11,6 +9,7 @@ from times_nz_internal_qa.app.helpers.data_processing import (
     filter_df_for_variable,
     read_data_pl,
 )
+from times_nz_internal_qa.app.helpers.dataset_cache import cached_by_scenario
 from times_nz_internal_qa.app.helpers.filters import (
     create_filter_dict,
 )
@@ -189,7 +188,7 @@ transport_capacity_parameters = {
 # GET DATA ------------------------------------------
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_dem_df(scenarios, filepath=DEM_FILE_LOCATION):
     """
     Returns demand data (pre-filtered)
@@ -202,7 +201,7 @@ def get_base_dem_df(scenarios, filepath=DEM_FILE_LOCATION):
     return df
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_elc_dem_df(scenarios, filepath=DEM_FILE_LOCATION):
     """
     Returns electricity demand data (pre-filtered)
@@ -231,7 +230,7 @@ def get_base_elc_dem_df(scenarios, filepath=DEM_FILE_LOCATION):
     return df.collect()
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_elc_dem_curve_df(scenarios, filepath=ELC_DEM_CURVE_FILE):
     """
     Returns electricity demand data (pre-filtered)
@@ -247,7 +246,7 @@ def get_base_elc_dem_curve_df(scenarios, filepath=ELC_DEM_CURVE_FILE):
     return df.collect()
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_transport_energy_demand_df(
     scenarios, filepath=TRANSPORT_ENERGY_DEMAND_FILE
 ):
@@ -262,7 +261,7 @@ def get_base_transport_energy_demand_df(
     return df
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_transport_capacity_df(scenarios, filepath=TRANSPORT_CAPACITY_FILE):
     """
     Returns transport capacity data with utilization breakdown
@@ -2,7 +2,6 @@
 App processing for developer-facing QA views
 """
 
-from functools import lru_cache
 from pathlib import Path
 
 import polars as pl
@@ -12,6 +11,7 @@ from times_nz_internal_qa.app.helpers.data_processing import (
     filter_df_for_variable,
     read_data_pl,
 )
+from times_nz_internal_qa.app.helpers.dataset_cache import cached_by_scenario
 from times_nz_internal_qa.app.helpers.filters import (
     create_filter_dict,
 )
@@ -98,7 +98,7 @@ technology_capacity_all_group_options = base_cols + technology_capacity_group_op
 
 
 # GET MAIN DATA
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_dev_energy_df(scenarios, filepath=DUMMY_ENERGY_FILEPATH):
     """
     standard
@@ -112,7 +112,7 @@ def get_dev_energy_df(scenarios, filepath=DUMMY_ENERGY_FILEPATH):
     return df.collect()
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_dev_demand_df(scenarios, filepath=DUMMY_DEMAND_FILEPATH):
     """
     standard
@@ -126,7 +126,7 @@ def get_dev_demand_df(scenarios, filepath=DUMMY_DEMAND_FILEPATH):
     return df.collect()
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_technology_capacity_df(scenarios, filepath=TECHNOLOGY_CAPACITY_FILE):
     """
     Returns non-transport technology capacity data (pre-filtered)
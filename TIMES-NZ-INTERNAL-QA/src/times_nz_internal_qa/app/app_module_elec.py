@@ -4,7 +4,6 @@ Data formatting, server and ui functions for electricity generation data
 """
 
 # pylint: disable = duplicate-code
-from functools import lru_cache
 
 import polars as pl
 from shiny import reactive
@@ -13,6 +12,7 @@ from times_nz_internal_qa.app.helpers.data_processing import (
     filter_df_for_variable,
     read_data_pl,
 )
+from times_nz_internal_qa.app.helpers.dataset_cache import cached_by_scenario
 from times_nz_internal_qa.app.helpers.filters import (
     create_filter_dict,
 )
@@ -158,7 +158,7 @@ gen_curve_all_groups = (
 # this only updates when the scenario changes and caches 8 copies for common scenario configs
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_ele_gen_df(scenarios, filepath=ELE_GEN_FILE_LOCATION):
     """
     Returns ele gen data (pre-filtered)
@@ -177,7 +177,7 @@ def get_base_ele_gen_df(scenarios, filepath=ELE_GEN_FILE_LOCATION):
     return df
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_ele_cap_df(scenarios, filepath=ELE_GEN_FILE_LOCATION):
     """
     Returns ele cap data (before any filtering)
@@ -190,7 +190,7 @@ def get_base_ele_cap_df(scenarios, filepath=ELE_GEN_FILE_LOCATION):
     return df
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_ele_use_df(scenarios, filepath=ELE_GEN_FILE_LOCATION):
     """
     Returns ele use data (pre-filtered)
@@ -203,7 +203,7 @@ def get_base_ele_use_df(scenarios, filepath=ELE_GEN_FILE_LOCATION):
     return df
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_ele_gen_curve_df(scenarios, filepath=ELE_GEN_BY_SLICE_FILE):
     """
     Returns ele use data (pre-filtered)
@@ -216,7 +216,7 @@ def get_base_ele_gen_curve_df(scenarios, filepath=ELE_GEN_BY_SLICE_FILE):
     return df
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_bat_cap_df(scenarios, filepath=ELE_BAT_FILE_LOCATION):
     """
     Returns battery capacity data
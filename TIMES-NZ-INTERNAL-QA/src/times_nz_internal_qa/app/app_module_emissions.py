@@ -3,14 +3,13 @@ Data formatting, server and ui functions for emissions data
 
 """
 
-from functools import lru_cache
-
 import polars as pl
 from shiny import reactive
 from times_nz_internal_qa.app.helpers.data_processing import (
     aggregate_by_group,
     read_data_pl,
 )
+from times_nz_internal_qa.app.helpers.dataset_cache import cached_by_scenario
 from times_nz_internal_qa.app.helpers.filters import (
     create_filter_dict,
 )
@@ -57,7 +56,7 @@ ems_all_group_options = base_cols + ems_group_options
 # Note: want to make an electricity-specific emissions chart too for emissions by plant
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_ems_df(scenarios, filepath=EMS_FILE_LOCATION):
     """
     Returns emsand data (pre-filtered)
@@ -8,14 +8,13 @@ So the sector filter requires no multi options
 Will need to build that into main
 """
 
-from functools import lru_cache
-
 from shiny import reactive
 from times_nz_internal_qa.app.helpers.data_processing import (
     aggregate_by_group,
     filter_df_for_variable,
     read_data_pl,
 )
+from times_nz_internal_qa.app.helpers.dataset_cache import cached_by_scenario
 from times_nz_internal_qa.app.helpers.filters import (
     create_filter_dict,
 )
@@ -155,7 +154,7 @@ transport_esd_parameters = {
 # Energy Service Demand Data ----------------------------------------------------------------
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_esd_df(scenarios, filepath=ESD_FILE_LOCATION):
     """
     Returns ESD data pre-filtering
@@ -169,7 +168,7 @@ def get_base_esd_df(scenarios, filepath=ESD_FILE_LOCATION):
     return df
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_esd_curve_df(scenarios, filepath=ESD_CURVE_FILE_LOCATION):
     """
     Returns ESD data pre-filtering
@@ -183,7 +182,7 @@ def get_base_esd_curve_df(scenarios, filepath=ESD_CURVE_FILE_LOCATION):
     return df
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_transport_esd_df(scenarios, filepath=TRANSPORT_ESD_FILE):
     """
     Returns transport energy service demand data with utilization breakdown
@@ -2,13 +2,12 @@
 Energy production server and ui
 """
 
-from functools import lru_cache
-
 from shiny import reactive
 from times_nz_internal_qa.app.helpers.data_processing import (
     aggregate_by_group,
     read_data_pl,
 )
+from times_nz_internal_qa.app.helpers.dataset_cache import cached_by_scenario
 from times_nz_internal_qa.app.helpers.filters import (
     create_filter_dict,
 )
@@ -70,7 +69,7 @@ pri_parameters = {
 # GET DATA ------------------------------------------
 
 
-@lru_cache(maxsize=8)
+@cached_by_scenario
 def get_base_pri_df(scenarios, filepath=PRI_FILE_LOCATION):
     """
     Returns demand data (pre-filtered)
@@ -9,8 +9,10 @@ Loads in all the markdown as objects for reactives to pull from
 """
 
 # Libraries
+import asyncio
+
 from shiny import reactive, render, ui
-from times_nz_internal_qa.postprocessing.package_outputs import build_outputs_zip_bytes
+from times_nz_internal_qa.postprocessing.package_outputs import get_cached_outputs_zip
 from times_nz_internal_qa.utilities.filepaths import ASSETS, FINAL_DATA
 
 # Load markdown inputs
@@ -62,6 +64,9 @@ def info_server(inputs, outputs, session):
     attach_info("info_dev", info_dev_doc, "For developers")
 
     # full results download zip
+    # built once per version of the outputs and cached on disk. Returning the
+    # path lets shiny stream the file in chunks rather than hold it in memory
     @render.download(filename="times_nz_3_wip_all_results.zip")
-    def all_results_zip():
-        yield build_outputs_zip_bytes(FINAL_DATA)
+    async def all_results_zip():
+        zip_file = await asyncio.to_thread(get_cached_outputs_zip, FINAL_DATA)
+        return str(zip_file)
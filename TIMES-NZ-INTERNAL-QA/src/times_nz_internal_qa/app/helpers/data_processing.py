@@ -16,6 +16,7 @@ import numpy as np
 import pandas as pd
 import polars as pl
 from times_nz_internal_qa.app.helpers.filters import apply_filters
+from times_nz_internal_qa.utilities.parquet_datasets import scan_partitioned_parquet
 from times_nz_internal_qa.utilities.value_mappings import apply_value_mappings_pl
 
 _MEASURE_COLUMNS = {"Period", "Value"}
@@ -128,12 +129,12 @@ def read_data_pl(file_location, scenarios) -> pl.LazyFrame:
     Include scenario filtering, and lazy output
     """
 
-    # eager read; for lazy, use pl.scan_parquet
+    # lazy scan of the scenario-partitioned dataset
     df = (
-        pl.scan_parquet(file_location)
+        scan_partitioned_parquet(file_location)
         .with_columns(pl.col("Period").cast(pl.Int64))
-        # filter here? we reread when the scenario filter changes.
-        # this keeps excess scenarios out of memory
+        # the scenario filter is pushed down to the partitions,
+        # so other scenarios are never read
         .filter(pl.col("Scenario").is_in(scenarios))
     )
 
@@ -0,0 +1,149 @@
+"""
+A process-wide cache of the app's base datasets, shared by every module
+and session
+
+Each module's get_base_*_df() functions are wrapped with
+@cached_by_scenario, which caches the collected frame of each scenario
+separately. A selection of several scenarios is put together from these
+partitions, so switching the comparison scenario only loads the new one,
+and a scenario loaded by one session is reused by all of them.
+
+The cache holds at most APP_CACHE_MAX_BYTES of frames in total (by Polars'
+estimated_size()), evicting the least recently used partitions first.
+Hit, miss and memory figures are available from get_cache_stats().
+"""
+
+import functools
+import os
+import threading
+from collections import OrderedDict
+
+import polars as pl
+from times_nz_internal_qa.utilities.value_mappings import remap_value
+
+# can be set with the TIMES_NZ_APP_CACHE_MB environment variable
+APP_CACHE_MAX_BYTES = int(os.environ.get("TIMES_NZ_APP_CACHE_MB", "1024")) * 1024**2
+
+
+class DatasetCache:
+    """
+    Least-recently-used cache of Polars frames, bounded by their total size
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._frames: OrderedDict = OrderedDict()
+        self._sizes: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def total_bytes(self) -> int:
+        """Estimated size of every cached frame"""
+        return sum(self._sizes.values())
+
+    def get(self, key) -> pl.DataFrame | None:
+        """Return the cached frame for key, or None, counting a hit or miss"""
+        with self._lock:
+            if key not in self._frames:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._frames.move_to_end(key)
+            return self._frames[key]
+
+    def put(self, key, df: pl.DataFrame) -> None:
+        """
+        Cache df, then evict the oldest frames until the cache fits in
+        max_bytes. A frame larger than max_bytes is not kept.
+        """
+        size = df.estimated_size()
+        with self._lock:
+            if key in self._frames:
+                del self._frames[key]
+                del self._sizes[key]
+            if size > self.max_bytes:
+                return
+            self._frames[key] = df
+            self._sizes[key] = size
+
+            total = self.total_bytes
+            while total > self.max_bytes:
+                old_key, _ = self._frames.popitem(last=False)
+                total -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached frame and reset the counters"""
+        with self._lock:
+            self._frames.clear()
+            self._sizes.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Hit, miss and memory figures, with the cached bytes of each dataset"""
+        with self._lock:
+            by_dataset: dict[str, int] = {}
+            for (dataset, _, _), size in self._sizes.items():
+                by_dataset[dataset] = by_dataset.get(dataset, 0) + size
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "entries": len(self._frames),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "bytes_by_dataset": by_dataset,
+            }
+
+
+DATASET_CACHE = DatasetCache(APP_CACHE_MAX_BYTES)
+
+
+def get_cache_stats() -> dict:
+    """Hit, miss and memory figures of the shared dataset cache"""
+    return DATASET_CACHE.stats()
+
+
+def cached_by_scenario(func):
+    """
+    Cache a func(scenarios, filepath) dataset loader in DATASET_CACHE, one
+    scenario at a time
+
+    func must return a collected frame whose rows each belong to one of
+    the given scenarios, sorted by Scenario first (as aggregate_by_group()
+    does with our base columns). Cached scenario frames are then joined in
+    order of their displayed Scenario names, as one call would have sorted
+    them.
+    """
+    dataset = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(scenarios, *args, **kwargs):
+        if not scenarios:
+            return func(scenarios, *args, **kwargs)
+
+        arg_key = (args, tuple(sorted(kwargs.items())))
+        frames = {}
+        for scenario in dict.fromkeys(scenarios):
+            key = (dataset, arg_key, scenario)
+            df = DATASET_CACHE.get(key)
+            if df is None:
+                df = func((scenario,), *args, **kwargs)
+                DATASET_CACHE.put(key, df)
+            frames[scenario] = df
+
+        if len(frames) == 1:
+            return next(iter(frames.values()))
+        ordered = sorted(frames, key=lambda s: remap_value("Scenario", s))
+        return pl.concat(
+            [frames[scenario] for scenario in ordered],
+            how="vertical_relaxed",
+            rechunk=False,
+        )
+
+    return wrapper
@@ -1,14 +1,21 @@
 """
 Data loading and quality check functions
+
+Raw scenario results are stored as one zstd-compressed parquet file per
+scenario in SCENARIO_FILES. read_vd() parses VD files with Polars using an
+explicit schema (categorical dimensions, float PV), so nothing is inferred
+and the file is only parsed once.
 """
 
 # Libraries
 
 import getpass
 import re
+from functools import lru_cache
 from pathlib import Path
 
 import pandas as pd
+import polars as pl
 from times_nz_internal_qa.config import current_scenarios
 from times_nz_internal_qa.utilities.filepaths import (
     COMMODITY_CONCORDANCES,
@@ -18,28 +25,84 @@ from times_nz_internal_qa.utilities.filepaths import (
 
 # Functions - coverage checks ------------------------------
 
-
-def test_coverage(df, result_type, scenario_name):
+# the description files that identify each kind of code
+CONCORDANCE_FILES = {
+    "Process": [
+        PROCESS_CONCORDANCES / "demand.csv",
+        PROCESS_CONCORDANCES / "elec_generation.csv",
+        PROCESS_CONCORDANCES / "distribution.csv",
+        PROCESS_CONCORDANCES / "dummies.csv",
+        PROCESS_CONCORDANCES / "production.csv",
+        PROCESS_CONCORDANCES / "closures.csv",
+        PROCESS_CONCORDANCES / "batteries.csv",
+    ],
+    "Commodity": [
+        COMMODITY_CONCORDANCES / "demand.csv",
+        COMMODITY_CONCORDANCES / "energy.csv",
+        COMMODITY_CONCORDANCES / "emissions.csv",
+        COMMODITY_CONCORDANCES / "currency.csv",
+    ],
+}
+
+
+@lru_cache(maxsize=2)
+def get_concordance_index(result_type):
+    """
+    Every known code of result_type ("Process" or "Commodity"),
+    mapped to the description file that first identifies it
     """
-    takes a df which has already been filtered to remove everything we found coverage for
+    index = {}
+    for filepath in CONCORDANCE_FILES[result_type]:
+        codes = pd.read_csv(filepath, usecols=[result_type])[result_type].dropna()
+        for code in codes.unique():
+            index.setdefault(code, filepath.name)
+    return index
 
-    Simply outputs a test describing what's left (or success if there's nothing)
-    type must be one of "Process" or "Commodity"
+
+def get_coverage_report(codes, result_type, scenario_name):
     """
+    Checks the unique codes of result_type found in a scenario against
+    the concordance index, ignoring "-" (no code)
 
-    if result_type not in ["Process", "Commodity"]:
-        print(
+    Returns a dict with counts of the codes checked and covered, the codes
+    covered by each description file, and a sorted list of uncovered codes
+    """
+    if result_type not in CONCORDANCE_FILES:
+        raise ValueError(
             f"Cannot test '{result_type}' coverage. Please enter 'Process' or 'Commodity'"
         )
 
-    if len(df) > 0:
+    index = get_concordance_index(result_type)
+    codes = {code for code in codes if isinstance(code, str) and code != "-"}
+    uncovered = sorted(code for code in codes if code not in index)
+    by_source = {}
+    for code in codes:
+        if code in index:
+            by_source[index[code]] = by_source.get(index[code], 0) + 1
+
+    return {
+        "scenario": scenario_name,
+        "result_type": result_type,
+        "codes": len(codes),
+        "covered": len(codes) - len(uncovered),
+        "by_source": dict(sorted(by_source.items())),
+        "uncovered": uncovered,
+    }
+
+
+def print_coverage_report(report):
+    """
+    Prints a coverage report from get_coverage_report(),
+    listing uncovered codes (or success if there are none)
+    """
+    result_type = report["result_type"]
+    scenario_name = report["scenario"]
+    if report["uncovered"]:
         # failure
         print(
             f"FAILURE: Could not find descriptions for '{result_type}' found in {scenario_name}:"
         )
-        df = df.sort_values(result_type)
-        uncovered_items = df[result_type].unique()
-        for item in uncovered_items:
+        for item in report["uncovered"]:
             print("    ", item)
     else:
         print(f"SUCCESS: Full coverage of each {result_type} in {scenario_name}")
@@ -50,39 +113,11 @@ def check_process_coverage(df, scenario_name):
     Checks every process in model output results
     Ensures that they are identified in one of our process description files
 
-    Simply prints results to console
+    Prints results to console and returns the coverage report
     """
-
-    # process codes
-
-    demand_processes = pd.read_csv(PROCESS_CONCORDANCES / "demand.csv")
-    elec_processes = pd.read_csv(PROCESS_CONCORDANCES / "elec_generation.csv")
-    dist_processes = pd.read_csv(PROCESS_CONCORDANCES / "distribution.csv")
-    dummy_processes = pd.read_csv(PROCESS_CONCORDANCES / "dummies.csv")
-    production_processes = pd.read_csv(PROCESS_CONCORDANCES / "production.csv")
-    closure_processes = pd.read_csv(PROCESS_CONCORDANCES / "closures.csv")
-    battery_processes = pd.read_csv(PROCESS_CONCORDANCES / "batteries.csv")
-
-    # remove non-process data
-    df = df[df["Process"] != "-"]
-    # remove identified demand processes
-    df = df[~df["Process"].isin(demand_processes["Process"].unique())]
-    # remove identified elec processes
-    df = df[~df["Process"].isin(elec_processes["Process"].unique())]
-    # remove identified distribution processes
-    df = df[~df["Process"].isin(dist_processes["Process"].unique())]
-    # dummies
-    df = df[~df["Process"].isin(dummy_processes["Process"].unique())]
-    # production
-    df = df[~df["Process"].isin(production_processes["Process"].unique())]
-    # closures
-    df = df[~df["Process"].isin(closure_processes["Process"].unique())]
-    # batteries
-    df = df[~df["Process"].isin(battery_processes["Process"].unique())]
-
-    test_coverage(df, "Process", scenario_name=scenario_name)
-
-    # print(df)
+    report = get_coverage_report(df["Process"].unique(), "Process", scenario_name)
+    print_coverage_report(report)
+    return report
 
 
 def check_commodity_coverage(df, scenario_name):
@@ -90,30 +125,13 @@ def check_commodity_coverage(df, scenario_name):
     Checks every commodity in model output results
     Ensures that they are identified in one of our commodity description files
 
-    Simply prints results to console
+    Prints results to console and returns the coverage report
     Note: any failures might mean we need to tweak our description files
     Or add a whole new section, depending
     """
-
-    # commodity codes
-
-    demand_commodities = pd.read_csv(COMMODITY_CONCORDANCES / "demand.csv")
-    energy_commodities = pd.read_csv(COMMODITY_CONCORDANCES / "energy.csv")
-    emission_commodities = pd.read_csv(COMMODITY_CONCORDANCES / "emissions.csv")
-    currency_commodities = pd.read_csv(COMMODITY_CONCORDANCES / "currency.csv")
-
-    # remove non-commodity data
-    df = df[df["Commodity"] != "-"]
-    # demand commodities
-    df = df[~df["Commodity"].isin(demand_commodities["Commodity"].unique())]
-    # energy commodities
-    df = df[~df["Commodity"].isin(energy_commodities["Commodity"].unique())]
-    # emissions
-    df = df[~df["Commodity"].isin(emission_commodities["Commodity"].unique())]
-    # currencies
-    df = df[~df["Commodity"].isin(currency_commodities["Commodity"].unique())]
-
-    test_coverage(df, "Commodity", scenario_name=scenario_name)
+    report = get_coverage_report(df["Commodity"].unique(), "Commodity", scenario_name)
+    print_coverage_report(report)
+    return report
 
 
 def check_coverage(df, scenario_name):
@@ -123,41 +141,152 @@ def check_coverage(df, scenario_name):
     Or outputs will be wrong/misinterpreted
     """
 
-    check_commodity_coverage(df, scenario_name=scenario_name)
-    check_process_coverage(df, scenario_name=scenario_name)
+    return [
+        check_commodity_coverage(df, scenario_name=scenario_name),
+        check_process_coverage(df, scenario_name=scenario_name),
+    ]
+
+
+def check_scenario_coverage(scenarios=None):
+    """
+    Checks process and commodity coverage of saved scenario results
+    (current_scenarios by default), reading only the unique codes of each
+
+    Prints results to console and returns every coverage report
+    """
+    if scenarios is None:
+        scenarios = current_scenarios
+
+    reports = []
+    for scenario in scenarios:
+        codes = (
+            pl.scan_parquet(get_scenario_file(scenario))
+            .select(
+                pl.col(result_type).unique().cast(pl.String).implode()
+                for result_type in ["Commodity", "Process"]
+            )
+            .collect()
+        )
+        for result_type in ["Commodity", "Process"]:
+            report = get_coverage_report(
+                codes[result_type][0].to_list(), result_type, scenario
+            )
+            print_coverage_report(report)
+            reports.append(report)
+    return reports
 
 
 # DATA LOADING
 
+# the only non-dimension column of a VD file
+VALUE_COLUMN = "PV"
+# dimensions holding years, or "-" where the attribute has none
+YEAR_COLUMNS = ["Period", "Vintage"]
 
-def read_vd(filepath):
-    """
-    Reads a VD file, using column names extracted from the file's
-    header with regex, skipping non-CSV formatted header lines.
 
-    :param filepath: Path to the VD file.
-    :param scen_label: Label for the 'scen' column for rows from this file.
+def read_vd_header(filepath):
+    """
+    Reads the column names from a VD file's header with regex,
+    and counts the header lines before the first (quoted) data line
     """
     dimensions_pattern = re.compile(r"\*\s*Dimensions-")
 
-    # Determine the number of rows to skip and the column names
     with open(filepath, "r", encoding="utf-8") as file:
         columns = None
         skiprows = 0
         for line in file:
+            if line.startswith('"'):
+                break
             if dimensions_pattern.search(line):
                 columns_line = line.split("- ")[1].strip()
                 columns = columns_line.split(";")
-                continue
-            if line.startswith('"'):
-                break
             skiprows += 1
+    return columns, skiprows
+
+
+def get_vd_schema(columns):
+    """
+    Polars schema of a VD file: every dimension (including Period and
+    Vintage, which hold "-" as well as years) is categorical, and PV a float.
+    read_scenario_file() reads Period and Vintage back as integers
+    """
+    return {
+        col: pl.Float64 if col == VALUE_COLUMN else pl.Categorical for col in columns
+    }
+
+
+def scan_vd(filepath):
+    """
+    Lazily reads a VD file with an explicit schema, using the
+    column names and header length from read_vd_header()
+    """
+    columns, skiprows = read_vd_header(filepath)
+    return pl.scan_csv(
+        filepath,
+        has_header=False,
+        skip_rows=skiprows,
+        schema=get_vd_schema(columns),
+    )
+
+
+def read_vd(filepath):
+    """
+    Reads a VD file to a typed Polars frame
+
+    :param filepath: Path to the VD file.
+    """
+    return scan_vd(filepath).collect()
+
+
+def scenario_file_path(scenario):
+    """Path of the raw results parquet file of a scenario"""
+    return SCENARIO_FILES / f"{scenario}.parquet"
+
+
+def save_scenario_file(vd_filepath, scenario):
+    """
+    Streams a VD file straight to the scenario's compressed parquet file
+    """
+    scan_vd(vd_filepath).sink_parquet(
+        scenario_file_path(scenario), compression="zstd", statistics=True
+    )
 
-    # Read the CSV file with the determined column names and skiprows
-    vd_df = pd.read_csv(
-        filepath, skiprows=skiprows, names=columns, header=None, low_memory=False
+
+def convert_csv_scenario_file(scenario):
+    """
+    Converts results saved as csv (before they were stored as
+    parquet) to the scenario's parquet file
+    """
+    csv_file = SCENARIO_FILES / f"{scenario}.csv"
+    columns = pl.read_csv(csv_file, n_rows=0).columns
+    pl.scan_csv(csv_file, schema=get_vd_schema(columns)).sink_parquet(
+        scenario_file_path(scenario), compression="zstd", statistics=True
     )
-    return vd_df
+    print(f"Converted {csv_file.name} to {scenario_file_path(scenario).name}")
+
+
+def get_scenario_file(scenario):
+    """
+    Path of the raw results parquet file of a scenario,
+    converting results only saved as csv first
+    """
+    filepath = scenario_file_path(scenario)
+    if not filepath.exists() and (SCENARIO_FILES / f"{scenario}.csv").exists():
+        convert_csv_scenario_file(scenario)
+    return filepath
+
+
+def read_scenario_file(scenario, columns=None):
+    """
+    Reads a scenario's raw results to pandas, with dimensions as plain
+    strings, except Period and Vintage, which are nullable integers ("-" is NA)
+    """
+    df = pl.read_parquet(get_scenario_file(scenario), columns=columns)
+    df = df.with_columns(pl.col(pl.Categorical).cast(pl.String))
+    year_columns = [col for col in YEAR_COLUMNS if col in df.columns]
+    df = df.with_columns(pl.col(year_columns).cast(pl.Int64, strict=False)).to_pandas()
+    df[year_columns] = df[year_columns].astype("Int64")
+    return df
 
 
 def find_veda_working_directory(base_dir=None):
@@ -242,7 +371,8 @@ def get_results_from_veda(scenario, veda_base_dir):
     Takes the scenario name and looks in the appropriate folder
     Also assumes Veda is stored under your windows mount username
 
-    Saves the compressed raw results to this directory
+    Saves the compressed raw results to this directory,
+    and returns their coverage reports
     """
     veda_base_dir = Path(veda_base_dir)
 
@@ -250,13 +380,10 @@ def get_results_from_veda(scenario, veda_base_dir):
     latest_scenario_results = get_latest_scenario_vd_name(veda_wd, scenario)
     print("LATEST RESULTS")
     print(latest_scenario_results)
-    df = read_vd(latest_scenario_results)
-    check_coverage(df, scenario)
-
-    df.to_csv(SCENARIO_FILES / f"{scenario}.csv", index=False)
+    save_scenario_file(latest_scenario_results, scenario)
     print(f"Saved results from '{scenario}' to {SCENARIO_FILES}")
 
-    return df
+    return check_scenario_coverage([scenario])
 
 
 def main():
@@ -1,31 +1,125 @@
 """
 Package all outputs to zipped csv for easy use
+
+The app serves the zip from a disk cache (see get_cached_outputs_zip()),
+so it is only built once for each version of the parquet outputs rather
+than on every download.
 """
 
+import hashlib
 import io
+import os
+import tempfile
+import threading
 import zipfile
 
-import pandas as pd
 from times_nz_internal_qa.utilities.filepaths import DATA, FINAL_DATA
-from times_nz_internal_qa.utilities.value_mappings import apply_value_mappings_pd
+from times_nz_internal_qa.utilities.parquet_datasets import (
+    list_parquet_files,
+    read_partitioned_parquet,
+)
+from times_nz_internal_qa.utilities.value_mappings import (
+    MAPPINGS_FILE,
+    apply_value_mappings_pd,
+)
 
+ZIP_CACHE_DIR = DATA / ".cache/all_results_zip"
 
-def build_outputs_zip_bytes(input_dir):
-    """
-    Build the full-results zip in memory from parquet outputs.
+# only one thread of this process builds a given zip at a time
+_BUILD_LOCK = threading.Lock()
+
+
+def write_outputs_zip(input_dir, output):
     """
-    zip_buffer = io.BytesIO()
+    Write the full-results zip from parquet outputs to output (a path or
+    binary file object).
 
-    with zipfile.ZipFile(zip_buffer, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        for file in input_dir.glob("*.parquet"):
-            df = pd.read_parquet(file)
+    Each csv is written straight into its zip entry, so only one table is
+    held in memory at a time.
+    """
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for file in sorted(input_dir.glob("*.parquet")):
+            df = read_partitioned_parquet(file)
             df = apply_value_mappings_pd(df)
 
             csv_name = file.with_suffix(".csv").name
-            csv_bytes = df.to_csv(index=False).encode("utf-8")
-            z.writestr(csv_name, csv_bytes)
+            with z.open(csv_name, "w", force_zip64=True) as entry:
+                with io.TextIOWrapper(entry, encoding="utf-8", newline="") as text:
+                    df.to_csv(text, index=False)
+
+
+def get_outputs_version(input_dir):
+    """
+    Hash of the path, size and modification time of every parquet file of
+    the outputs and of the value mappings, which changes whenever the zip
+    would.
+    """
+    files = [
+        file
+        for dataset in sorted(input_dir.glob("*.parquet"))
+        for file in list_parquet_files(dataset)
+    ]
+    digest = hashlib.sha256()
+    for file in files + [MAPPINGS_FILE]:
+        stat = file.stat()
+        digest.update(f"{file}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def get_cached_outputs_zip(input_dir, cache_dir=ZIP_CACHE_DIR):
+    """
+    Return the path of the full-results zip for the current outputs,
+    building it first if it is not cached.
+
+    The zip is written to a temporary file and renamed into place, so other
+    processes never see a partial zip. The zip it replaces is kept until
+    the next rebuild, as a download may still be streaming it, and older
+    zips are removed.
+    """
+    output_file = cache_dir / f"all_results_{get_outputs_version(input_dir)}.zip"
+    if output_file.exists():
+        return output_file
+
+    with _BUILD_LOCK:
+        # another thread may have built it while we waited
+        if output_file.exists():
+            return output_file
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        handle, temp_name = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as temp_file:
+                write_outputs_zip(input_dir, temp_file)
+            os.replace(temp_name, output_file)
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+
+        remove_old_zips(cache_dir, keep=output_file)
+
+    return output_file
+
+
+def remove_old_zips(cache_dir, keep):
+    """
+    Remove the cached zips other than keep and the newest one before it
+    """
+    old_files = []
+    for old_file in cache_dir.glob("all_results_*.zip"):
+        if old_file == keep:
+            continue
+        try:
+            old_files.append((old_file.stat().st_mtime_ns, old_file))
+        except FileNotFoundError:
+            # removed by another process
+            continue
 
-    return zip_buffer.getvalue()
+    for _, old_file in sorted(old_files, reverse=True)[1:]:
+        try:
+            old_file.unlink(missing_ok=True)
+        except PermissionError:
+            # still being served on Windows; removed by a later rebuild
+            pass
 
 
 def package_outputs(input_dir, output_file):
@@ -34,7 +128,7 @@ def package_outputs(input_dir, output_file):
     and outputs a zip file to output_file
     """
 
-    output_file.write_bytes(build_outputs_zip_bytes(input_dir))
+    write_outputs_zip(input_dir, output_file)
 
 
 def main():
@@ -42,6 +136,8 @@ def main():
     Entrypoint
     """
     package_outputs(FINAL_DATA, DATA / "times_nz_3_wip_all_results.zip")
+    # so the first app download after postprocessing is already built
+    get_cached_outputs_zip(FINAL_DATA)
 
 
 if __name__ == "__main__":
@@ -9,23 +9,79 @@ Energy demand
 Electricity generation
 etc (more to come)
 
+Each processor in PROCESSORS runs on the results of one scenario, and its
+outputs are written to that scenario's partition of each output dataset.
+process_scenarios.py decides which scenarios to process and runs the
+processors, on a pool of worker processes by default.
+
 """
 
+from contextlib import contextmanager
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
-from times_nz_internal_qa.config import current_scenarios
+from times_nz_internal_qa.postprocessing.get_data import read_scenario_file
 from times_nz_internal_qa.utilities.filepaths import (
     COMMODITY_CONCORDANCES,
     CONCORDANCE_PATCHES,
     FINAL_DATA,
     PREP_STAGE_2,
     PROCESS_CONCORDANCES,
-    SCENARIO_FILES,
+)
+from times_nz_internal_qa.utilities.parquet_datasets import (
+    read_partitioned_parquet,
+    write_partitioned_parquet,
+    write_scenario_partition,
 )
 
 BASE_YEAR = 2023
 MAX_YEAR = 2050
 
+YRFR_FILE = PREP_STAGE_2 / "settings/load_curves/yrfr.csv"
+
+# the scenario save_data() is writing outputs for (see writing_scenario())
+# and the names of the outputs it has written
+_OUTPUT_SCENARIO = {"scenario": None, "outputs": set()}
+
+# concordance tables read by this process, by path (see read_concordance())
+_CONCORDANCES = {}
+
+
+def read_concordance(filepath):
+    """
+    Reads a concordance csv once per process, returning a copy
+    that processors are free to modify
+    """
+    filepath = Path(filepath)
+    if filepath not in _CONCORDANCES:
+        _CONCORDANCES[filepath] = pd.read_csv(filepath)
+    return _CONCORDANCES[filepath].copy()
+
+
+def load_concordances():
+    """
+    Reads every concordance, patch and the year fractions,
+    returning them by path to share with worker processes
+    """
+    files = (
+        sorted(PROCESS_CONCORDANCES.glob("*.csv"))
+        + sorted(COMMODITY_CONCORDANCES.glob("*.csv"))
+        + sorted(CONCORDANCE_PATCHES.rglob("*.csv"))
+        + [YRFR_FILE]
+    )
+    for file in files:
+        read_concordance(file)
+    return dict(_CONCORDANCES)
+
+
+def share_concordances(concordances):
+    """
+    Uses concordances read by another process (from load_concordances())
+    rather than reading them again
+    """
+    _CONCORDANCES.update(concordances)
+
 
 def coerce_period_to_int(df):
     """
@@ -44,12 +100,9 @@ def coerce_period_to_int(df):
         "Reg_wobj",
         "User_con",
     ]
+    # read_scenario_file() already reads "-" periods as NA
     period_numeric = pd.to_numeric(df["Period"], errors="coerce")
-    invalid_mask = (
-        period_numeric.isna()
-        & df["Period"].notna()
-        & ~df["Attribute"].isin(attributes_to_ignore)
-    )
+    invalid_mask = period_numeric.isna() & ~df["Attribute"].isin(attributes_to_ignore)
 
     if invalid_mask.any():
         invalid_attributes = (
@@ -71,13 +124,29 @@ def coerce_period_to_int(df):
     return df
 
 
-def save_data(df, name, method="parquet"):
-    """Save final outputs to <repo>/data (creates folder if missing)."""
+def save_data(df, name, method="parquet", partition_cols=None):
+    """
+    Save final outputs to <repo>/data (creates folder if missing).
+    Parquet outputs are datasets partitioned by Scenario, and also by any
+    other partition_cols given (see utilities/parquet_datasets.py)
+
+    Inside writing_scenario(), only that scenario's partition is replaced.
+    """
     name = name.removesuffix(".csv").removesuffix(".parquet")
     FINAL_DATA.mkdir(parents=True, exist_ok=True)  # <-- ensure folder exists
 
     if method == "parquet":
-        df.to_parquet(FINAL_DATA / f"{name}.parquet", engine="pyarrow")
+        partition_cols = ["Scenario"] + (partition_cols or [])
+        scenario = _OUTPUT_SCENARIO["scenario"]
+        if scenario is None:
+            write_partitioned_parquet(
+                df, FINAL_DATA / f"{name}.parquet", partition_cols=partition_cols
+            )
+        else:
+            write_scenario_partition(
+                df, FINAL_DATA / f"{name}.parquet", scenario, partition_cols
+            )
+            _OUTPUT_SCENARIO["outputs"].add(name)
     else:
         df.to_csv(FINAL_DATA / f"{name}.csv", index=False, encoding="utf-8-sig")
 
@@ -89,7 +158,7 @@ def load_scenario_results(scenarios):
     """
     result_list = []
     for scenario in scenarios:
-        df = pd.read_csv(SCENARIO_FILES / f"{scenario}.csv", low_memory=False)
+        df = read_scenario_file(scenario)
         df["Scenario"] = scenario
         result_list.append(df)
 
@@ -108,11 +177,11 @@ def process_electricity_generation(df):
     # load data
 
     # get concordances
-    processes = pd.read_csv(PROCESS_CONCORDANCES / "elec_generation.csv")
-    fuels = pd.read_csv(COMMODITY_CONCORDANCES / "energy.csv")
-    emissions = pd.read_csv(COMMODITY_CONCORDANCES / "emissions.csv")
+    processes = read_concordance(PROCESS_CONCORDANCES / "elec_generation.csv")
+    fuels = read_concordance(COMMODITY_CONCORDANCES / "energy.csv")
+    emissions = read_concordance(COMMODITY_CONCORDANCES / "emissions.csv")
     commodities = pd.concat([fuels, emissions])
-    attributes = pd.read_csv(
+    attributes = read_concordance(
         CONCORDANCE_PATCHES / "attributes/attributes_for_ele_gen.csv"
     )
     # ele specific labels for techs
@@ -156,7 +225,8 @@ def process_electricity_generation(df):
 
     df = df[ele_variables]
     # save
-    save_data(df, "elec_generation.csv")
+    # the app reads one variable at a time from this
+    save_data(df, "elec_generation.csv", partition_cols=["Variable"])
 
 
 def process_generation_by_timeslice(df):
@@ -166,12 +236,12 @@ def process_generation_by_timeslice(df):
 
     Starts by matching the electricity method, then trims
     """
-    yrfr = pd.read_csv(PREP_STAGE_2 / "settings/load_curves/yrfr.csv")
-    processes = pd.read_csv(PROCESS_CONCORDANCES / "elec_generation.csv")
-    fuels = pd.read_csv(COMMODITY_CONCORDANCES / "energy.csv")
-    emissions = pd.read_csv(COMMODITY_CONCORDANCES / "emissions.csv")
+    yrfr = read_concordance(YRFR_FILE)
+    processes = read_concordance(PROCESS_CONCORDANCES / "elec_generation.csv")
+    fuels = read_concordance(COMMODITY_CONCORDANCES / "energy.csv")
+    emissions = read_concordance(COMMODITY_CONCORDANCES / "emissions.csv")
     commodities = pd.concat([fuels, emissions])
-    attributes = pd.read_csv(
+    attributes = read_concordance(
         CONCORDANCE_PATCHES / "attributes/attributes_for_ele_gen.csv"
     )
     # ele specific labels for techs
@@ -235,7 +305,7 @@ def process_batteries(df):
     :param df: Description
     """
 
-    battery_processes = pd.read_csv(PROCESS_CONCORDANCES / "batteries.csv")
+    battery_processes = read_concordance(PROCESS_CONCORDANCES / "batteries.csv")
 
     df = df[df["Process"].isin(battery_processes["Process"])]
     df = df.merge(battery_processes, on="Process", how="left")
@@ -269,7 +339,7 @@ def process_batteries(df):
 def process_demand_flex_flows(df):
     """Create demand-flex input/output flows in the battery_flows output shape."""
 
-    demand_flex_processes = pd.read_csv(
+    demand_flex_processes = read_concordance(
         CONCORDANCE_PATCHES / "demand_flex/demand_flex.csv"
     )
     demand_flex_processes = demand_flex_processes.rename(
@@ -318,9 +388,9 @@ def process_electricity_demand_by_timeslice(df):
     For these we currently only extract energy demand, not capacity or output.
     """
 
-    demand_processes = pd.read_csv(PROCESS_CONCORDANCES / "demand.csv")
-    energy_commodities = pd.read_csv(COMMODITY_CONCORDANCES / "energy.csv")
-    yrfr = pd.read_csv(PREP_STAGE_2 / "settings/load_curves/yrfr.csv")
+    demand_processes = read_concordance(PROCESS_CONCORDANCES / "demand.csv")
+    energy_commodities = read_concordance(COMMODITY_CONCORDANCES / "energy.csv")
+    yrfr = read_concordance(YRFR_FILE)
 
     df = df[df["Process"].isin(demand_processes["Process"].unique())]
 
@@ -372,8 +442,8 @@ def process_energy_demand(df):
     this output so it can be reported separately later.
     """
 
-    demand_processes = pd.read_csv(PROCESS_CONCORDANCES / "demand.csv")
-    energy_commodities = pd.read_csv(COMMODITY_CONCORDANCES / "energy.csv")
+    demand_processes = read_concordance(PROCESS_CONCORDANCES / "demand.csv")
+    energy_commodities = read_concordance(COMMODITY_CONCORDANCES / "energy.csv")
 
     df = df[df["Process"].isin(demand_processes["Process"].unique())]
     df = df[df["Attribute"] == "VAR_FIn"]
@@ -454,10 +524,10 @@ def process_primary_energy(df):
 
     df = df[df["Attribute"] == "VAR_FOut"]
 
-    prod_processes = pd.read_csv(PROCESS_CONCORDANCES / "production.csv")
-    sets_units = pd.read_csv(PROCESS_CONCORDANCES / "process_sets_and_units.csv")
+    prod_processes = read_concordance(PROCESS_CONCORDANCES / "production.csv")
+    sets_units = read_concordance(PROCESS_CONCORDANCES / "process_sets_and_units.csv")
     sets_units = sets_units.rename(columns={"techname": "Process"})
-    fuels = pd.read_csv(COMMODITY_CONCORDANCES / "energy.csv")
+    fuels = read_concordance(COMMODITY_CONCORDANCES / "energy.csv")
 
     # only energy outputs of identified production processes
     # including unit settings from inputs
@@ -505,11 +575,13 @@ def process_energy_service_demand(df):
     Excludes Road Transport which is handled separately in process_transport_energy_service_demand
     """
 
-    demand_processes = pd.read_csv(
+    demand_processes = read_concordance(
         PROCESS_CONCORDANCES / "demand.csv"
     ).drop_duplicates()
-    demand_commodities = pd.read_csv(COMMODITY_CONCORDANCES / "demand.csv")
-    com_units = pd.read_csv(COMMODITY_CONCORDANCES / "commodity_sets_and_units.csv")
+    demand_commodities = read_concordance(COMMODITY_CONCORDANCES / "demand.csv")
+    com_units = read_concordance(
+        COMMODITY_CONCORDANCES / "commodity_sets_and_units.csv"
+    )
 
     # Exclude Road Transport sector processes (handled separately)
     demand_processes = demand_processes[
@@ -573,17 +645,18 @@ def process_energy_service_demand(df):
     save_data(esd, "energy_service_demand.csv")
 
 
-def get_data_by_timeslice(filename):
+def get_data_by_timeslice(filename, scenarios=None):
     """
     Takes an existing file and converts it to load by timeslice
     Only works on PJ, and converts to GWh, then uses YRFR to convert to GW per hour
+    Optionally only for some scenarios
     """
 
-    df = pd.read_parquet(FINAL_DATA / filename)
+    df = read_partitioned_parquet(FINAL_DATA / filename, scenarios=scenarios)
 
     df = df[df["Unit"] == "PJ"]
 
-    yrfr = pd.read_csv(PREP_STAGE_2 / "settings/load_curves/yrfr.csv")
+    yrfr = read_concordance(YRFR_FILE)
 
     # add year fractions
     df = df.merge(yrfr, on="TimeSlice", how="left")
@@ -608,7 +681,11 @@ def get_data_by_timeslice(filename):
 
 def get_esd_by_timeslice():
     """Wrapper for energy service demand outputs by timeslice"""
-    esd = get_data_by_timeslice("energy_service_demand.parquet")
+    scenario = _OUTPUT_SCENARIO["scenario"]
+    esd = get_data_by_timeslice(
+        "energy_service_demand.parquet",
+        scenarios=None if scenario is None else [scenario],
+    )
     save_data(esd, "esd_by_timeslice.parquet")
 
 
@@ -616,9 +693,9 @@ def process_infeasible_data(df):
     """
     This is used for getting a better look at the autogenerated dummy processes
     """
-    dummy_processes = pd.read_csv(PROCESS_CONCORDANCES / "dummies.csv")
-    demand_commodities = pd.read_csv(COMMODITY_CONCORDANCES / "demand.csv")
-    energy_commodities = pd.read_csv(COMMODITY_CONCORDANCES / "energy.csv")
+    dummy_processes = read_concordance(PROCESS_CONCORDANCES / "dummies.csv")
+    demand_commodities = read_concordance(COMMODITY_CONCORDANCES / "demand.csv")
+    energy_commodities = read_concordance(COMMODITY_CONCORDANCES / "energy.csv")
 
     # only var_fout is relevant - act is also available but who cares
     # cost_act is available - might be worth something later
@@ -650,10 +727,10 @@ def process_emissions(df):
     All emissions outputs!
     """
 
-    df_s = pd.read_csv(COMMODITY_CONCORDANCES / "emissions.csv")
+    df_s = read_concordance(COMMODITY_CONCORDANCES / "emissions.csv")
 
-    demand_concordance = pd.read_csv(PROCESS_CONCORDANCES / "demand.csv")
-    ele_generation_concordance = pd.read_csv(
+    demand_concordance = read_concordance(PROCESS_CONCORDANCES / "demand.csv")
+    ele_generation_concordance = read_concordance(
         PROCESS_CONCORDANCES / "elec_generation.csv"
     )
 
@@ -661,7 +738,7 @@ def process_emissions(df):
     for label in ["SectorGroup", "Sector", "EnduseGroup", "EndUse"]:
         ele_generation_concordance[label] = "Electricity generation"
 
-    production_concordance = pd.read_csv(PROCESS_CONCORDANCES / "production.csv")
+    production_concordance = read_concordance(PROCESS_CONCORDANCES / "production.csv")
 
     conc = pd.concat(
         [demand_concordance, ele_generation_concordance, production_concordance]
@@ -708,9 +785,7 @@ def process_carbon_costs(df):
         .rename(columns={"PV": "Emissions_ktCO2"})
     )
 
-    costs = df[
-        (df["Commodity"] == "TOTCO2") & (df["Attribute"] == "Cost_Comx")
-    ].copy()
+    costs = df[(df["Commodity"] == "TOTCO2") & (df["Attribute"] == "Cost_Comx")].copy()
     if costs.empty:
         costs = emissions[["Scenario", "Period", "Region", "Commodity"]].copy()
         costs["CarbonCost_MioNZD"] = 0
@@ -730,9 +805,9 @@ def process_carbon_costs(df):
     )
     carbon_df["CarbonCost_MioNZD"] = carbon_df["CarbonCost_MioNZD"].fillna(0)
 
-    nonzero_cost_zero_emissions = (
-        carbon_df["Emissions_ktCO2"].eq(0) & carbon_df["CarbonCost_MioNZD"].ne(0)
-    )
+    nonzero_cost_zero_emissions = carbon_df["Emissions_ktCO2"].eq(0) & carbon_df[
+        "CarbonCost_MioNZD"
+    ].ne(0)
     if nonzero_cost_zero_emissions.any():
         invalid_rows = carbon_df.loc[
             nonzero_cost_zero_emissions, ["Scenario", "Period", "Region"]
@@ -794,10 +869,10 @@ def process_transport_energy_demand(df):
     - Maintains detailed vehicle technology information for each mode
     """
 
-    demand_processes = pd.read_csv(
+    demand_processes = read_concordance(
         PROCESS_CONCORDANCES / "demand.csv"
     ).drop_duplicates()
-    energy_commodities = pd.read_csv(COMMODITY_CONCORDANCES / "energy.csv")
+    energy_commodities = read_concordance(COMMODITY_CONCORDANCES / "energy.csv")
 
     # Filter for Road Transport sector only
     transport_processes = demand_processes[
@@ -870,10 +945,10 @@ def process_transport_energy_service_demand(df):
     All values are in BVkm (Billion Vehicle Kilometers).
     """
 
-    demand_processes = pd.read_csv(
+    demand_processes = read_concordance(
         PROCESS_CONCORDANCES / "demand.csv"
     ).drop_duplicates()
-    demand_commodities = pd.read_csv(COMMODITY_CONCORDANCES / "demand.csv")
+    demand_commodities = read_concordance(COMMODITY_CONCORDANCES / "demand.csv")
 
     # Filter for Road Transport sector only
     transport_processes = demand_processes[
@@ -936,7 +1011,7 @@ def process_transport_capacity(df):
     fleet composition evolution across different utilization scenarios.
     """
 
-    demand_processes = pd.read_csv(
+    demand_processes = read_concordance(
         PROCESS_CONCORDANCES / "demand.csv"
     ).drop_duplicates()
 
@@ -1006,10 +1081,12 @@ def process_technology_capacity(df):
     Road Transport is excluded and handled separately in process_transport_capacity.
     """
 
-    demand_processes = pd.read_csv(
+    demand_processes = read_concordance(
         PROCESS_CONCORDANCES / "demand.csv"
     ).drop_duplicates()
-    process_units = pd.read_csv(PROCESS_CONCORDANCES / "process_sets_and_units.csv")
+    process_units = read_concordance(
+        PROCESS_CONCORDANCES / "process_sets_and_units.csv"
+    )
     process_units = process_units[process_units["sets"] == "DMD"].rename(
         columns={
             "techname": "Process",
@@ -1089,7 +1166,7 @@ def process_objective_functions(df):
             f"Expected one objective function value per scenario: {scenarios}"
         )
 
-    missing_scenarios = sorted(set(current_scenarios) - set(objective_df["Scenario"]))
+    missing_scenarios = sorted(set(df["Scenario"]) - set(objective_df["Scenario"]))
     if missing_scenarios:
         scenarios = ", ".join(missing_scenarios)
         raise ValueError(
@@ -1126,38 +1203,43 @@ def check_df(df):
     print(df)
 
 
-def main():
+# independent processors, in the order they run in one process.
+# All but those in FULL_PERIOD_PROCESSORS get results up to MAX_YEAR only.
+PROCESSORS = {
+    "objective_functions": process_objective_functions,
+    "carbon_costs": process_carbon_costs,
+    "primary_energy": process_primary_energy,
+    "energy_service_demand": process_energy_service_demand,
+    "energy_demand": process_energy_demand,
+    "electricity_generation": process_electricity_generation,
+    "infeasible_data": process_infeasible_data,
+    "emissions": process_emissions,
+    "generation_by_timeslice": process_generation_by_timeslice,
+    "electricity_demand_by_timeslice": process_electricity_demand_by_timeslice,
+    "batteries": process_batteries,
+    "demand_flex_flows": process_demand_flex_flows,
+    "transport_energy_demand": process_transport_energy_demand,
+    "transport_energy_service_demand": process_transport_energy_service_demand,
+    "transport_capacity": process_transport_capacity,
+    "technology_capacity": process_technology_capacity,
+}
+FULL_PERIOD_PROCESSORS = {"objective_functions"}
+
+
+def limit_periods(df):
+    """Results up to MAX_YEAR"""
+    return df[(df["Period"] <= MAX_YEAR).fillna(False)]
+
+
+@contextmanager
+def writing_scenario(scenario):
     """
-    Orchestrates processing for all relevant outputs.
+    Within this, save_data() only replaces the partition of scenario in
+    each output. Yields the set of output names written.
     """
-    print("Processing all scenario files...")
-    df = load_scenario_results(current_scenarios)
-
-    process_objective_functions(df)
-
-    df = df[(df["Period"] <= MAX_YEAR).fillna(False)]
-
-    process_carbon_costs(df)
-    process_primary_energy(df)
-    process_energy_service_demand(df)
-    process_energy_demand(df)
-    process_electricity_generation(df)
-    process_infeasible_data(df)
-    process_emissions(df)
-    process_generation_by_timeslice(df)
-    process_electricity_demand_by_timeslice(df)
-
-    process_batteries(df)
-    process_demand_flex_flows(df)
-
-    process_transport_energy_demand(df)
-    process_transport_energy_service_demand(df)
-    process_transport_capacity(df)
-    process_technology_capacity(df)
-
-    get_esd_by_timeslice()
-
-
-if __name__ == "__main__":
-
-    main()
+    _OUTPUT_SCENARIO["scenario"] = scenario
+    _OUTPUT_SCENARIO["outputs"] = set()
+    try:
+        yield _OUTPUT_SCENARIO["outputs"]
+    finally:
+        _OUTPUT_SCENARIO["scenario"] = None
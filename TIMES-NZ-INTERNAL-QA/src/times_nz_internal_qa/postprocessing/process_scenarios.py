@@ -0,0 +1,327 @@
+"""
+Runs the postprocessing processors on each scenario's results
+
+Each scenario is processed on its own, and its outputs written to its own
+partition of each output dataset (see process_data.save_data()). A manifest
+in FINAL_DATA records the hash of each scenario's results file, so main()
+only reprocesses scenarios whose results changed (or all of them, if the
+concordances or process_data.py did).
+
+The processors in process_data.PROCESSORS are independent of each other, so
+main() runs them on a pool of worker processes, one task per scenario and
+processor. Each worker is given the concordances once (see
+process_data.read_concordance()), and reads a scenario's results from an
+Arrow IPC file the main process writes, memory-mapping it rather than
+having the frame pickled to it.
+
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+from times_nz_internal_qa.config import current_scenarios
+from times_nz_internal_qa.postprocessing import process_data
+from times_nz_internal_qa.postprocessing.get_data import get_scenario_file
+from times_nz_internal_qa.utilities import parquet_datasets
+from times_nz_internal_qa.utilities.filepaths import (
+    COMMODITY_CONCORDANCES,
+    CONCORDANCE_PATCHES,
+    FINAL_DATA,
+    PROCESS_CONCORDANCES,
+)
+from times_nz_internal_qa.utilities.parquet_datasets import (
+    list_scenario_partitions,
+    migrate_to_scenario_dataset,
+    remove_scenario_partition,
+)
+
+MANIFEST_FILE = FINAL_DATA / "manifest.json"
+PROCESS_DATA_FILE = Path(process_data.__file__)
+PARQUET_DATASETS_FILE = Path(parquet_datasets.__file__)
+
+
+@dataclass
+class WorkerResults:
+    """The scenario results a worker process last loaded"""
+
+    results_file: str | None = None
+    # the results, by whether the processor gets every period
+    # (see process_data.FULL_PERIOD_PROCESSORS)
+    frames: dict[bool, pd.DataFrame] = field(default_factory=dict)
+
+
+# the results of this worker process (see _run_processor_task())
+_WORKER_RESULTS = WorkerResults()
+
+
+def run_processor(name, df, scenario):
+    """
+    Runs one processor on the results of one scenario,
+    returning the outputs it wrote and the seconds it took
+    """
+    start = time.perf_counter()
+    with process_data.writing_scenario(scenario) as outputs:
+        process_data.PROCESSORS[name](df)
+    return sorted(outputs), time.perf_counter() - start
+
+
+def finish_scenario(scenario):
+    """
+    Runs the processing that depends on other outputs of a scenario,
+    returning the outputs it wrote and the seconds it took
+    """
+    start = time.perf_counter()
+    with process_data.writing_scenario(scenario) as outputs:
+        process_data.get_esd_by_timeslice()
+    return sorted(outputs), time.perf_counter() - start
+
+
+def write_shared_results(df, filepath):
+    """
+    Writes scenario results to an Arrow IPC file for worker processes
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(str(filepath), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _init_worker(concordances):
+    """Gives a worker process the concordances read by the main process"""
+    process_data.share_concordances(concordances)
+
+
+def _run_processor_task(name, scenario, results_file):
+    """
+    Runs a processor in a worker process, on results memory-mapped from
+    results_file. The results stay loaded for the worker's next task.
+    """
+    if _WORKER_RESULTS.results_file != results_file:
+        _WORKER_RESULTS.frames.clear()  # free the last scenario first
+        with pa.memory_map(results_file) as source:
+            df = pa.ipc.open_file(source).read_all().to_pandas()
+        _WORKER_RESULTS.results_file = results_file
+        _WORKER_RESULTS.frames.update({True: df, False: process_data.limit_periods(df)})
+
+    df = _WORKER_RESULTS.frames[name in process_data.FULL_PERIOD_PROCESSORS]
+    return run_processor(name, df, scenario)
+
+
+def get_jobs(jobs, tasks):
+    """
+    Number of worker processes: 0 means one per CPU,
+    and there is never more than one per task
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    return max(1, min(jobs, tasks))
+
+
+def process_scenarios_in_process(scenarios, timings):
+    """
+    Processes each scenario in turn in this process.
+    Yields each scenario with the outputs it wrote.
+    """
+    for scenario in scenarios:
+        print(f"Processing {scenario}...")
+        df = process_data.load_scenario_results([scenario])
+        frames = {True: df, False: process_data.limit_periods(df)}
+        scenario_outputs = set()
+        for name in process_data.PROCESSORS:
+            outputs, seconds = run_processor(
+                name, frames[name in process_data.FULL_PERIOD_PROCESSORS], scenario
+            )
+            scenario_outputs.update(outputs)
+            timings[name].append(seconds)
+        outputs, seconds = finish_scenario(scenario)
+        scenario_outputs.update(outputs)
+        timings["esd_by_timeslice"].append(seconds)
+        yield scenario, sorted(scenario_outputs)
+
+
+def process_scenarios_in_pool(scenarios, jobs, timings):
+    """
+    Processes scenarios on a pool of worker processes, one task per
+    scenario and processor. Yields each scenario with the outputs it
+    wrote, as it finishes.
+    """
+    with tempfile.TemporaryDirectory(prefix="times_nz_results_") as temp_dir:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(process_data.load_concordances(),),
+        ) as pool:
+            pending = {}
+            for scenario in scenarios:
+                print(f"Loading {scenario}...")
+                results_file = str(Path(temp_dir) / f"{scenario}.arrow")
+                write_shared_results(
+                    process_data.load_scenario_results([scenario]), results_file
+                )
+                for name in process_data.PROCESSORS:
+                    future = pool.submit(
+                        _run_processor_task, name, scenario, results_file
+                    )
+                    pending[future] = (scenario, name)
+
+            remaining = defaultdict(int)
+            for scenario, _ in pending.values():
+                remaining[scenario] += 1
+            scenario_outputs = defaultdict(set)
+
+            for future in as_completed(pending):
+                scenario, name = pending[future]
+                outputs, seconds = future.result()
+                scenario_outputs[scenario].update(outputs)
+                timings[name].append(seconds)
+                remaining[scenario] -= 1
+                if remaining[scenario] == 0:
+                    outputs, seconds = finish_scenario(scenario)
+                    scenario_outputs[scenario].update(outputs)
+                    timings["esd_by_timeslice"].append(seconds)
+                    print(f"Processed {scenario}")
+                    yield scenario, sorted(scenario_outputs[scenario])
+
+
+def report_timings(timings, wall_seconds):
+    """Prints the time each processor took, slowest first"""
+    print(f"Processed in {wall_seconds:.1f}s. Time per processor:")
+    for name, seconds in sorted(timings.items(), key=lambda kv: -sum(kv[1])):
+        print(
+            f"       - {name}: {sum(seconds):.2f}s total, "
+            f"{sum(seconds) / len(seconds):.2f}s per scenario"
+        )
+
+
+def hash_file(filepath):
+    """sha256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_definitions_hash():
+    """
+    Hash of everything other than a scenario's results that its outputs
+    depend on: the concordances, patches, year fractions, process_data.py
+    and the dataset writer in parquet_datasets.py
+    """
+    files = (
+        sorted(PROCESS_CONCORDANCES.glob("*.csv"))
+        + sorted(COMMODITY_CONCORDANCES.glob("*.csv"))
+        + sorted(CONCORDANCE_PATCHES.rglob("*.csv"))
+        + [process_data.YRFR_FILE, PROCESS_DATA_FILE, PARQUET_DATASETS_FILE]
+    )
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(f"{file.name}:{hash_file(file)}\n".encode())
+    return digest.hexdigest()
+
+
+def load_manifest(definitions_hash):
+    """
+    The processing manifest, or an empty one if there is none or it was
+    made with other definitions
+    """
+    empty = {"definitions_hash": definitions_hash, "scenarios": {}}
+    if not MANIFEST_FILE.exists():
+        return empty
+    manifest = json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+    if manifest.get("definitions_hash") != definitions_hash:
+        print("Concordances or processing changed; reprocessing every scenario")
+        return empty
+    return manifest
+
+
+def save_manifest(manifest):
+    """Writes the processing manifest"""
+    FINAL_DATA.mkdir(parents=True, exist_ok=True)
+    MANIFEST_FILE.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+def is_up_to_date(manifest, scenario, input_hash):
+    """
+    Whether the outputs of scenario were made from the same results file,
+    and are all still there
+    """
+    entry = manifest["scenarios"].get(scenario)
+    if entry is None or entry["input_hash"] != input_hash:
+        return False
+    return all(
+        (FINAL_DATA / f"{name}.parquet" / f"Scenario={scenario}").is_dir()
+        for name in entry["outputs"]
+    )
+
+
+def remove_old_scenarios(manifest, scenarios):
+    """
+    Removes the outputs of any scenario not in scenarios, and forgets it
+    """
+    for dataset in FINAL_DATA.glob("*.parquet"):
+        for scenario in list_scenario_partitions(dataset):
+            if scenario not in scenarios:
+                remove_scenario_partition(dataset, scenario)
+    for scenario in set(manifest["scenarios"]) - set(scenarios):
+        del manifest["scenarios"][scenario]
+
+
+def main(force=False, jobs=0):
+    """
+    Orchestrates processing for all relevant outputs.
+    Only scenarios whose results changed since they were last processed
+    are processed again, unless force is True.
+
+    jobs is the number of worker processes (0 = one per CPU); with 1,
+    everything runs in this process. Each worker holds one scenario's
+    results in memory at a time.
+    """
+    manifest = load_manifest(get_definitions_hash())
+    remove_old_scenarios(manifest, current_scenarios)
+
+    input_hashes = {}
+    for scenario in current_scenarios:
+        input_hash = hash_file(get_scenario_file(scenario))
+        if not force and is_up_to_date(manifest, scenario, input_hash):
+            print(f"{scenario}: results unchanged, skipping")
+        else:
+            input_hashes[scenario] = input_hash
+    if not input_hashes:
+        return
+
+    # once, before workers write scenarios to the same datasets
+    for dataset in FINAL_DATA.glob("*.parquet"):
+        migrate_to_scenario_dataset(dataset)
+
+    start = time.perf_counter()
+    timings = defaultdict(list)
+    jobs = get_jobs(jobs, len(input_hashes) * len(process_data.PROCESSORS))
+    if jobs == 1:
+        processed = process_scenarios_in_process(input_hashes, timings)
+    else:
+        processed = process_scenarios_in_pool(input_hashes, jobs, timings)
+
+    for scenario, outputs in processed:
+        manifest["scenarios"][scenario] = {
+            "input_hash": input_hashes[scenario],
+            "outputs": outputs,
+        }
+        # saved as we go, so an interrupted run keeps what it finished
+        save_manifest(manifest)
+
+    report_timings(timings, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+
+    main()
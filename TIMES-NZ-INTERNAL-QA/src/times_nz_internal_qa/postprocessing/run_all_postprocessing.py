@@ -5,7 +5,7 @@ Orchestrates each component of postprocessing
 from times_nz_internal_qa.postprocessing.define_data import main as define_data
 from times_nz_internal_qa.postprocessing.get_data import main as get_data
 from times_nz_internal_qa.postprocessing.package_outputs import main as package_outputs
-from times_nz_internal_qa.postprocessing.process_data import main as process_data
+from times_nz_internal_qa.postprocessing.process_scenarios import main as process_data
 
 # SWITCHES
 # this requires a local fresh run of PREPARE-TIMES-NZ to be populated.
@@ -0,0 +1,298 @@
+"""
+Reading and writing the partitioned parquet datasets in FINAL_DATA
+
+Each output is a hive-partitioned dataset directory, named like the single
+file it replaces (eg clean_results/emissions.parquet/), with one folder
+per Scenario and optionally per Variable:
+
+    emissions.parquet/Scenario=steady-v308/part-0.parquet
+
+Rows are sorted within each partition, and written in row groups with
+min/max statistics, so readers filtering on Scenario only open those
+partitions and can skip row groups by Variable or Period.
+
+Partition values are always read back as strings, and
+read_partitioned_parquet() restores the original column order.
+"""
+
+import json
+import shutil
+
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PARTITION_COLUMNS = ["Scenario"]
+# sorted within partitions so row group statistics are selective
+SORT_COLUMNS = ["Variable", "Period"]
+ROW_GROUP_SIZE = 64 * 1024
+
+_COLUMNS_METADATA_KEY = b"times_nz_columns"
+
+
+def _to_dataset_table(
+    df: pd.DataFrame, partition_cols, schema: pa.Schema | None = None
+) -> pa.Table:
+    """
+    Convert df to arrow with string partition columns, sorted by partition
+    and SORT_COLUMNS, recording its column order in the schema metadata
+
+    Columns with no values to infer a type from get their type in schema
+    (see _fill_null_types())
+    """
+    table = _fill_null_types(pa.Table.from_pandas(df, preserve_index=False), schema)
+    for col in partition_cols:
+        table = table.set_column(
+            table.schema.get_field_index(col), col, table[col].cast(pa.string())
+        )
+    sort_cols = partition_cols + [c for c in SORT_COLUMNS if c in table.column_names]
+    table = table.sort_by([(col, "ascending") for col in sort_cols])
+    return table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            _COLUMNS_METADATA_KEY: json.dumps(table.column_names).encode(),
+        }
+    )
+
+
+def _fill_null_types(table: pa.Table, schema: pa.Schema | None) -> pa.Table:
+    """
+    Give the columns arrow typed as null (object columns that are empty or
+    all missing, eg in a scenario with no rows for an output) their type
+    in schema, or string, which object columns hold otherwise
+
+    Readers take a dataset's schema from one of its files, and cannot cast
+    the other files' columns to null, so no file may have null columns.
+    """
+    for i, field in enumerate(table.schema):
+        if not pa.types.is_null(field.type):
+            continue
+        col_type = pa.string()
+        if schema is not None and field.name in schema.names:
+            if not pa.types.is_null(schema.field(field.name).type):
+                col_type = schema.field(field.name).type
+        table = table.set_column(i, field.name, table.column(i).cast(col_type))
+    return table
+
+
+def _get_dataset_schema(path, exclude=None) -> pa.Schema | None:
+    """
+    Schema of the first file of the dataset at path outside the exclude
+    partition, or None if there is none
+    """
+    if not path.is_dir():
+        return None
+    for file in sorted(path.rglob("*.parquet")):
+        if exclude is None or exclude not in file.relative_to(path).parts:
+            return pq.read_schema(file)
+    return None
+
+
+def _write_dataset(table: pa.Table, path, partition_cols):
+    """
+    Write table to a new dataset directory path, partitioned by
+    partition_cols (which may be empty)
+
+    An empty table is written as one empty file that keeps every column,
+    so the dataset keeps its schema.
+    """
+    write_options = {
+        "compression": "zstd",
+        "write_statistics": True,
+    }
+    if table.num_rows == 0 or not partition_cols:
+        path.mkdir(parents=True)
+        pq.write_table(
+            table,
+            path / "part-0.parquet",
+            row_group_size=ROW_GROUP_SIZE,
+            **write_options,
+        )
+        return
+
+    ds.write_dataset(
+        table,
+        path,
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([(col, pa.string()) for col in partition_cols]), flavor="hive"
+        ),
+        basename_template="part-{i}.parquet",
+        max_rows_per_group=ROW_GROUP_SIZE,
+        max_partitions=4096,
+        file_options=ds.ParquetFileFormat().make_write_options(**write_options),
+    )
+
+
+def write_partitioned_parquet(df: pd.DataFrame, path, partition_cols=None):
+    """
+    Write df to the dataset directory path, replacing anything there
+
+    Partitioned by partition_cols (PARTITION_COLUMNS by default). The new
+    dataset is written next to path and then moved into place, so readers
+    never see a half-written one.
+    """
+    if partition_cols is None:
+        partition_cols = PARTITION_COLUMNS
+
+    table = _to_dataset_table(df, partition_cols)
+    temp_path = path.with_name(path.name + ".tmp")
+    _remove_path(temp_path)
+    _write_dataset(table, temp_path, partition_cols)
+    _remove_path(path)
+    temp_path.rename(path)
+
+
+def write_scenario_partition(df: pd.DataFrame, path, scenario, partition_cols=None):
+    """
+    Replace the partition of one scenario in the dataset at path with df,
+    leaving other scenarios as they are
+
+    df must only hold rows of that scenario. If it is empty, an empty
+    partition is written, so the dataset keeps its schema. Columns df has
+    no values for take their type from the other scenarios' partitions.
+    """
+    if partition_cols is None:
+        partition_cols = PARTITION_COLUMNS
+    if not df["Scenario"].eq(scenario).all():
+        raise ValueError(f"Rows of other scenarios in the {scenario} partition")
+
+    partition = f"Scenario={scenario}"
+    schema = _get_dataset_schema(path, exclude=partition)
+    table = _to_dataset_table(df, partition_cols, schema)
+    # written outside the dataset, so readers never see it
+    temp_path = path.with_name(f".{path.name}.{partition}.tmp")
+    _remove_path(temp_path)
+    _write_dataset(table.drop_columns("Scenario"), temp_path, partition_cols[1:])
+
+    migrate_to_scenario_dataset(path)
+    _remove_path(path / partition)
+    temp_path.rename(path / partition)
+
+
+def migrate_to_scenario_dataset(path):
+    """
+    Make path a directory that only holds scenario partitions
+
+    Removes a single-file output from before outputs were partitioned, and
+    the files of an unpartitioned (empty) dataset written by
+    write_partitioned_parquet(). Files already removed (by another process
+    writing another scenario) are skipped. Callers writing scenarios on a
+    worker pool should migrate each dataset once before dispatching them.
+    """
+    if path.is_file():
+        path.unlink(missing_ok=True)
+    path.mkdir(parents=True, exist_ok=True)
+    for stray_file in path.glob("*.parquet"):
+        stray_file.unlink(missing_ok=True)
+
+
+def list_scenario_partitions(path) -> list[str]:
+    """Scenarios with a partition in the dataset at path"""
+    if not path.is_dir():
+        return []
+    return sorted(
+        p.name.split("=", 1)[1]
+        for p in path.iterdir()
+        if p.is_dir() and p.name.startswith("Scenario=")
+    )
+
+
+def remove_scenario_partition(path, scenario):
+    """Remove the partition of one scenario from the dataset at path"""
+    _remove_path(path / f"Scenario={scenario}")
+
+
+def _remove_path(path):
+    """Remove a file or directory, if it exists"""
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def get_partition_columns(path) -> list[str]:
+    """
+    Names of the hive partition levels of a dataset directory, outermost
+    first (empty for a single parquet file)
+
+    Every directory of a level is looked at, since an empty scenario
+    partition has no sub-partitions.
+    """
+    columns = []
+    level_dirs = [path] if path.is_dir() else []
+    while level_dirs:
+        partition_dirs = [
+            p
+            for level in level_dirs
+            for p in level.iterdir()
+            if p.is_dir() and "=" in p.name
+        ]
+        if not partition_dirs:
+            break
+        columns.append(partition_dirs[0].name.split("=", 1)[0])
+        level_dirs = partition_dirs
+    return columns
+
+
+def list_parquet_files(path) -> list:
+    """Every parquet file of a dataset (or the file itself), sorted"""
+    if path.is_dir():
+        return sorted(path.rglob("*.parquet"))
+    return [path]
+
+
+def _open_dataset(path) -> ds.Dataset:
+    partition_cols = get_partition_columns(path)
+    partitioning = None
+    if partition_cols:
+        partitioning = ds.partitioning(
+            pa.schema([(col, pa.string()) for col in partition_cols]), flavor="hive"
+        )
+    return ds.dataset(path, format="parquet", partitioning=partitioning)
+
+
+def read_partitioned_parquet(
+    path, scenarios=None, columns=None, filters=None
+) -> pd.DataFrame:
+    """
+    Read a dataset written by write_partitioned_parquet() (or a single
+    parquet file) to pandas
+
+    scenarios limits the rows (and partitions read) to those scenarios.
+    filters is an optional further pyarrow filter expression.
+    """
+    dataset = _open_dataset(path)
+    expression = filters
+    if scenarios is not None:
+        scenario_filter = ds.field("Scenario").isin(list(scenarios))
+        expression = (
+            scenario_filter if expression is None else expression & scenario_filter
+        )
+    table = dataset.to_table(columns=columns, filter=expression)
+
+    df = table.to_pandas()
+    metadata = dataset.schema.metadata or {}
+    if columns is None and _COLUMNS_METADATA_KEY in metadata:
+        df = df[json.loads(metadata[_COLUMNS_METADATA_KEY])]
+    return df
+
+
+def scan_partitioned_parquet(path) -> pl.LazyFrame:
+    """
+    Lazily scan a dataset written by write_partitioned_parquet() (or a
+    single parquet file) with Polars
+
+    Filters on partition columns are pushed down, so only the matching
+    partitions are read.
+    """
+    partition_cols = get_partition_columns(path)
+    if not partition_cols:
+        return pl.scan_parquet(path)
+    return pl.scan_parquet(
+        path,
+        hive_partitioning=True,
+        hive_schema={col: pl.String for col in partition_cols},
+    )
@@ -12,7 +12,8 @@ from typing import Any
 import pandas as pd
 import polars as pl
 
-_MAPPINGS_FILE = Path(__file__).with_name("value_mappings.json")
+# the display value mappings, also part of the version of packaged outputs
+MAPPINGS_FILE = Path(__file__).with_name("value_mappings.json")
 
 
 @lru_cache(maxsize=1)
@@ -20,7 +21,7 @@ def load_column_value_mappings() -> dict[str, dict[str, str]]:
     """
     Load the JSON-backed mapping config once per process.
     """
-    with _MAPPINGS_FILE.open(encoding="utf-8") as f:
+    with MAPPINGS_FILE.open(encoding="utf-8") as f:
         data = json.load(f)
 
     mappings = data.get("column_value_mappings", {})
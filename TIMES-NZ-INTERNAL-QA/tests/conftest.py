@@ -0,0 +1,9 @@
+"""Test configuration for TIMES-NZ-INTERNAL-QA."""
+
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
@@ -0,0 +1,58 @@
+"""Tests for the scenario-partitioned output datasets."""
+
+import pandas as pd
+import polars as pl
+import pytest
+from times_nz_internal_qa.utilities import parquet_datasets
+
+
+def make_output(scenario, rows=2):
+    """An output frame of one scenario, typed as the processors leave it."""
+    df = pd.DataFrame(
+        {
+            "Scenario": [scenario] * 2,
+            "Variable": ["Production", "Production"],
+            "Unit": ["PJ", "PJ"],
+            "Period": pd.array([2023, 2050], dtype="Int64"),
+            "Value": [1.0, 2.0],
+        }
+    )
+    return df.iloc[:rows]
+
+
+@pytest.mark.parametrize("empty_first", [True, False])
+def test_scenario_with_no_rows_keeps_dataset_readable(tmp_path, empty_first):
+    """An empty scenario partition has the same column types as the others."""
+    path = tmp_path / "dummy_demand.parquet"
+    scenarios = (
+        ["feasible", "infeasible"] if empty_first else ["infeasible", "feasible"]
+    )
+
+    for scenario in scenarios:
+        df = make_output(scenario, rows=0 if scenario == "feasible" else 2)
+        parquet_datasets.write_scenario_partition(df, path, scenario)
+
+    result = parquet_datasets.read_partitioned_parquet(path)
+    pd.testing.assert_frame_equal(result, make_output("infeasible"))
+    scanned = parquet_datasets.scan_partitioned_parquet(path).collect()
+    assert scanned["Scenario"].to_list() == ["infeasible", "infeasible"]
+    assert parquet_datasets.list_scenario_partitions(path) == [
+        "feasible",
+        "infeasible",
+    ]
+
+
+def test_only_scenario_with_no_rows_writes_strings(tmp_path):
+    """With no other partitions, empty object columns are written as strings."""
+    path = tmp_path / "dummy_energy.parquet"
+
+    parquet_datasets.write_scenario_partition(
+        make_output("feasible", rows=0), path, "feasible"
+    )
+
+    result = parquet_datasets.read_partitioned_parquet(path)
+    assert result.empty
+    assert result.columns.tolist() == make_output("feasible").columns.tolist()
+    assert result.dtypes[["Period", "Value"]].tolist() == ["Int64", "float64"]
+    schema = parquet_datasets.scan_partitioned_parquet(path).collect_schema()
+    assert schema["Unit"] == pl.String